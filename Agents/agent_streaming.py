@@ -0,0 +1,124 @@
+"""
+Async Streaming for ADK Runners
+===============================
+Runs an agent with ``Runner.run_async`` in SSE streaming mode and yields its
+text as it arrives, so callers inside an event loop never block it and can
+forward partial output (e.g. to a streaming HTTP response).
+
+Features:
+- Partial text chunks as the model produces them
+- Overall deadline per run (``asyncio.TimeoutError`` when exceeded)
+- Cancellation closes the underlying ADK run
+- No per-event logging
+"""
+
+import asyncio
+import os
+from typing import AsyncIterator, Optional
+
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.runners import Runner
+from google.genai import types
+
+# Seconds an agent run may take before it is cancelled
+AGENT_TIMEOUT_SECONDS = float(os.getenv("AGENT_TIMEOUT_SECONDS", "120"))
+
+STREAMING_RUN_CONFIG = RunConfig(streaming_mode=StreamingMode.SSE)
+
+
+def _event_text(event) -> str:
+    """Text carried by an event (empty for tool calls and state updates)."""
+    if not event.content or not event.content.parts:
+        return ""
+    return "".join(part.text for part in event.content.parts if part.text)
+
+
+async def _next_event(events, deadline: float):
+    """
+    Await the next event before ``deadline``.
+
+    The timer only runs while waiting on the agent, never while the caller
+    handles a chunk, and the ADK generator stays in the caller's task.
+    """
+    if deadline <= asyncio.get_running_loop().time():
+        raise asyncio.TimeoutError("Agent run timed out")
+    timeout = asyncio.timeout_at(deadline)
+    try:
+        async with timeout:
+            return await events.__anext__()
+    except TimeoutError:
+        if timeout.expired():
+            raise asyncio.TimeoutError("Agent run timed out") from None
+        raise
+
+
+async def stream_agent_text(
+    runner: Runner,
+    user_id: str,
+    session_id: str,
+    message: str,
+    timeout: Optional[float] = None
+) -> AsyncIterator[str]:
+    """
+    Run an agent and yield its text as it streams in.
+
+    Partial chunks are yielded as they arrive; the aggregated event that closes
+    each model turn is skipped unless the turn produced no partial chunks.
+    Separate turns are separated by a blank line.
+
+    Args:
+        runner: Runner for the agent
+        user_id: ADK user ID
+        session_id: Existing session to run in
+        message: User message text
+        timeout: Seconds for the whole run (defaults to AGENT_TIMEOUT_SECONDS)
+
+    Raises:
+        asyncio.TimeoutError: If the run does not finish in time
+    """
+    deadline = asyncio.get_running_loop().time() + (timeout or AGENT_TIMEOUT_SECONDS)
+    events = runner.run_async(
+        user_id=user_id,
+        session_id=session_id,
+        new_message=types.Content(role="user", parts=[types.Part(text=message)]),
+        run_config=STREAMING_RUN_CONFIG
+    )
+    streamed_turn = False
+    wrote_text = False
+    try:
+        while True:
+            try:
+                event = await _next_event(events, deadline)
+            except StopAsyncIteration:
+                return
+            text = _event_text(event)
+            if event.partial:
+                if text:
+                    if wrote_text and not streamed_turn:
+                        yield "\n\n"
+                    streamed_turn = wrote_text = True
+                    yield text
+                continue
+            # Non-partial event: closes the current turn
+            if text and not streamed_turn:
+                if wrote_text:
+                    yield "\n\n"
+                wrote_text = True
+                yield text
+            streamed_turn = False
+    finally:
+        await events.aclose()
+
+
+async def collect_agent_text(
+    runner: Runner,
+    user_id: str,
+    session_id: str,
+    message: str,
+    timeout: Optional[float] = None
+) -> str:
+    """Run an agent to completion and return all of its text."""
+    chunks = []
+    async for chunk in stream_agent_text(runner, user_id, session_id, message, timeout):
+        chunks.append(chunk)
+    return "".join(chunks)
@@ -0,0 +1,115 @@
+"""
+Cache Entry Encoding Benchmark
+==============================
+Compares bytes per entry and set/get latency of cached agent reports stored
+the old way (JSON text: minified in SQLite, ``indent=2`` in GhostWriterBot's
+files) against the compact encoding of ``cache_codec``.
+
+Usage:
+    python bench_cache_codec.py              # default: 200 entries, 40 files per report
+    python bench_cache_codec.py <entries> <files>
+"""
+
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+import cache_codec
+from bench_report_encoder import build_runtime_report, build_security_report
+from cache_backends import SQLiteBackend
+
+
+class JsonTextSQLiteBackend(SQLiteBackend):
+    """SQLite backend storing responses as JSON text, as before cache_codec."""
+
+    def _row(self, key, entry):
+        payload = json.dumps(entry['response'])
+        return (
+            key, entry['agent_name'], payload, entry['cached_at'], entry['expiry_time'],
+            int(bool(entry.get('negative'))), len(payload.encode('utf-8')), entry['cached_at'],
+            entry.get('fresh_until')
+        )
+
+
+def measure_sqlite(label: str, backend_cls, report: dict, entries: int) -> dict:
+    backend = backend_cls(Path(tempfile.mkdtemp(prefix="bench_cache_")) / "cache.db")
+    now = time.time()
+    start = time.perf_counter()
+    for n in range(entries):
+        backend.put(f"key{n}", {
+            'agent_name': report['agent'],
+            'response': report,
+            'cached_at': now,
+            'expiry_time': now + 3600,
+            'negative': False
+        })
+    set_ms = (time.perf_counter() - start) * 1000 / entries
+    start = time.perf_counter()
+    for n in range(entries):
+        backend.get(f"key{n}")
+    get_ms = (time.perf_counter() - start) * 1000 / entries
+    stored_bytes = backend.usage()[1]
+    backend.close()
+    return {"label": label, "bytes": stored_bytes // entries, "set_ms": set_ms, "get_ms": get_ms}
+
+
+def measure_files(label: str, encode, decode, report: dict, entries: int) -> dict:
+    cache_dir = Path(tempfile.mkdtemp(prefix="bench_cache_"))
+    cache_data = {"agent_name": report['agent'], "timestamp": "2026-01-01T00:00:00",
+                  "response": report, "negative": False}
+    start = time.perf_counter()
+    for n in range(entries):
+        with open(cache_dir / f"key{n}.json", "wb") as f:
+            f.write(encode(cache_data))
+    set_ms = (time.perf_counter() - start) * 1000 / entries
+    start = time.perf_counter()
+    for n in range(entries):
+        with open(cache_dir / f"key{n}.json", "rb") as f:
+            decode(f.read())
+    get_ms = (time.perf_counter() - start) * 1000 / entries
+    stored_bytes = sum(p.stat().st_size for p in cache_dir.iterdir())
+    return {"label": label, "bytes": stored_bytes // entries, "set_ms": set_ms, "get_ms": get_ms}
+
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    files = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+
+    reports = {
+        "security": build_security_report(files, 6),
+        "runtime": build_runtime_report(files * 2),
+        "small": build_runtime_report(2),
+    }
+
+    print("\n📊 Cache Entry Encoding Benchmark")
+    print("=" * 78)
+    print(f"Entries: {entries}  Files per report: {files}  "
+          f"Compression: {'zstd' if cache_codec.ZSTD_AVAILABLE else 'zlib'} "
+          f"above {cache_codec.COMPRESS_MIN_BYTES} bytes")
+    print(f"{'report':<10} {'storage':<16} {'bytes/entry':>12} {'set ms':>9} {'get ms':>9}")
+
+    for name, report in reports.items():
+        rows = [
+            measure_sqlite("sqlite json", JsonTextSQLiteBackend, report, entries),
+            measure_sqlite("sqlite codec", SQLiteBackend, report, entries),
+            measure_files(
+                "files indent=2",
+                lambda d: json.dumps(d, indent=2).encode("utf-8"),
+                lambda b: json.loads(b.decode("utf-8")),
+                report, entries
+            ),
+            measure_files("files codec", cache_codec.encode, cache_codec.decode, report, entries),
+        ]
+        for row in rows:
+            print(f"{name:<10} {row['label']:<16} {row['bytes']:>12} "
+                  f"{row['set_ms']:>9.3f} {row['get_ms']:>9.3f}")
+        print("-" * 78)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Report Encoder Benchmark
+========================
+Compares synthesis-prompt reports encoded as ``json.dumps(indent=2)`` (what
+the prompts used before), as minified JSON of the same report, and with
+``report_encoder.encode_report``.
+
+The sizes are estimated prompt tokens for the report text only. The compact
+form is lossy by design (top-K groups, a few samples per group), so the
+``snippets`` column shows how many of the report's distinct code snippets
+each encoding still carries.
+
+With ``--llm`` (needs GROQ_API_KEY and network access) each encoding is also
+sent to Groq in a Ghostwriter-style prompt, and the median round-trip
+latency and the provider-reported prompt tokens are printed.
+
+Usage:
+    python bench_report_encoder.py              # default: 40 files, 6 findings each
+    python bench_report_encoder.py <files> <findings_per_file> [--llm]
+"""
+
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from report_encoder import encode_report, estimate_tokens
+
+LLM_MODEL = "llama-3.3-70b-versatile"
+LLM_ROUNDS = 3
+
+
+RECOMMENDATIONS = {
+    "API Key": "Remove hardcoded secrets and use environment variables or secret management systems",
+    "F-string in SQL": "Use parameterized queries or ORM to prevent SQL injection",
+    "shell=True": "Avoid shell=True - use shell=False with list arguments",
+}
+
+
+def build_security_report(files: int, per_file: int) -> dict:
+    """Build a scan-shaped report with the repetition real diffs produce."""
+    secrets, sql, antipatterns = [], [], []
+    for f in range(files):
+        for i in range(per_file):
+            line = f * 100 + i
+            path = f"app/module_{f:02d}.py"
+            secrets.append({
+                "type": "Hardcoded Secret",
+                "secret_type": "API Key",
+                "severity": "CRITICAL",
+                "file": path,
+                "line": line,
+                "code_snippet": f'+    api_key = "sk_live_{f:04d}{i:02d}abcdefghijklmnopqrstuvwxyz"',
+                "recommendation": RECOMMENDATIONS["API Key"],
+            })
+            sql.append({
+                "type": "SQL Injection Vulnerability",
+                "vulnerability_type": "F-string in SQL",
+                "severity": "HIGH",
+                "file": path,
+                "line": line + 1,
+                "code_snippet": f'+    cursor.execute(f"SELECT * FROM t{f}_{i} WHERE id = {{user_id}}")',
+                "recommendation": RECOMMENDATIONS["F-string in SQL"],
+            })
+            # Scanners re-report the same line once per matching pattern
+            sql.append(dict(sql[-1]))
+            antipatterns.append({
+                "type": "Security Anti-Pattern",
+                "pattern_name": "shell=True",
+                "severity": "HIGH",
+                "file": path,
+                "line": line + 2,
+                "code_snippet": f"+    subprocess.run(cmd_{i}, shell=True)",
+                "recommendation": RECOMMENDATIONS["shell=True"],
+            })
+
+    scans = [
+        {"scan_type": "hardcoded_secrets", "issues": secrets},
+        {"scan_type": "sql_injection", "issues": sql},
+        {"scan_type": "security_antipatterns", "issues": antipatterns},
+    ]
+    for scan in scans:
+        scan["status"] = "failed"
+        scan["total_issues"] = len(scan["issues"])
+
+    return {
+        "agent": "Security Auditor Agent",
+        "status": "failed",
+        "total_issues": sum(s["total_issues"] for s in scans),
+        "scans": scans,
+    }
+
+
+def build_runtime_report(issues: int) -> dict:
+    return {
+        "agent": "Runtime Validator Agent",
+        "status": "failed",
+        "total_issues": issues,
+        "issues": [
+            {
+                "type": "Undefined Variable",
+                "severity": "HIGH",
+                "description": f"Variable 'result_{i % 5}' is used before assignment",
+                "location": f"Line {i * 7}",
+            }
+            for i in range(issues)
+        ],
+    }
+
+
+ENCODINGS = {
+    "json": lambda r: json.dumps(r, indent=2),
+    "json-min": lambda r: json.dumps(r, separators=(",", ":")),
+    "compact": encode_report,
+}
+
+
+def _snippets(report: dict) -> set:
+    """Distinct code snippets / descriptions in a report, without the diff ``+`` prefix."""
+    found = set()
+    for scan in report.get("scans") or []:
+        found.update(i["code_snippet"].lstrip("+ ") for i in scan["issues"] if i.get("code_snippet"))
+    found.update(i["description"] for i in report.get("issues") or [] if i.get("description"))
+    return found
+
+
+def _carried(snippet: str, text: str) -> bool:
+    """Whether ``text`` contains the start of ``snippet`` (plain or JSON-escaped)."""
+    return snippet[:40] in text or json.dumps(snippet)[1:41] in text
+
+
+def measure(label: str, encode, report: dict, rounds: int = 50) -> dict:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        text = encode(report)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / rounds
+    snippets = _snippets(report)
+    return {
+        "label": label,
+        "text": text,
+        "chars": len(text),
+        "tokens": estimate_tokens(text),
+        "encode_ms": elapsed_ms,
+        "snippets": f"{sum(1 for s in snippets if _carried(s, text))}/{len(snippets)}",
+    }
+
+
+def measure_llm(client, security_text: str, runtime_text: str) -> dict:
+    """Median Groq round trip for a Ghostwriter-style prompt embedding both reports."""
+    prompt = (
+        "Write a short GitHub PR review comment from these reports.\n\n"
+        f"Security Report:\n{security_text}\n\nRuntime Report:\n{runtime_text}\n"
+    )
+    latencies, prompt_tokens = [], 0
+    for _ in range(LLM_ROUNDS):
+        start = time.perf_counter()
+        response = client.chat.completions.create(
+            model=LLM_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.0,
+            max_tokens=300,
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        prompt_tokens = response.usage.prompt_tokens
+    return {"latency_ms": statistics.median(latencies), "prompt_tokens": prompt_tokens}
+
+
+def main():
+    args = [a for a in sys.argv[1:] if a != "--llm"]
+    files = int(args[0]) if len(args) > 0 else 40
+    per_file = int(args[1]) if len(args) > 1 else 6
+
+    reports = {
+        "security": build_security_report(files, per_file),
+        "runtime": build_runtime_report(files * 2),
+    }
+
+    print("\n📊 Report Encoder Benchmark")
+    print("=" * 78)
+    print(f"Files: {files}  Findings per file: {per_file}")
+    print(f"{'report':<10} {'encoding':<10} {'chars':>9} {'~tokens':>9} {'encode ms':>10} {'snippets':>10}")
+
+    texts = {label: {} for label in ENCODINGS}
+    totals = {label: 0 for label in ENCODINGS}
+    for name, report in reports.items():
+        for label, encode in ENCODINGS.items():
+            row = measure(label, encode, report)
+            texts[label][name] = row["text"]
+            totals[label] += row["tokens"]
+            print(
+                f"{name:<10} {row['label']:<10} {row['chars']:>9} "
+                f"{row['tokens']:>9} {row['encode_ms']:>10.3f} {row['snippets']:>10}"
+            )
+
+    print("-" * 78)
+    print("Total ~tokens: " + " ".join(f"{label}={n}" for label, n in totals.items()))
+    print(f"compact vs json-min: {totals['json-min'] / max(totals['compact'], 1):.1f}x smaller")
+
+    if "--llm" in sys.argv:
+        api_key = os.getenv("GROQ_API_KEY")
+        if not api_key:
+            print("\n--llm needs GROQ_API_KEY; skipping the latency measurement")
+            return
+        from groq import Groq
+
+        client = Groq(api_key=api_key)
+        print(f"\n⏱️  Groq {LLM_MODEL}, median of {LLM_ROUNDS} calls (300 output tokens max)")
+        for label in ENCODINGS:
+            result = measure_llm(client, texts[label]["security"], texts[label]["runtime"])
+            print(f"{label:<10} prompt_tokens={result['prompt_tokens']:>7} "
+                  f"latency_ms={result['latency_ms']:>9.0f}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,937 @@
+"""
+Cache Storage Backends
+======================
+Storage for CacheManager entries, behind one small interface so the manager's
+TTL and negative-caching rules do not depend on where entries live.
+
+Backends:
+- SQLiteBackend: one WAL-mode database, indexed by key, agent, expiry,
+  size and access; every write is one atomic transaction. Point
+  CACHE_SQLITE_PATH at a volume shared by several processes on one host to
+  share the cache between them
+- RedisBackend: entries in a Redis-protocol server (CACHE_REDIS_URL),
+  shared by every replica and both services
+- JsonFileBackend: the original layout, one JSON file per entry plus a
+  ``_metadata.json`` index rewritten on every change
+
+SQLite stores responses in the compact binary encoding of cache_codec.py
+(rows written as JSON text by older versions still read). JSON files are
+written minified.
+
+An entry is a dict with ``agent_name``, ``response``, ``cached_at``,
+``expiry_time`` and ``negative``, and optionally ``fresh_until`` (when an
+entry kept for stale-while-revalidate turns stale; ``expiry_time`` is then
+the end of its grace window). Backends also track each entry's size,
+last access time and hit count for size-bounded LRU/LFU eviction.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import cache_codec
+from resp_client import RespClient
+
+# Names CACHE_BACKEND accepts in both services; each service picks its own default
+BACKEND_NAMES = ("sqlite", "redis", "json")
+# SQLite database; defaults to cache.db in the cache directory
+CACHE_SQLITE_PATH = os.getenv("CACHE_SQLITE_PATH")
+# Redis-protocol server and the prefix of every key the cache writes there
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+CACHE_REDIS_PREFIX = os.getenv("CACHE_REDIS_PREFIX", "agent-cache")
+
+METADATA_FILE = "_metadata.json"
+SQLITE_FILE = "cache.db"
+
+EVICTION_POLICIES = ("lru", "lfu")
+
+
+class CacheBackend:
+    """
+    Interface for cache storage. Expiry is decided by the caller; backends
+    only store, look up and delete entries.
+    """
+
+    name = "base"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Entry stored under ``key``, expired or not."""
+        raise NotImplementedError
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        """Insert or replace an entry."""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> bool:
+        """Remove an entry; returns whether it existed."""
+        raise NotImplementedError
+
+    def clear(self, agent_name: Optional[str] = None) -> int:
+        """Remove all entries, or those of one agent; returns the count."""
+        raise NotImplementedError
+
+    def clear_expired(self, now: float) -> int:
+        """Remove entries whose expiry time has passed; returns the count."""
+        raise NotImplementedError
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        """Counts: total, expired, negative (unexpired), bytes, evictions and entries by agent."""
+        raise NotImplementedError
+
+    def usage(self) -> Tuple[int, int]:
+        """(entries, bytes) stored, without scanning the entries."""
+        raise NotImplementedError
+
+    def touch(self, hits: Dict[str, Tuple[int, float]]) -> None:
+        """Record reads: key -> (read count, last read time)."""
+        raise NotImplementedError
+
+    def evict(
+        self, max_entries: int, max_bytes: int, policy: str, limit: int, now: float,
+        keep: Optional[str] = None
+    ) -> int:
+        """
+        Remove up to ``limit`` entries until at most ``max_entries`` and
+        ``max_bytes`` are stored: expired entries first, then least recently
+        used (``lru``) or least frequently used (``lfu``) ones. ``keep``
+        (the entry just written) is never chosen.
+
+        Returns:
+            Number of entries evicted
+        """
+        raise NotImplementedError
+
+    def sweep_expired(self, now: float, limit: int) -> Tuple[int, int]:
+        """Remove up to ``limit`` expired entries; returns (count, bytes)."""
+        raise NotImplementedError
+
+    def compact(self, max_pages: int) -> int:
+        """Give free space back to the filesystem within a budget; returns bytes."""
+        return 0
+
+    def verify(self) -> bool:
+        """Check storage integrity, repairing what can be repaired; True if it was clean."""
+        return True
+
+    def claim(self, name: str, seconds: float) -> bool:
+        """
+        Take a lease on ``name`` for ``seconds``, shared by every process
+        using this storage; False while another holder has it. Storage that
+        is private to one process needs no lease.
+        """
+        return True
+
+    def release(self, name: str) -> None:
+        """Give up a lease taken with ``claim`` before it runs out."""
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Entries in one SQLite database (WAL mode). Lookups use the primary key,
+    clears and sweeps use the agent and expiry indexes, eviction the access
+    indexes, and size checks read trigger-maintained totals.
+    """
+
+    name = "sqlite"
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS entries (
+        key TEXT PRIMARY KEY,
+        agent_name TEXT NOT NULL,
+        response BLOB NOT NULL,
+        cached_at REAL NOT NULL,
+        expiry_time REAL NOT NULL,
+        negative INTEGER NOT NULL DEFAULT 0,
+        size INTEGER NOT NULL,
+        last_access REAL NOT NULL DEFAULT 0,
+        hits INTEGER NOT NULL DEFAULT 0,
+        fresh_until REAL
+    );
+    """
+
+    # Running totals kept by triggers, so size checks never scan the table
+    _INDEXES_AND_TOTALS = """
+    CREATE INDEX IF NOT EXISTS entries_agent ON entries (agent_name);
+    CREATE INDEX IF NOT EXISTS entries_expiry ON entries (expiry_time);
+    CREATE INDEX IF NOT EXISTS entries_size ON entries (size);
+    CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_access);
+    CREATE INDEX IF NOT EXISTS entries_lfu ON entries (hits, last_access);
+    CREATE TABLE IF NOT EXISTS totals (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        entries INTEGER NOT NULL,
+        bytes INTEGER NOT NULL,
+        evictions INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO totals
+        SELECT 0, COUNT(*), COALESCE(SUM(size), 0), 0 FROM entries;
+    CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+        UPDATE totals SET entries = entries + 1, bytes = bytes + NEW.size WHERE id = 0;
+    END;
+    CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+        UPDATE totals SET entries = entries - 1, bytes = bytes - OLD.size WHERE id = 0;
+    END;
+    CREATE TRIGGER IF NOT EXISTS entries_resize AFTER UPDATE OF size ON entries BEGIN
+        UPDATE totals SET bytes = bytes - OLD.size + NEW.size WHERE id = 0;
+    END;
+    CREATE TABLE IF NOT EXISTS claims (
+        name TEXT PRIMARY KEY,
+        held_until REAL NOT NULL
+    );
+    """
+
+    # Insert, or overwrite in place (an UPDATE, so the size trigger fires)
+    _UPSERT = (
+        "INSERT INTO entries "
+        "(key, agent_name, response, cached_at, expiry_time, negative, size, last_access, "
+        "fresh_until) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET agent_name = excluded.agent_name, "
+        "response = excluded.response, cached_at = excluded.cached_at, "
+        "expiry_time = excluded.expiry_time, negative = excluded.negative, "
+        "size = excluded.size, last_access = excluded.last_access, "
+        "fresh_until = excluded.fresh_until"
+    )
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Database file (created if missing)
+        """
+        self.path = str(path)
+        # Writes share one connection; reads use one per thread, which WAL
+        # mode lets run alongside each other and alongside a write
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._local = threading.local()
+        self._readers = []
+        with self._lock, self._conn:
+            # Only takes effect on a new database; lets compact() free pages in small steps
+            self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self._SCHEMA)
+            # Databases created before access tracking
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(entries)")}
+            if "last_access" not in columns:
+                self._conn.execute(
+                    "ALTER TABLE entries ADD COLUMN last_access REAL NOT NULL DEFAULT 0"
+                )
+                self._conn.execute("UPDATE entries SET last_access = cached_at")
+            if "hits" not in columns:
+                self._conn.execute("ALTER TABLE entries ADD COLUMN hits INTEGER NOT NULL DEFAULT 0")
+            if "fresh_until" not in columns:
+                self._conn.execute("ALTER TABLE entries ADD COLUMN fresh_until REAL")
+            self._conn.executescript(self._INDEXES_AND_TOTALS)
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            self._local.conn = conn
+            with self._lock:
+                self._readers.append(conn)
+        return conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._reader().execute(
+            "SELECT agent_name, response, cached_at, expiry_time, negative, fresh_until "
+            "FROM entries WHERE key = ?",
+            (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            response = cache_codec.decode(row[1])
+        except ValueError:
+            return None
+        entry = {
+            'agent_name': row[0],
+            'response': response,
+            'cached_at': row[2],
+            'expiry_time': row[3],
+            'negative': bool(row[4])
+        }
+        if row[5] is not None:
+            entry['fresh_until'] = row[5]
+        return entry
+
+    def _row(self, key: str, entry: Dict[str, Any]) -> tuple:
+        payload = cache_codec.encode(entry['response'])
+        return (
+            key,
+            entry['agent_name'],
+            payload,
+            entry['cached_at'],
+            entry['expiry_time'],
+            int(bool(entry.get('negative'))),
+            len(payload),
+            entry['cached_at'],
+            entry.get('fresh_until')
+        )
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        row = self._row(key, entry)
+        with self._lock, self._conn:
+            self._conn.execute(self._UPSERT, row)
+
+    def delete(self, key: str) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        return cursor.rowcount > 0
+
+    def clear(self, agent_name: Optional[str] = None) -> int:
+        with self._lock, self._conn:
+            if agent_name is None:
+                cursor = self._conn.execute("DELETE FROM entries")
+            else:
+                cursor = self._conn.execute(
+                    "DELETE FROM entries WHERE agent_name = ?", (agent_name,)
+                )
+        return cursor.rowcount
+
+    def clear_expired(self, now: float) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM entries WHERE expiry_time < ?", (now,))
+        return cursor.rowcount
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        with self._lock:
+            total, expired, negative, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), "
+                "COALESCE(SUM(expiry_time < ?), 0), "
+                "COALESCE(SUM(negative AND expiry_time >= ?), 0), "
+                "COALESCE(SUM(size), 0) FROM entries",
+                (now, now)
+            ).fetchone()
+            by_agent = dict(self._conn.execute(
+                "SELECT agent_name, COUNT(*) FROM entries GROUP BY agent_name"
+            ).fetchall())
+            evictions = self._conn.execute(
+                "SELECT evictions FROM totals WHERE id = 0"
+            ).fetchone()[0]
+        return {
+            'total': total,
+            'expired': expired,
+            'negative': negative,
+            'total_bytes': total_bytes,
+            'evictions': evictions,
+            'by_agent': by_agent
+        }
+
+    def usage(self) -> Tuple[int, int]:
+        with self._lock:
+            return self._usage()
+
+    def _usage(self) -> Tuple[int, int]:
+        return self._conn.execute("SELECT entries, bytes FROM totals WHERE id = 0").fetchone()
+
+    def touch(self, hits: Dict[str, Tuple[int, float]]) -> None:
+        if not hits:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE entries SET hits = hits + ?, last_access = MAX(last_access, ?) WHERE key = ?",
+                [(count, last, key) for key, (count, last) in hits.items()]
+            )
+
+    def evict(
+        self, max_entries: int, max_bytes: int, policy: str, limit: int, now: float,
+        keep: Optional[str] = None
+    ) -> int:
+        order = "hits, last_access" if policy == "lfu" else "last_access"
+        with self._lock, self._conn:
+            entries, total_bytes = self._usage()
+            if entries <= max_entries and total_bytes <= max_bytes:
+                return 0
+            # Both candidate lists come straight off an index
+            candidates = self._conn.execute(
+                "SELECT key, size FROM entries WHERE expiry_time < ? ORDER BY expiry_time LIMIT ?",
+                (now, limit)
+            ).fetchall() + self._conn.execute(
+                f"SELECT key, size FROM entries ORDER BY {order} LIMIT ?", (limit + 1,)
+            ).fetchall()
+
+            victims = []
+            for key, size in candidates:
+                if len(victims) >= limit or (entries <= max_entries and total_bytes <= max_bytes):
+                    break
+                if key == keep or key in victims:
+                    continue
+                victims.append(key)
+                entries -= 1
+                total_bytes -= size
+
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in victims])
+            self._conn.execute(
+                "UPDATE totals SET evictions = evictions + ? WHERE id = 0", (len(victims),)
+            )
+        return len(victims)
+
+    def sweep_expired(self, now: float, limit: int) -> Tuple[int, int]:
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT key, size FROM entries WHERE expiry_time < ? ORDER BY expiry_time LIMIT ?",
+                (now, limit)
+            ).fetchall()
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in rows])
+        return len(rows), sum(size for _, size in rows)
+
+    def compact(self, max_pages: int) -> int:
+        with self._lock:
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+            free_before = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if self._conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                self._conn.execute(f"PRAGMA incremental_vacuum({int(max_pages)})").fetchall()
+            free_after = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        return (free_before - free_after) * page_size
+
+    def verify(self) -> bool:
+        with self._lock, self._conn:
+            clean = self._conn.execute("PRAGMA quick_check").fetchone()[0] == "ok"
+            actual = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            if tuple(actual) != tuple(self._usage()):
+                # Totals drifted (e.g. rows edited by hand): recount
+                self._conn.execute(
+                    "UPDATE totals SET entries = ?, bytes = ? WHERE id = 0", tuple(actual)
+                )
+                clean = False
+        return clean
+
+    def migrate_json(self, cache_dir: Path) -> int:
+        """
+        One-time import of a JsonFileBackend directory.
+
+        Entry files describe themselves, so a corrupt ``_metadata.json`` loses
+        nothing. Unexpired entries are inserted in one transaction; the
+        entry files are removed and the index renamed to ``*.migrated``.
+
+        Returns:
+            Number of entries imported
+        """
+        cache_dir = Path(cache_dir)
+        entry_files = [p for p in cache_dir.glob("*.json") if p.name != METADATA_FILE]
+        metadata_file = cache_dir / METADATA_FILE
+        if not entry_files and not metadata_file.exists():
+            return 0
+
+        now = time.time()
+        rows = []
+        for path in entry_files:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('expiry_time', 0) >= now:
+                    rows.append(self._row(path.stem, {
+                        'agent_name': data.get('agent_name', 'unknown'),
+                        'response': data.get('response'),
+                        'cached_at': data.get('cached_at', now),
+                        'expiry_time': data['expiry_time'],
+                        'negative': data.get('negative', False),
+                        'fresh_until': data.get('fresh_until')
+                    }))
+            except (json.JSONDecodeError, IOError, KeyError, TypeError) as e:
+                print(f"Warning: Skipping unreadable cache file {path.name}: {e}")
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO entries "
+                "(key, agent_name, response, cached_at, expiry_time, negative, size, last_access, "
+                "fresh_until) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+        for path in entry_files:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        if metadata_file.exists():
+            metadata_file.replace(cache_dir / (METADATA_FILE + ".migrated"))
+        print(f"INFO: Migrated {len(rows)} cache entries from JSON files to {self.path}")
+        return len(rows)
+
+    def claim(self, name: str, seconds: float) -> bool:
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO claims (name, held_until) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET held_until = excluded.held_until "
+                "WHERE claims.held_until < ?",
+                (name, now + seconds, now),
+            )
+        return cursor.rowcount == 1
+
+    def release(self, name: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM claims WHERE name = ?", (name,))
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers = []
+            self._conn.close()
+
+
+class RedisBackend(CacheBackend):
+    """
+    Entries in a Redis-protocol server, shared by every process using the
+    same URL and prefix. Keys:
+
+    - ``{prefix}:e:{key}``: the encoded entry, expiring with it (PX)
+    - ``{prefix}:idx``: hash of key -> [agent, size, expiry, negative]
+    - ``{prefix}:exp``: sorted set of keys by expiry time, for sweeps and
+      eviction without reading the whole index
+    - ``{prefix}:neg``: sorted set of negative entries by expiry time
+    - ``{prefix}:agents``: hash of entry counts per agent
+    - ``{prefix}:totals``: hash of stored ``bytes`` and ``evictions``
+    - ``{prefix}:claim:{name}``: short leases (SET NX PX), see ``claim``
+
+    The server drops expired entries on its own; the sweep prunes their
+    index records. Reads are not tracked, so eviction removes expired
+    entries and then the ones closest to expiry (the oldest writes). For
+    true LRU/LFU, also give the server a ``maxmemory-policy``. Only
+    ``clear`` and ``verify`` read the whole index.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "agent-cache", client: Optional[RespClient] = None):
+        """
+        Args:
+            url: Server URL (redis:// or rediss://)
+            prefix: Namespace for this cache's keys
+            client: Existing client (one is created from ``url`` otherwise)
+        """
+        self.url = url
+        self.prefix = prefix
+        self.client = client or RespClient(url)
+        self.index_key = f"{prefix}:idx"
+        self.expiry_key = f"{prefix}:exp"
+        self.negative_key = f"{prefix}:neg"
+        self.agents_key = f"{prefix}:agents"
+        self.totals_key = f"{prefix}:totals"
+
+    def _entry_key(self, key: str) -> str:
+        return f"{self.prefix}:e:{key}"
+
+    def _index(self) -> Dict[str, list]:
+        flat = self.client.execute("HGETALL", self.index_key)
+        return {
+            flat[i].decode("utf-8"): json.loads(flat[i + 1])
+            for i in range(0, len(flat), 2)
+        }
+
+    def _records(self, keys: List[str]) -> Dict[str, Optional[list]]:
+        """Index records for ``keys`` (None where the record is missing)."""
+        if not keys:
+            return {}
+        values = self.client.execute("HMGET", self.index_key, *keys)
+        return {
+            key: json.loads(value) if value is not None else None
+            for key, value in zip(keys, values)
+        }
+
+    def _earliest(self, max_expiry: str, limit: int) -> List[str]:
+        """Keys with the nearest expiry up to ``max_expiry``, oldest first."""
+        keys = self.client.execute(
+            "ZRANGEBYSCORE", self.expiry_key, "-inf", max_expiry, "LIMIT", 0, limit
+        )
+        return [key.decode("utf-8") for key in keys]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        blob = self.client.execute("GET", self._entry_key(key))
+        if blob is None:
+            return None
+        try:
+            return cache_codec.decode(blob)
+        except ValueError:
+            return None
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        blob = cache_codec.encode(entry)
+        agent_name = entry['agent_name']
+        ttl_ms = max(1, int((entry['expiry_time'] - time.time()) * 1000))
+        negative = bool(entry.get('negative'))
+        record = cache_codec.dumps([agent_name, len(blob), entry['expiry_time'], negative])
+        previous = self.client.execute("HGET", self.index_key, key)
+        previous = json.loads(previous) if previous else None
+        commands = [
+            ("MULTI",),
+            ("SET", self._entry_key(key), blob, "PX", ttl_ms),
+            ("HSET", self.index_key, key, record),
+            ("HINCRBY", self.totals_key, "bytes", len(blob) - (previous[1] if previous else 0)),
+            ("ZADD", self.expiry_key, repr(entry['expiry_time']), key),
+            ("ZADD", self.negative_key, repr(entry['expiry_time']), key)
+            if negative else ("ZREM", self.negative_key, key),
+        ]
+        if previous is None or previous[0] != agent_name:
+            commands.append(("HINCRBY", self.agents_key, agent_name, 1))
+            if previous is not None:
+                commands.append(("HINCRBY", self.agents_key, previous[0], -1))
+        self.client.pipeline(commands + [("EXEC",)])
+
+    def _remove(self, records: Dict[str, Optional[list]], evicted: bool = False) -> Tuple[int, int]:
+        """Remove entries given their index records; returns (count, bytes)."""
+        if not records:
+            return 0, 0
+        freed = sum(record[1] for record in records.values() if record)
+        per_agent: Dict[str, int] = {}
+        for record in records.values():
+            if record:
+                per_agent[record[0]] = per_agent.get(record[0], 0) + 1
+        commands = [
+            ("MULTI",),
+            ("DEL", *[self._entry_key(key) for key in records]),
+            ("HDEL", self.index_key, *records),
+            ("ZREM", self.expiry_key, *records),
+            ("ZREM", self.negative_key, *records),
+            ("HINCRBY", self.totals_key, "bytes", -freed),
+        ]
+        commands += [
+            ("HINCRBY", self.agents_key, agent_name, -count)
+            for agent_name, count in per_agent.items()
+        ]
+        if evicted:
+            commands.append(("HINCRBY", self.totals_key, "evictions", len(records)))
+        self.client.pipeline(commands + [("EXEC",)])
+        return len(records), freed
+
+    def delete(self, key: str) -> bool:
+        previous = self.client.execute("HGET", self.index_key, key)
+        if previous is None:
+            return bool(self.client.execute("DEL", self._entry_key(key)))
+        self._remove({key: json.loads(previous)})
+        return True
+
+    def clear(self, agent_name: Optional[str] = None) -> int:
+        return self._remove({
+            key: record for key, record in self._index().items()
+            if agent_name is None or record[0] == agent_name
+        })[0]
+
+    def clear_expired(self, now: float) -> int:
+        removed = 0
+        while True:
+            count, _ = self.sweep_expired(now, 1000)
+            removed += count
+            if count < 1000:
+                return removed
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        total, expired, negative, totals, agents = self.client.pipeline([
+            ("HLEN", self.index_key),
+            ("ZCOUNT", self.expiry_key, "-inf", f"({now!r}"),
+            ("ZCOUNT", self.negative_key, repr(now), "+inf"),
+            ("HMGET", self.totals_key, "bytes", "evictions"),
+            ("HGETALL", self.agents_key),
+        ])
+        by_agent = {
+            agents[i].decode("utf-8"): int(agents[i + 1])
+            for i in range(0, len(agents), 2) if int(agents[i + 1]) > 0
+        }
+        return {
+            'total': total,
+            'expired': expired,
+            'negative': negative,
+            'total_bytes': int(totals[0] or 0),
+            'evictions': int(totals[1] or 0),
+            'by_agent': by_agent
+        }
+
+    def usage(self) -> Tuple[int, int]:
+        entries, stored_bytes = self.client.pipeline([
+            ("HLEN", self.index_key),
+            ("HGET", self.totals_key, "bytes"),
+        ])
+        return entries, int(stored_bytes or 0)
+
+    def touch(self, hits: Dict[str, Tuple[int, float]]) -> None:
+        # Reads are not recorded: one more round trip per hit would cost
+        # more than the server's own maxmemory LRU/LFU
+        pass
+
+    def evict(
+        self, max_entries: int, max_bytes: int, policy: str, limit: int, now: float,
+        keep: Optional[str] = None
+    ) -> int:
+        entries, total_bytes = self.usage()
+        if entries <= max_entries and total_bytes <= max_bytes:
+            return 0
+        # Expired entries sort first, then the ones closest to expiry
+        candidates = [key for key in self._earliest("+inf", limit + 1) if key != keep]
+        victims = {}
+        for key, record in self._records(candidates[:limit]).items():
+            if entries <= max_entries and total_bytes <= max_bytes:
+                break
+            victims[key] = record
+            entries -= 1
+            total_bytes -= record[1] if record else 0
+        return self._remove(victims, evicted=True)[0]
+
+    def sweep_expired(self, now: float, limit: int) -> Tuple[int, int]:
+        return self._remove(self._records(self._earliest(f"({now!r}", limit)))
+
+    def verify(self) -> bool:
+        if self.client.execute("PING") != "PONG":
+            return False
+        index = self._index()
+        actual = sum(record[1] for record in index.values())
+        per_agent: Dict[str, int] = {}
+        for record in index.values():
+            per_agent[record[0]] = per_agent.get(record[0], 0) + 1
+        stored, indexed = self.client.pipeline([
+            ("HGET", self.totals_key, "bytes"),
+            ("ZCARD", self.expiry_key),
+        ])
+        stats = self.stats(time.time())
+        if actual == int(stored or 0) and indexed == len(index) and stats['by_agent'] == per_agent:
+            return True
+        # Totals or side indexes drifted (a writer died mid-update, or the
+        # index predates them): rebuild them from the index
+        commands = [
+            ("MULTI",),
+            ("DEL", self.expiry_key, self.negative_key, self.agents_key),
+            ("HSET", self.totals_key, "bytes", actual),
+        ]
+        for key, (agent_name, _, expiry_time, negative) in index.items():
+            commands.append(("ZADD", self.expiry_key, repr(expiry_time), key))
+            if negative:
+                commands.append(("ZADD", self.negative_key, repr(expiry_time), key))
+        commands += [
+            ("HSET", self.agents_key, agent_name, count) for agent_name, count in per_agent.items()
+        ]
+        self.client.pipeline(commands + [("EXEC",)])
+        return False
+
+    def claim(self, name: str, seconds: float) -> bool:
+        reply = self.client.execute(
+            "SET", f"{self.prefix}:claim:{name}", "1", "NX", "PX", max(1, int(seconds * 1000))
+        )
+        return reply == "OK"
+
+    def release(self, name: str) -> None:
+        self.client.execute("DEL", f"{self.prefix}:claim:{name}")
+
+    def close(self) -> None:
+        self.client.close()
+
+
+class JsonFileBackend(CacheBackend):
+    """
+    One JSON file per entry plus a ``_metadata.json`` index (legacy layout).
+    Every change rewrites the whole index, so prefer SQLiteBackend for large caches.
+    One lock covers the index and the files.
+    """
+
+    name = "json"
+
+    def __init__(self, cache_dir: str):
+        """
+        Args:
+            cache_dir: Directory for entry files and the index
+        """
+        self.cache_dir = Path(cache_dir)
+        self.metadata_file = self.cache_dir / METADATA_FILE
+        self._lock = threading.RLock()
+        self._load_metadata()
+        # Kept in memory only: the index has no room for backend-wide counters
+        self.evictions = 0
+
+    def _load_metadata(self) -> None:
+        """Load cache metadata from disk."""
+        if self.metadata_file.exists():
+            try:
+                with open(self.metadata_file, 'r', encoding='utf-8') as f:
+                    self.metadata = json.load(f)
+            except (json.JSONDecodeError, IOError):
+                self.metadata = {}
+        else:
+            self.metadata = {}
+
+    def _save_metadata(self) -> None:
+        """Save cache metadata to disk."""
+        try:
+            with open(self.metadata_file, 'w', encoding='utf-8') as f:
+                json.dump(self.metadata, f, indent=2)
+        except IOError as e:
+            print(f"Warning: Failed to save cache metadata: {e}")
+
+    def _file(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cache_file = self._file(key)
+            if key not in self.metadata or not cache_file.exists():
+                return None
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Warning: Failed to read cache file {key}: {e}")
+                return None
+            data.setdefault('expiry_time', self.metadata[key].get('expiry_time', 0))
+            data.setdefault('negative', False)
+            return data
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            payload = cache_codec.dumps(entry)
+            with open(self._file(key), 'w', encoding='utf-8') as f:
+                f.write(payload)
+            self.metadata[key] = {
+                'agent_name': entry['agent_name'],
+                'cached_at': entry['cached_at'],
+                'expiry_time': entry['expiry_time'],
+                'negative': entry.get('negative', False),
+                'size': len(payload.encode('utf-8')),
+                'last_access': entry['cached_at'],
+                'hits': self.metadata.get(key, {}).get('hits', 0),
+                'input_hash': key[:16]  # Store partial hash for debugging
+            }
+            self._save_metadata()
+
+    def _remove(self, keys) -> int:
+        for key in keys:
+            cache_file = self._file(key)
+            if cache_file.exists():
+                cache_file.unlink()
+            self.metadata.pop(key, None)
+        if keys:
+            self._save_metadata()
+        return len(keys)
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            existed = key in self.metadata or self._file(key).exists()
+            self._remove([key])
+            return existed
+
+    def clear(self, agent_name: Optional[str] = None) -> int:
+        with self._lock:
+            return self._remove([
+                key for key, entry in self.metadata.items()
+                if agent_name is None or entry.get('agent_name') == agent_name
+            ])
+
+    def clear_expired(self, now: float) -> int:
+        with self._lock:
+            return self._remove([
+                key for key, entry in self.metadata.items()
+                if now > entry.get('expiry_time', 0)
+            ])
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        with self._lock:
+            by_agent: Dict[str, int] = {}
+            expired = negative = total_bytes = 0
+            for entry in self.metadata.values():
+                agent_name = entry.get('agent_name', 'unknown')
+                by_agent[agent_name] = by_agent.get(agent_name, 0) + 1
+                total_bytes += entry.get('size', 0)
+                if now > entry.get('expiry_time', 0):
+                    expired += 1
+                elif entry.get('negative'):
+                    negative += 1
+            return {
+                'total': len(self.metadata),
+                'expired': expired,
+                'negative': negative,
+                'total_bytes': total_bytes,
+                'evictions': self.evictions,
+                'by_agent': by_agent
+            }
+
+    def usage(self) -> Tuple[int, int]:
+        with self._lock:
+            return len(self.metadata), sum(entry.get('size', 0) for entry in self.metadata.values())
+
+    def sweep_expired(self, now: float, limit: int) -> Tuple[int, int]:
+        with self._lock:
+            expired = []
+            for key, entry in self.metadata.items():
+                if len(expired) >= limit:
+                    break
+                if now > entry.get('expiry_time', 0):
+                    expired.append((key, entry.get('size', 0)))
+            self._remove([key for key, _ in expired])
+            return len(expired), sum(size for _, size in expired)
+
+    def verify(self) -> bool:
+        with self._lock:
+            missing = [key for key in self.metadata if not self._file(key).exists()]
+            self._remove(missing)
+            return not missing
+
+    def touch(self, hits: Dict[str, Tuple[int, float]]) -> None:
+        with self._lock:
+            # Saved with the next index write
+            for key, (count, last) in hits.items():
+                entry = self.metadata.get(key)
+                if entry is not None:
+                    entry['hits'] = entry.get('hits', 0) + count
+                    entry['last_access'] = max(entry.get('last_access', 0), last)
+
+    def evict(
+        self, max_entries: int, max_bytes: int, policy: str, limit: int, now: float,
+        keep: Optional[str] = None
+    ) -> int:
+        with self._lock:
+            entries, total_bytes = self.usage()
+            if entries <= max_entries and total_bytes <= max_bytes:
+                return 0
+
+            def rank(item):
+                entry = item[1]
+                expired = now > entry.get('expiry_time', 0)
+                last_access = entry.get('last_access', entry.get('cached_at', 0))
+                if policy == "lfu":
+                    return (not expired, entry.get('hits', 0), last_access)
+                return (not expired, last_access)
+
+            victims = []
+            for key, entry in sorted(self.metadata.items(), key=rank):
+                if len(victims) >= limit or (entries <= max_entries and total_bytes <= max_bytes):
+                    break
+                if key == keep:
+                    continue
+                victims.append(key)
+                entries -= 1
+                total_bytes -= entry.get('size', 0)
+            self.evictions += self._remove(victims)
+            return len(victims)
+
+
+def create_backend(kind: str, cache_dir: Path, migrate: bool = True) -> CacheBackend:
+    """
+    Build the storage backend for a cache directory.
+
+    Args:
+        kind: One of BACKEND_NAMES
+        cache_dir: Cache directory (must exist)
+        migrate: Whether the SQLite backend imports entries left in
+            ``cache_dir`` by the JSON backend
+    """
+    kind = kind.lower()
+    if kind not in BACKEND_NAMES:
+        raise ValueError(f"Unknown cache backend: {kind} (expected one of {', '.join(BACKEND_NAMES)})")
+    if kind == "json":
+        return JsonFileBackend(cache_dir)
+    if kind == "redis":
+        return RedisBackend(CACHE_REDIS_URL, CACHE_REDIS_PREFIX)
+    backend = SQLiteBackend(CACHE_SQLITE_PATH or Path(cache_dir) / SQLITE_FILE)
+    if migrate:
+        backend.migrate_json(cache_dir)
+    return backend
@@ -0,0 +1,99 @@
+"""
+Cache Entry Codec
+=================
+Compact binary encoding for cached agent responses.
+
+Layout: one format version byte, one compression byte, then minified UTF-8
+JSON, compressed when it is at least CACHE_COMPRESS_MIN_BYTES long and
+compression actually helps. zstd is used when the ``zstandard`` package is
+installed, zlib otherwise.
+
+Entries written before this format (plain, often pretty-printed JSON text)
+are still decoded: JSON text never starts with the version byte.
+"""
+
+import json
+import os
+import zlib
+from typing import Any, Union
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+FORMAT_VERSION = 1
+
+RAW = 0
+ZLIB = 1
+ZSTD = 2
+
+# Payloads shorter than this are stored uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "512"))
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def dumps(value: Any) -> str:
+    """Minified JSON (no indentation or separator spaces)."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def _compress(data: bytes):
+    if ZSTD_AVAILABLE:
+        return ZSTD, zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return ZLIB, zlib.compress(data, ZLIB_LEVEL)
+
+
+def encode(value: Any, min_compress_bytes: int = None) -> bytes:
+    """
+    Encode a JSON-serializable value.
+
+    Args:
+        value: Value to encode
+        min_compress_bytes: Compression threshold (defaults to COMPRESS_MIN_BYTES)
+    """
+    data = dumps(value).encode("utf-8")
+    threshold = COMPRESS_MIN_BYTES if min_compress_bytes is None else min_compress_bytes
+    codec = RAW
+    if len(data) >= threshold:
+        compressed_codec, compressed = _compress(data)
+        if len(compressed) < len(data):
+            codec, data = compressed_codec, compressed
+    return bytes((FORMAT_VERSION, codec)) + data
+
+
+def decode(blob: Union[bytes, str]) -> Any:
+    """
+    Decode an encoded value, or a legacy JSON text entry.
+
+    Raises:
+        ValueError: For unknown versions or codecs, corrupt data, or zstd
+            entries when ``zstandard`` is not installed
+    """
+    if isinstance(blob, str):
+        return json.loads(blob)
+    if not blob or blob[0] != FORMAT_VERSION:
+        # Legacy entry: JSON text
+        return json.loads(blob.decode("utf-8"))
+    if len(blob) < 2:
+        raise ValueError("Truncated cache entry")
+
+    codec, data = blob[1], blob[2:]
+    if codec == ZLIB:
+        try:
+            data = zlib.decompress(data)
+        except zlib.error as e:
+            raise ValueError(f"Corrupt cache entry: {e}") from e
+    elif codec == ZSTD:
+        if not ZSTD_AVAILABLE:
+            raise ValueError("Cache entry is zstd-compressed but zstandard is not installed")
+        try:
+            data = zstandard.ZstdDecompressor().decompress(data)
+        except zstandard.ZstdError as e:
+            raise ValueError(f"Corrupt cache entry: {e}") from e
+    elif codec != RAW:
+        raise ValueError(f"Unknown cache entry codec: {codec}")
+    return json.loads(data.decode("utf-8"))
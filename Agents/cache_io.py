@@ -0,0 +1,69 @@
+"""
+Cache I/O Threads
+=================
+Async access to the cache without blocking the event loop. Blocking cache
+work (key hashing, SQLite, entry files, Redis sockets) runs on a small
+dedicated thread pool, separate from the default executor that
+``asyncio.to_thread`` uses for agent calls, so slow storage never delays an
+agent and a burst of agent calls never starves cache reads.
+
+Also provides striped per-key locks: operations on different keys never
+wait for each other, only concurrent writes and reads of one key do.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+# Threads doing cache I/O for async callers
+CACHE_IO_WORKERS = int(os.getenv("CACHE_IO_WORKERS", "8"))
+# Locks shared out among keys; more stripes, fewer unrelated keys colliding
+KEY_LOCK_STRIPES = int(os.getenv("CACHE_KEY_LOCK_STRIPES", "64"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """The cache I/O pool, created on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, CACHE_IO_WORKERS), thread_name_prefix="cache-io"
+            )
+        return _executor
+
+
+async def run_io(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking cache call on the cache I/O pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_io_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_io_executor() -> None:
+    """Finish queued cache I/O and stop the pool (a later call starts a new one)."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+class KeyLocks:
+    """A fixed set of locks, one picked per key."""
+
+    def __init__(self, stripes: Optional[int] = None):
+        """
+        Args:
+            stripes: Number of locks (defaults to KEY_LOCK_STRIPES)
+        """
+        self._locks: List[threading.Lock] = [
+            threading.Lock() for _ in range(max(1, stripes or KEY_LOCK_STRIPES))
+        ]
+
+    def __call__(self, key: str) -> threading.Lock:
+        return self._locks[hash(key) % len(self._locks)]
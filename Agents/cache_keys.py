@@ -0,0 +1,122 @@
+"""
+Versioned Cache Keys
+====================
+Content-addressed cache keys that also cover everything else shaping an
+agent's output: the model, the prompt templates and the version of the
+static scanner rules. Changing any of them changes the key, so a deploy
+invalidates only the entries it affects and TTLs can safely be long.
+
+A key hashes, in order: the key schema (KEY_SCHEMA), the agent name, the
+version tag from ``cache_version`` and the fingerprint of the full input.
+Unified diffs are fingerprinted in a canonical form (``canonical_diff``), so
+a rebased or re-pushed PR with the same changes hits the cache.
+"""
+
+import hashlib
+import re
+from typing import Iterable, List, Optional
+
+# Bump when the key layout itself changes
+KEY_SCHEMA = 2
+
+_HUNK_HEADER = re.compile(r"^@@ -\d+(?:,(\d+))? \+\d+(?:,(\d+))? @@")
+# Header lines that change with every rebase or re-push
+_VOLATILE_HEADERS = ("index ", "similarity index ", "dissimilarity index ")
+
+
+def canonical_diff(text: str) -> Optional[str]:
+    """
+    Canonical form of a unified diff: per file, its header lines (paths,
+    modes, renames) and its added and removed lines, with trailing
+    whitespace stripped. Index/blob lines, hunk positions and context lines
+    are dropped, and files are sorted by header.
+
+    Returns:
+        The canonical text, or None if ``text`` has no hunks (not a diff)
+    """
+    preamble: List[str] = []
+    files: List[List[str]] = []
+    current: Optional[List[str]] = None
+    old_left = new_left = 0
+    hunks = 0
+
+    for line in text.splitlines():
+        if old_left > 0 or new_left > 0:
+            # Inside a hunk: the header's line counts say where it ends
+            tag = line[:1]
+            if tag == "+":
+                new_left -= 1
+            elif tag == "-":
+                old_left -= 1
+            elif tag == "\\":
+                continue
+            else:
+                old_left -= 1
+                new_left -= 1
+                continue
+            current.append(line.rstrip())
+            continue
+
+        hunk = _HUNK_HEADER.match(line)
+        if hunk and current is not None:
+            old_left = int(hunk.group(1) or 1)
+            new_left = int(hunk.group(2) or 1)
+            hunks += 1
+        elif line.startswith("diff --git ") or (
+            line.startswith("--- ") and (current is None or current[-1].startswith(("+", "-")))
+        ):
+            # A new file: git header, or a plain unified diff's "---" line
+            current = [line.rstrip()]
+            files.append(current)
+        elif current is None:
+            preamble.append(line.rstrip())
+        elif not line.startswith(_VOLATILE_HEADERS):
+            current.append(line.rstrip())
+
+    if not hunks:
+        return None
+    files.sort(key=lambda lines: lines[0])
+    return "\n".join(preamble + [line for lines in files for line in lines])
+
+
+def content_hash(content: str) -> str:
+    """SHA-256 of the full input (of its canonical form, for diffs)."""
+    canonical = canonical_diff(content)
+    if canonical is not None:
+        content = canonical
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def prompt_hash(prompts: Iterable[str]) -> str:
+    """Short hash of prompt templates (system prompts, instructions)."""
+    digest = hashlib.sha256()
+    for prompt in prompts:
+        digest.update(prompt.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def cache_version(model: str = "", prompts: Iterable[str] = (), rules: str = "") -> str:
+    """
+    Version tag for one agent's cache entries.
+
+    Args:
+        model: Model id (e.g. "llama-3.3-70b-versatile")
+        prompts: Prompt templates the agent renders its input into
+        rules: Version of the static scanner rules the result includes
+
+    Returns:
+        "model|prompt-hash|rules", readable in logs and stats
+    """
+    return f"{model}|{prompt_hash(prompts)}|{rules}"
+
+
+def build_cache_key(agent_name: str, content: str, version: str = "") -> str:
+    """
+    Cache key for ``content`` processed by ``agent_name`` at ``version``.
+
+    Returns:
+        SHA-256 hex digest
+    """
+    parts = (f"k{KEY_SCHEMA}", agent_name, version, content_hash(content))
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
@@ -5,182 +5,483 @@ Provides persistent caching for agent responses to avoid redundant API calls
 and handle rate limits gracefully.
 
 Features:
-- Hash-based key generation from agent name + input content
-- JSON file-based persistence
+- Content-addressed keys covering the agent, its model, prompts and scanner
+  rule version (see cache_keys.py), so TTLs can be long
+- Pluggable persistence (SQLite in WAL mode by default, Redis shared by all
+  replicas and services, legacy JSON files), chosen by CACHE_BACKEND
+- In-process LRU tier in front of the persistent one (write-through)
+- Size-bounded persistent tier with incremental LRU or LFU eviction
+- Read-only lookups; expired entries are removed by a background sweep
+  (see cache_sweeper.py)
 - TTL (time-to-live) expiration
 - Thread-safe operations
 - Automatic cache directory creation
+- Negative caching: failed agent outputs are kept only for a short TTL
+- Async API (aget/aset/aclear) on a dedicated I/O pool (see cache_io.py),
+  with per-key locks instead of one lock around all storage access
+- Optional stale-while-revalidate per agent (register_refresher): for a grace
+  window after expiry an entry is still served, marked stale, while one
+  background refresh replaces it
 """
 
-import json
-import hashlib
+import asyncio
+import os
+import sqlite3
 import time
 from pathlib import Path
-from typing import Any, Optional, Dict
+from typing import Any, Awaitable, Callable, Optional, Dict, Tuple, Union
 import threading
 
+from cache_backends import BACKEND_NAMES, EVICTION_POLICIES, CacheBackend, create_backend
+from cache_io import KeyLocks, run_io
+from cache_keys import build_cache_key
+from resp_client import RespError
+from memory_cache import MISS, MemoryCache
+
+# Hours a successful agent output stays cached. Keys change with the model,
+# prompts and rules (see cache_keys.py), so this can be long.
+CACHE_TTL_HOURS = int(os.getenv("CACHE_TTL_HOURS", str(14 * 24)))
+
+# Seconds a failed agent output stays cached. Long enough to absorb a burst of
+# identical retries, short enough that a transient failure is retried soon.
+NEGATIVE_TTL_SECONDS = float(os.getenv("CACHE_NEGATIVE_TTL_SECONDS", "60"))
+
+# Caps for the persistent tier; eviction trims to EVICTION_LOW_WATER of them
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "100000"))
+# "lru" (least recently used) or "lfu" (least frequently used)
+CACHE_EVICTION_POLICY = os.getenv("CACHE_EVICTION_POLICY", "lru").lower()
+EVICTION_LOW_WATER = 0.9
+# Entries evicted per write at most, so no single request pays for a big cleanup
+EVICTION_BATCH = int(os.getenv("CACHE_EVICTION_BATCH", "256"))
+# Persistent tier, one of cache_backends.BACKEND_NAMES; SQLite by default here
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite").lower()
+# Free pages returned to the filesystem per compaction at most (SQLite)
+COMPACT_MAX_PAGES = int(os.getenv("CACHE_COMPACT_MAX_PAGES", "2048"))
+# Seconds past expiry that entries of an agent with a registered refresher are
+# still served (as stale) while they are recomputed; 0 keeps hard expiry
+CACHE_STALE_GRACE_SECONDS = float(os.getenv("CACHE_STALE_GRACE_SECONDS", "0"))
+# Seconds one process holds the refresh of a stale entry in shared storage, so
+# other replicas keep serving it stale instead of recomputing it too
+CACHE_REFRESH_LEASE_SECONDS = float(os.getenv("CACHE_REFRESH_LEASE_SECONDS", "120"))
+
+# Lookup outcomes reported by CacheManager.lookup
+FRESH = "fresh"
+STALE = "stale"
+MISSED = "miss"
+
+
+def is_failed_response(response: Any) -> bool:
+    """
+    Whether an agent output records a failure rather than a real result.
+    
+    Failed outputs carry an ``error`` key (degraded static stand-ins also set
+    ``degraded``); the orchestral Security Auditor reports ``status: unknown``
+    when the agent returned nothing it could parse.
+    """
+    if not isinstance(response, dict):
+        return False
+    return bool(
+        response.get("error")
+        or response.get("degraded")
+        or response.get("status") == "unknown"
+    )
+
 
 class CacheManager:
     """
     Manages caching of agent responses with TTL and persistence.
     """
     
-    def __init__(self, cache_dir: str = "agent_cache", default_ttl_hours: int = 24):
+    def __init__(
+        self,
+        cache_dir: str = "agent_cache",
+        default_ttl_hours: Optional[int] = None,
+        negative_ttl_seconds: Optional[float] = None,
+        backend: Union[str, CacheBackend, None] = None,
+        memory: Optional[MemoryCache] = None,
+        max_bytes: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        eviction_policy: Optional[str] = None
+    ):
         """
         Initialize the cache manager.
         
         Args:
             cache_dir: Directory to store cache files
             default_ttl_hours: Default time-to-live for cache entries in hours
+                (defaults to CACHE_TTL_HOURS)
+            negative_ttl_seconds: Time-to-live for failed responses in seconds
+            backend: Storage backend, or its name (one of BACKEND_NAMES);
+                defaults to CACHE_BACKEND
+            memory: In-process tier (bounded by CACHE_MEMORY_MAX_ENTRIES and
+                CACHE_MEMORY_MAX_BYTES by default)
+            max_bytes: Cap on stored bytes in the persistent tier
+            max_entries: Cap on entries in the persistent tier
+            eviction_policy: "lru" or "lfu"
         """
         self.cache_dir = Path(cache_dir)
-        self.default_ttl_seconds = default_ttl_hours * 3600
+        self.default_ttl_seconds = (default_ttl_hours or CACHE_TTL_HOURS) * 3600
+        self.negative_ttl_seconds = (
+            negative_ttl_seconds if negative_ttl_seconds is not None else NEGATIVE_TTL_SECONDS
+        )
+        # Guards counters and buffered reads only; storage has per-key locks
         self.lock = threading.Lock()
+        self.key_locks = KeyLocks()
+        # One eviction or maintenance pass at a time
+        self.maintenance_lock = threading.Lock()
         
         # Create cache directory if it doesn't exist
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         
-        # Metadata file to track cache entries
-        self.metadata_file = self.cache_dir / "_metadata.json"
-        self._load_metadata()
-    
-    def _load_metadata(self) -> None:
-        """Load cache metadata from disk."""
-        if self.metadata_file.exists():
-            try:
-                with open(self.metadata_file, 'r', encoding='utf-8') as f:
-                    self.metadata = json.load(f)
-            except (json.JSONDecodeError, IOError):
-                self.metadata = {}
+        if isinstance(backend, CacheBackend):
+            self.backend = backend
         else:
-            self.metadata = {}
-    
-    def _save_metadata(self) -> None:
-        """Save cache metadata to disk."""
-        try:
-            with open(self.metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(self.metadata, f, indent=2)
-        except IOError as e:
-            print(f"Warning: Failed to save cache metadata: {e}")
+            self.backend = create_backend(backend or CACHE_BACKEND, self.cache_dir)
+        self.memory = memory if memory is not None else MemoryCache()
+        self.counters = {
+            'memory_hits': 0, 'disk_hits': 0, 'misses': 0,
+            'stale_hits': 0, 'refreshes': 0, 'refresh_failures': 0, 'refreshes_elsewhere': 0
+        }
+        # agent name -> (refresh function, grace seconds)
+        self._refreshers: Dict[str, Tuple[Callable[[Any], Any], float]] = {}
+        # Keys being refreshed, and the tasks doing it (kept until done)
+        self._refreshing: set = set()
+        self._refresh_tasks: set = set()
+        
+        self.max_bytes = max_bytes or CACHE_MAX_BYTES
+        self.max_entries = max_entries or CACHE_MAX_ENTRIES
+        self.eviction_policy = (eviction_policy or CACHE_EVICTION_POLICY).lower()
+        if self.eviction_policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {self.eviction_policy}")
+        # Reads are recorded here (key -> [count, last read]) and written in batches
+        self._touches: Dict[str, list] = {}
     
-    def _generate_cache_key(self, agent_name: str, input_content: str) -> str:
+    def _generate_cache_key(self, agent_name: str, input_content: str, version: str = "") -> str:
         """
-        Generate a unique cache key based on agent name and input content.
+        Generate a unique cache key based on agent name, version and input content.
         
         Args:
             agent_name: Name of the agent
             input_content: Input content to hash
+            version: Version tag from ``cache_keys.cache_version``
             
         Returns:
             SHA256 hash as cache key
         """
-        # Create a combined string and hash it
-        combined = f"{agent_name}:{input_content}"
-        return hashlib.sha256(combined.encode('utf-8')).hexdigest()
-    
-    def _get_cache_file_path(self, cache_key: str) -> Path:
-        """Get the file path for a cache key."""
-        return self.cache_dir / f"{cache_key}.json"
+        return build_cache_key(agent_name, input_content, version)
     
-    def _is_expired(self, cache_key: str) -> bool:
+    def register_refresher(
+        self,
+        agent_name: str,
+        refresh: Callable[[Any], Union[Any, Awaitable[Any]]],
+        grace_seconds: Optional[float] = None
+    ) -> None:
         """
-        Check if a cache entry has expired.
+        Serve ``agent_name``'s entries stale-while-revalidate.
+        
+        For ``grace_seconds`` after an entry expires, lookups still return it
+        (status STALE) and start one background ``refresh`` for its key; the
+        result replaces the entry. A refresh returning None or a failure
+        leaves the stale entry in place until the grace window ends. Each
+        agent has one refresher; registering again replaces it.
         
         Args:
-            cache_key: Cache key to check
-            
-        Returns:
-            True if expired, False otherwise
+            agent_name: Name of the agent
+            refresh: Recomputes a response; called with the ``context`` the
+                stale lookup was given (its input content by default). May
+                be a coroutine function; plain functions run in a thread
+            grace_seconds: Grace window (defaults to CACHE_STALE_GRACE_SECONDS)
         """
-        if cache_key not in self.metadata:
-            return True
-        
-        entry = self.metadata[cache_key]
-        expiry_time = entry.get('expiry_time', 0)
-        
-        return time.time() > expiry_time
+        grace = CACHE_STALE_GRACE_SECONDS if grace_seconds is None else grace_seconds
+        self._refreshers[agent_name] = (refresh, max(0.0, grace))
+    
+    def _grace_seconds(self, agent_name: str) -> float:
+        refresher = self._refreshers.get(agent_name)
+        return refresher[1] if refresher else 0.0
     
-    def get(self, agent_name: str, input_content: str) -> Optional[Any]:
+    def get(self, agent_name: str, input_content: str, version: str = "") -> Optional[Any]:
         """
         Retrieve cached response for given agent and input.
         
+        Failed responses are returned too while their short negative TTL
+        lasts; use ``is_failed_response`` to tell them apart. Stale entries
+        are returned too (see ``register_refresher``); use ``lookup`` to
+        tell them apart.
+        
         Args:
             agent_name: Name of the agent
             input_content: Input content that was processed
+            version: Version tag of the agent (model, prompts, rules)
             
         Returns:
             Cached response if found and valid, None otherwise
         """
-        with self.lock:
-            cache_key = self._generate_cache_key(agent_name, input_content)
-            cache_file = self._get_cache_file_path(cache_key)
-            
-            # Check if cache exists and is not expired
-            if not cache_file.exists() or self._is_expired(cache_key):
-                # Clean up expired entry
-                if cache_key in self.metadata:
-                    del self.metadata[cache_key]
-                    self._save_metadata()
-                if cache_file.exists():
-                    cache_file.unlink()
-                return None
+        return self.lookup(agent_name, input_content, version)[0]
+    
+    async def aget(self, agent_name: str, input_content: str, version: str = "") -> Optional[Any]:
+        """``get`` for async callers; runs on the cache I/O pool."""
+        return (await self.alookup(agent_name, input_content, version))[0]
+    
+    def lookup(
+        self, agent_name: str, input_content: str, version: str = "", context: Any = None
+    ) -> Tuple[Optional[Any], str]:
+        """
+        Like ``get``, but also says whether the response is FRESH or STALE
+        (MISSED when there is none). A stale lookup starts the agent's
+        background refresh unless one is already running for the key.
+        
+        Args:
+            context: Passed to the agent's refresher (defaults to ``input_content``)
             
-            # Load and return cached data
+        Returns:
+            (cached response or None, status)
+        """
+        response, status, cache_key = self._lookup(agent_name, input_content, version)
+        if status == STALE:
+            self._start_refresh(cache_key, agent_name, input_content, version, context)
+        return response, status
+    
+    async def alookup(
+        self, agent_name: str, input_content: str, version: str = "", context: Any = None
+    ) -> Tuple[Optional[Any], str]:
+        """``lookup`` for async callers; refreshes run as tasks on the caller's loop."""
+        response, status, cache_key = await run_io(self._lookup, agent_name, input_content, version)
+        if status == STALE:
+            self._start_refresh(cache_key, agent_name, input_content, version, context)
+        return response, status
+    
+    def _lookup(self, agent_name: str, input_content: str, version: str) -> Tuple[Optional[Any], str, str]:
+        cache_key = self._generate_cache_key(agent_name, input_content, version)
+        now = time.time()
+        
+        # Hot entries are served from memory without touching the disk
+        # (the memory tier only holds them while they are fresh)
+        response = self.memory.get(cache_key, now)
+        if response is not MISS:
+            with self.lock:
+                self.counters['memory_hits'] += 1
+                self._record_touch(cache_key, now)
+            return response, FRESH, cache_key
+        
+        # Held until the memory tier is warmed, so a concurrent set of this
+        # key cannot be overwritten there by the older entry read here
+        with self.key_locks(cache_key):
             try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    cached_data = json.load(f)
-                    return cached_data.get('response')
-            except (json.JSONDecodeError, IOError) as e:
-                print(f"Warning: Failed to read cache file {cache_key}: {e}")
-                return None
+                entry = self.backend.get(cache_key)
+            except (OSError, sqlite3.Error, RespError) as e:
+                # A shared backend being unreachable is a miss, not a failed review
+                print(f"Warning: Cache backend unavailable: {e}")
+                entry = None
+            # Expired entries are left for the background sweep
+            if entry is not None and now > entry.get('expiry_time', 0):
+                entry = None
+            stale = entry is not None and now > entry.get('fresh_until', entry['expiry_time'])
+            if entry is not None and not stale:
+                self.memory.put(
+                    cache_key, agent_name, entry.get('response'),
+                    entry.get('fresh_until', entry['expiry_time'])
+                )
+        
+        with self.lock:
+            if entry is None:
+                self.counters['misses'] += 1
+                return None, MISSED, cache_key
+            self.counters['disk_hits'] += 1
+            if stale:
+                self.counters['stale_hits'] += 1
+            self._record_touch(cache_key, now)
+        return entry.get('response'), STALE if stale else FRESH, cache_key
+    
+    def _start_refresh(
+        self, cache_key: str, agent_name: str, input_content: str, version: str, context: Any
+    ) -> None:
+        """
+        Start the background refresh of a stale entry, once per key in this
+        process; ``_refresh`` then takes a backend lease so that only one of
+        the processes sharing the storage recomputes it.
+        """
+        if agent_name not in self._refreshers:
+            return
+        with self.lock:
+            if cache_key in self._refreshing:
+                return
+            self._refreshing.add(cache_key)
+        job = self._refresh(
+            cache_key, agent_name, input_content, version,
+            input_content if context is None else context
+        )
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None:
+            # Sync callers (CLI tools): refresh on a thread with its own loop
+            def run() -> None:
+                try:
+                    asyncio.run(job)
+                finally:
+                    self._end_refresh(cache_key)
+            threading.Thread(target=run, name="cache-refresh", daemon=True).start()
+            return
+        task = loop.create_task(job)
+        self._refresh_tasks.add(task)
+        # Also runs if the task is cancelled before it starts (loop shutdown)
+        task.add_done_callback(lambda done: self._end_refresh(cache_key, done))
+    
+    def _end_refresh(self, cache_key: str, task: Optional[asyncio.Task] = None) -> None:
+        with self.lock:
+            self._refreshing.discard(cache_key)
+        self._refresh_tasks.discard(task)
+    
+    async def _refresh(
+        self, cache_key: str, agent_name: str, input_content: str, version: str, context: Any
+    ) -> None:
+        refresh, _ = self._refreshers[agent_name]
+        lease = f"refresh:{cache_key}"
+        try:
+            if not await run_io(self.backend.claim, lease, CACHE_REFRESH_LEASE_SECONDS):
+                # Another replica is already recomputing it
+                with self.lock:
+                    self.counters['refreshes_elsewhere'] += 1
+                return
+        except Exception as e:
+            # Storage unreachable: refresh anyway rather than serve stale until the grace ends
+            print(f"⚠️ Could not take the refresh lease for {agent_name}: {e}")
+        try:
+            print(f"🔄 Refreshing stale {agent_name} cache entry in the background")
+            if asyncio.iscoroutinefunction(refresh):
+                response = await refresh(context)
+            else:
+                response = await asyncio.to_thread(refresh, context)
+            if response is None or is_failed_response(response):
+                # Keep serving the stale entry rather than caching a failure over it
+                with self.lock:
+                    self.counters['refresh_failures'] += 1
+                print(f"⚠️ Refresh of {agent_name} gave no usable result; keeping stale entry")
+                return
+            await self.aset(agent_name, input_content, response, failed=False, version=version)
+            with self.lock:
+                self.counters['refreshes'] += 1
+        except Exception as e:
+            with self.lock:
+                self.counters['refresh_failures'] += 1
+            print(f"⚠️ Refresh of {agent_name} failed: {e}")
+        finally:
+            try:
+                await run_io(self.backend.release, lease)
+            except Exception:
+                pass  # the lease runs out on its own
     
     def set(
         self, 
         agent_name: str, 
         input_content: str, 
         response: Any,
-        ttl_hours: Optional[int] = None
+        ttl_hours: Optional[int] = None,
+        failed: Optional[bool] = None,
+        version: str = ""
     ) -> None:
         """
         Store response in cache.
         
+        Failures are stored as negative entries that expire after
+        ``negative_ttl_seconds`` whatever ``ttl_hours`` says.
+        
         Args:
             agent_name: Name of the agent
             input_content: Input content that was processed
             response: Response to cache
             ttl_hours: Time-to-live in hours (uses default if not specified)
+            failed: Whether the response is a failure (detected if not specified)
+            version: Version tag of the agent (model, prompts, rules)
         """
-        with self.lock:
-            cache_key = self._generate_cache_key(agent_name, input_content)
-            cache_file = self._get_cache_file_path(cache_key)
-            
-            # Calculate expiry time
+        if failed is None:
+            failed = is_failed_response(response)
+        
+        cache_key = self._generate_cache_key(agent_name, input_content, version)
+        
+        # Calculate expiry time
+        if failed:
+            ttl_seconds = self.negative_ttl_seconds
+        else:
             ttl_seconds = (ttl_hours * 3600) if ttl_hours else self.default_ttl_seconds
-            expiry_time = time.time() + ttl_seconds
-            
-            # Prepare cache data
-            cache_data = {
-                'agent_name': agent_name,
-                'response': response,
-                'cached_at': time.time(),
-                'expiry_time': expiry_time
-            }
-            
-            # Write cache file
-            try:
-                with open(cache_file, 'w', encoding='utf-8') as f:
-                    json.dump(cache_data, f, indent=2)
-                
-                # Update metadata
-                self.metadata[cache_key] = {
-                    'agent_name': agent_name,
-                    'cached_at': cache_data['cached_at'],
-                    'expiry_time': expiry_time,
-                    'input_hash': cache_key[:16]  # Store partial hash for debugging
-                }
-                self._save_metadata()
-            except IOError as e:
-                print(f"Warning: Failed to write cache file {cache_key}: {e}")
+        now = time.time()
+        # Kept past expiry for stale-while-revalidate (never failures)
+        grace = 0.0 if failed else self._grace_seconds(agent_name)
+        
+        entry = {
+            'agent_name': agent_name,
+            'response': response,
+            'cached_at': now,
+            'expiry_time': now + ttl_seconds + grace,
+            'negative': failed
+        }
+        if grace:
+            entry['fresh_until'] = now + ttl_seconds
+        
+        try:
+            with self.key_locks(cache_key):
+                self.backend.put(cache_key, entry)
+                self.memory.put(cache_key, agent_name, response, now + ttl_seconds)
+            evicted = 0
+            # A write never waits for another write's eviction pass
+            if self.maintenance_lock.acquire(blocking=False):
+                try:
+                    self._flush_touches()
+                    evicted = self._evict(now, cache_key)
+                finally:
+                    self.maintenance_lock.release()
+            if evicted:
+                print(f"🧹 Evicted {evicted} cache entries ({self.eviction_policy})")
+            if failed:
+                print(f"⚠️ Cached failed {agent_name} response for {ttl_seconds:.0f}s only")
+        except (IOError, sqlite3.Error, RespError, TypeError, ValueError) as e:
+            print(f"Warning: Failed to write cache entry {cache_key}: {e}")
+    
+    async def aset(
+        self,
+        agent_name: str,
+        input_content: str,
+        response: Any,
+        ttl_hours: Optional[int] = None,
+        failed: Optional[bool] = None,
+        version: str = ""
+    ) -> None:
+        """``set`` for async callers; runs on the cache I/O pool."""
+        await run_io(self.set, agent_name, input_content, response, ttl_hours, failed, version)
+    
+    def _record_touch(self, cache_key: str, now: float) -> None:
+        """
+        Buffer one read for LRU/LFU tracking (call with the lock held).
+        Written by the next set or maintenance pass, never by a read.
+        """
+        touch = self._touches.setdefault(cache_key, [0, now])
+        touch[0] += 1
+        touch[1] = now
+    
+    def _flush_touches(self) -> None:
+        with self.lock:
+            touches, self._touches = self._touches, {}
+        if touches:
+            self.backend.touch({key: tuple(touch) for key, touch in touches.items()})
+    
+    def _evict(self, now: float, keep: str) -> int:
+        """
+        Once over a cap, trim toward the low-water mark, at most EVICTION_BATCH
+        entries per call; later writes continue while a cap is still exceeded.
+        """
+        entries, stored_bytes = self.backend.usage()
+        if entries <= self.max_entries and stored_bytes <= self.max_bytes:
+            return 0
+        return self.backend.evict(
+            int(self.max_entries * EVICTION_LOW_WATER),
+            int(self.max_bytes * EVICTION_LOW_WATER),
+            self.eviction_policy,
+            EVICTION_BATCH,
+            now,
+            keep
+        )
     
     def clear(self, agent_name: Optional[str] = None) -> int:
         """
@@ -193,24 +494,13 @@ class CacheManager:
         Returns:
             Number of entries cleared
         """
-        with self.lock:
-            cleared_count = 0
-            keys_to_remove = []
-            
-            for cache_key, entry in self.metadata.items():
-                if agent_name is None or entry.get('agent_name') == agent_name:
-                    cache_file = self._get_cache_file_path(cache_key)
-                    if cache_file.exists():
-                        cache_file.unlink()
-                    keys_to_remove.append(cache_key)
-                    cleared_count += 1
-            
-            # Remove from metadata
-            for key in keys_to_remove:
-                del self.metadata[key]
-            
-            self._save_metadata()
-            return cleared_count
+        cleared = self.backend.clear(agent_name)
+        self.memory.clear(agent_name)
+        return cleared
+    
+    async def aclear(self, agent_name: Optional[str] = None) -> int:
+        """``clear`` for async callers; runs on the cache I/O pool."""
+        return await run_io(self.clear, agent_name)
     
     def clear_expired(self) -> int:
         """
@@ -219,24 +509,34 @@ class CacheManager:
         Returns:
             Number of expired entries removed
         """
-        with self.lock:
-            cleared_count = 0
-            keys_to_remove = []
-            
-            for cache_key in list(self.metadata.keys()):
-                if self._is_expired(cache_key):
-                    cache_file = self._get_cache_file_path(cache_key)
-                    if cache_file.exists():
-                        cache_file.unlink()
-                    keys_to_remove.append(cache_key)
-                    cleared_count += 1
-            
-            # Remove from metadata
-            for key in keys_to_remove:
-                del self.metadata[key]
-            
-            self._save_metadata()
-            return cleared_count
+        now = time.time()
+        self.memory.clear_expired(now)
+        with self.maintenance_lock:
+            return self.backend.clear_expired(now)
+    
+    def sweep_expired(self, limit: int = 200) -> Tuple[int, int, bool]:
+        """
+        Remove up to ``limit`` expired entries (background maintenance).
+        
+        Returns:
+            (entries removed, bytes reclaimed, whether more may be left)
+        """
+        now = time.time()
+        self.memory.clear_expired(now)
+        with self.maintenance_lock:
+            removed, reclaimed = self.backend.sweep_expired(now, limit)
+        return removed, reclaimed, removed >= limit
+    
+    def compact(self) -> int:
+        """Write buffered access records and compact storage; returns bytes reclaimed."""
+        with self.maintenance_lock:
+            self._flush_touches()
+            return self.backend.compact(COMPACT_MAX_PAGES)
+    
+    def verify(self) -> bool:
+        """Check (and where possible repair) storage integrity."""
+        with self.maintenance_lock:
+            return self.backend.verify()
     
     def get_stats(self) -> Dict[str, Any]:
         """
@@ -245,23 +545,51 @@ class CacheManager:
         Returns:
             Dictionary with cache statistics
         """
+        stats = self.backend.stats(time.time())
         with self.lock:
-            total_entries = len(self.metadata)
-            expired_count = sum(1 for key in self.metadata if self._is_expired(key))
-            
-            # Count by agent
-            agent_counts = {}
-            for entry in self.metadata.values():
-                agent_name = entry.get('agent_name', 'unknown')
-                agent_counts[agent_name] = agent_counts.get(agent_name, 0) + 1
-            
-            return {
-                'total_entries': total_entries,
-                'active_entries': total_entries - expired_count,
-                'expired_entries': expired_count,
-                'entries_by_agent': agent_counts,
-                'cache_dir': str(self.cache_dir)
+            memory_hits, disk_hits, misses = (
+                self.counters['memory_hits'], self.counters['disk_hits'], self.counters['misses']
+            )
+            stale = {
+                'hits': self.counters['stale_hits'],
+                'refreshes': self.counters['refreshes'],
+                'refresh_failures': self.counters['refresh_failures'],
+                'refreshes_elsewhere': self.counters['refreshes_elsewhere'],
+                'refreshing': len(self._refreshing),
+                'grace_seconds': {name: grace for name, (_, grace) in self._refreshers.items()}
+            }
+        lookups = memory_hits + disk_hits + misses
+        disk_lookups = disk_hits + misses
+        
+        return {
+            'total_entries': stats['total'],
+            'active_entries': stats['total'] - stats['expired'],
+            'expired_entries': stats['expired'],
+            'negative_entries': stats['negative'],
+            'negative_ttl_seconds': self.negative_ttl_seconds,
+            'entries_by_agent': stats['by_agent'],
+            'total_bytes': stats['total_bytes'],
+            'max_bytes': self.max_bytes,
+            'max_entries': self.max_entries,
+            'eviction_policy': self.eviction_policy,
+            'evictions': stats['evictions'],
+            'backend': self.backend.name,
+            'cache_dir': str(self.cache_dir),
+            'lookups': lookups,
+            'hit_ratio': round((memory_hits + disk_hits) / lookups, 4) if lookups else 0.0,
+            'stale_while_revalidate': stale,
+            'tiers': {
+                'memory': {
+                    **self.memory.get_stats(),
+                    'hits': memory_hits,
+                    'hit_ratio': round(memory_hits / lookups, 4) if lookups else 0.0
+                },
+                'disk': {
+                    'hits': disk_hits,
+                    'hit_ratio': round(disk_hits / disk_lookups, 4) if disk_lookups else 0.0
+                }
             }
+        }
 
 
 # Singleton instance
@@ -270,14 +598,16 @@ _cache_manager_instance: Optional[CacheManager] = None
 
 def get_cache_manager(
     cache_dir: str = "agent_cache", 
-    default_ttl_hours: int = 24
+    default_ttl_hours: Optional[int] = None
 ) -> CacheManager:
     """
     Get or create the singleton cache manager instance.
     
     Args:
-        cache_dir: Directory to store cache files
+        cache_dir: Directory to store cache files (the AGENT_CACHE_DIR
+            environment variable, when set, takes precedence)
         default_ttl_hours: Default time-to-live for cache entries in hours
+            (defaults to CACHE_TTL_HOURS)
         
     Returns:
         CacheManager instance
@@ -285,6 +615,7 @@ def get_cache_manager(
     global _cache_manager_instance
     
     if _cache_manager_instance is None:
+        cache_dir = os.getenv("AGENT_CACHE_DIR") or cache_dir
         _cache_manager_instance = CacheManager(cache_dir, default_ttl_hours)
     
     return _cache_manager_instance
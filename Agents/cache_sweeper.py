@@ -0,0 +1,189 @@
+"""
+Background Cache Maintenance
+============================
+Moves cache housekeeping off the request path: an asyncio task started with
+the web app sweeps expired entries in small batches, compacts storage and
+verifies integrity, so ``get`` only compares expiry times and never writes.
+
+Features:
+- Interval and per-sweep I/O budget (batches and seconds) from the environment
+- Storage work runs on the cache I/O pool (see cache_io.py), so the event
+  loop is never blocked and agent calls on the default executor never wait
+- Sweep duration, removed entries and reclaimed bytes as Prometheus metrics
+
+A cache needs ``sweep_expired(limit) -> (removed, reclaimed_bytes, more)``,
+``compact() -> reclaimed_bytes`` and ``verify() -> bool``.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+
+from cache_io import run_io
+
+# Seconds between sweeps
+SWEEP_INTERVAL_SECONDS = float(os.getenv("CACHE_SWEEP_INTERVAL_SECONDS", "300"))
+# Entries examined per batch, and batches per sweep at most
+SWEEP_BATCH = int(os.getenv("CACHE_SWEEP_BATCH", "200"))
+SWEEP_MAX_BATCHES = int(os.getenv("CACHE_SWEEP_MAX_BATCHES", "10"))
+# Wall-clock budget of one sweep; the rest waits for the next one
+SWEEP_MAX_SECONDS = float(os.getenv("CACHE_SWEEP_MAX_SECONDS", "2"))
+# Integrity check every N sweeps
+VERIFY_EVERY = int(os.getenv("CACHE_VERIFY_EVERY", "12"))
+
+
+class CacheSweeper:
+    """
+    Periodic maintenance for one cache.
+    """
+
+    def __init__(
+        self,
+        cache: Any,
+        name: str,
+        interval: Optional[float] = None,
+        batch: Optional[int] = None,
+        max_batches: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        verify_every: Optional[int] = None
+    ):
+        """
+        Args:
+            cache: Cache manager to maintain
+            name: Label for logs and metrics
+            interval: Seconds between sweeps
+            batch: Entries per batch
+            max_batches: Batches per sweep at most
+            max_seconds: Time budget per sweep
+            verify_every: Run the integrity check every N sweeps
+        """
+        self.cache = cache
+        self.name = name
+        self.interval = interval if interval is not None else SWEEP_INTERVAL_SECONDS
+        self.batch = batch or SWEEP_BATCH
+        self.max_batches = max_batches or SWEEP_MAX_BATCHES
+        self.max_seconds = max_seconds if max_seconds is not None else SWEEP_MAX_SECONDS
+        self.verify_every = verify_every or VERIFY_EVERY
+        self._task: Optional[asyncio.Task] = None
+        self.counters = {
+            "sweeps": 0,
+            "removed": 0,
+            "reclaimed_bytes": 0,
+            "duration_seconds": 0.0,
+            "errors": 0
+        }
+        self.last_duration = 0.0
+        self.integrity_ok = True
+
+    async def sweep_once(self) -> Dict[str, Any]:
+        """Run one budgeted sweep; returns what it did."""
+        started = time.monotonic()
+        removed = reclaimed = 0
+        for _ in range(self.max_batches):
+            count, freed, more = await run_io(self.cache.sweep_expired, self.batch)
+            removed += count
+            reclaimed += freed
+            if not more or time.monotonic() - started >= self.max_seconds:
+                break
+        reclaimed += await run_io(self.cache.compact)
+
+        self.counters["sweeps"] += 1
+        verified = self.counters["sweeps"] % self.verify_every == 0
+        if verified:
+            self.integrity_ok = await run_io(self.cache.verify)
+            if not self.integrity_ok:
+                print(f"⚠️ [{self.name}] Cache integrity check found problems (repaired where possible)")
+
+        self.last_duration = time.monotonic() - started
+        self.counters["removed"] += removed
+        self.counters["reclaimed_bytes"] += reclaimed
+        self.counters["duration_seconds"] += self.last_duration
+        if removed or reclaimed:
+            print(f"🧹 [{self.name}] Swept {removed} expired entries, reclaimed "
+                  f"{reclaimed / 1024:.1f} KB in {self.last_duration:.2f}s")
+        return {
+            "removed": removed,
+            "reclaimed_bytes": reclaimed,
+            "verified": verified,
+            "seconds": self.last_duration
+        }
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.counters["errors"] += 1
+                print(f"Warning: Cache sweep for {self.name} failed: {e}")
+
+    def start(self) -> None:
+        """Start sweeping in the running event loop (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name=f"cache-sweeper-{self.name}")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval_seconds": self.interval,
+            "batch": self.batch,
+            "max_batches": self.max_batches,
+            "max_seconds": self.max_seconds,
+            "last_duration_seconds": round(self.last_duration, 4),
+            "integrity_ok": self.integrity_ok,
+            **self.counters
+        }
+
+
+# One sweeper per cache, by name
+_sweepers: Dict[str, CacheSweeper] = {}
+
+
+def get_cache_sweeper(cache: Any, name: str) -> CacheSweeper:
+    """
+    Get or create the process-wide sweeper for a named cache.
+
+    Args:
+        cache: Cache manager to maintain
+        name: Label for logs and metrics
+    """
+    if name not in _sweepers:
+        _sweepers[name] = CacheSweeper(cache, name)
+    return _sweepers[name]
+
+
+def get_sweeper_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: sweeper.get_stats() for name, sweeper in _sweepers.items()}
+
+
+def render_sweeper_metrics() -> str:
+    """Sweep counters and durations in Prometheus text format."""
+    metrics = (
+        ("cache_sweeps_total", "counter", "Completed cache sweeps.",
+         lambda s: s.counters["sweeps"]),
+        ("cache_sweep_duration_seconds_total", "counter", "Time spent sweeping.",
+         lambda s: round(s.counters["duration_seconds"], 6)),
+        ("cache_sweep_last_duration_seconds", "gauge", "Duration of the latest sweep.",
+         lambda s: round(s.last_duration, 6)),
+        ("cache_sweep_removed_entries_total", "counter", "Expired entries removed by sweeps.",
+         lambda s: s.counters["removed"]),
+        ("cache_sweep_reclaimed_bytes_total", "counter", "Bytes reclaimed by sweeps and compaction.",
+         lambda s: s.counters["reclaimed_bytes"]),
+        ("cache_integrity_ok", "gauge", "Result of the latest integrity check (1 = ok).",
+         lambda s: int(s.integrity_ok)),
+    )
+    lines = []
+    for metric, kind, help_text, value in metrics:
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        for name, sweeper in _sweepers.items():
+            lines.append(f'{metric}{{cache="{name}"}} {value(sweeper)}')
+    return "\n".join(lines) + "\n"
@@ -25,10 +25,15 @@ def show_stats():
     print("=" * 50)
     
     stats = cache.get_stats()
-    print(f"Cache Directory: {stats['cache_dir']}")
+    print(f"Cache Directory: {stats['cache_dir']} ({stats['backend']} backend)")
     print(f"Total Entries: {stats['total_entries']}")
     print(f"Active Entries: {stats['active_entries']}")
     print(f"Expired Entries: {stats['expired_entries']}")
+    print(f"Negative Entries: {stats['negative_entries']} "
+          f"(failures, kept {stats['negative_ttl_seconds']:.0f}s)")
+    print(f"Stored Size: {stats['total_bytes'] / 1024:.1f} KB "
+          f"(cap {stats['max_bytes'] / 1024 / 1024:.0f} MB, {stats['max_entries']} entries)")
+    print(f"Evictions: {stats['evictions']} ({stats['eviction_policy'].upper()})")
     
     if stats['entries_by_agent']:
         print("\n📁 Entries by Agent:")
@@ -0,0 +1,22 @@
+"""
+Shared pytest setup for the Agents tests
+"""
+import os
+import shutil
+import tempfile
+
+_cache_dir = None
+
+
+def pytest_configure(config):
+    """Point module-level cache managers at a scratch directory before any test module imports them."""
+    global _cache_dir
+    if "AGENT_CACHE_DIR" not in os.environ:
+        _cache_dir = tempfile.mkdtemp(prefix="agent_cache_")
+        os.environ["AGENT_CACHE_DIR"] = _cache_dir
+
+
+def pytest_unconfigure(config):
+    if _cache_dir is not None:
+        os.environ.pop("AGENT_CACHE_DIR", None)
+        shutil.rmtree(_cache_dir, ignore_errors=True)
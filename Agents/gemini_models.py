@@ -0,0 +1,62 @@
+"""
+Gemini model helpers for ADK agents
+Builds Gemini models bound to an explicit API key so agents never have to
+share (or overwrite) the process-wide GOOGLE_API_KEY.
+"""
+from typing import Dict, Iterable, Optional, Tuple
+
+from google.adk.agents import Agent
+from google.adk.models.google_llm import Gemini
+
+from cache_keys import cache_version
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+# (agent name, api key) -> agent clone using that key
+_agents_by_key: Dict[Tuple[str, str], Agent] = {}
+
+
+def gemini_model(api_key: Optional[str], model: str = DEFAULT_MODEL):
+    """
+    Gemini model for an agent, bound to ``api_key``.
+
+    Falls back to the plain model name (ADK's default environment lookup)
+    when no key is given.
+    """
+    if not api_key:
+        return model
+    return Gemini(model=model, client_kwargs={"api_key": api_key})
+
+
+def model_name(agent: Agent) -> str:
+    """Model id an agent runs on."""
+    model = agent.model.model if isinstance(agent.model, Gemini) else agent.model
+    return model or DEFAULT_MODEL
+
+
+def agent_cache_version(
+    *agents: Agent, prompts: Iterable[str] = (), rules: str = ""
+) -> str:
+    """
+    Cache version tag for results produced by ``agents``: their model ids
+    and instructions, extra prompt templates and the static rule version.
+    The API key an agent runs on is not part of it.
+    """
+    models = ",".join(sorted({model_name(agent) for agent in agents}))
+    instructions = [agent.instruction for agent in agents if isinstance(agent.instruction, str)]
+    return cache_version(models, [*instructions, *prompts], rules)
+
+
+def agent_for_key(agent: Agent, api_key: Optional[str]) -> Agent:
+    """
+    Same agent (instruction, tools, description) running on ``api_key``.
+    Clones are cached per key, so repeated calls reuse one client.
+    """
+    if not api_key:
+        return agent
+    cache_key = (agent.name, api_key)
+    clone = _agents_by_key.get(cache_key)
+    if clone is None:
+        clone = agent.clone(update={"model": gemini_model(api_key, model_name(agent))})
+        _agents_by_key[cache_key] = clone
+    return clone
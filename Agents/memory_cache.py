@@ -0,0 +1,130 @@
+"""
+In-Process LRU Cache Tier
+=========================
+Bounded memory tier that sits in front of a persistent cache, so entries
+read again within a review are served without disk I/O.
+
+Features:
+- LRU eviction bounded by entry count and total bytes
+- Entries keep the expiry time of their persistent copy
+- Each hit returns a private copy (entries are held as minified JSON text)
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import cache_codec
+
+# Upper bounds for the memory tier; 0 disables it
+MEMORY_CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MEMORY_MAX_ENTRIES", "1024"))
+MEMORY_CACHE_MAX_BYTES = int(os.getenv("CACHE_MEMORY_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Returned by get() on a miss (a cached response may itself be None)
+MISS = object()
+
+
+class MemoryCache:
+    """
+    Thread-safe LRU map of cache key -> (agent, JSON text, expiry time).
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        """
+        Args:
+            max_entries: Most entries kept (defaults to CACHE_MEMORY_MAX_ENTRIES)
+            max_bytes: Most bytes of JSON text kept (defaults to CACHE_MEMORY_MAX_BYTES)
+        """
+        self.max_entries = max_entries if max_entries is not None else MEMORY_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes if max_bytes is not None else MEMORY_CACHE_MAX_BYTES
+        self.lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, str, float]]" = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, key: str, now: Optional[float] = None) -> Any:
+        """Cached response for ``key``, or MISS if absent or expired."""
+        with self.lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISS
+            if (now or time.time()) > entry[2]:
+                self._pop(key)
+                return MISS
+            self._entries.move_to_end(key)
+            payload = entry[1]
+        return json.loads(payload)
+
+    def put(
+        self,
+        key: str,
+        agent_name: str,
+        response: Any,
+        expiry_time: float,
+        payload: Optional[str] = None
+    ) -> None:
+        """
+        Store a response, evicting least recently used entries to stay in bounds.
+
+        Args:
+            key: Cache key
+            agent_name: Agent the entry belongs to (for per-agent clears)
+            response: Response to keep
+            expiry_time: Same expiry as the persistent copy
+            payload: Already serialized response, if the caller has it
+        """
+        if not self.enabled:
+            return
+        if payload is None:
+            payload = cache_codec.dumps(response)
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            self._pop(key)
+            self._entries[key] = (agent_name, payload, expiry_time)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._pop(oldest)
+                self.evictions += 1
+
+    def _pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def delete(self, key: str) -> None:
+        with self.lock:
+            self._pop(key)
+
+    def clear(self, agent_name: Optional[str] = None) -> None:
+        """Drop all entries, or those of one agent."""
+        with self.lock:
+            for key, entry in list(self._entries.items()):
+                if agent_name is None or entry[0] == agent_name:
+                    self._pop(key)
+
+    def clear_expired(self, now: Optional[float] = None) -> None:
+        now = now or time.time()
+        with self.lock:
+            for key, entry in list(self._entries.items()):
+                if now > entry[2]:
+                    self._pop(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions
+            }
@@ -3,7 +3,7 @@ import asyncio
 import sys
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import json
 import logging
 import warnings
@@ -14,39 +14,42 @@ env_path = Path(__file__).parent.parent.parent / ".env.local"
 load_dotenv(dotenv_path=env_path)
 
 from google.adk.agents import Agent
-from google.adk.sessions import InMemorySessionService
-from google.adk.runners import Runner
 from google.genai import types
 
 # Add parent directories to path to import worker agents and cache_manager
 sys.path.append(str(Path(__file__).parent.parent))
 
 # Import cache manager
-from cache_manager import get_cache_manager
+from cache_manager import get_cache_manager, is_failed_response
+from gemini_models import agent_cache_version, agent_for_key
+from session_manager import SessionManager, get_session_manager
+from report_encoder import encode_report
 
 # Import worker agents
 from workers_agents.Runtime_Validator import (
+    CACHE_VERSION as RUNTIME_CACHE_VERSION,
     runtime_validator_agent,
     detect_syntax_errors,
     detect_infinite_loops,
 )
 from workers_agents.Security_Auditor import (
     security_auditor,
+    security_triage_agent,
+    SecurityTriage,
+    run_all_scans,
     scan_hardcoded_secrets,
     scan_sql_injection,
     scan_vulnerable_dependencies,
     scan_security_antipatterns,
 )
+from workers_agents.security_scanners import RULES_VERSION as SCANNER_RULES_VERSION
 
 # Suppress warnings and configure logging
 warnings.filterwarnings("ignore")
 logging.basicConfig(level=logging.ERROR)
 
 # Initialize cache manager
-cache_manager = get_cache_manager(
-    cache_dir=str(Path(__file__).parent.parent / "agent_cache"),
-    default_ttl_hours=24
-)
+cache_manager = get_cache_manager(cache_dir=str(Path(__file__).parent.parent / "agent_cache"))
 print(f"INFO: Cache manager initialized at {cache_manager.cache_dir}")
 
 """
@@ -66,8 +69,32 @@ The orchestral agent coordinates these workers and provides a unified report.
 
 APP_NAME = "code_audit_orchestrator"
 USER_ID = "orchestrator_user"
-RUNTIME_SESSION_ID = "runtime_validation_session"
-SECURITY_SESSION_ID = "security_audit_session"
+
+# "fast": run the scanners in Python and make at most one triage LLM call
+# "agent": let the LLM drive every scanner tool (one round trip per tool)
+SECURITY_AUDIT_MODE = os.getenv("SECURITY_AUDIT_MODE", "fast")
+
+SECURITY_AGENT_QUERY = """
+Please conduct a comprehensive security audit of this code:
+
+{code}
+
+Run all security checks:
+1. Scan for hardcoded secrets
+2. Check for SQL injection vulnerabilities
+3. Identify vulnerable dependencies
+4. Detect security anti-patterns
+
+Return the final JSON report from generate_security_summary.
+"""
+
+# Cache version tags per security mode (models, prompts, scanner rules)
+SECURITY_CACHE_VERSIONS = {
+    "agent": agent_cache_version(
+        security_auditor, prompts=(SECURITY_AGENT_QUERY,), rules=SCANNER_RULES_VERSION
+    ),
+    "fast": agent_cache_version(security_triage_agent, rules=SCANNER_RULES_VERSION),
+}
 
 
 # =========================================================
@@ -133,9 +160,18 @@ def write_consolidated_report(
 # AGENT INTERACTION FUNCTIONS
 # =========================================================
 
+def _cache_input(code_content: str, scan_content: Optional[str]) -> str:
+    """Cache input covering both the prompt text and the text the scanners saw."""
+    if scan_content is None or scan_content == code_content:
+        return code_content
+    return f"{scan_content}\n{code_content}"
+
+
 async def run_runtime_validation(
     code_content: str,
-    session_service: InMemorySessionService
+    sessions: Optional[SessionManager] = None,
+    api_key: Optional[str] = None,
+    scan_content: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Runs the Runtime Validator agent on the provided code.
@@ -143,7 +179,10 @@ async def run_runtime_validation(
     
     Args:
         code_content: The code to validate
-        session_service: ADK session service
+        sessions: Session manager to run in (defaults to the app's shared one)
+        api_key: Gemini API key to run on (defaults to the agent's own key)
+        scan_content: Full text for the static checks when ``code_content`` is
+            trimmed for the LLM prompt (defaults to ``code_content``)
         
     Returns:
         Dictionary containing validation results
@@ -153,36 +192,31 @@ async def run_runtime_validation(
     print("="*80)
     
     agent_name = "orchestral_runtime_validator"
+    cache_input = _cache_input(code_content, scan_content)
     
     # Check cache first
-    cached_response = cache_manager.get(agent_name, code_content)
+    cached_response = await cache_manager.aget(agent_name, cache_input, version=RUNTIME_CACHE_VERSION)
     if cached_response is not None:
+        if is_failed_response(cached_response):
+            print(f"⚠️ Negative cache HIT for {agent_name} - returning recent failure")
+            return cached_response
         print(f"✅ Cache HIT for {agent_name}")
         print(f"✅ Runtime validation complete: {cached_response.get('total_issues', 0)} total issue(s)")
         return cached_response
     
     print(f"⚠️ Cache MISS for {agent_name} - calling Google ADK API")
     
-    # Create session for runtime validation
-    await session_service.create_session(
-        app_name=APP_NAME,
-        user_id=USER_ID,
-        session_id=RUNTIME_SESSION_ID
-    )
+    sessions = sessions or get_session_manager(APP_NAME)
     
-    # Run static checks first
+    # Run static checks first, on everything (only the LLM prompt is trimmed)
     static_issues = []
-    static_issues.extend(detect_syntax_errors(code_content))
-    static_issues.extend(detect_infinite_loops(code_content))
+    static_issues.extend(detect_syntax_errors(scan_content or code_content))
+    static_issues.extend(detect_infinite_loops(scan_content or code_content))
     
     print(f"✅ Static analysis complete: {len(static_issues)} issue(s) found")
     
-    # Create runner for runtime validator
-    runner = Runner(
-        agent=runtime_validator_agent,
-        app_name=APP_NAME,
-        session_service=session_service
-    )
+    # Shared runner for runtime validator
+    runner = sessions.runner_for(agent_for_key(runtime_validator_agent, api_key))
     
     # Prepare user message
     user_content = types.Content(
@@ -193,21 +227,22 @@ async def run_runtime_validation(
     llm_issues = []
     print("🤖 Running LLM-based runtime analysis...")
     
-    # Run agent and collect results
-    async for event in runner.run_async(
-        user_id=USER_ID,
-        session_id=RUNTIME_SESSION_ID,
-        new_message=user_content
-    ):
-        if event.is_final_response():
-            if event.content and event.content.parts:
-                for part in event.content.parts:
-                    try:
-                        parsed = json.loads(part.text)
-                        llm_issues.extend(parsed.get("issues", []))
-                    except json.JSONDecodeError:
-                        # If not JSON, treat as descriptive text
-                        pass
+    # Run agent in a fresh session and collect results
+    async with sessions.session(USER_ID, "runtime") as session_id:
+        async for event in runner.run_async(
+            user_id=USER_ID,
+            session_id=session_id,
+            new_message=user_content
+        ):
+            if event.is_final_response():
+                if event.content and event.content.parts:
+                    for part in event.content.parts:
+                        try:
+                            parsed = json.loads(part.text)
+                            llm_issues.extend(parsed.get("issues", []))
+                        except json.JSONDecodeError:
+                            # If not JSON, treat as descriptive text
+                            pass
     
     # Combine all issues
     all_issues = static_issues + llm_issues
@@ -220,71 +255,24 @@ async def run_runtime_validation(
     }
     
     # Cache the result
-    cache_manager.set(agent_name, code_content, result)
+    await cache_manager.aset(agent_name, cache_input, result, version=RUNTIME_CACHE_VERSION)
     
     print(f"✅ Runtime validation complete: {len(all_issues)} total issue(s)")
     
     return result
 
 
-async def run_security_audit(
+async def _run_security_agent(
     code_content: str,
-    session_service: InMemorySessionService
+    sessions: SessionManager,
+    api_key: Optional[str]
 ) -> Dict[str, Any]:
-    """
-    Runs the Security Auditor agent on the provided code.
-    Now includes caching to handle rate limits.
-    
-    Args:
-        code_content: The code to audit
-        session_service: ADK session service
-        
-    Returns:
-        Dictionary containing the security audit results
-    """
-    print("\n" + "="*80)
-    print("🔒 STARTING SECURITY AUDIT")
-    print("="*80)
-    
-    agent_name = "orchestral_security_auditor"
-    
-    # Check cache first
-    cached_response = cache_manager.get(agent_name, code_content)
-    if cached_response is not None:
-        print(f"✅ Cache HIT for {agent_name}")
-        print("✅ Security audit complete")
-        return cached_response
-    
-    print(f"⚠️ Cache MISS for {agent_name} - calling Google ADK API")
-    
-    # Create session for security audit
-    await session_service.create_session(
-        app_name=APP_NAME,
-        user_id=USER_ID,
-        session_id=SECURITY_SESSION_ID
-    )
-    
-    # Create runner for security auditor
-    runner = Runner(
-        agent=security_auditor,
-        app_name=APP_NAME,
-        session_service=session_service
-    )
+    """Tool-driven audit: the LLM calls each scanner and the summary tool."""
+    # Shared runner for security auditor
+    runner = sessions.runner_for(agent_for_key(security_auditor, api_key))
     
     # Prepare the security audit query
-    query = f"""
-Please conduct a comprehensive security audit of this code:
-
-{code_content}
-
-Run all security checks:
-1. Scan for hardcoded secrets
-2. Check for SQL injection vulnerabilities
-3. Identify vulnerable dependencies
-4. Detect security anti-patterns
-
-Return the final JSON report from generate_security_summary.
-"""
+    query = SECURITY_AGENT_QUERY.format(code=code_content)
     
     user_content = types.Content(
         role="user",
@@ -294,17 +282,18 @@ Return the final JSON report from generate_security_summary.
     responses = []
     print("🤖 Running security analysis...")
     
-    # Run agent and collect responses
-    async for event in runner.run_async(
-        user_id=USER_ID,
-        session_id=SECURITY_SESSION_ID,
-        new_message=user_content
-    ):
-        if event.is_final_response():
-            if event.content and event.content.parts:
-                for part in event.content.parts:
-                    if hasattr(part, 'text') and part.text:
-                        responses.append(part.text)
+    # Run agent in a fresh session and collect responses
+    async with sessions.session(USER_ID, "security") as session_id:
+        async for event in runner.run_async(
+            user_id=USER_ID,
+            session_id=session_id,
+            new_message=user_content
+        ):
+            if event.is_final_response():
+                if event.content and event.content.parts:
+                    for part in event.content.parts:
+                        if hasattr(part, 'text') and part.text:
+                            responses.append(part.text)
     
     # Try to parse JSON from responses
     security_result = {
@@ -324,8 +313,111 @@ Return the final JSON report from generate_security_summary.
         except json.JSONDecodeError:
             continue
     
-    # Cache the result
-    cache_manager.set(agent_name, code_content, security_result)
+    return security_result
+
+
+async def _run_security_triage(
+    code_content: str,
+    sessions: SessionManager,
+    api_key: Optional[str]
+) -> Dict[str, Any]:
+    """
+    Deterministic-first audit: the scanners run directly in Python and a
+    single structured-output call triages their compact findings table.
+    Clean scans need no LLM call at all. ``code_content`` is the full text:
+    the LLM only sees the findings.
+    """
+    security_result = run_all_scans(code_content)
+    security_result["mode"] = "fast"
+    print(f"✅ Security scanners complete: {security_result['total_issues']} issue(s) found")
+    
+    if not security_result["total_issues"]:
+        security_result["llm_analysis"] = {"summary": "No findings from the security scanners."}
+        return security_result
+    
+    runner = sessions.runner_for(agent_for_key(security_triage_agent, api_key))
+    user_content = types.Content(
+        role="user",
+        parts=[types.Part(text=encode_report(security_result))]
+    )
+    
+    reply = ""
+    print("🤖 Triaging scanner findings (single LLM call)...")
+    async with sessions.session(USER_ID, "security_triage") as session_id:
+        async for event in runner.run_async(
+            user_id=USER_ID,
+            session_id=session_id,
+            new_message=user_content
+        ):
+            if event.is_final_response() and event.content and event.content.parts:
+                reply = "".join(part.text for part in event.content.parts if part.text)
+    
+    try:
+        triage = SecurityTriage.model_validate_json(reply).model_dump()
+    except ValueError:
+        triage = {"summary": reply.strip() or "LLM triage returned no summary"}
+    security_result["llm_analysis"] = triage
+    return security_result
+
+
+async def run_security_audit(
+    code_content: str,
+    sessions: Optional[SessionManager] = None,
+    api_key: Optional[str] = None,
+    mode: Optional[str] = None,
+    scan_content: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Runs the Security Auditor agent on the provided code.
+    Now includes caching to handle rate limits.
+    
+    Args:
+        code_content: The code to audit
+        sessions: Session manager to run in (defaults to the app's shared one)
+        api_key: Gemini API key to run on (defaults to the agent's own key)
+        mode: "fast" (scanners + one triage call) or "agent" (tool-driven);
+            defaults to SECURITY_AUDIT_MODE
+        scan_content: Full text for the scanners when ``code_content`` is
+            trimmed for the LLM prompt (defaults to ``code_content``)
+        
+    Returns:
+        Dictionary containing the security audit results
+    """
+    print("\n" + "="*80)
+    print("🔒 STARTING SECURITY AUDIT")
+    print("="*80)
+    
+    mode = mode or SECURITY_AUDIT_MODE
+    sessions = sessions or get_session_manager(APP_NAME)
+    agent_name = "orchestral_security_auditor" if mode == "agent" else "orchestral_security_triage"
+    version = SECURITY_CACHE_VERSIONS["agent" if mode == "agent" else "fast"]
+    cache_input = _cache_input(code_content, scan_content)
+    
+    # Check cache first
+    cached_response = await cache_manager.aget(agent_name, cache_input, version=version)
+    if cached_response is not None:
+        if is_failed_response(cached_response):
+            print(f"⚠️ Negative cache HIT for {agent_name} - returning recent failure")
+            return cached_response
+        print(f"✅ Cache HIT for {agent_name}")
+        print("✅ Security audit complete")
+        return cached_response
+    
+    print(f"⚠️ Cache MISS for {agent_name} - calling Google ADK API")
+    
+    if mode == "agent":
+        security_result = await _run_security_agent(code_content, sessions, api_key)
+        if scan_content and scan_content != code_content and not is_failed_response(security_result):
+            # The agent's scanner calls only saw the prompt; findings come from everything
+            full_scan = run_all_scans(scan_content)
+            security_result.update({
+                key: full_scan[key] for key in ("status", "total_issues", "scans", "summary")
+            })
+    else:
+        security_result = await _run_security_triage(scan_content or code_content, sessions, api_key)
+    
+    # Cache the result (an unparsed "unknown" result only briefly, as a failure)
+    await cache_manager.aset(agent_name, cache_input, security_result, version=version)
     
     print("✅ Security audit complete")
     
@@ -351,19 +443,16 @@ async def orchestrate_code_audit(filename: str = "sample.py"):
     print("="*80)
     
     try:
-        # Initialize session service
-        session_service = InMemorySessionService()
-        
         # Read the code file
         print(f"\n📖 Reading {filename}...")
         code_content = read_sample_file(filename)
         print(f"✅ Successfully read {len(code_content)} characters")
         
         # Run Runtime Validation
-        runtime_result = await run_runtime_validation(code_content, session_service)
+        runtime_result = await run_runtime_validation(code_content)
         
         # Run Security Audit
-        security_result = await run_security_audit(code_content, session_service)
+        security_result = await run_security_audit(code_content)
         
         # Display results
         print("\n" + "="*80)
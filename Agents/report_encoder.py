@@ -0,0 +1,313 @@
+"""
+Compact Report Encoder for LLM Prompts
+======================================
+Turns security / runtime agent reports into a terse tabular form before they
+are embedded in a synthesis prompt, instead of pasting ``json.dumps(indent=2)``.
+
+Features:
+- Understands the scan-based reports (``scans[].issues``), Groq vulnerability
+  reports (``vulnerabilities``) and runtime reports (``issues`` / ``steps``)
+- Dedupes identical findings and groups them by rule and file with counts,
+  keeping every line number and each distinct detail / snippet of the group
+- Keeps the top-K groups by severity, with truncated code snippets
+- Lists each distinct recommendation once instead of once per finding
+"""
+
+from typing import Any, Dict, List, Optional
+
+
+DEFAULT_TOP_K = 15
+DEFAULT_SNIPPET_CHARS = 60
+DEFAULT_SUMMARY_CHARS = 300
+# Distinct details / snippets and line numbers listed per group
+DEFAULT_GROUP_SAMPLES = 3
+DEFAULT_GROUP_LINES = 10
+
+SEVERITY_RANK = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3}
+SEVERITY_ABBREV = {"CRITICAL": "CRIT", "HIGH": "HIGH", "MEDIUM": "MED", "LOW": "LOW"}
+
+# Keys that carry the most specific rule name for a scanner finding
+_RULE_KEYS = ("secret_type", "vulnerability_type", "pattern_name", "package")
+
+# Scalar report fields worth keeping in the one-line header
+_HEADER_KEYS = (
+    "status",
+    "total_issues",
+    "is_secure",
+    "final_verdict",
+    "error_recovery_attempted",
+)
+
+
+def _truncate(text: Any, limit: int) -> str:
+    """Collapse whitespace and cut text to ``limit`` characters."""
+    if text is None:
+        return ""
+    text = " ".join(str(text).split())
+    if len(text) <= limit:
+        return text
+    return text[: max(limit - 1, 0)] + "…"
+
+
+def _cell(text: Any, limit: int) -> str:
+    """Table cell: truncated and safe to place between ``|`` separators."""
+    return _truncate(text, limit).replace("|", "/") or "-"
+
+
+def _severity(value: Any) -> str:
+    severity = str(value or "").upper()
+    return severity if severity in SEVERITY_RANK else "LOW"
+
+
+def _line_of(value: Any) -> Optional[int]:
+    """Extract a line number from ``12`` or ``"Line 12"`` style values."""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        digits = "".join(ch for ch in value if ch.isdigit())
+        if digits and value.strip().lower().startswith("line"):
+            return int(digits)
+    return None
+
+
+def collect_findings(report: Any) -> List[Dict[str, Any]]:
+    """
+    Normalize every finding in a report into a flat list.
+
+    Args:
+        report: Agent report dictionary (any of the supported shapes)
+
+    Returns:
+        List of findings with rule, file, severity, line, detail, snippet and fix
+    """
+    if not isinstance(report, dict):
+        return []
+
+    findings = []
+
+    # Scan-based reports (Security Auditor, ADK and Groq bot variants)
+    for scan in report.get("scans") or []:
+        if not isinstance(scan, dict):
+            continue
+        for issue in scan.get("issues") or []:
+            rule = next((issue[k] for k in _RULE_KEYS if issue.get(k)), None)
+            findings.append({
+                "rule": rule or issue.get("type") or scan.get("scan_type", "finding"),
+                "file": issue.get("file_path") or issue.get("file"),
+                "severity": _severity(issue.get("severity")),
+                "line": _line_of(issue.get("line")),
+                "detail": issue.get("description") or issue.get("vulnerable_version"),
+                "snippet": issue.get("code_snippet"),
+                "fix": issue.get("recommendation"),
+            })
+
+    # Groq-style vulnerability lists
+    for vuln in report.get("vulnerabilities") or []:
+        if not isinstance(vuln, dict):
+            continue
+        findings.append({
+            "rule": vuln.get("type") or "vulnerability",
+            "file": vuln.get("file_path"),
+            "severity": _severity(vuln.get("severity")),
+            "line": _line_of(vuln.get("line_number")),
+            "detail": vuln.get("description"),
+            "snippet": None,
+            "fix": None,
+        })
+
+    # Runtime validator issues
+    for issue in report.get("issues") or []:
+        if not isinstance(issue, dict):
+            continue
+        location = issue.get("location")
+        line = _line_of(location)
+        findings.append({
+            "rule": issue.get("type") or "runtime issue",
+            "file": issue.get("file_path") or (None if line else location),
+            "severity": _severity(issue.get("severity")),
+            "line": line,
+            "detail": issue.get("description"),
+            "snippet": issue.get("code_snippet"),
+            "fix": None,
+        })
+
+    # Runtime validator test steps - only failures are findings
+    for step in report.get("steps") or []:
+        if not isinstance(step, dict) or str(step.get("status", "")).upper() == "PASS":
+            continue
+        findings.append({
+            "rule": step.get("step_name") or "failed step",
+            "file": None,
+            "severity": "MEDIUM",
+            "line": None,
+            "detail": (
+                f"{step.get('description', '')} "
+                f"(expected {step.get('expected_output', '?')}, "
+                f"got {step.get('actual_output', '?')})"
+            ),
+            "snippet": None,
+            "fix": None,
+        })
+
+    return findings
+
+
+def group_findings(findings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Dedupe identical findings and group the rest by (rule, file), keeping
+    each group's line numbers and distinct details and snippets.
+
+    Returns:
+        Groups sorted by severity, then by count (descending)
+    """
+    seen = set()
+    groups: Dict[tuple, Dict[str, Any]] = {}
+
+    for finding in findings:
+        identity = (
+            finding["rule"],
+            finding["file"],
+            finding["line"],
+            finding["detail"],
+            finding["snippet"],
+        )
+        if identity in seen:
+            continue
+        seen.add(identity)
+
+        group_key = (finding["rule"], finding["file"])
+        group = groups.get(group_key)
+        if group is None:
+            group = groups[group_key] = {
+                "rule": finding["rule"],
+                "file": finding["file"],
+                "severity": finding["severity"],
+                "count": 0,
+                "lines": [],
+                "details": [],
+                "snippets": [],
+                "fix": finding["fix"],
+            }
+        group["count"] += 1
+        if finding["line"] is not None and finding["line"] not in group["lines"]:
+            group["lines"].append(finding["line"])
+        if SEVERITY_RANK[finding["severity"]] < SEVERITY_RANK[group["severity"]]:
+            group["severity"] = finding["severity"]
+        for field, values in (("detail", group["details"]), ("snippet", group["snippets"])):
+            if finding[field] and finding[field] not in values:
+                values.append(finding[field])
+        if not group["fix"] and finding["fix"]:
+            group["fix"] = finding["fix"]
+
+    return sorted(
+        groups.values(),
+        key=lambda g: (SEVERITY_RANK[g["severity"]], -g["count"], str(g["rule"])),
+    )
+
+
+def _format_lines(lines: List[int], limit: int = DEFAULT_GROUP_LINES) -> str:
+    if not lines:
+        return "-"
+    ordered = sorted(lines)
+    text = ",".join(str(n) for n in ordered[:limit])
+    if len(ordered) > limit:
+        text += f",+{len(ordered) - limit}"
+    return text
+
+
+def _samples(values: List[Any], chars: int, limit: int) -> str:
+    """Cell listing up to ``limit`` distinct values, each cut to ``chars``."""
+    if not values:
+        return "-"
+    text = " ; ".join(_cell(value, chars) for value in values[:limit])
+    if len(values) > limit:
+        text += f" ; +{len(values) - limit} more"
+    return text
+
+
+def encode_report(
+    report: Any,
+    top_k: int = DEFAULT_TOP_K,
+    snippet_chars: int = DEFAULT_SNIPPET_CHARS,
+    summary_chars: int = DEFAULT_SUMMARY_CHARS,
+    samples: int = DEFAULT_GROUP_SAMPLES,
+) -> str:
+    """
+    Encode an agent report into a compact, LLM-friendly text block.
+
+    Args:
+        report: Agent report dictionary (or plain text, passed through truncated)
+        top_k: Maximum number of finding groups to include
+        snippet_chars: Maximum characters per snippet / detail cell
+        summary_chars: Maximum characters for free-text summaries
+        samples: Distinct details / snippets listed per group
+
+    Returns:
+        Terse tabular representation of the report
+    """
+    if not isinstance(report, dict):
+        return _truncate(report, summary_chars * 4)
+
+    header = []
+    for key in _HEADER_KEYS:
+        if key in report and report[key] is not None:
+            value = report[key]
+            if isinstance(value, bool):
+                value = "yes" if value else "no"
+            header.append(f"{key}={value}")
+    if report.get("steps"):
+        steps = report["steps"]
+        passed = sum(1 for s in steps if str(s.get("status", "")).upper() == "PASS")
+        header.append(f"steps_passed={passed}/{len(steps)}")
+    if report.get("error"):
+        header.append(f"error={_truncate(report['error'], 80)}")
+
+    lines = [" ".join(header) if header else "report"]
+
+    for key in ("summary_reasoning", "recovery_trace"):
+        if report.get(key):
+            lines.append(f"{key}: {_truncate(report[key], summary_chars)}")
+    llm_analysis = report.get("llm_analysis")
+    if isinstance(llm_analysis, dict) and llm_analysis.get("summary"):
+        lines.append(f"summary: {_truncate(llm_analysis['summary'], summary_chars)}")
+
+    groups = group_findings(collect_findings(report))
+    if not groups:
+        lines.append("findings: none")
+        return "\n".join(lines)
+
+    shown = groups[:top_k]
+    lines.append("sev|rule|file|n|lines|details|snippets")
+    for group in shown:
+        lines.append("|".join([
+            SEVERITY_ABBREV[group["severity"]],
+            _cell(group["rule"], 40),
+            _cell(group["file"], 60),
+            str(group["count"]),
+            _format_lines(group["lines"]),
+            _samples(group["details"], snippet_chars, samples),
+            _samples(group["snippets"], snippet_chars, samples),
+        ]))
+
+    omitted = groups[top_k:]
+    if omitted:
+        by_severity: Dict[str, int] = {}
+        for group in omitted:
+            abbrev = SEVERITY_ABBREV[group["severity"]]
+            by_severity[abbrev] = by_severity.get(abbrev, 0) + group["count"]
+        counts = " ".join(f"{sev}={n}" for sev, n in by_severity.items())
+        lines.append(f"+{len(omitted)} more groups omitted ({counts})")
+
+    fixes = []
+    for group in shown:
+        if group["fix"] and group["fix"] not in fixes:
+            fixes.append(group["fix"])
+    for fix in fixes:
+        lines.append(f"fix: {_truncate(fix, summary_chars)}")
+
+    return "\n".join(lines)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token) for budgeting."""
+    return (len(text) + 3) // 4
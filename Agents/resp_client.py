@@ -0,0 +1,152 @@
+"""
+Minimal Redis Protocol Client
+=============================
+Just enough of RESP (the Redis serialization protocol) for the shared cache
+backend: one blocking connection per client, commands and pipelines, no
+extra dependency. Works with Redis, Valkey, KeyDB and compatible services.
+
+URL format: ``redis://[[user]:password@]host[:port][/db]`` (``rediss://``
+for TLS).
+"""
+
+import socket
+import ssl
+import threading
+from typing import Any, List, Optional, Sequence
+from urllib.parse import unquote, urlsplit
+
+
+class RespError(Exception):
+    """Error reply from the server."""
+
+
+class RespClient:
+    """
+    Thread-safe client on one connection, opened lazily and reopened after
+    a network error.
+    """
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        """
+        Args:
+            url: Server URL
+            timeout: Socket timeout in seconds
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in ("redis", "rediss"):
+            raise ValueError(f"Unsupported cache URL scheme: {parts.scheme}")
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 6379
+        self.username = unquote(parts.username) if parts.username else None
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int(parts.path.lstrip("/") or 0)
+        self.tls = parts.scheme == "rediss"
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+
+    def _connect(self) -> None:
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        if self.tls:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=self.host)
+        self._sock = sock
+        self._reader = sock.makefile("rb")
+        if self.password:
+            auth = ("AUTH", self.username, self.password) if self.username else ("AUTH", self.password)
+            self._roundtrip([auth])
+        if self.db:
+            self._roundtrip([("SELECT", self.db)])
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+    def _close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._reader.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = self._reader = None
+
+    @staticmethod
+    def _encode(args: Sequence[Any]) -> bytes:
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if isinstance(arg, bytes):
+                data = arg
+            elif isinstance(arg, str):
+                data = arg.encode("utf-8")
+            else:
+                data = str(arg).encode("ascii")
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(out)
+
+    def _read(self) -> Any:
+        line = self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Connection closed by the cache server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode("utf-8")
+        if kind == b"-":
+            return RespError(body.decode("utf-8"))
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(body)
+            if length < 0:
+                return None
+            return [self._read() for _ in range(length)]
+        raise ConnectionError(f"Unexpected reply from the cache server: {line[:20]!r}")
+
+    def _replies(self, count: int) -> List[Any]:
+        try:
+            replies = [self._read() for _ in range(count)]
+        except (OSError, ConnectionError, ValueError):
+            # The stream is out of step with the commands sent: start over
+            self._close()
+            raise
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    def _roundtrip(self, commands: List[Sequence[Any]]) -> List[Any]:
+        self._sock.sendall(b"".join(self._encode(command) for command in commands))
+        return self._replies(len(commands))
+
+    def pipeline(self, commands: List[Sequence[Any]]) -> List[Any]:
+        """
+        Send several commands in one round trip; returns their replies.
+        Only a failed send on an idle connection is retried, so no command
+        is ever applied twice.
+        """
+        payload = b"".join(self._encode(command) for command in commands)
+        with self._lock:
+            if self._sock is not None:
+                try:
+                    self._sock.sendall(payload)
+                except OSError:
+                    self._close()
+                else:
+                    return self._replies(len(commands))
+            try:
+                self._connect()
+                self._sock.sendall(payload)
+            except (OSError, RespError):
+                self._close()
+                raise
+            return self._replies(len(commands))
+
+    def execute(self, *args: Any) -> Any:
+        """Run one command; error replies raise RespError."""
+        return self.pipeline([args])[0]
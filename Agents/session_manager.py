@@ -0,0 +1,205 @@
+"""
+ADK Session Manager
+===================
+Gives every agent invocation its own short-lived ADK session instead of
+fixed, shared session IDs, so concurrent reviews never share a conversation
+and no history piles up into later prompts.
+
+Features:
+- Unique session per invocation, deleted as soon as the call finishes
+- Bounded session store; sessions whose owning task ended without closing
+  them are evicted, live ones never are (``open`` waits for a free slot)
+- One reusable Runner per agent instead of one per call
+"""
+
+import asyncio
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from google.adk.agents import BaseAgent
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+
+# Seconds before an unclosed session without a known owner task is evicted
+SESSION_TTL_SECONDS = float(os.getenv("ADK_SESSION_TTL_SECONDS", "600"))
+# Sessions kept at most; opening one more waits until a slot frees up
+MAX_SESSIONS = int(os.getenv("ADK_MAX_SESSIONS", "256"))
+# Seconds between capacity checks while waiting for a free slot
+SESSION_WAIT_INTERVAL = float(os.getenv("ADK_SESSION_WAIT_INTERVAL", "0.05"))
+
+
+class SessionManager:
+    """
+    Owns one session service and the runners that use it.
+    """
+
+    def __init__(
+        self,
+        app_name: str,
+        session_service: Optional[InMemorySessionService] = None,
+        ttl_seconds: Optional[float] = None,
+        max_sessions: Optional[int] = None
+    ):
+        """
+        Initialize the session manager.
+
+        Args:
+            app_name: ADK application name for every session and runner
+            session_service: Session service to use (a new in-memory one by default)
+            ttl_seconds: Age after which unclosed sessions without an owner are evicted
+            max_sessions: Upper bound on live sessions
+        """
+        self.app_name = app_name
+        self.session_service = session_service or InMemorySessionService()
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else SESSION_TTL_SECONDS
+        self.max_sessions = max_sessions or MAX_SESSIONS
+        self.lock = threading.Lock()
+
+        # (user_id, session_id) -> (created_at, task that opened it), oldest first
+        self._sessions: "OrderedDict[Tuple[str, str], Tuple[float, Optional[asyncio.Task]]]" = OrderedDict()
+        # id(agent) -> (agent, runner); the agent is kept so its id is not reused
+        self._runners: Dict[int, Tuple[BaseAgent, Runner]] = {}
+        self.counters = {"created": 0, "closed": 0, "evicted": 0, "waited": 0}
+
+    def runner_for(self, agent: BaseAgent) -> Runner:
+        """Get the shared Runner for an agent, creating it on first use."""
+        with self.lock:
+            entry = self._runners.get(id(agent))
+            if entry is None or entry[0] is not agent:
+                runner = Runner(
+                    agent=agent,
+                    app_name=self.app_name,
+                    session_service=self.session_service
+                )
+                entry = (agent, runner)
+                self._runners[id(agent)] = entry
+            return entry[1]
+
+    def _is_abandoned(self, created_at: float, owner: Optional[asyncio.Task], now: float) -> bool:
+        """A session is abandoned once its owner is gone; live calls are never evicted."""
+        if owner is not None:
+            return owner.done()
+        return now - created_at >= self.ttl_seconds
+
+    def _reserve(self, key: Tuple[str, str], owner: Optional[asyncio.Task]) -> Tuple[bool, list]:
+        """Pop abandoned sessions and, if there is room, claim a slot for ``key``."""
+        now = time.time()
+        with self.lock:
+            evicted = [
+                k for k, (created_at, task) in self._sessions.items()
+                if self._is_abandoned(created_at, task, now)
+            ]
+            for k in evicted:
+                del self._sessions[k]
+            self.counters["evicted"] += len(evicted)
+            reserved = len(self._sessions) < self.max_sessions
+            if reserved:
+                self._sessions[key] = (now, owner)
+        return reserved, evicted
+
+    async def open(self, user_id: str, prefix: str = "session") -> str:
+        """
+        Create a fresh session for one invocation, owned by the calling task.
+        When every slot is held by a running call, waits until one closes.
+
+        Args:
+            user_id: ADK user the session belongs to
+            prefix: Readable prefix for the session ID (usually the agent name)
+
+        Returns:
+            The new session ID
+        """
+        session_id = f"{prefix}_{uuid.uuid4().hex}"
+        key = (user_id, session_id)
+        owner = asyncio.current_task()
+        waited = False
+        while True:
+            reserved, evicted = self._reserve(key, owner)
+            for stale_user, stale_session in evicted:
+                await self._delete(stale_user, stale_session)
+            if reserved:
+                break
+            # Every slot belongs to a running call; wait for one to close
+            if not waited:
+                waited = True
+                with self.lock:
+                    self.counters["waited"] += 1
+            await asyncio.sleep(SESSION_WAIT_INTERVAL)
+
+        try:
+            await self.session_service.create_session(
+                app_name=self.app_name,
+                user_id=user_id,
+                session_id=session_id
+            )
+        except BaseException:
+            with self.lock:
+                self._sessions.pop(key, None)
+            raise
+        with self.lock:
+            self.counters["created"] += 1
+        return session_id
+
+    async def close(self, user_id: str, session_id: str) -> None:
+        """Delete a session and its history."""
+        with self.lock:
+            tracked = self._sessions.pop((user_id, session_id), None) is not None
+            if tracked:
+                self.counters["closed"] += 1
+        if tracked:
+            await self._delete(user_id, session_id)
+
+    async def _delete(self, user_id: str, session_id: str) -> None:
+        try:
+            await self.session_service.delete_session(
+                app_name=self.app_name,
+                user_id=user_id,
+                session_id=session_id
+            )
+        except Exception as e:
+            print(f"Warning: Failed to delete ADK session {session_id}: {e}")
+
+    @asynccontextmanager
+    async def session(self, user_id: str, prefix: str = "session") -> AsyncIterator[str]:
+        """Open a session for the duration of an ``async with`` block."""
+        session_id = await self.open(user_id, prefix)
+        try:
+            yield session_id
+        finally:
+            await self.close(user_id, session_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Live sessions, runners and lifecycle counters."""
+        with self.lock:
+            return {
+                "app_name": self.app_name,
+                "live_sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "ttl_seconds": self.ttl_seconds,
+                "runners": len(self._runners),
+                **self.counters
+            }
+
+
+# One manager per ADK application
+_session_managers: Dict[str, SessionManager] = {}
+
+
+def get_session_manager(app_name: str) -> SessionManager:
+    """
+    Get or create the process-wide session manager for an application.
+
+    Args:
+        app_name: ADK application name
+
+    Returns:
+        SessionManager instance
+    """
+    if app_name not in _session_managers:
+        _session_managers[app_name] = SessionManager(app_name)
+    return _session_managers[app_name]
@@ -0,0 +1,96 @@
+"""
+Agent Streaming Test Script
+===========================
+Tests partial-text streaming, timeouts and cancellation with a scripted runner.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent))
+
+from google.adk.events import Event
+from google.genai import types
+
+from agent_streaming import collect_agent_text, stream_agent_text
+
+
+def _event(text=None, partial=False):
+    content = types.Content(role="model", parts=[types.Part(text=text)]) if text else None
+    return Event(author="agent", content=content, partial=partial)
+
+
+class ScriptedRunner:
+    """Stands in for an ADK Runner: replays events with optional delays."""
+
+    def __init__(self, script):
+        self.script = script
+        self.closed = False
+
+    async def run_async(self, **kwargs):
+        assert kwargs["run_config"].streaming_mode.value == "sse"
+        try:
+            for delay, event in self.script:
+                await asyncio.sleep(delay)
+                yield event
+        finally:
+            self.closed = True
+
+
+def test_partial_chunks_stream_and_turn_aggregates_are_skipped():
+    """Chunks arrive as they are produced; each turn's aggregate is not repeated."""
+    runner = ScriptedRunner([
+        (0, _event("## Review", partial=True)),
+        (0, _event(" summary", partial=True)),
+        (0, _event("## Review summary")),
+        (0, _event()),  # tool call / state update without text
+        (0, _event("Done.")),
+    ])
+
+    async def scenario():
+        return [chunk async for chunk in stream_agent_text(runner, "u", "s", "hi")]
+
+    assert asyncio.run(scenario()) == ["## Review", " summary", "\n\n", "Done."]
+    assert runner.closed
+
+
+def test_timeout_cancels_the_run():
+    """A stalled agent raises TimeoutError after the deadline and is closed."""
+    runner = ScriptedRunner([(0, _event("partial", partial=True)), (5, _event("late"))])
+
+    async def scenario():
+        try:
+            await collect_agent_text(runner, "u", "s", "hi", timeout=0.05)
+        except asyncio.TimeoutError:
+            return "timed out"
+
+    assert asyncio.run(scenario()) == "timed out"
+    assert runner.closed
+
+
+def test_streams_share_one_event_loop():
+    """Two slow agents stream concurrently instead of one after the other."""
+    def slow():
+        return ScriptedRunner([(0.1, _event("a", partial=True)), (0.1, _event("a"))])
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        results = await asyncio.gather(
+            collect_agent_text(slow(), "u", "s1", "hi"),
+            collect_agent_text(slow(), "u", "s2", "hi"),
+        )
+        return results, loop.time() - start
+
+    results, elapsed = asyncio.run(scenario())
+    assert results == ["a", "a"]
+    assert elapsed < 0.35
+
+
+if __name__ == "__main__":
+    test_partial_chunks_stream_and_turn_aggregates_are_skipped()
+    test_timeout_cancels_the_run()
+    test_streams_share_one_event_loop()
+    print("✅ Agent streaming tests passed!")
@@ -0,0 +1,74 @@
+"""
+Cache Codec Test Script
+=======================
+Tests the compact cache entry encoding and reading of older entries.
+"""
+
+import json
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent))
+
+import cache_codec
+from bench_report_encoder import build_security_report
+from cache_manager import CacheManager
+
+
+def test_small_entries_stay_raw_and_large_ones_compress():
+    small = {"status": "passed", "issues": []}
+    blob = cache_codec.encode(small)
+    assert blob[:2] == bytes((cache_codec.FORMAT_VERSION, cache_codec.RAW))
+    assert blob[2:] == b'{"status":"passed","issues":[]}'
+    assert cache_codec.decode(blob) == small
+
+    report = build_security_report(10, 4)
+    blob = cache_codec.encode(report)
+    assert blob[1] in (cache_codec.ZLIB, cache_codec.ZSTD)
+    assert len(blob) * 5 < len(json.dumps(report))
+    assert cache_codec.decode(blob) == report
+
+
+def test_legacy_json_text_still_decodes():
+    report = {"status": "failed", "note": "naïve"}
+    assert cache_codec.decode(json.dumps(report, indent=2)) == report
+    assert cache_codec.decode(json.dumps(report, indent=2).encode("utf-8")) == report
+
+    for corrupt in (bytes((cache_codec.FORMAT_VERSION, cache_codec.ZLIB)) + b"junk",
+                    bytes((cache_codec.FORMAT_VERSION, 9)) + b"{}"):
+        try:
+            cache_codec.decode(corrupt)
+        except ValueError:
+            continue
+        raise AssertionError(f"{corrupt!r} decoded")
+
+
+def test_sqlite_reads_rows_written_as_json_text():
+    """Rows stored as JSON text by older versions are served; new rows are compact."""
+    cache_dir = tempfile.mkdtemp(prefix="agent_cache_")
+    cache = CacheManager(cache_dir=cache_dir)
+    report = build_security_report(5, 3)
+    cache.set("security", "new", report)
+    cache.set("security", "old", {"placeholder": True})
+
+    key = cache._generate_cache_key("security", "old")
+    conn = sqlite3.connect(Path(cache_dir) / "cache.db")
+    with conn:
+        conn.execute("UPDATE entries SET response = ? WHERE key = ?",
+                     (json.dumps({"status": "passed"}), key))
+    conn.close()
+
+    reopened = CacheManager(cache_dir=cache_dir)
+    assert reopened.get("security", "old") == {"status": "passed"}
+    assert reopened.get("security", "new") == report
+    assert reopened.get_stats()["total_bytes"] < len(json.dumps(report)) // 5
+
+
+if __name__ == "__main__":
+    test_small_entries_stay_raw_and_large_ones_compress()
+    test_legacy_json_text_still_decodes()
+    test_sqlite_reads_rows_written_as_json_text()
+    print("✅ Cache codec tests passed!")
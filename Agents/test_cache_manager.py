@@ -0,0 +1,316 @@
+"""
+Cache Manager Test Script
+=========================
+Tests cache entry lifetimes without calling any agent.
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent))
+
+import cache_codec
+from cache_backends import JsonFileBackend, SQLiteBackend
+from cache_keys import cache_version
+from cache_manager import FRESH, MISSED, STALE, CacheManager, is_failed_response
+from memory_cache import MISS, MemoryCache
+
+
+def _cache(**kwargs) -> CacheManager:
+    return CacheManager(cache_dir=tempfile.mkdtemp(prefix="agent_cache_"), **kwargs)
+
+
+def test_failed_outputs_are_detected():
+    """Error, degraded and unparsed results are failures; real reports are not."""
+    assert is_failed_response({"is_secure": False, "error": "503 Service Unavailable"})
+    assert is_failed_response({"status": "passed", "degraded": True})
+    assert is_failed_response({"agent": "Security Auditor Agent", "status": "unknown"})
+    assert not is_failed_response({"status": "failed", "total_issues": 2})
+    assert not is_failed_response("plain text report")
+
+
+def test_failures_expire_after_negative_ttl():
+    """A failure is served back briefly, then the next call goes to the agent again."""
+    cache = _cache(negative_ttl_seconds=0.05)
+    failure = {"status": "unknown", "raw_response": "No response"}
+
+    cache.set("security", "code", failure, ttl_hours=24)
+    assert cache.get("security", "code") == failure
+    assert cache.get_stats()["negative_entries"] == 1
+
+    time.sleep(0.1)
+    assert cache.get("security", "code") is None
+
+
+def test_success_replaces_failure_and_keeps_full_ttl():
+    """Positive results are stored for the normal TTL, even over a negative entry."""
+    cache = _cache(negative_ttl_seconds=0.05)
+    cache.set("runtime", "code", {"status": "passed"}, failed=True)
+    cache.set("runtime", "code", {"status": "passed", "total_issues": 0})
+
+    time.sleep(0.1)
+    assert cache.get("runtime", "code") == {"status": "passed", "total_issues": 0}
+    stats = cache.get_stats()
+    assert stats["negative_entries"] == 0 and stats["active_entries"] == 1
+
+
+def test_sqlite_entries_persist_across_instances():
+    """The default backend keeps entries in one database file."""
+    cache_dir = tempfile.mkdtemp(prefix="agent_cache_")
+    cache = CacheManager(cache_dir=cache_dir, backend="sqlite")
+    cache.set("security", "code", {"status": "passed"})
+    cache.set("runtime", "code", {"status": "passed"})
+    assert cache.clear("runtime") == 1
+
+    reopened = CacheManager(cache_dir=cache_dir, backend="sqlite")
+    assert reopened.get("security", "code") == {"status": "passed"}
+    stats = reopened.get_stats()
+    assert stats["backend"] == "sqlite" and stats["entries_by_agent"] == {"security": 1}
+    assert stats["total_bytes"] > 0
+    assert not list(Path(cache_dir).glob("*.json"))
+
+
+def test_json_cache_is_migrated_once():
+    """Entries written by the JSON backend move into SQLite, even with a corrupt index."""
+    cache_dir = tempfile.mkdtemp(prefix="agent_cache_")
+    legacy = CacheManager(cache_dir=cache_dir, backend="json")
+    assert isinstance(legacy.backend, JsonFileBackend)
+    legacy.set("security", "old code", {"status": "passed"})
+    legacy.set("runtime", "stale", {"status": "passed"}, failed=True)
+    legacy.negative_ttl_seconds = -1
+    legacy.set("runtime", "expired", {"status": "passed"}, failed=True)
+    (Path(cache_dir) / "_metadata.json").write_text("{ truncated")
+
+    migrated = CacheManager(cache_dir=cache_dir, backend="sqlite")
+    assert migrated.get("security", "old code") == {"status": "passed"}
+    stats = migrated.get_stats()
+    assert stats["total_entries"] == 2 and stats["negative_entries"] == 1
+    assert (Path(cache_dir) / "_metadata.json.migrated").exists()
+    assert not [p for p in Path(cache_dir).glob("*.json")]
+
+
+def test_hot_entries_are_served_from_memory():
+    """Repeat reads skip the persistent tier; expiry matches the disk copy."""
+    cache = _cache(negative_ttl_seconds=0.05)
+    cache.set("security", "code", {"status": "passed"})
+    cache.set("runtime", "code", {"status": "passed"}, failed=True)
+
+    # Drop the persistent copy behind the memory tier's back
+    cache.backend.clear()
+    first = cache.get("security", "code")
+    first["status"] = "mutated"
+    assert cache.get("security", "code") == {"status": "passed"}
+
+    time.sleep(0.1)
+    assert cache.get("runtime", "code") is None
+    tiers = cache.get_stats()["tiers"]
+    assert tiers["memory"]["hits"] == 2 and tiers["disk"]["hits"] == 0
+    assert tiers["memory"]["hit_ratio"] == round(2 / 3, 4)
+
+
+def test_disk_hits_warm_memory_and_lru_stays_bounded():
+    cache_dir = tempfile.mkdtemp(prefix="agent_cache_")
+    CacheManager(cache_dir=cache_dir).set("security", "code", {"status": "passed"})
+
+    cache = CacheManager(cache_dir=cache_dir)
+    assert cache.get("security", "code") == {"status": "passed"}
+    assert cache.get("security", "code") == {"status": "passed"}
+    tiers = cache.get_stats()["tiers"]
+    assert tiers["disk"]["hits"] == 1 and tiers["memory"]["hits"] == 1
+
+    memory = MemoryCache(max_entries=2, max_bytes=40)
+    far = time.time() + 60
+    memory.put("a", "x", "a" * 10, far)
+    memory.put("b", "x", "b" * 10, far)
+    memory.get("a")
+    memory.put("c", "y", "c" * 10, far)      # over max_entries: "b" is least recent
+    assert memory.get("b") is MISS and memory.get("a") == "a" * 10
+    memory.put("d", "y", "d" * 30, far)      # over max_bytes
+    assert memory.get_stats()["bytes"] <= 40
+    memory.clear("y")
+    assert memory.get_stats()["entries"] == 0
+
+
+def test_size_caps_evict_by_policy():
+    """Over a cap, LRU drops the least recently read entries and LFU the least read."""
+    for policy, survivor, victim in (("lru", "k4", "k0"), ("lfu", "k0", "k1")):
+        cache_dir = tempfile.mkdtemp(prefix="agent_cache_")
+        cache = CacheManager(
+            cache_dir=cache_dir, max_entries=5, eviction_policy=policy, memory=MemoryCache(0, 0)
+        )
+        for n in range(5):
+            cache.set("security", f"k{n}", {"n": n})
+            time.sleep(0.01)
+        for _ in range(3):
+            cache.get("security", "k0")
+        for n in (1, 2, 4):
+            cache.get("security", f"k{n}")
+            time.sleep(0.01)
+        cache.set("security", "k5", {"n": 5})  # 6 entries > 5: trim to 4
+
+        # k3 was never read; the new entry is never evicted
+        assert cache.get("security", "k3") is None, policy
+        assert cache.get("security", "k5") is not None, policy
+        assert cache.get("security", survivor) is not None, policy
+        assert cache.get("security", victim) is None, policy
+        stats = CacheManager(cache_dir=cache_dir).get_stats()
+        assert stats["total_entries"] == 4 and stats["evictions"] == 2, policy
+
+
+def test_byte_totals_track_overwrites():
+    """Running totals stay exact when entries are replaced or deleted."""
+    cache = _cache(max_bytes=10_000)
+    cache.set("runtime", "code", {"report": "x" * 100})
+    cache.set("runtime", "code", {"report": "x" * 10})
+    entries, stored_bytes = cache.backend.usage()
+    assert entries == 1 and stored_bytes == len(cache_codec.encode({"report": "x" * 10}))
+    cache.clear()
+    assert cache.backend.usage() == (0, 0)
+
+
+def test_keys_cover_full_content_and_version():
+    """Inputs sharing a long prefix never collide; a new model, prompt or rule set misses."""
+    cache = _cache()
+    prefix = "diff --git a/app.py b/app.py\n" * 10
+    cache.set("pr_analysis", prefix + "+x = 1", {"status": "success"})
+    assert cache.get("pr_analysis", prefix + "+x = 2") is None
+
+    v1 = cache_version("llama-3.3-70b-versatile", ["Find runtime issues in {code}"], "1")
+    cache.set("runtime", "code", {"status": "passed"}, version=v1)
+    assert cache.get("runtime", "code", version=v1) == {"status": "passed"}
+    for changed in (
+        cache_version("llama-3.1-8b-instant", ["Find runtime issues in {code}"], "1"),
+        cache_version("llama-3.3-70b-versatile", ["Find runtime bugs in {code}"], "1"),
+        cache_version("llama-3.3-70b-versatile", ["Find runtime issues in {code}"], "2"),
+    ):
+        assert cache.get("runtime", "code", version=changed) is None
+
+
+def test_rebased_diff_hits_cache():
+    """Index lines, hunk offsets, context and trailing whitespace do not change the key."""
+    diff = (
+        "diff --git a/app.py b/app.py\n"
+        "index 1111111..2222222 100644\n"
+        "--- a/app.py\n"
+        "+++ b/app.py\n"
+        "@@ -10,3 +10,3 @@ def main():\n"
+        "     x = 1\n"
+        "-    y = 2\n"
+        "+    y = 3\n"
+        "     return x\n"
+    )
+    rebased = (
+        diff.replace("1111111..2222222", "aaaaaaa..bbbbbbb")
+        .replace("@@ -10,3 +10,3 @@", "@@ -42,3 +45,3 @@")
+        .replace("     x = 1", "     x = 0")
+        .replace("+    y = 3", "+    y = 3  ")
+    )
+    cache = _cache()
+    cache.set("runtime", diff, {"status": "passed"})
+    assert cache.get("runtime", rebased) == {"status": "passed"}
+    assert cache.get("runtime", diff.replace("+    y = 3", "+    y = 4")) is None
+
+
+class _SlowSQLiteBackend(SQLiteBackend):
+    """Lookups take 0.1s, like a busy disk or a distant cache server."""
+
+    def get(self, key):
+        time.sleep(0.1)
+        return super().get(key)
+
+
+def test_async_api_keeps_the_loop_free():
+    """Slow lookups run on the I/O pool, and lookups of different keys overlap."""
+    cache_dir = tempfile.mkdtemp(prefix="agent_cache_")
+    backend = _SlowSQLiteBackend(Path(cache_dir) / "cache.db")
+    cache = CacheManager(cache_dir=cache_dir, backend=backend, memory=MemoryCache(0, 0))
+
+    async def scenario():
+        await asyncio.gather(*(cache.aset("runtime", f"code {n}", {"n": n}) for n in range(4)))
+        ticks = []
+
+        async def ticker():
+            while len(ticks) < 5:
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        start = time.perf_counter()
+        results, _ = await asyncio.gather(
+            asyncio.gather(*(cache.aget("runtime", f"code {n}") for n in range(4))), ticker()
+        )
+        elapsed = time.perf_counter() - start
+        return results, elapsed, ticks, await cache.aclear()
+
+    results, elapsed, ticks, cleared = asyncio.run(scenario())
+    assert results == [{"n": n} for n in range(4)]
+    assert elapsed < 0.3                    # one at a time would take 0.4s
+    assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.08
+    assert cleared == 4
+
+
+def test_stale_entries_are_served_while_one_refresh_runs():
+    """Past expiry but within the grace window: stale value now, a single recompute behind it."""
+    cache = _cache()
+    calls = []
+
+    async def refresh(context):
+        calls.append(context)
+        await asyncio.sleep(0.05)
+        return {"status": "passed", "run": len(calls)}
+
+    cache.register_refresher("pr_analysis", refresh, grace_seconds=5)
+    cache.default_ttl_seconds = 0.05
+    cache.set("pr_analysis", "diff", {"status": "passed", "run": 0})
+    time.sleep(0.1)
+
+    async def scenario():
+        stale = await asyncio.gather(*(
+            cache.alookup("pr_analysis", "diff", context=("repo", 1)) for _ in range(5)
+        ))
+        await asyncio.gather(*cache._refresh_tasks)
+        return stale, await cache.alookup("pr_analysis", "diff")
+
+    stale, refreshed = asyncio.run(scenario())
+    assert stale == [({"status": "passed", "run": 0}, STALE)] * 5
+    assert calls == [("repo", 1)]
+    assert refreshed == ({"status": "passed", "run": 1}, FRESH)
+    stats = cache.get_stats()["stale_while_revalidate"]
+    assert stats["hits"] == 5 and stats["refreshes"] == 1 and stats["refreshing"] == 0
+
+    # A failed refresh keeps the stale entry; past the grace window it is gone
+    cache.register_refresher("pr_analysis", lambda context: None, grace_seconds=0.2)
+    cache.set("pr_analysis", "diff", {"status": "passed", "run": 2})
+    time.sleep(0.1)
+
+    async def failed_refresh():
+        first = await cache.alookup("pr_analysis", "diff")
+        await asyncio.gather(*cache._refresh_tasks)
+        return first, await cache.alookup("pr_analysis", "diff")
+
+    assert asyncio.run(failed_refresh()) == (({"status": "passed", "run": 2}, STALE),) * 2
+    time.sleep(0.25)
+    assert cache.lookup("pr_analysis", "diff") == (None, MISSED)
+    # The second stale lookup's refresh was cancelled with the loop, not left running
+    stats = cache.get_stats()["stale_while_revalidate"]
+    assert stats["refresh_failures"] == 1 and stats["refreshing"] == 0
+
+
+if __name__ == "__main__":
+    test_failed_outputs_are_detected()
+    test_failures_expire_after_negative_ttl()
+    test_success_replaces_failure_and_keeps_full_ttl()
+    test_sqlite_entries_persist_across_instances()
+    test_json_cache_is_migrated_once()
+    test_hot_entries_are_served_from_memory()
+    test_disk_hits_warm_memory_and_lru_stays_bounded()
+    test_size_caps_evict_by_policy()
+    test_byte_totals_track_overwrites()
+    test_keys_cover_full_content_and_version()
+    test_rebased_diff_hits_cache()
+    test_async_api_keeps_the_loop_free()
+    test_stale_entries_are_served_while_one_refresh_runs()
+    print("✅ Cache manager tests passed!")
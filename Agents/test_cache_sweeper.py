@@ -0,0 +1,70 @@
+"""
+Cache Sweeper Test Script
+=========================
+Tests background cache maintenance without calling any agent.
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent))
+
+from cache_manager import CacheManager
+from cache_sweeper import CacheSweeper, render_sweeper_metrics, get_cache_sweeper
+
+
+def _cache() -> CacheManager:
+    return CacheManager(cache_dir=tempfile.mkdtemp(prefix="agent_cache_"), negative_ttl_seconds=0.01)
+
+
+def test_lookups_never_write():
+    """An expired entry is a miss, but stays stored until the sweep."""
+    cache = _cache()
+    cache.set("security", "code", {"status": "passed"}, failed=True)
+    time.sleep(0.05)
+
+    assert cache.get("security", "code") is None
+    assert cache.backend.usage()[0] == 1
+
+
+def test_sweep_runs_in_budgeted_batches():
+    cache = _cache()
+    for n in range(25):
+        cache.set("runtime", f"code {n}", {"status": "passed"}, failed=True)
+    cache.set("runtime", "fresh", {"status": "passed"})
+    time.sleep(0.05)
+
+    sweeper = CacheSweeper(cache, "test", batch=10, max_batches=2, verify_every=1)
+    first = asyncio.run(sweeper.sweep_once())
+    second = asyncio.run(sweeper.sweep_once())
+
+    assert first["removed"] == 20 and second["removed"] == 5
+    assert first["verified"] and sweeper.integrity_ok
+    assert cache.backend.usage()[0] == 1
+    assert sweeper.counters["reclaimed_bytes"] >= 25 * len('{"status": "passed"}')
+
+
+def test_verify_repairs_drifted_totals_and_metrics_render():
+    cache = _cache()
+    cache.set("security", "code", {"status": "passed"})
+    cache.backend._conn.execute("UPDATE totals SET entries = 7")
+    assert cache.verify() is False
+    assert cache.verify() is True
+    assert cache.backend.usage()[0] == 1
+
+    sweeper = get_cache_sweeper(cache, "metrics-test")
+    asyncio.run(sweeper.sweep_once())
+    metrics = render_sweeper_metrics()
+    assert 'cache_sweeps_total{cache="metrics-test"} 1' in metrics
+    assert "# TYPE cache_sweep_reclaimed_bytes_total counter" in metrics
+
+
+if __name__ == "__main__":
+    test_lookups_never_write()
+    test_sweep_runs_in_budgeted_batches()
+    test_verify_repairs_drifted_totals_and_metrics_render()
+    print("✅ Cache sweeper tests passed!")
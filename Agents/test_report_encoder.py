@@ -0,0 +1,140 @@
+"""
+Report Encoder Test Script
+==========================
+Tests the compact report encoding used in synthesis prompts.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent))
+
+from report_encoder import collect_findings, encode_report, group_findings
+
+
+def _secret(line, snippet='api_key = "sk_live_1234567890abcdefghij"'):
+    return {
+        "type": "Hardcoded Secret",
+        "secret_type": "API Key",
+        "severity": "CRITICAL",
+        "line": line,
+        "code_snippet": snippet,
+        "recommendation": "Remove hardcoded secrets and use environment variables",
+    }
+
+
+def test_dedupes_and_groups_findings():
+    """Identical findings collapse and same rule/file groups carry counts."""
+    report = {
+        "status": "failed",
+        "total_issues": 4,
+        "scans": [{"scan_type": "hardcoded_secrets", "issues": [
+            _secret(3), _secret(3), _secret(9), _secret(12),
+        ]}],
+    }
+
+    groups = group_findings(collect_findings(report))
+
+    assert len(groups) == 1
+    assert groups[0]["count"] == 3
+    assert groups[0]["lines"] == [3, 9, 12]
+
+
+def test_groups_keep_files_and_distinct_snippets():
+    """Scanner findings carry their file, and a group keeps each distinct snippet."""
+    from workers_agents.security_scanners import run_all_scans
+
+    diff = "\n".join([
+        "diff --git a/app/db.py b/app/db.py",
+        "+++ b/app/db.py",
+        "@@ -0,0 +1,2 @@",
+        '+cursor.execute(f"SELECT * FROM users WHERE id = {uid}")',
+        '+cursor.execute(f"SELECT * FROM orders WHERE id = {oid}")',
+        "diff --git a/app/jobs.py b/app/jobs.py",
+        "+++ b/app/jobs.py",
+        "@@ -0,0 +1 @@",
+        '+cursor.execute(f"DELETE FROM jobs WHERE id = {jid}")',
+    ])
+
+    groups = group_findings(collect_findings(run_all_scans(diff)))
+    fstring = {g["file"]: g for g in groups if g["rule"] == "F-string in SQL"}
+
+    assert set(fstring) == {"app/db.py", "app/jobs.py"}
+    assert fstring["app/db.py"]["lines"] == [4, 5]
+    assert len(fstring["app/db.py"]["snippets"]) == 2
+
+    encoded = encode_report(run_all_scans(diff), snippet_chars=80)
+    assert "FROM users" in encoded and "FROM orders" in encoded and "FROM jobs" in encoded
+
+
+def test_encoding_is_smaller_and_keeps_signal():
+    """The compact form is much smaller than indented JSON but keeps rules and fixes."""
+    issues = [_secret(n) for n in range(40)]
+    issues.append({
+        "type": "SQL Injection Vulnerability",
+        "vulnerability_type": "F-string in SQL",
+        "severity": "HIGH",
+        "line": 50,
+        "code_snippet": 'cursor.execute(f"SELECT * FROM users WHERE id = {uid}")',
+        "recommendation": "Use parameterized queries",
+    })
+    report = {"status": "failed", "total_issues": len(issues),
+              "scans": [{"scan_type": "mixed", "issues": issues}]}
+
+    encoded = encode_report(report)
+
+    assert len(encoded) * 3 < len(json.dumps(report, indent=2))
+    assert "API Key" in encoded and "F-string in SQL" in encoded
+    assert encoded.count("Remove hardcoded secrets") == 1
+    # Severity order: critical group comes before high
+    assert encoded.index("CRIT|") < encoded.index("HIGH|")
+
+
+def test_top_k_reports_omitted_groups():
+    """Groups beyond top-K are summarized in a single omission line."""
+    issues = [
+        {"type": f"Rule {i}", "severity": "LOW", "description": "x", "location": f"Line {i}"}
+        for i in range(10)
+    ]
+
+    encoded = encode_report({"status": "failed", "issues": issues}, top_k=3)
+
+    assert "+7 more groups omitted (LOW=7)" in encoded
+
+
+def test_runtime_steps_and_groq_vulnerabilities():
+    """Failed steps and Groq vulnerability lists are both encoded."""
+    runtime = {
+        "final_verdict": "FAIL",
+        "steps": [
+            {"step_name": "Auth", "description": "login", "expected_output": "200",
+             "actual_output": "500", "status": "FAIL"},
+            {"step_name": "Logout", "description": "logout", "expected_output": "200",
+             "actual_output": "200", "status": "PASS"},
+        ],
+    }
+    security = {
+        "is_secure": False,
+        "summary_reasoning": "One secret found",
+        "vulnerabilities": [{"type": "Hardcoded Secret", "severity": "High",
+                             "description": "token in config", "file_path": "app.py",
+                             "line_number": 4}],
+    }
+
+    runtime_text = encode_report(runtime)
+    security_text = encode_report(security)
+
+    assert "steps_passed=1/2" in runtime_text and "Auth" in runtime_text
+    assert "Logout|" not in runtime_text
+    assert "is_secure=no" in security_text and "app.py" in security_text
+
+
+if __name__ == "__main__":
+    test_dedupes_and_groups_findings()
+    test_groups_keep_files_and_distinct_snippets()
+    test_encoding_is_smaller_and_keeps_signal()
+    test_top_k_reports_omitted_groups()
+    test_runtime_steps_and_groq_vulnerabilities()
+    print("✅ Report encoder tests passed!")
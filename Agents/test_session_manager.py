@@ -0,0 +1,88 @@
+"""
+Session Manager Test Script
+===========================
+Tests per-invocation ADK sessions, eviction and runner reuse.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent))
+
+from google.adk.agents import Agent
+
+from session_manager import SessionManager
+
+agent = Agent(model="gemini-2.5-flash", name="echo", instruction="Echo the input.")
+
+
+def test_each_invocation_gets_a_fresh_session_that_is_torn_down():
+    """Sessions are unique per call and deleted, history and all, on exit."""
+    sessions = SessionManager("test_app")
+
+    async def scenario():
+        async with sessions.session("user", "runtime") as first:
+            async with sessions.session("user", "runtime") as second:
+                assert first != second
+                assert sessions.get_stats()["live_sessions"] == 2
+        return await sessions.session_service.get_session(
+            app_name="test_app", user_id="user", session_id=first
+        )
+
+    assert asyncio.run(scenario()) is None
+    stats = sessions.get_stats()
+    assert stats["live_sessions"] == 0
+    assert stats["created"] == 2 and stats["closed"] == 2
+
+
+def test_abandoned_sessions_are_evicted_but_live_ones_are_not():
+    """Sessions whose task ended unclosed are evicted; at capacity, open waits."""
+    sessions = SessionManager("test_app", max_sessions=2)
+
+    async def exists(session_id):
+        return await sessions.session_service.get_session(
+            app_name="test_app", user_id="user", session_id=session_id
+        ) is not None
+
+    async def scenario():
+        # Opened by a task that finished without closing it
+        leaked = await asyncio.create_task(sessions.open("user", "leaked"))
+        a = await sessions.open("user", "a")
+        assert not await exists(leaked)
+
+        b = await sessions.open("user", "b")
+        waiting = asyncio.create_task(sessions.open("user", "c"))
+        await asyncio.sleep(0.1)
+        # Both slots hold running calls, so neither is evicted
+        assert not waiting.done()
+        assert await exists(a) and await exists(b)
+
+        await sessions.close("user", a)
+        c = await waiting
+        assert await exists(b) and await exists(c)
+
+    asyncio.run(scenario())
+    stats = sessions.get_stats()
+    assert stats["live_sessions"] == 2
+    assert stats["evicted"] == 1
+    assert stats["waited"] == 1
+
+
+def test_runner_is_reused_per_agent():
+    """One runner per agent, bound to the manager's session service."""
+    sessions = SessionManager("test_app")
+    other = agent.clone(update={"name": "other"})
+
+    runner = sessions.runner_for(agent)
+    assert sessions.runner_for(agent) is runner
+    assert sessions.runner_for(other) is not runner
+    assert runner.session_service is sessions.session_service
+
+
+if __name__ == "__main__":
+    test_each_invocation_gets_a_fresh_session_that_is_torn_down()
+    test_abandoned_sessions_are_evicted_but_live_ones_are_not()
+    test_runner_is_reused_per_agent()
+    print("✅ Session manager tests passed!")
@@ -0,0 +1,287 @@
+"""
+Shared Cache Test Script
+========================
+Tests the shared cache backends against a local stand-in for a Redis
+server and a SQLite database shared by two processes' worth of managers.
+"""
+
+import asyncio
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent))
+
+from cache_backends import RedisBackend, SQLiteBackend
+from cache_manager import FRESH, STALE, CacheManager
+from memory_cache import MemoryCache
+from resp_client import RespClient
+
+
+class StandInRedis(socketserver.ThreadingTCPServer):
+    """The subset of Redis the cache uses, in memory (strings with PX, hashes, sorted sets, MULTI/EXEC)."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _StandInHandler)
+        self.lock = threading.Lock()
+        self.strings = {}  # key -> (value, expires at or None)
+        self.hashes = {}
+        self.zsets = {}  # key -> {member: score}
+        self.commands = []
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"redis://127.0.0.1:{self.server_address[1]}/0"
+
+    def run(self, name, *args):
+        now = time.time()
+        self.commands.append((name, args[0] if args else None))
+        if name == "PING":
+            return "+PONG"
+        if name == "SET":
+            options = [arg.upper() for arg in args[2:]]
+            if b"NX" in options and self.run("GET", args[0]) is not None:
+                return None
+            expires = now + int(args[options.index(b"PX") + 3]) / 1000 if b"PX" in options else None
+            self.strings[args[0]] = (args[1], expires)
+            return "+OK"
+        if name == "GET":
+            value, expires = self.strings.get(args[0], (None, None))
+            return None if expires is not None and now > expires else value
+        if name == "DEL":
+            return sum(
+                any(store.pop(key, None) is not None for store in (self.strings, self.hashes, self.zsets))
+                for key in args
+            )
+        if name.startswith("Z"):
+            return self._run_zset(name, self.zsets.setdefault(args[0], {}), args[1:])
+        table = self.hashes.setdefault(args[0], {})
+        if name == "HSET":
+            table[args[1]] = args[2]
+            return 1
+        if name == "HGET":
+            return table.get(args[1])
+        if name == "HMGET":
+            return [table.get(field) for field in args[1:]]
+        if name == "HDEL":
+            return sum(table.pop(field, None) is not None for field in args[1:])
+        if name == "HLEN":
+            return len(table)
+        if name == "HGETALL":
+            return [item for pair in table.items() for item in pair]
+        if name == "HINCRBY":
+            table[args[1]] = str(int(table.get(args[1], 0)) + int(args[2])).encode()
+            return int(table[args[1]])
+        if name == "HSCAN":
+            start, count = int(args[1]), int(args[3])
+            fields = sorted(table)[start:start + count]
+            cursor = start + count if start + count < len(table) else 0
+            return [str(cursor).encode(), [x for f in fields for x in (f, table[f])]]
+        return f"-ERR unknown command '{name}'"
+
+    @staticmethod
+    def _run_zset(name, zset, args):
+        def bound(raw, default):
+            raw = raw.decode()
+            if raw.startswith("("):
+                value = float(raw[1:])
+                return lambda score: score < value if default > 0 else score > value
+            value = {"-inf": float("-inf"), "+inf": float("inf")}.get(raw)
+            value = float(raw) if value is None else value
+            return lambda score: score <= value if default > 0 else score >= value
+
+        if name == "ZADD":
+            for score, member in zip(args[::2], args[1::2]):
+                zset[member] = float(score)
+            return len(args) // 2
+        if name == "ZREM":
+            return sum(zset.pop(member, None) is not None for member in args)
+        if name == "ZCARD":
+            return len(zset)
+        if name in ("ZCOUNT", "ZRANGEBYSCORE"):
+            low, high = bound(args[0], -1), bound(args[1], 1)
+            members = sorted(
+                (m for m, score in zset.items() if low(score) and high(score)), key=zset.get
+            )
+            if name == "ZCOUNT":
+                return len(members)
+            if len(args) > 2:  # LIMIT offset count
+                offset, count = int(args[3]), int(args[4])
+                members = members[offset:offset + count]
+            return members
+        return f"-ERR unknown command '{name}'"
+
+
+class _StandInHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        queued = None
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+            name, args = args[0].decode().upper(), args[1:]
+            if name == "MULTI":
+                queued = []
+                self.wfile.write(b"+OK\r\n")
+            elif name == "EXEC":
+                with self.server.lock:
+                    replies = [self.server.run(n, *a) for n, a in queued]
+                queued = None
+                self.wfile.write(_encode(replies))
+            elif queued is not None:
+                queued.append((name, args))
+                self.wfile.write(b"+QUEUED\r\n")
+            else:
+                with self.server.lock:
+                    self.wfile.write(_encode(self.server.run(name, *args)))
+
+
+def _encode(reply) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, str):
+        return reply.encode() + b"\r\n"
+    if isinstance(reply, list):
+        return b"*%d\r\n" % len(reply) + b"".join(_encode(item) for item in reply)
+    return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+
+def _manager(backend, **kwargs) -> CacheManager:
+    # No memory tier: every lookup must reach the shared backend
+    return CacheManager(
+        cache_dir=tempfile.mkdtemp(prefix="agent_cache_"), backend=backend,
+        memory=MemoryCache(max_entries=0), **kwargs
+    )
+
+
+def test_replicas_share_entries_through_redis():
+    server = StandInRedis()
+    replica_a = _manager(RedisBackend(server.url, "test"), negative_ttl_seconds=0.05)
+    replica_b = _manager(RedisBackend(server.url, "test"), negative_ttl_seconds=0.05)
+
+    replica_a.set("runtime", "code", {"status": "passed", "issues": []})
+    replica_a.set("security", "code", {"status": "unknown"})
+    assert replica_b.get("runtime", "code") == {"status": "passed", "issues": []}
+    assert replica_b.get_stats()["entries_by_agent"] == {"runtime": 1, "security": 1}
+
+    # The failure expires on the server and the sweep prunes its index record
+    time.sleep(0.1)
+    assert replica_b.get("security", "code") is None
+    removed, reclaimed, _ = replica_b.sweep_expired()
+    assert removed == 1 and reclaimed > 0
+    assert replica_a.verify() is True
+    assert replica_a.clear("runtime") == 1
+    assert replica_b.backend.usage() == (0, 0)
+    server.shutdown()
+
+
+def test_redis_eviction_keeps_caps():
+    server = StandInRedis()
+    cache = _manager(RedisBackend(server.url, "caps"), max_entries=5)
+    for n in range(8):
+        cache.set("runtime", f"code {n}", {"n": n})
+    stats = cache.get_stats()
+    assert stats["total_entries"] <= 5 and stats["evictions"] >= 3
+    assert cache.get("runtime", "code 7") == {"n": 7}
+    server.shutdown()
+
+
+def test_redis_writes_and_sweeps_never_read_the_whole_index():
+    server = StandInRedis()
+    cache = _manager(RedisBackend(server.url, "scale"), max_entries=5, negative_ttl_seconds=0.05)
+    for n in range(8):
+        cache.set("runtime", f"code {n}", {"n": n})
+    cache.set("security", "code", {"status": "unknown"})
+    time.sleep(0.1)
+    removed, _, _ = cache.sweep_expired()
+    stats = cache.get_stats()
+    assert ("HGETALL", b"scale:idx") not in server.commands
+    assert removed == 1 and stats["entries_by_agent"] == {"runtime": 4}
+
+    # An index written before the side indexes existed is rebuilt by verify
+    server.zsets.clear()
+    assert cache.verify() is False
+    assert cache.verify() is True
+    assert cache.backend.evict(3, 1 << 30, "lru", 10, time.time()) == 1
+    server.shutdown()
+
+
+def test_one_replica_refreshes_a_shared_stale_entry():
+    server = StandInRedis()
+    path = os.path.join(tempfile.mkdtemp(prefix="shared_cache_"), "cache.db")
+    for backends in (
+        lambda: RedisBackend(server.url, "swr"),
+        lambda: SQLiteBackend(path),
+    ):
+        calls = []
+
+        async def refresh(context):
+            calls.append(context)
+            await asyncio.sleep(0.05)
+            return {"status": "passed", "run": len(calls)}
+
+        replicas = [_manager(backends()) for _ in range(3)]
+        for replica in replicas:
+            replica.register_refresher("pr_analysis", refresh, grace_seconds=5)
+            replica.default_ttl_seconds = 0.05
+        replicas[0].set("pr_analysis", "diff", {"status": "passed", "run": 0})
+        time.sleep(0.1)
+        for replica in replicas:
+            replica.default_ttl_seconds = 3600
+
+        async def scenario():
+            stale = await asyncio.gather(*(
+                replica.alookup("pr_analysis", "diff") for replica in replicas
+            ))
+            await asyncio.gather(*(t for replica in replicas for t in replica._refresh_tasks))
+            return stale
+
+        assert all(status == STALE for _, status in asyncio.run(scenario()))
+        assert len(calls) == 1
+        assert replicas[2].lookup("pr_analysis", "diff") == ({"status": "passed", "run": 1}, FRESH)
+        skipped = sum(r.get_stats()["stale_while_revalidate"]["refreshes_elsewhere"] for r in replicas)
+        assert skipped == 2
+    server.shutdown()
+
+
+def test_unreachable_redis_is_a_miss():
+    server = StandInRedis()
+    url = server.url
+    server.shutdown()
+    server.server_close()
+    cache = _manager(RedisBackend(url, "down", client=RespClient(url, timeout=0.5)))
+    cache.set("runtime", "code", {"status": "passed"})
+    assert cache.get("runtime", "code") is None
+
+
+def test_sqlite_on_a_shared_path():
+    path = os.path.join(tempfile.mkdtemp(prefix="shared_cache_"), "cache.db")
+    writer = _manager(SQLiteBackend(path))
+    reader = _manager(SQLiteBackend(path))
+    writer.set("runtime", "code", {"status": "passed"})
+    assert reader.get("runtime", "code") == {"status": "passed"}
+
+
+if __name__ == "__main__":
+    test_replicas_share_entries_through_redis()
+    test_redis_eviction_keeps_caps()
+    test_redis_writes_and_sweeps_never_read_the_whole_index()
+    test_one_replica_refreshes_a_shared_stale_entry()
+    test_unreachable_redis_is_a_miss()
+    test_sqlite_on_a_shared_path()
+    print("✅ Shared cache tests passed!")
@@ -1,11 +1,11 @@
 from google.adk.agents.llm_agent import Agent
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
-from google.genai import types
+import asyncio
 import os
 from pathlib import Path
 from datetime import datetime
-from typing import Annotated
+from typing import Annotated, AsyncIterator, Optional
 
 """
 Ghostwriter Agent (The Synthesizer) for PR Reviews
@@ -14,204 +14,16 @@ with proper markdown formatting, summaries, and recommendations.
 """
 
 
-# Tool: Format PR comment header
-def format_pr_comment_header(
-    logic_status: Annotated[str, "Pass/Fail status of logic check"],
-    security_issues_count: Annotated[int, "Number of security issues found"],
-    readme_updated: Annotated[bool, "Whether README was updated"]
-) -> str:
-    """
-    Creates a professional PR comment header with emoji indicators.
-    """
-    # Format logic status
-    logic_emoji = "✅" if logic_status.lower() == "pass" else "❌"
-    logic_text = f"{logic_emoji} Logic {logic_status}"
-    
-    # Format security status
-    if security_issues_count == 0:
-        security_text = "✅ No Security Risks"
-    elif security_issues_count == 1:
-        security_text = "⚠️ 1 Security Risk Found"
-    else:
-        security_text = f"⚠️ {security_issues_count} Security Risks Found"
-    
-    # Format README status
-    readme_text = "📝 README Updated" if readme_updated else "📄 No README Changes"
-    
-    header = f"""## 🔍 Pull Request Review Summary
-
-{logic_text} | {security_text} | {readme_text}
-
----
-"""
-    return header
-
-
-# Tool: Format security findings section
-def format_security_findings(
-    security_report: Annotated[str, "Raw security audit report"]
-) -> str:
-    """
-    Formats security findings into a clean, readable markdown section.
-    """
-    if "✅" in security_report and "PASSED" in security_report.upper():
-        return """### 🔒 Security Analysis
-**Status:** ✅ All security checks passed
-
-No security vulnerabilities detected in this PR.
-"""
-    
-    section = """### 🔒 Security Analysis
-**Status:** ⚠️ Issues Require Attention
-
-"""
-    
-    # Extract key findings from the report
-    if "HARDCODED SECRETS" in security_report:
-        section += "#### 🔐 Hardcoded Secrets\n"
-        section += "Potential credentials or API keys detected in code. Please use environment variables or secret management.\n\n"
-    
-    if "SQL INJECTION" in security_report:
-        section += "#### 💉 SQL Injection Risks\n"
-        section += "Unsafe SQL query construction detected. Use parameterized queries or ORM methods.\n\n"
-    
-    if "VULNERABLE DEPENDENCIES" in security_report:
-        section += "#### 📦 Vulnerable Dependencies\n"
-        section += "Outdated packages with known vulnerabilities found. Update to latest secure versions.\n\n"
-    
-    if "SECURITY ANTI-PATTERNS" in security_report:
-        section += "#### 🛡️ Security Anti-Patterns\n"
-        section += "Unsafe coding practices detected. Review and apply security best practices.\n\n"
-    
-    return section
-
-
-# Tool: Format logic check section
-def format_logic_check(
-    logic_status: Annotated[str, "Pass/Fail status"],
-    logic_details: Annotated[str, "Details about logic check"]
-) -> str:
-    """
-    Formats the logic check results into markdown.
-    """
-    emoji = "✅" if logic_status.lower() == "pass" else "❌"
-    
-    section = f"""### 🧮 Logic & Functionality
-**Status:** {emoji} {logic_status}
-
-{logic_details}
-"""
-    return section
-
-
-# Tool: Format README changes section
-def format_readme_section(
-    readme_updated: Annotated[bool, "Whether README was updated"],
-    readme_changes: Annotated[str, "Description of README changes if any"]
-) -> str:
-    """
-    Formats the README update section.
-    """
-    if readme_updated:
-        return f"""### 📝 Documentation Updates
-**Status:** ✅ README Updated
-
-{readme_changes}
-"""
-    else:
-        return """### 📝 Documentation Updates
-**Status:** ℹ️ No documentation changes in this PR
-
-Consider updating the README if new features or significant changes were introduced.
-"""
-
-
-# Tool: Generate recommendations
-def generate_recommendations(
-    has_security_issues: Annotated[bool, "Whether security issues exist"],
-    has_logic_issues: Annotated[bool, "Whether logic issues exist"],
-    needs_readme: Annotated[bool, "Whether README should be updated"]
-) -> str:
-    """
-    Generates actionable recommendations based on findings.
-    """
-    recommendations = []
-    
-    if has_security_issues:
-        recommendations.append("🔒 **Security:** Address all security vulnerabilities before merging")
-    
-    if has_logic_issues:
-        recommendations.append("🧮 **Logic:** Fix identified logic errors and add test coverage")
-    
-    if needs_readme:
-        recommendations.append("📝 **Documentation:** Update README to reflect new changes")
-    
-    if not recommendations:
-        recommendations.append("✅ **Ready to Merge:** All checks passed successfully!")
-    
-    section = """### 💡 Recommendations
-
-"""
-    section += "\n".join(f"- {rec}" for rec in recommendations)
-    section += "\n"
-    
-    return section
-
-
-# Tool: Create final PR comment
-def create_pr_comment(
-    header: Annotated[str, "Formatted header section"],
-    security_section: Annotated[str, "Formatted security section"],
-    logic_section: Annotated[str, "Formatted logic section"],
-    readme_section: Annotated[str, "Formatted README section"],
-    recommendations: Annotated[str, "Formatted recommendations"]
-) -> str:
-    """
-    Combines all sections into a complete, professional GitHub PR comment.
-    """
-    footer = f"""
----
-
-*🤖 Automated review generated at {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}*
-*Powered by ADK Multi-Agent PR Review System*
-"""
-    
-    full_comment = (
-        header +
-        security_section +
-        logic_section +
-        readme_section +
-        recommendations +
-        footer
-    )
-    
-    return full_comment
-
-
-# Tool: Generate summary statistics
-def generate_summary_statistics(
-    total_files_changed: Annotated[int, "Number of files changed"],
-    lines_added: Annotated[int, "Lines of code added"],
-    lines_removed: Annotated[int, "Lines of code removed"],
-    security_issues: Annotated[int, "Number of security issues"],
-    logic_issues: Annotated[int, "Number of logic issues"]
-) -> str:
-    """
-    Creates a summary statistics section for the PR.
-    """
-    section = f"""### 📊 Change Statistics
-
-| Metric | Value |
-|--------|-------|
-| Files Changed | {total_files_changed} |
-| Lines Added | +{lines_added} |
-| Lines Removed | -{lines_removed} |
-| Net Change | {lines_added - lines_removed:+d} |
-| Security Issues | {security_issues} |
-| Logic Issues | {logic_issues} |
-
-"""
-    return section
+from agent_streaming import stream_agent_text
+from workers_agents.comment_format import (
+    format_pr_comment_header,
+    format_security_findings,
+    format_logic_check,
+    format_readme_section,
+    generate_recommendations,
+    create_pr_comment,
+    generate_summary_statistics,
+)
 
 
 # Create the Ghostwriter Agent
@@ -262,43 +74,15 @@ ghostwriter_agent = Agent(
 )
 
 
-def synthesize_pr_review(
+def _review_query(
     security_report: str,
     logic_status: str,
     logic_details: str,
     readme_updated: bool,
     readme_changes: str,
-    session_service: InMemorySessionService,
-    app_name: str,
-    user_id: str,
-    session_id: str,
     stats: dict = None
 ) -> str:
-    """
-    Main function to synthesize PR review and generate comment.
-    
-    Args:
-        security_report: Raw security audit report
-        logic_status: Pass/Fail status of logic check
-        logic_details: Details about logic analysis
-        readme_updated: Whether README was updated
-        readme_changes: Description of README changes
-        session_service: ADK session service
-        app_name: Application name
-        user_id: User ID
-        session_id: Session ID
-        stats: Optional dictionary with PR statistics
-        
-    Returns:
-        Formatted GitHub PR comment
-    """
-    runner = Runner(
-        agent=ghostwriter_agent,
-        app_name=app_name,
-        session_service=session_service
-    )
-    
-    # Prepare the synthesis request
+    """Builds the synthesis request sent to the ghostwriter agent."""
     stats_text = ""
     if stats:
         stats_text = f"""
@@ -309,7 +93,7 @@ PR Statistics:
 - Lines removed: {stats.get('lines_removed', 0)}
 """
     
-    query = f"""
+    return f"""
     Please synthesize the following PR review findings into a professional GitHub comment:
     
     SECURITY AUDIT REPORT:
@@ -334,30 +118,111 @@ PR Statistics:
     
     Use proper markdown formatting and make it professional and easy to scan.
     """
+
+
+async def stream_pr_review(
+    security_report: str,
+    logic_status: str,
+    logic_details: str,
+    readme_updated: bool,
+    readme_changes: str,
+    session_service: InMemorySessionService,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    stats: dict = None,
+    runner: Runner = None,
+    timeout: Optional[float] = None
+) -> AsyncIterator[str]:
+    """
+    Synthesizes the PR review, yielding the comment text as it streams in.
     
-    user_content = types.Content(
-        role='user',
-        parts=[types.Part(text=query)]
+    Args:
+        security_report: Raw security audit report
+        logic_status: Pass/Fail status of logic check
+        logic_details: Details about logic analysis
+        readme_updated: Whether README was updated
+        readme_changes: Description of README changes
+        session_service: ADK session service
+        app_name: Application name
+        user_id: User ID
+        session_id: Session ID
+        stats: Optional dictionary with PR statistics
+        runner: Reusable runner for the ghostwriter agent (created if not given)
+        timeout: Seconds for the whole run (defaults to AGENT_TIMEOUT_SECONDS)
+        
+    Yields:
+        Chunks of the formatted GitHub PR comment
+    """
+    if runner is None:
+        runner = Runner(
+            agent=ghostwriter_agent,
+            app_name=app_name,
+            session_service=session_service
+        )
+    
+    query = _review_query(
+        security_report, logic_status, logic_details, readme_updated, readme_changes, stats
     )
     
-    responses = []
     print("\n✍️ Ghostwriter is synthesizing review...\n")
+    async for chunk in stream_agent_text(runner, user_id, session_id, query, timeout):
+        yield chunk
+
+
+async def synthesize_pr_review_async(
+    security_report: str,
+    logic_status: str,
+    logic_details: str,
+    readme_updated: bool,
+    readme_changes: str,
+    session_service: InMemorySessionService,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    stats: dict = None,
+    runner: Runner = None,
+    timeout: Optional[float] = None
+) -> str:
+    """
+    Synthesizes the PR review without blocking the event loop.
     
-    for event in runner.run(
-        user_id=user_id,
-        session_id=session_id,
-        new_message=user_content
+    Returns:
+        Formatted GitHub PR comment
+    """
+    chunks = []
+    async for chunk in stream_pr_review(
+        security_report, logic_status, logic_details, readme_updated, readme_changes,
+        session_service, app_name, user_id, session_id, stats, runner, timeout
     ):
-        if hasattr(event, 'content') and event.content:
-            if hasattr(event.content, 'parts') and event.content.parts:
-                for part in event.content.parts:
-                    if hasattr(part, 'text') and part.text:
-                        responses.append(part.text)
-        
-        if hasattr(event, 'text') and event.text:
-            responses.append(event.text)
+        chunks.append(chunk)
+    return "".join(chunks) or "No response generated."
+
+
+def synthesize_pr_review(
+    security_report: str,
+    logic_status: str,
+    logic_details: str,
+    readme_updated: bool,
+    readme_changes: str,
+    session_service: InMemorySessionService,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    stats: dict = None,
+    runner: Runner = None
+) -> str:
+    """
+    Synchronous wrapper around ``synthesize_pr_review_async`` for scripts.
+    Async callers should await ``synthesize_pr_review_async`` instead.
     
-    return "\n\n".join(responses) if responses else "No response generated."
+    Returns:
+        Formatted GitHub PR comment
+    """
+    return asyncio.run(synthesize_pr_review_async(
+        security_report, logic_status, logic_details, readme_updated, readme_changes,
+        session_service, app_name, user_id, session_id, stats, runner
+    ))
 
 
 def write_pr_comment(comment: str, filename: str = "pr_comment.md") -> None:
@@ -373,8 +238,6 @@ def write_pr_comment(comment: str, filename: str = "pr_comment.md") -> None:
 
 
 if __name__ == "__main__":
-    import asyncio
-    
     async def main():
         print("✍️ Starting Ghostwriter Agent Test...")
         print("=" * 70)
@@ -430,7 +293,7 @@ installation instructions to include the new dependency requirements.
             
             # Generate the PR comment
             print("📝 Synthesizing PR review comment...")
-            pr_comment = synthesize_pr_review(
+            pr_comment = await synthesize_pr_review_async(
                 security_report=security_report,
                 logic_status=logic_status,
                 logic_details=logic_details,
@@ -15,18 +15,17 @@ from dotenv import load_dotenv
 # Add parent directory to import cache_manager
 sys.path.append(str(Path(__file__).parent.parent))
 from cache_manager import get_cache_manager
+from gemini_models import agent_cache_version, gemini_model
 
 # Load environment variables
 env_path = Path(__file__).parent.parent.parent / ".env.local"
 load_dotenv(dotenv_path=env_path)
 
-os.environ["GOOGLE_API_KEY"] = os.getenv("RUNTIME_VALIDATOR_API_KEY")
+# The agent carries its own key instead of overwriting GOOGLE_API_KEY
+API_KEY = os.getenv("RUNTIME_VALIDATOR_API_KEY")
 
 # Initialize cache manager
-cache_manager = get_cache_manager(
-    cache_dir=str(Path(__file__).parent.parent / "agent_cache"),
-    default_ttl_hours=24
-)
+cache_manager = get_cache_manager(cache_dir=str(Path(__file__).parent.parent / "agent_cache"))
 
 """
 Runtime Validator Agent (ADK-correct)
@@ -53,30 +52,7 @@ def read_sample_file(filename: str = "sample.py") -> str:
 # STATIC CHECKS (DETERMINISTIC)
 # =========================================================
 
-def detect_syntax_errors(code: str) -> List[Dict]:
-    try:
-        ast.parse(code)
-        return []
-    except SyntaxError as e:
-        return [{
-            "type": "Syntax Error",
-            "severity": "CRITICAL",
-            "description": e.msg,
-            "location": f"Line {e.lineno}"
-        }]
-
-
-def detect_infinite_loops(code: str) -> List[Dict]:
-    issues = []
-    for i, line in enumerate(code.splitlines(), 1):
-        if line.replace(" ", "") == "whileTrue:":
-            issues.append({
-                "type": "Infinite Loop",
-                "severity": "HIGH",
-                "description": "Unconditional infinite loop detected.",
-                "location": f"Line {i}"
-            })
-    return issues
+from workers_agents.runtime_checks import RULES_VERSION, detect_syntax_errors, detect_infinite_loops
 
 
 # =========================================================
@@ -85,7 +61,7 @@ def detect_infinite_loops(code: str) -> List[Dict]:
 
 runtime_validator_agent = Agent(
     name="runtime_validator",
-    model="gemini-2.5-flash",  
+    model=gemini_model(API_KEY, "gemini-2.5-flash"),
     description="Detects runtime logic flaws without executing code.",
     instruction="""
 You are a Runtime Validator Agent.
@@ -121,6 +97,9 @@ If no issues exist, return:
 """
 )
 
+# Cached reports are tied to the agent's model and instruction and the static checks
+CACHE_VERSION = agent_cache_version(runtime_validator_agent, rules=RULES_VERSION)
+
 
 # =========================================================
 # MAIN PIPELINE
@@ -141,7 +120,7 @@ async def validate_runtime():
     
     # Check cache first
     print(f"\n🔍 Checking cache for {agent_name}...")
-    cached_response = cache_manager.get(agent_name, code)
+    cached_response = await cache_manager.aget(agent_name, code, version=CACHE_VERSION)
     if cached_response is not None:
         print(f"✅ Cache HIT! Returning cached response.")
         print(f"   (No API call needed - using cached result)\n")
@@ -203,7 +182,7 @@ async def validate_runtime():
     
     # Cache the result for future use
     print(f"\n💾 Caching response for agent: {agent_name}")
-    cache_manager.set(agent_name, code, result)
+    await cache_manager.aset(agent_name, code, result, version=CACHE_VERSION)
     print(f"✅ Response cached successfully!\n")
 
     print("="*70)
@@ -1,29 +1,31 @@
 from google.adk.agents.llm_agent import Agent
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
-from google.genai import types
+import asyncio
 import os
 from pathlib import Path
 from datetime import datetime
 import json
 import sys
+from typing import AsyncIterator, List, Optional
 from dotenv import load_dotenv
+from pydantic import BaseModel, Field
 
 # Add parent directory to import cache_manager
 sys.path.append(str(Path(__file__).parent.parent))
 from cache_manager import get_cache_manager
+from gemini_models import agent_cache_version, gemini_model
+from agent_streaming import stream_agent_text
 
 # Load environment variables
 env_path = Path(__file__).parent.parent.parent / ".env.local"
 load_dotenv(dotenv_path=env_path)
 
-os.environ["GOOGLE_API_KEY"] = os.getenv("SECURITY_AUDITOR_API_KEY")
+# The agent carries its own key instead of overwriting GOOGLE_API_KEY
+API_KEY = os.getenv("SECURITY_AUDITOR_API_KEY")
 
 # Initialize cache manager
-cache_manager = get_cache_manager(
-    cache_dir=str(Path(__file__).parent.parent / "agent_cache"),
-    default_ttl_hours=24
-)
+cache_manager = get_cache_manager(cache_dir=str(Path(__file__).parent.parent / "agent_cache"))
 
 """
 Security Auditor Agent for PR Code Review
@@ -34,215 +36,19 @@ Scans code diffs for security vulnerabilities including:
 - Common security anti-patterns
 """
 
-import re
-from typing import Annotated
-
-# Tool: Scan for hardcoded secrets
-def scan_hardcoded_secrets(code_diff: Annotated[str, "The PR diff content to scan"]) -> str:
-    """
-    Scans code diff for hardcoded secrets like API keys, passwords, and tokens.
-    Returns findings as a JSON string.
-    """
-    findings = []
-    
-    # Patterns for common secrets
-    patterns = {
-        "API Key": r'(?i)(api[_-]?key|apikey|api[_-]?secret)\s*[:=]\s*["\']([a-zA-Z0-9_\-]{20,})["\']',
-        "AWS Access Key": r'(?i)(aws[_-]?access[_-]?key[_-]?id|aws[_-]?secret)\s*[:=]\s*["\']([A-Z0-9]{20,})["\']',
-        "Password": r'(?i)(password|passwd|pwd)\s*[:=]\s*["\']([^"\']{8,})["\']',
-        "Private Key": r'-----BEGIN (?:RSA |EC )?PRIVATE KEY-----',
-        "OAuth Token": r'(?i)(oauth[_-]?token|access[_-]?token)\s*[:=]\s*["\']([a-zA-Z0-9_\-\.]{20,})["\']',
-        "GitHub Token": r'(?i)(gh[ps]_[a-zA-Z0-9]{36,})',
-        "Generic Secret": r'(?i)(secret|token|bearer)\s*[:=]\s*["\']([a-zA-Z0-9_\-]{32,})["\']',
-    }
-    
-    lines = code_diff.split('\n')
-    for line_num, line in enumerate(lines, 1):
-        # Check all lines (not just those starting with +)
-        for secret_type, pattern in patterns.items():
-            if re.search(pattern, line):
-                findings.append({
-                    "type": "Hardcoded Secret",
-                    "secret_type": secret_type,
-                    "severity": "CRITICAL",
-                    "line": line_num,
-                    "code_snippet": line.strip()[:80],
-                    "recommendation": "Remove hardcoded secrets and use environment variables or secret management systems"
-                })
-    
-    result = {
-        "scan_type": "hardcoded_secrets",
-        "status": "failed" if findings else "passed",
-        "total_issues": len(findings),
-        "issues": findings
-    }
-    return json.dumps(result)
-
-
-# Tool: Scan for SQL injection vulnerabilities
-def scan_sql_injection(code_diff: Annotated[str, "The PR diff content to scan"]) -> str:
-    """
-    Scans code diff for potential SQL injection vulnerabilities.
-    Returns findings as a JSON string.
-    """
-    findings = []
-    
-    # Patterns for SQL injection vulnerabilities
-    patterns = {
-        "String concatenation in SQL": r'(?i)(execute|exec|query)\s*\([^)]*[+%]\s*["\']',
-        "F-string in SQL": r'(?i)(execute|exec|query)\s*\([^)]*f["\'].*{',
-        "Format in SQL": r'(?i)(execute|exec|query)\s*\([^)]*\.format\(',
-        "Unsafe SQL construction": r'(?i)(select|insert|update|delete).*[+%].*(?:where|from|into)',
-    }
-    
-    lines = code_diff.split('\n')
-    for line_num, line in enumerate(lines, 1):
-        for vuln_type, pattern in patterns.items():
-            if re.search(pattern, line):
-                findings.append({
-                    "type": "SQL Injection Vulnerability",
-                    "vulnerability_type": vuln_type,
-                    "severity": "HIGH",
-                    "line": line_num,
-                    "code_snippet": line.strip()[:80],
-                    "recommendation": "Use parameterized queries or ORM to prevent SQL injection"
-                })
-    
-    result = {
-        "scan_type": "sql_injection",
-        "status": "failed" if findings else "passed",
-        "total_issues": len(findings),
-        "issues": findings
-    }
-    return json.dumps(result)
-
-
-# Tool: Scan for vulnerable dependencies
-def scan_vulnerable_dependencies(code_diff: Annotated[str, "The PR diff content to scan"]) -> str:
-    """
-    Scans dependency files for known vulnerable versions.
-    Returns findings as a JSON string.
-    """
-    findings = []
-    
-    # Known vulnerable patterns (simplified - in production, use a vulnerability database)
-    vulnerable_packages = {
-        "requests": ["2.25.0", "2.26.0"],  # Example: versions with known issues
-        "pyyaml": ["5.3", "5.3.1"],  # Versions with arbitrary code execution
-        "pillow": ["8.1.0", "8.1.1"],  # Versions with security issues
-        "django": ["3.0", "3.0.1"],  # Example vulnerable versions
-        "flask": ["1.0", "1.0.1"],  # Example vulnerable versions
-    }
-    
-    lines = code_diff.split('\n')
-    for line_num, line in enumerate(lines, 1):
-        # Check requirements.txt or similar files
-        for package, vuln_versions in vulnerable_packages.items():
-            for version in vuln_versions:
-                if f"{package}=={version}" in line.lower() or f"{package}@{version}" in line.lower():
-                    findings.append({
-                        "type": "Vulnerable Dependency",
-                        "package": package,
-                        "vulnerable_version": version,
-                        "severity": "HIGH",
-                        "line": line_num,
-                        "recommendation": f"Update {package} to the latest secure version"
-                    })
-    
-    result = {
-        "scan_type": "vulnerable_dependencies",
-        "status": "failed" if findings else "passed",
-        "total_issues": len(findings),
-        "issues": findings
-    }
-    return json.dumps(result)
-
-
-# Tool: Scan for general security anti-patterns
-def scan_security_antipatterns(code_diff: Annotated[str, "The PR diff content to scan"]) -> str:
-    """
-    Scans for common security anti-patterns and unsafe practices.
-    Returns findings as a JSON string.
-    """
-    findings = []
-    
-    # Common security anti-patterns
-    patterns = {
-        "eval() usage": (r'\beval\s*\(', "Avoid eval() - it can execute arbitrary code", "HIGH"),
-        "exec() usage": (r'\bexec\s*\(', "Avoid exec() - it can execute arbitrary code", "HIGH"),
-        "pickle.loads()": (r'pickle\.loads\s*\(', "Pickle is unsafe for untrusted data - use JSON", "MEDIUM"),
-        "shell=True": (r'shell\s*=\s*True', "Avoid shell=True - use shell=False with list arguments", "HIGH"),
-        "md5 hashing": (r'\bhashlib\.md5\s*\(', "MD5 is cryptographically broken - use SHA256 or better", "MEDIUM"),
-        "assert for validation": (r'^\s*assert\s+', "Don't use assert for data validation - it can be disabled", "LOW"),
-        "hardcoded localhost": (r'(?i)(localhost|127\.0\.0\.1):[0-9]+', "Avoid hardcoded hosts - use configuration", "LOW"),
-    }
-    
-    lines = code_diff.split('\n')
-    for line_num, line in enumerate(lines, 1):
-        for pattern_name, (pattern, recommendation, severity) in patterns.items():
-            if re.search(pattern, line):
-                findings.append({
-                    "type": "Security Anti-Pattern",
-                    "pattern_name": pattern_name,
-                    "severity": severity,
-                    "line": line_num,
-                    "code_snippet": line.strip()[:80],
-                    "recommendation": recommendation
-                })
-    
-    result = {
-        "scan_type": "security_antipatterns",
-        "status": "failed" if findings else "passed",
-        "total_issues": len(findings),
-        "issues": findings
-    }
-    return json.dumps(result)
-
-
-# Tool: Generate security summary
-def generate_security_summary(
-    secrets_result: Annotated[str, "Results from secrets scan"],
-    sql_result: Annotated[str, "Results from SQL injection scan"],
-    deps_result: Annotated[str, "Results from dependency scan"],
-    antipatterns_result: Annotated[str, "Results from anti-patterns scan"]
-) -> str:
-    """
-    Generates a comprehensive security summary from all scan results.
-    Returns a JSON string with consolidated results.
-    """
-    all_scans = []
-    total_issues = 0
-    overall_status = "passed"
-    
-    for result_str in [secrets_result, sql_result, deps_result, antipatterns_result]:
-        try:
-            result = json.loads(result_str)
-            all_scans.append(result)
-            total_issues += result.get("total_issues", 0)
-            if result.get("status") == "failed":
-                overall_status = "failed"
-        except json.JSONDecodeError:
-            pass
-    
-    summary = {
-        "agent": "Security Auditor Agent",
-        "status": overall_status,
-        "total_issues": total_issues,
-        "scans": all_scans,
-        "summary": {
-            "hardcoded_secrets": sum(1 for s in all_scans if s.get("scan_type") == "hardcoded_secrets" and s.get("status") == "failed"),
-            "sql_injection": sum(1 for s in all_scans if s.get("scan_type") == "sql_injection" and s.get("status") == "failed"),
-            "vulnerable_dependencies": sum(1 for s in all_scans if s.get("scan_type") == "vulnerable_dependencies" and s.get("status") == "failed"),
-            "security_antipatterns": sum(1 for s in all_scans if s.get("scan_type") == "security_antipatterns" and s.get("status") == "failed")
-        }
-    }
-    
-    return json.dumps(summary)
-
+from workers_agents.security_scanners import (
+    scan_hardcoded_secrets,
+    scan_sql_injection,
+    scan_vulnerable_dependencies,
+    scan_security_antipatterns,
+    generate_security_summary,
+    run_all_scans,
+    RULES_VERSION,
+)
 
 # Create the Security Auditor Agent
 security_auditor = Agent(
-    model="gemini-2.5-flash",  # Use Ollama Llama 3.1 via LiteLLM
+    model=gemini_model(API_KEY, "gemini-2.5-flash"),
     name="security_auditor",
     description=(
         "Security specialist that scans pull request diffs for security vulnerabilities "
@@ -284,6 +90,53 @@ security_auditor = Agent(
 )
 
 
+class SecurityTriage(BaseModel):
+    """Structured reply of the triage agent."""
+    summary: str = Field(description="Two or three sentences on the real risk of this change")
+    false_positives: List[str] = Field(
+        default_factory=list,
+        description="Rules from the findings table that are false positives here",
+    )
+    top_risks: List[str] = Field(
+        default_factory=list,
+        description="Rules to fix first, most urgent first",
+    )
+
+
+# Fast-path agent: the scanners above run directly in Python and this agent
+# only triages their compact findings table in a single call (no tools, no
+# conversation history), instead of driving five tool round trips.
+security_triage_agent = Agent(
+    model=gemini_model(API_KEY, "gemini-2.5-flash"),
+    name="security_triage",
+    description="Triages deterministic security scanner findings for a pull request.",
+    instruction="""
+    You are a security expert triaging the findings of deterministic scanners
+    on a pull request diff. Each row is sev|rule|file|n|lines|details|snippets,
+    followed by the distinct recommended fixes.
+    
+    - Flag rules that are clearly false positives (test fixtures, placeholders,
+      parameterized queries, example values)
+    - List the rules to fix first, most urgent first
+    - Summarize the real risk of the change in two or three sentences
+    Use the rule names exactly as they appear in the table.
+    """,
+    output_schema=SecurityTriage,
+    include_contents="none",
+)
+
+AUDIT_QUERY = """
+    Please conduct a comprehensive security audit of this code:
+    
+    {code}
+    
+    Run all security checks and provide a detailed summary report.
+    """
+
+# Cached reports are tied to the auditor's model, instruction and query and the scanner rules
+CACHE_VERSION = agent_cache_version(security_auditor, prompts=(AUDIT_QUERY,), rules=RULES_VERSION)
+
+
 def read_sample_file(filename: str = "sample.py") -> str:
     """
     Reads the sample Python file from the current directory.
@@ -337,11 +190,18 @@ End of Report
     print(f"✅ Report written to: {file_path}")
 
 
-def audit_pr_diff(code_content: str, session_service: InMemorySessionService, 
-                  app_name: str, user_id: str, session_id: str) -> str:
+async def stream_audit_pr_diff(
+    code_content: str,
+    session_service: InMemorySessionService,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    timeout: Optional[float] = None,
+    runner: Optional[Runner] = None
+) -> AsyncIterator[str]:
     """
-    Main function to audit code for security issues using ADK Runner.
-    Now includes caching to handle rate limits.
+    Audits code for security issues, yielding the report text as it streams in.
+    Cached reports are yielded in one piece; complete runs are cached.
     
     Args:
         code_content: The code content to audit
@@ -349,104 +209,93 @@ def audit_pr_diff(code_content: str, session_service: InMemorySessionService,
         app_name: Application name for the session
         user_id: User ID for the session
         session_id: Session ID for the audit
+        timeout: Seconds for the whole run (defaults to AGENT_TIMEOUT_SECONDS)
+        runner: Reusable runner for the security auditor (created if not given)
         
-    Returns:
-        Security audit report as a string
+    Yields:
+        Chunks of the security audit report
     """
     agent_name = "security_auditor_adk"
     
     # Check cache first
     print(f"\n🔍 Checking cache for {agent_name}...")
-    cached_response = cache_manager.get(agent_name, code_content)
+    cached_response = await cache_manager.aget(agent_name, code_content, version=CACHE_VERSION)
     if cached_response is not None:
         print(f"✅ Cache HIT! Returning cached response.")
         print(f"   (No API call needed - using cached result)\n")
-        return cached_response if isinstance(cached_response, str) else json.dumps(cached_response, indent=2)
+        yield cached_response if isinstance(cached_response, str) else json.dumps(cached_response, indent=2)
+        return
     
     print(f"⚠️ Cache MISS - Calling Google ADK API...")
     print(f"   (This response will be cached for future use)\n")
     
-    # Create the runner with the security auditor agent
-    runner = Runner(
-        agent=security_auditor,
-        app_name=app_name,
-        session_service=session_service
-    )
-    
-    # Create the user query content
-    query = f"""
-    Please conduct a comprehensive security audit of this code:
+    if runner is None:
+        runner = Runner(
+            agent=security_auditor,
+            app_name=app_name,
+            session_service=session_service
+        )
     
-    {code_content}
-    
-    Run all security checks and provide a detailed summary report.
-    """
+    query = AUDIT_QUERY.format(code=code_content)
     
-    user_content = types.Content(
-        role='user',
-        parts=[types.Part(text=query)]
-    )
-    
-    # Run the agent and collect all responses
-    responses = []
     print("\n🤖 Agent is processing...\n")
+    chunks = []
+    async for chunk in stream_agent_text(runner, user_id, session_id, query, timeout):
+        chunks.append(chunk)
+        yield chunk
     
-    for event in runner.run(
-        user_id=user_id,
-        session_id=session_id,
-        new_message=user_content
-    ):
-        # Debug: print event type and attributes
-        print(f"Event type: {type(event).__name__}")
-        print(f"Event attributes: {dir(event)}")
-        
-        # Try to get text from various possible attributes
-        text_content = None
-        
-        if hasattr(event, 'content') and event.content:
-            if hasattr(event.content, 'parts') and event.content.parts:
-                for part in event.content.parts:
-                    if hasattr(part, 'text') and part.text:
-                        text_content = part.text
-                        print(f"📝 Collected response part ({len(part.text)} chars)")
-                        responses.append(part.text)
-        
-        # Also try direct text attribute
-        if hasattr(event, 'text') and event.text:
-            text_content = event.text
-            print(f"📝 Collected direct text ({len(event.text)} chars)")
-            responses.append(event.text)
-        
-        # Print first 200 chars of any text found
-        if text_content:
-            print(f"Preview: {text_content[:200]}...")
-        
-        # Check for final response
-        if hasattr(event, 'is_final_response'):
-            if callable(event.is_final_response):
-                if event.is_final_response():
-                    print("✅ Received final response marker")
-            elif event.is_final_response:
-                print("✅ Received final response marker")
-    
-    # Combine all responses
-    final_response = "\n\n".join(responses) if responses else ""
-    
+    final_response = "".join(chunks)
     if not final_response:
         print("⚠️ Warning: No text content found in agent responses")
         final_response = "No response received from agent. Please check the API configuration and try again."
+        # Keep the failure briefly so an immediate retry does not hit the API again
+        await cache_manager.aset(agent_name, code_content, final_response, failed=True, version=CACHE_VERSION)
+        yield final_response
     else:
         # Cache the successful response for future use
         print(f"\n💾 Caching response for agent: {agent_name}")
-        cache_manager.set(agent_name, code_content, final_response)
+        await cache_manager.aset(agent_name, code_content, final_response, version=CACHE_VERSION)
         print(f"✅ Response cached successfully!\n")
+
+
+async def audit_pr_diff_async(
+    code_content: str,
+    session_service: InMemorySessionService,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    timeout: Optional[float] = None,
+    runner: Optional[Runner] = None
+) -> str:
+    """
+    Audits code for security issues without blocking the event loop.
     
-    return final_response
+    Returns:
+        Security audit report as a string
+    """
+    chunks = []
+    async for chunk in stream_audit_pr_diff(
+        code_content, session_service, app_name, user_id, session_id, timeout, runner
+    ):
+        chunks.append(chunk)
+    return "".join(chunks)
 
 
-if __name__ == "__main__":
-    import asyncio
+def audit_pr_diff(code_content: str, session_service: InMemorySessionService, 
+                  app_name: str, user_id: str, session_id: str) -> str:
+    """
+    Synchronous wrapper around ``audit_pr_diff_async`` for scripts.
+    Async callers should await ``audit_pr_diff_async`` instead.
     
+    Returns:
+        Security audit report as a string
+    """
+    return asyncio.run(audit_pr_diff_async(
+        code_content, session_service, app_name, user_id, session_id
+    ))
+
+
+if __name__ == "__main__":
     async def main():
         print("\n" + "=" * 70)
         print("🔒 SECURITY AUDITOR AGENT")
@@ -477,7 +326,7 @@ if __name__ == "__main__":
             
             # Run the security audit
             print("🔒 Running security audit...")
-            result = audit_pr_diff(
+            result = await audit_pr_diff_async(
                 code_content, 
                 session_service, 
                 APP_NAME, 
@@ -0,0 +1,210 @@
+"""
+PR Comment Formatting Tools
+===========================
+Deterministic markdown builders used by the Ghostwriter agent as tools.
+Kept free of ADK imports so degraded-mode fallbacks can format comments
+without loading the agent framework.
+"""
+
+from datetime import datetime
+from typing import Annotated
+
+
+# Tool: Format PR comment header
+def format_pr_comment_header(
+    logic_status: Annotated[str, "Pass/Fail status of logic check"],
+    security_issues_count: Annotated[int, "Number of security issues found"],
+    readme_updated: Annotated[bool, "Whether README was updated"]
+) -> str:
+    """
+    Creates a professional PR comment header with emoji indicators.
+    """
+    # Format logic status
+    logic_emoji = "✅" if logic_status.lower() == "pass" else "❌"
+    logic_text = f"{logic_emoji} Logic {logic_status}"
+    
+    # Format security status
+    if security_issues_count == 0:
+        security_text = "✅ No Security Risks"
+    elif security_issues_count == 1:
+        security_text = "⚠️ 1 Security Risk Found"
+    else:
+        security_text = f"⚠️ {security_issues_count} Security Risks Found"
+    
+    # Format README status
+    readme_text = "📝 README Updated" if readme_updated else "📄 No README Changes"
+    
+    header = f"""## 🔍 Pull Request Review Summary
+
+{logic_text} | {security_text} | {readme_text}
+
+---
+"""
+    return header
+
+
+# Tool: Format security findings section
+def format_security_findings(
+    security_report: Annotated[str, "Raw security audit report"]
+) -> str:
+    """
+    Formats security findings into a clean, readable markdown section.
+    """
+    if "✅" in security_report and "PASSED" in security_report.upper():
+        return """### 🔒 Security Analysis
+**Status:** ✅ All security checks passed
+
+No security vulnerabilities detected in this PR.
+"""
+    
+    section = """### 🔒 Security Analysis
+**Status:** ⚠️ Issues Require Attention
+
+"""
+    
+    # Extract key findings from the report
+    if "HARDCODED SECRETS" in security_report:
+        section += "#### 🔐 Hardcoded Secrets\n"
+        section += "Potential credentials or API keys detected in code. Please use environment variables or secret management.\n\n"
+    
+    if "SQL INJECTION" in security_report:
+        section += "#### 💉 SQL Injection Risks\n"
+        section += "Unsafe SQL query construction detected. Use parameterized queries or ORM methods.\n\n"
+    
+    if "VULNERABLE DEPENDENCIES" in security_report:
+        section += "#### 📦 Vulnerable Dependencies\n"
+        section += "Outdated packages with known vulnerabilities found. Update to latest secure versions.\n\n"
+    
+    if "SECURITY ANTI-PATTERNS" in security_report:
+        section += "#### 🛡️ Security Anti-Patterns\n"
+        section += "Unsafe coding practices detected. Review and apply security best practices.\n\n"
+    
+    return section
+
+
+# Tool: Format logic check section
+def format_logic_check(
+    logic_status: Annotated[str, "Pass/Fail status"],
+    logic_details: Annotated[str, "Details about logic check"]
+) -> str:
+    """
+    Formats the logic check results into markdown.
+    """
+    emoji = "✅" if logic_status.lower() == "pass" else "❌"
+    
+    section = f"""### 🧮 Logic & Functionality
+**Status:** {emoji} {logic_status}
+
+{logic_details}
+"""
+    return section
+
+
+# Tool: Format README changes section
+def format_readme_section(
+    readme_updated: Annotated[bool, "Whether README was updated"],
+    readme_changes: Annotated[str, "Description of README changes if any"]
+) -> str:
+    """
+    Formats the README update section.
+    """
+    if readme_updated:
+        return f"""### 📝 Documentation Updates
+**Status:** ✅ README Updated
+
+{readme_changes}
+"""
+    else:
+        return """### 📝 Documentation Updates
+**Status:** ℹ️ No documentation changes in this PR
+
+Consider updating the README if new features or significant changes were introduced.
+"""
+
+
+# Tool: Generate recommendations
+def generate_recommendations(
+    has_security_issues: Annotated[bool, "Whether security issues exist"],
+    has_logic_issues: Annotated[bool, "Whether logic issues exist"],
+    needs_readme: Annotated[bool, "Whether README should be updated"]
+) -> str:
+    """
+    Generates actionable recommendations based on findings.
+    """
+    recommendations = []
+    
+    if has_security_issues:
+        recommendations.append("🔒 **Security:** Address all security vulnerabilities before merging")
+    
+    if has_logic_issues:
+        recommendations.append("🧮 **Logic:** Fix identified logic errors and add test coverage")
+    
+    if needs_readme:
+        recommendations.append("📝 **Documentation:** Update README to reflect new changes")
+    
+    if not recommendations:
+        recommendations.append("✅ **Ready to Merge:** All checks passed successfully!")
+    
+    section = """### 💡 Recommendations
+
+"""
+    section += "\n".join(f"- {rec}" for rec in recommendations)
+    section += "\n"
+    
+    return section
+
+
+# Tool: Create final PR comment
+def create_pr_comment(
+    header: Annotated[str, "Formatted header section"],
+    security_section: Annotated[str, "Formatted security section"],
+    logic_section: Annotated[str, "Formatted logic section"],
+    readme_section: Annotated[str, "Formatted README section"],
+    recommendations: Annotated[str, "Formatted recommendations"]
+) -> str:
+    """
+    Combines all sections into a complete, professional GitHub PR comment.
+    """
+    footer = f"""
+---
+
+*🤖 Automated review generated at {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}*
+*Powered by ADK Multi-Agent PR Review System*
+"""
+    
+    full_comment = (
+        header +
+        security_section +
+        logic_section +
+        readme_section +
+        recommendations +
+        footer
+    )
+    
+    return full_comment
+
+
+# Tool: Generate summary statistics
+def generate_summary_statistics(
+    total_files_changed: Annotated[int, "Number of files changed"],
+    lines_added: Annotated[int, "Lines of code added"],
+    lines_removed: Annotated[int, "Lines of code removed"],
+    security_issues: Annotated[int, "Number of security issues"],
+    logic_issues: Annotated[int, "Number of logic issues"]
+) -> str:
+    """
+    Creates a summary statistics section for the PR.
+    """
+    section = f"""### 📊 Change Statistics
+
+| Metric | Value |
+|--------|-------|
+| Files Changed | {total_files_changed} |
+| Lines Added | +{lines_added} |
+| Lines Removed | -{lines_removed} |
+| Net Change | {lines_added - lines_removed:+d} |
+| Security Issues | {security_issues} |
+| Logic Issues | {logic_issues} |
+
+"""
+    return section
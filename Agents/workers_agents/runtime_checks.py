@@ -0,0 +1,39 @@
+"""
+Runtime Static Checks
+=====================
+Deterministic checks run by the Runtime Validator before the LLM pass.
+Kept free of ADK imports so degraded-mode fallbacks can run them without
+loading the agent framework.
+"""
+
+import ast
+from typing import Dict, List
+
+# Bump when a check changes, so cached runtime reports are recomputed
+RULES_VERSION = "1"
+
+
+def detect_syntax_errors(code: str) -> List[Dict]:
+    try:
+        ast.parse(code)
+        return []
+    except SyntaxError as e:
+        return [{
+            "type": "Syntax Error",
+            "severity": "CRITICAL",
+            "description": e.msg,
+            "location": f"Line {e.lineno}"
+        }]
+
+
+def detect_infinite_loops(code: str) -> List[Dict]:
+    issues = []
+    for i, line in enumerate(code.splitlines(), 1):
+        if line.replace(" ", "") == "whileTrue:":
+            issues.append({
+                "type": "Infinite Loop",
+                "severity": "HIGH",
+                "description": "Unconditional infinite loop detected.",
+                "location": f"Line {i}"
+            })
+    return issues
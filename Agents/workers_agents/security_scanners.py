@@ -0,0 +1,240 @@
+"""
+Security Scanners for PR Code Review
+====================================
+Deterministic regex scans used by the Security Auditor agent as tools.
+Kept free of ADK imports so other stages (hunk ranking, fallbacks) can
+run them without loading the agent framework.
+"""
+
+import json
+import re
+from typing import Annotated
+
+# Bump when a scanner rule changes, so cached security reports are recomputed
+RULES_VERSION = "2"
+
+
+def _diff_lines(code_diff: str):
+    """Yield (line number, file path or None, line) for each line, tracking ``+++`` file headers."""
+    file_path = None
+    for line_num, line in enumerate(code_diff.split('\n'), 1):
+        if line.startswith('+++ '):
+            path = line[4:].strip()
+            file_path = None if path == '/dev/null' else path.removeprefix('b/')
+        yield line_num, file_path, line
+
+
+# Tool: Scan for hardcoded secrets
+def scan_hardcoded_secrets(code_diff: Annotated[str, "The PR diff content to scan"]) -> str:
+    """
+    Scans code diff for hardcoded secrets like API keys, passwords, and tokens.
+    Returns findings as a JSON string.
+    """
+    findings = []
+    
+    # Patterns for common secrets
+    patterns = {
+        "API Key": r'(?i)(api[_-]?key|apikey|api[_-]?secret)\s*[:=]\s*["\']([a-zA-Z0-9_\-]{20,})["\']',
+        "AWS Access Key": r'(?i)(aws[_-]?access[_-]?key[_-]?id|aws[_-]?secret)\s*[:=]\s*["\']([A-Z0-9]{20,})["\']',
+        "Password": r'(?i)(password|passwd|pwd)\s*[:=]\s*["\']([^"\']{8,})["\']',
+        "Private Key": r'-----BEGIN (?:RSA |EC )?PRIVATE KEY-----',
+        "OAuth Token": r'(?i)(oauth[_-]?token|access[_-]?token)\s*[:=]\s*["\']([a-zA-Z0-9_\-\.]{20,})["\']',
+        "GitHub Token": r'(?i)(gh[ps]_[a-zA-Z0-9]{36,})',
+        "Generic Secret": r'(?i)(secret|token|bearer)\s*[:=]\s*["\']([a-zA-Z0-9_\-]{32,})["\']',
+    }
+    
+    for line_num, file_path, line in _diff_lines(code_diff):
+        # Check all lines (not just those starting with +)
+        for secret_type, pattern in patterns.items():
+            if re.search(pattern, line):
+                findings.append({
+                    "type": "Hardcoded Secret",
+                    "secret_type": secret_type,
+                    "severity": "CRITICAL",
+                    "file": file_path,
+                    "line": line_num,
+                    "code_snippet": line.strip()[:80],
+                    "recommendation": "Remove hardcoded secrets and use environment variables or secret management systems"
+                })
+    
+    result = {
+        "scan_type": "hardcoded_secrets",
+        "status": "failed" if findings else "passed",
+        "total_issues": len(findings),
+        "issues": findings
+    }
+    return json.dumps(result)
+
+
+# Tool: Scan for SQL injection vulnerabilities
+def scan_sql_injection(code_diff: Annotated[str, "The PR diff content to scan"]) -> str:
+    """
+    Scans code diff for potential SQL injection vulnerabilities.
+    Returns findings as a JSON string.
+    """
+    findings = []
+    
+    # Patterns for SQL injection vulnerabilities
+    patterns = {
+        "String concatenation in SQL": r'(?i)(execute|exec|query)\s*\([^)]*[+%]\s*["\']',
+        "F-string in SQL": r'(?i)(execute|exec|query)\s*\([^)]*f["\'].*{',
+        "Format in SQL": r'(?i)(execute|exec|query)\s*\([^)]*\.format\(',
+        "Unsafe SQL construction": r'(?i)(select|insert|update|delete).*[+%].*(?:where|from|into)',
+    }
+    
+    for line_num, file_path, line in _diff_lines(code_diff):
+        for vuln_type, pattern in patterns.items():
+            if re.search(pattern, line):
+                findings.append({
+                    "type": "SQL Injection Vulnerability",
+                    "vulnerability_type": vuln_type,
+                    "severity": "HIGH",
+                    "file": file_path,
+                    "line": line_num,
+                    "code_snippet": line.strip()[:80],
+                    "recommendation": "Use parameterized queries or ORM to prevent SQL injection"
+                })
+    
+    result = {
+        "scan_type": "sql_injection",
+        "status": "failed" if findings else "passed",
+        "total_issues": len(findings),
+        "issues": findings
+    }
+    return json.dumps(result)
+
+
+# Tool: Scan for vulnerable dependencies
+def scan_vulnerable_dependencies(code_diff: Annotated[str, "The PR diff content to scan"]) -> str:
+    """
+    Scans dependency files for known vulnerable versions.
+    Returns findings as a JSON string.
+    """
+    findings = []
+    
+    # Known vulnerable patterns (simplified - in production, use a vulnerability database)
+    vulnerable_packages = {
+        "requests": ["2.25.0", "2.26.0"],  # Example: versions with known issues
+        "pyyaml": ["5.3", "5.3.1"],  # Versions with arbitrary code execution
+        "pillow": ["8.1.0", "8.1.1"],  # Versions with security issues
+        "django": ["3.0", "3.0.1"],  # Example vulnerable versions
+        "flask": ["1.0", "1.0.1"],  # Example vulnerable versions
+    }
+    
+    for line_num, file_path, line in _diff_lines(code_diff):
+        # Check requirements.txt or similar files
+        for package, vuln_versions in vulnerable_packages.items():
+            for version in vuln_versions:
+                if f"{package}=={version}" in line.lower() or f"{package}@{version}" in line.lower():
+                    findings.append({
+                        "type": "Vulnerable Dependency",
+                        "package": package,
+                        "vulnerable_version": version,
+                        "severity": "HIGH",
+                        "file": file_path,
+                        "line": line_num,
+                        "recommendation": f"Update {package} to the latest secure version"
+                    })
+    
+    result = {
+        "scan_type": "vulnerable_dependencies",
+        "status": "failed" if findings else "passed",
+        "total_issues": len(findings),
+        "issues": findings
+    }
+    return json.dumps(result)
+
+
+# Tool: Scan for general security anti-patterns
+def scan_security_antipatterns(code_diff: Annotated[str, "The PR diff content to scan"]) -> str:
+    """
+    Scans for common security anti-patterns and unsafe practices.
+    Returns findings as a JSON string.
+    """
+    findings = []
+    
+    # Common security anti-patterns
+    patterns = {
+        "eval() usage": (r'\beval\s*\(', "Avoid eval() - it can execute arbitrary code", "HIGH"),
+        "exec() usage": (r'\bexec\s*\(', "Avoid exec() - it can execute arbitrary code", "HIGH"),
+        "pickle.loads()": (r'pickle\.loads\s*\(', "Pickle is unsafe for untrusted data - use JSON", "MEDIUM"),
+        "shell=True": (r'shell\s*=\s*True', "Avoid shell=True - use shell=False with list arguments", "HIGH"),
+        "md5 hashing": (r'\bhashlib\.md5\s*\(', "MD5 is cryptographically broken - use SHA256 or better", "MEDIUM"),
+        "assert for validation": (r'^\s*assert\s+', "Don't use assert for data validation - it can be disabled", "LOW"),
+        "hardcoded localhost": (r'(?i)(localhost|127\.0\.0\.1):[0-9]+', "Avoid hardcoded hosts - use configuration", "LOW"),
+    }
+    
+    for line_num, file_path, line in _diff_lines(code_diff):
+        for pattern_name, (pattern, recommendation, severity) in patterns.items():
+            if re.search(pattern, line):
+                findings.append({
+                    "type": "Security Anti-Pattern",
+                    "pattern_name": pattern_name,
+                    "severity": severity,
+                    "file": file_path,
+                    "line": line_num,
+                    "code_snippet": line.strip()[:80],
+                    "recommendation": recommendation
+                })
+    
+    result = {
+        "scan_type": "security_antipatterns",
+        "status": "failed" if findings else "passed",
+        "total_issues": len(findings),
+        "issues": findings
+    }
+    return json.dumps(result)
+
+
+# Tool: Generate security summary
+def generate_security_summary(
+    secrets_result: Annotated[str, "Results from secrets scan"],
+    sql_result: Annotated[str, "Results from SQL injection scan"],
+    deps_result: Annotated[str, "Results from dependency scan"],
+    antipatterns_result: Annotated[str, "Results from anti-patterns scan"]
+) -> str:
+    """
+    Generates a comprehensive security summary from all scan results.
+    Returns a JSON string with consolidated results.
+    """
+    all_scans = []
+    total_issues = 0
+    overall_status = "passed"
+    
+    for result_str in [secrets_result, sql_result, deps_result, antipatterns_result]:
+        try:
+            result = json.loads(result_str)
+            all_scans.append(result)
+            total_issues += result.get("total_issues", 0)
+            if result.get("status") == "failed":
+                overall_status = "failed"
+        except json.JSONDecodeError:
+            pass
+    
+    summary = {
+        "agent": "Security Auditor Agent",
+        "status": overall_status,
+        "total_issues": total_issues,
+        "scans": all_scans,
+        "summary": {
+            "hardcoded_secrets": sum(1 for s in all_scans if s.get("scan_type") == "hardcoded_secrets" and s.get("status") == "failed"),
+            "sql_injection": sum(1 for s in all_scans if s.get("scan_type") == "sql_injection" and s.get("status") == "failed"),
+            "vulnerable_dependencies": sum(1 for s in all_scans if s.get("scan_type") == "vulnerable_dependencies" and s.get("status") == "failed"),
+            "security_antipatterns": sum(1 for s in all_scans if s.get("scan_type") == "security_antipatterns" and s.get("status") == "failed")
+        }
+    }
+    
+    return json.dumps(summary)
+
+
+def run_all_scans(code_diff: str) -> dict:
+    """
+    Runs every scanner directly in Python (no LLM round trips) and returns
+    the consolidated summary as a dictionary.
+    """
+    return json.loads(generate_security_summary(
+        scan_hardcoded_secrets(code_diff),
+        scan_sql_injection(code_diff),
+        scan_vulnerable_dependencies(code_diff),
+        scan_security_antipatterns(code_diff),
+    ))
@@ -1,10 +1,19 @@
 from groq import Groq
 import os
+import sys
 import json
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 
+# Shared cache, report and breaker modules live in Agents/ and agent-engine/;
+# appended so this bot's own cache_manager comes first
+sys.path.append(str(Path(__file__).parent.parent / "Agents"))
+sys.path.append(str(Path(__file__).parent.parent / "agent-engine"))
+
+from report_encoder import encode_report
+from circuit_breaker import CircuitOpenError, get_breaker
+
 # Load environment variables
 load_dotenv()
 
@@ -13,6 +22,7 @@ GROQ_API_KEY = os.getenv("GHOSTWRITER_API_KEY") or os.getenv("GROQ_API_KEY")
 
 # Initialize Groq client
 groq_client = Groq(api_key=GROQ_API_KEY)
+groq_breaker = get_breaker("groq", "llama-3.3-70b-versatile")
 
 """
 Ghostwriter Agent (Groq-powered) - The Synthesizer for PR Reviews
@@ -52,16 +62,20 @@ def synthesize_pr_review(
 
     # Prepare context for Groq
     prompt = f"""You are a professional technical writer creating a GitHub PR review comment.
+Details are compact: a key=value header, then one row per finding group
+(sev|rule|file|n|lines|details|snippets), then distinct fixes.
 
 **Security Analysis Results:**
 - Status: {security_status}
 - Issues Found: {security_issues}
-- Details: {json.dumps(security_report.get('scans', []), indent=2)}
+- Details:
+{encode_report(security_report)}
 
 **Runtime Validation Results:**
 - Status: {runtime_status}
 - Issues Found: {runtime_issues}
-- Details: {json.dumps(runtime_report.get('issues', []), indent=2)}
+- Details:
+{encode_report(runtime_report)}
 
 **PR Statistics:**
 - Files Changed: {files_changed}
@@ -84,6 +98,8 @@ Return ONLY the markdown comment, no other text."""
     try:
         print("🤖 Generating PR comment with Groq AI...")
 
+        # Fail fast to the template while Groq is known to be down
+        groq_breaker.check()
         chat_completion = groq_client.chat.completions.create(
             messages=[
                 {
@@ -98,6 +114,7 @@ Return ONLY the markdown comment, no other text."""
         )
 
         comment = chat_completion.choices[0].message.content
+        groq_breaker.record_success()
 
         # Add footer
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -113,19 +130,23 @@ Return ONLY the markdown comment, no other text."""
         print("✅ PR comment generated successfully")
         return comment
 
+    except CircuitOpenError as e:
+        # Rejected before any call was made, so there is nothing to record
+        print(f"⚠️ Groq skipped: {e}")
     except Exception as e:
+        groq_breaker.record_failure(e)
         print(f"❌ Error generating comment: {e}")
 
-        # Fallback to basic template
-        return generate_fallback_comment(
-            security_issues,
-            security_status,
-            runtime_issues,
-            runtime_status,
-            files_changed,
-            additions,
-            deletions,
-        )
+    # Fallback to basic template
+    return generate_fallback_comment(
+        security_issues,
+        security_status,
+        runtime_issues,
+        runtime_status,
+        files_changed,
+        additions,
+        deletions,
+    )
 
 
 def generate_fallback_comment(
@@ -1,19 +1,27 @@
 from groq import Groq
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 import ast
 import json
 import os
 import sys
 from dotenv import load_dotenv
 
+# Shared cache, report and breaker modules live in Agents/ and agent-engine/;
+# appended so this bot's own cache_manager comes first
+sys.path.append(str(Path(__file__).parent.parent / "Agents"))
+sys.path.append(str(Path(__file__).parent.parent / "agent-engine"))
+
 # Import cache_manager from current directory
 try:
-    from cache_manager import get_cache_manager
+    from cache_manager import get_cache_manager, is_failed_response
 except ImportError:
     # Fallback if running from different directory
     sys.path.append(str(Path(__file__).parent))
-    from cache_manager import get_cache_manager
+    from cache_manager import get_cache_manager, is_failed_response
+
+from cache_keys import cache_version
+from circuit_breaker import CircuitOpenError, get_breaker
 
 # Load environment variables
 load_dotenv()
@@ -21,13 +29,14 @@ load_dotenv()
 # Get Groq API key
 GROQ_API_KEY = os.getenv("RUNTIME_VALIDATOR_API_KEY") or os.getenv("GROQ_API_KEY")
 
+GROQ_MODEL = "llama-3.3-70b-versatile"
+
 # Initialize Groq client
 groq_client = Groq(api_key=GROQ_API_KEY)
+groq_breaker = get_breaker("groq", GROQ_MODEL)
 
 # Initialize cache manager
-cache_manager = get_cache_manager(
-    cache_dir=str(Path(__file__).parent / "agent_cache"), default_ttl_hours=24
-)
+cache_manager = get_cache_manager(cache_dir=str(Path(__file__).parent / "agent_cache"))
 
 """
 Runtime Validator Agent (Groq-powered)
@@ -43,6 +52,9 @@ Runtime Validator Agent (Groq-powered)
 # STATIC CHECKS (DETERMINISTIC)
 # =========================================================
 
+# Bump when a static check changes, so cached reports are recomputed
+STATIC_RULES_VERSION = "1"
+
 
 def detect_syntax_errors(code: str) -> List[Dict]:
     """Detect Python syntax errors using AST parsing."""
@@ -111,17 +123,9 @@ def detect_undefined_variables(code: str) -> List[Dict]:
 # =========================================================
 
 
-def analyze_runtime_with_groq(code: str) -> List[Dict]:
-    """
-    Use Groq AI to detect runtime issues and logic flaws.
-
-    Args:
-        code: Python code to analyze
+SYSTEM_PROMPT = "You are a code validator. Return only valid JSON."
 
-    Returns:
-        List of runtime issues found
-    """
-    prompt = f"""You are a runtime code validator. Analyze this Python code for runtime issues.
+RUNTIME_PROMPT = """You are a runtime code validator. Analyze this Python code for runtime issues.
 
 Code to analyze:
 ```python
@@ -150,21 +154,40 @@ Return ONLY valid JSON in this format:
 If no issues, return: {{"issues": []}}
 """
 
+# Cached reports are tied to the model, prompts and static checks
+CACHE_VERSION = cache_version(GROQ_MODEL, (SYSTEM_PROMPT, RUNTIME_PROMPT), STATIC_RULES_VERSION)
+
+
+def analyze_runtime_with_groq(code: str) -> Optional[List[Dict]]:
+    """
+    Use Groq AI to detect runtime issues and logic flaws.
+
+    Args:
+        code: Python code to analyze
+
+    Returns:
+        List of runtime issues found, or None if the Groq call failed
+    """
+    prompt = RUNTIME_PROMPT.format(code=code)
+
     try:
+        # Fail fast to the static results while Groq is known to be down
+        groq_breaker.check()
         chat_completion = groq_client.chat.completions.create(
             messages=[
                 {
                     "role": "system",
-                    "content": "You are a code validator. Return only valid JSON.",
+                    "content": SYSTEM_PROMPT,
                 },
                 {"role": "user", "content": prompt},
             ],
-            model="llama-3.3-70b-versatile",
+            model=GROQ_MODEL,
             temperature=0.1,
             max_tokens=1500,
         )
 
         response_text = chat_completion.choices[0].message.content
+        groq_breaker.record_success()
 
         # Try to parse JSON response
         try:
@@ -181,9 +204,14 @@ If no issues, return: {{"issues": []}}
                 }
             ]
 
+    except CircuitOpenError as e:
+        # Rejected before any call was made, so there is nothing to record
+        print(f"⚠️ Groq skipped: {e}")
+        return None
     except Exception as e:
+        groq_breaker.record_failure(e)
         print(f"⚠️ Groq API error: {e}")
-        return []
+        return None
 
 
 # =========================================================
@@ -205,10 +233,13 @@ def validate_runtime(code: str) -> Dict:
 
     # Check cache first
     print(f"\n🔍 Checking cache for {agent_name}...")
-    cached_response = cache_manager.get(agent_name, code)
+    cached_response = cache_manager.get(agent_name, code, version=CACHE_VERSION)
     if cached_response is not None:
-        print(f"✅ Cache HIT! Returning cached response.")
-        print(f"   (No API call needed - using cached result)\n")
+        if is_failed_response(cached_response):
+            print(f"⚠️ Negative cache HIT - Groq failed moments ago, returning static results.")
+        else:
+            print(f"✅ Cache HIT! Returning cached response.")
+            print(f"   (No API call needed - using cached result)\n")
         return cached_response
 
     print(f"⚠️ Cache MISS - Running validation...")
@@ -226,7 +257,12 @@ def validate_runtime(code: str) -> Dict:
     # Run AI-powered analysis
     print("🤖 Running AI-powered runtime analysis...")
     ai_issues = analyze_runtime_with_groq(code)
-    print(f"   Found {len(ai_issues)} AI-detected issues")
+    ai_failed = ai_issues is None
+    if ai_failed:
+        ai_issues = []
+        print("   AI analysis unavailable - static checks only")
+    else:
+        print(f"   Found {len(ai_issues)} AI-detected issues")
 
     # Combine all issues
     all_issues = static_issues + ai_issues
@@ -237,10 +273,14 @@ def validate_runtime(code: str) -> Dict:
         "total_issues": len(all_issues),
         "issues": all_issues,
     }
+    if ai_failed:
+        # Static checks only: cached briefly as a failure, not for a full day
+        result["degraded"] = True
+        result["error"] = "Groq runtime analysis unavailable"
 
     # Cache the result
     print(f"\n💾 Caching response for agent: {agent_name}")
-    cache_manager.set(agent_name, code, result)
+    cache_manager.set(agent_name, code, result, version=CACHE_VERSION)
     print(f"✅ Response cached successfully!\n")
 
     return result
@@ -6,13 +6,22 @@ import json
 import sys
 from dotenv import load_dotenv
 
+# Shared cache, report and breaker modules live in Agents/ and agent-engine/;
+# appended so this bot's own cache_manager comes first
+sys.path.append(str(Path(__file__).parent.parent / "Agents"))
+sys.path.append(str(Path(__file__).parent.parent / "agent-engine"))
+
 # Import cache_manager from current directory
 try:
-    from cache_manager import get_cache_manager
+    from cache_manager import get_cache_manager, is_failed_response
 except ImportError:
     # Fallback if running from different directory
     sys.path.append(str(Path(__file__).parent))
-    from cache_manager import get_cache_manager
+    from cache_manager import get_cache_manager, is_failed_response
+
+from report_encoder import encode_report
+from cache_keys import cache_version
+from circuit_breaker import CircuitOpenError, get_breaker
 
 # Load environment variables
 load_dotenv()
@@ -20,13 +29,14 @@ load_dotenv()
 # Get Groq API key
 GROQ_API_KEY = os.getenv("SECURITY_AUDITOR_API_KEY") or os.getenv("GROQ_API_KEY")
 
+GROQ_MODEL = "llama-3.3-70b-versatile"  # Groq's best model
+
 # Initialize Groq client
 groq_client = Groq(api_key=GROQ_API_KEY)
+groq_breaker = get_breaker("groq", GROQ_MODEL)
 
 # Initialize cache manager
-cache_manager = get_cache_manager(
-    cache_dir=str(Path(__file__).parent / "agent_cache"), default_ttl_hours=24
-)
+cache_manager = get_cache_manager(cache_dir=str(Path(__file__).parent / "agent_cache"))
 
 """
 Security Auditor Agent for PR Code Review
@@ -248,6 +258,29 @@ def scan_security_antipatterns(
     return json.dumps(result)
 
 
+# Bump when a scanner rule changes, so cached reports are recomputed
+SCANNER_RULES_VERSION = "1"
+
+SYSTEM_PROMPT = "You are a security expert. Return only valid JSON."
+
+SECURITY_PROMPT = """You are a security auditor. Analyze these security scan results and provide a brief summary.
+
+Scan Results (sev|rule|file|n|lines|details|snippets, then distinct fixes):
+{report}
+
+Provide a JSON response with:
+- overall_status: "passed" or "failed"
+- total_issues: number
+- critical_count: number of CRITICAL issues
+- high_count: number of HIGH issues
+- summary: brief text summary
+
+Return ONLY valid JSON, no other text."""
+
+# Cached reports are tied to the model, prompts and scanner rules
+CACHE_VERSION = cache_version(GROQ_MODEL, (SYSTEM_PROMPT, SECURITY_PROMPT), SCANNER_RULES_VERSION)
+
+
 def run_security_audit_with_groq(code_diff: str) -> dict:
     """
     Run security audit using Groq API to analyze the scan results.
@@ -277,35 +310,29 @@ def run_security_audit_with_groq(code_diff: str) -> dict:
             pass
 
     # Use Groq to generate summary
-    prompt = f"""You are a security auditor. Analyze these security scan results and provide a brief summary.
-
-Scan Results:
-{json.dumps(all_scans, indent=2)}
-
-Provide a JSON response with:
-- overall_status: "passed" or "failed"
-- total_issues: number
-- critical_count: number of CRITICAL issues
-- high_count: number of HIGH issues
-- summary: brief text summary
-
-Return ONLY valid JSON, no other text."""
+    prompt = SECURITY_PROMPT.format(
+        report=encode_report({"total_issues": total_issues, "scans": all_scans})
+    )
 
+    llm_error = None
     try:
+        # Fail fast to the static results while Groq is known to be down
+        groq_breaker.check()
         chat_completion = groq_client.chat.completions.create(
             messages=[
                 {
                     "role": "system",
-                    "content": "You are a security expert. Return only valid JSON.",
+                    "content": SYSTEM_PROMPT,
                 },
                 {"role": "user", "content": prompt},
             ],
-            model="llama-3.3-70b-versatile",  # Groq's best model
+            model=GROQ_MODEL,
             temperature=0.1,
             max_tokens=1000,
         )
 
         llm_response = chat_completion.choices[0].message.content
+        groq_breaker.record_success()
 
         # Try to parse LLM response as JSON
         try:
@@ -313,9 +340,16 @@ Return ONLY valid JSON, no other text."""
         except:
             llm_summary = {"summary": llm_response}
 
+    except CircuitOpenError as e:
+        # Rejected before any call was made, so there is nothing to record
+        print(f"⚠️ Groq skipped: {e}")
+        llm_summary = {"summary": "LLM analysis unavailable"}
+        llm_error = str(e)
     except Exception as e:
+        groq_breaker.record_failure(e)
         print(f"⚠️ Groq API error: {e}")
         llm_summary = {"summary": "LLM analysis unavailable"}
+        llm_error = str(e)
 
     # Build final report
     summary = {
@@ -350,6 +384,10 @@ Return ONLY valid JSON, no other text."""
             ),
         },
     }
+    if llm_error:
+        # Static scans only: cached briefly as a failure, not for a full day
+        summary["degraded"] = True
+        summary["error"] = llm_error
 
     return summary
 
@@ -424,10 +462,13 @@ def audit_pr_diff(
 
     # Check cache first
     print(f"\n🔍 Checking cache for {agent_name}...")
-    cached_response = cache_manager.get(agent_name, code_content)
+    cached_response = cache_manager.get(agent_name, code_content, version=CACHE_VERSION)
     if cached_response is not None:
-        print(f"✅ Cache HIT! Returning cached response.")
-        print(f"   (No API call needed - using cached result)\n")
+        if is_failed_response(cached_response):
+            print(f"⚠️ Negative cache HIT - Groq failed moments ago, returning static results.")
+        else:
+            print(f"✅ Cache HIT! Returning cached response.")
+            print(f"   (No API call needed - using cached result)\n")
         return (
             cached_response
             if isinstance(cached_response, str)
@@ -446,7 +487,7 @@ def audit_pr_diff(
 
     # Cache the successful response for future use
     print(f"\n💾 Caching response for agent: {agent_name}")
-    cache_manager.set(agent_name, code_content, result)
+    cache_manager.set(agent_name, code_content, result, version=CACHE_VERSION)
     print(f"✅ Response cached successfully!\n")
 
     return final_response
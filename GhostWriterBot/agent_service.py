@@ -5,6 +5,7 @@ Coordinates Security Auditor, Runtime Validator, and Ghostwriter agents (all Gro
 
 import json
 import asyncio
+import sys
 from pathlib import Path
 from typing import Dict
 from datetime import datetime
@@ -13,6 +14,15 @@ from datetime import datetime
 from Security_Auditor import audit_pr_diff as run_security_audit
 from Runtime_Validator import validate_runtime as run_runtime_validation
 from GhostWriter import synthesize_pr_review as run_ghostwriter
+# Shared cache, report and breaker modules live in Agents/ and agent-engine/;
+# appended so this bot's own cache_manager comes first
+sys.path.append(str(Path(__file__).parent.parent / "Agents"))
+sys.path.append(str(Path(__file__).parent.parent / "agent-engine"))
+
+from single_flight import SingleFlight, content_key
+
+# Webhook redeliveries and manual triggers for the same diff share one review
+review_flight = SingleFlight("pr_review")
 
 
 class AgentOrchestrator:
@@ -42,7 +52,8 @@ class AgentOrchestrator:
         print("=" * 70)
 
         # Run security audit (uses Groq API with caching)
-        result_str = run_security_audit(code_content=pr_diff)
+        # Blocking Groq call runs off the event loop so other reviews proceed
+        result_str = await asyncio.to_thread(run_security_audit, code_content=pr_diff)
 
         # Try to parse JSON response
         try:
@@ -85,7 +96,7 @@ class AgentOrchestrator:
         code_content = "\n".join(code_lines)
 
         # Run runtime validation (uses Groq API with caching)
-        result = run_runtime_validation(code_content)
+        result = await asyncio.to_thread(run_runtime_validation, code_content)
 
         print(
             f"✅ Runtime validation complete: {result.get('total_issues', 0)} issues found"
@@ -116,7 +127,8 @@ class AgentOrchestrator:
         print("=" * 70)
 
         # Synthesize PR review using Groq
-        pr_comment = run_ghostwriter(
+        pr_comment = await asyncio.to_thread(
+            run_ghostwriter,
             security_report=security_report,
             runtime_report=runtime_report,
             pr_metadata=pr_metadata,
@@ -126,19 +138,36 @@ class AgentOrchestrator:
         return pr_comment
 
     async def orchestrate_pr_review(
-        self, pr_diff: str, pr_metadata: Dict, pr_number: int
+        self, pr_diff: str, pr_metadata: Dict, pr_number: int, repo_full_name: str = ""
     ) -> str:
         """
-        Main orchestration method - runs all three agents in sequence.
+        Main orchestration method. Concurrent reviews of the same PR (same
+        repository, number, metadata and diff) attach to the one already in
+        flight instead of re-running the agents.
 
         Args:
             pr_diff: Unified PR diff
             pr_metadata: PR metadata
             pr_number: PR number
+            repo_full_name: Full repository name (owner/repo)
 
         Returns:
             Final markdown comment from Ghostwriter
         """
+        key = content_key(
+            repo_full_name,
+            pr_number,
+            json.dumps(pr_metadata, sort_keys=True, default=str),
+            pr_diff,
+        )
+        return await review_flight.run(
+            key, lambda: self._run_pipeline(pr_diff, pr_metadata, pr_number)
+        )
+
+    async def _run_pipeline(
+        self, pr_diff: str, pr_metadata: Dict, pr_number: int
+    ) -> str:
+        """Run all three agents in sequence."""
         print("\n" + "=" * 70)
         print("🚀 STARTING MULTI-AGENT PR REVIEW ORCHESTRATION (Groq-Powered)")
         print("=" * 70)
@@ -1,15 +1,75 @@
 """
 Cache Manager for Agent Responses
 Handles caching of agent outputs to reduce API calls and handle rate limits.
+Keys cover the full input plus the agent's model, prompts and rule version
+(see cache_keys.py), so a deploy only invalidates what it changed.
+Hot entries are served from an in-process LRU tier in front of the files.
+The files are capped by size and count, with incremental LRU or LFU eviction.
+Reads never write: expired and corrupt files are removed by a background
+sweep (see cache_sweeper.py).
+Files hold the compact, versioned encoding of cache_codec.py; files written
+as pretty-printed JSON by older versions are still read. They keep the
+``.json`` name so existing caches carry over.
+
+CACHE_BACKEND picks the storage, with the same names as agent-engine:
+"json" (default here, this module's own files, one directory per replica),
+or a backend shared across replicas and with agent-engine: "redis"
+(CACHE_REDIS_URL) or "sqlite" on a shared volume (CACHE_SQLITE_PATH).
+The shared backends use the same keys, entry format, TTLs and stats as
+Agents/cache_manager.py (see cache_backends.py).
+
+Async callers use aget/aset/aclear, which run on a dedicated cache I/O pool
+(see cache_io.py). Storage access is serialized per key, not globally.
 """
 
-import json
-import hashlib
+import heapq
+import os
+import sys
+import threading
 import time
 from pathlib import Path
-from typing import Any, Optional, Dict
+from typing import Any, Optional, Dict, Tuple
 from datetime import datetime, timedelta
 
+# Shared cache, report and breaker modules live in Agents/ and agent-engine/;
+# appended so this bot's own cache_manager comes first
+sys.path.append(str(Path(__file__).parent.parent / "Agents"))
+sys.path.append(str(Path(__file__).parent.parent / "agent-engine"))
+
+import cache_codec
+from cache_backends import BACKEND_NAMES, CacheBackend, create_backend
+from cache_io import KeyLocks, run_io
+from cache_keys import build_cache_key
+from resp_client import RespError
+from memory_cache import MISS, MemoryCache
+
+# Hours a successful agent output stays cached; versioned keys make long TTLs safe
+CACHE_TTL_HOURS = int(os.getenv("CACHE_TTL_HOURS", str(14 * 24)))
+
+# Seconds a failed agent output stays cached, so identical retries in a burst
+# get the failure back instead of hitting Groq again
+NEGATIVE_TTL_SECONDS = float(os.getenv("CACHE_NEGATIVE_TTL_SECONDS", "60"))
+
+# Caps for the cache directory; eviction trims to EVICTION_LOW_WATER of them
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "100000"))
+# "lru" (least recently used) or "lfu" (least frequently used)
+CACHE_EVICTION_POLICY = os.getenv("CACHE_EVICTION_POLICY", "lru").lower()
+EVICTION_LOW_WATER = 0.9
+# Files deleted per write at most
+EVICTION_BATCH = int(os.getenv("CACHE_EVICTION_BATCH", "256"))
+# One of cache_backends.BACKEND_NAMES; "json" means the file cache below
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "json").lower()
+# Free pages returned to the filesystem per compaction at most (SQLite)
+COMPACT_MAX_PAGES = int(os.getenv("CACHE_COMPACT_MAX_PAGES", "2048"))
+
+
+def is_failed_response(response: Any) -> bool:
+    """Whether an agent output records a failure (``error`` or ``degraded`` set)."""
+    if not isinstance(response, dict):
+        return False
+    return bool(response.get("error") or response.get("degraded"))
+
 
 class CacheManager:
     """
@@ -17,73 +77,224 @@ class CacheManager:
     Uses content hashing for cache keys and TTL for expiration.
     """
 
-    def __init__(self, cache_dir: str = "agent_cache", default_ttl_hours: int = 24):
+    def __init__(
+        self,
+        cache_dir: str = "agent_cache",
+        default_ttl_hours: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        eviction_policy: Optional[str] = None,
+    ):
         """
         Initialize cache manager.
 
         Args:
             cache_dir: Directory to store cache files
-            default_ttl_hours: Default time-to-live in hours
+            default_ttl_hours: Default time-to-live in hours (defaults to CACHE_TTL_HOURS)
+            max_bytes: Cap on the total size of cache files
+            max_entries: Cap on the number of cache files
+            eviction_policy: "lru" or "lfu"
         """
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
-        self.default_ttl = timedelta(hours=default_ttl_hours)
-
-    def _generate_cache_key(self, agent_name: str, content: str) -> str:
+        self.default_ttl = timedelta(hours=default_ttl_hours or CACHE_TTL_HOURS)
+        self.negative_ttl = timedelta(seconds=NEGATIVE_TTL_SECONDS)
+        self.memory = MemoryCache()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+        self.max_bytes = max_bytes or CACHE_MAX_BYTES
+        self.max_entries = max_entries or CACHE_MAX_ENTRIES
+        self.eviction_policy = (eviction_policy or CACHE_EVICTION_POLICY).lower()
+        if self.eviction_policy not in ("lru", "lfu"):
+            raise ValueError(f"Unknown eviction policy: {self.eviction_policy}")
+        self.evictions = 0
+        # Guards the index and counters; file reads and writes have per-key locks
+        self.lock = threading.Lock()
+        self.key_locks = KeyLocks()
+        self._load_index()
+
+    def _load_index(self) -> None:
+        """
+        Index every cache file once at startup (size and write time from
+        stat), so eviction, sweeps and stats never scan the directory afterwards.
+        """
+        # cache key -> [size, last_access, hits, expires_at]
+        self._index: Dict[str, list] = {}
+        # Keys indexed from stat alone: expires_at is the earliest possible
+        # expiry (negative TTL), confirmed from the file once it has passed
+        self._unread: set = set()
+        self._bytes = 0
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".json") and entry.is_file():
+                    stat = entry.stat()
+                    self._index_file(entry.name[:-5], stat.st_size, stat.st_mtime)
+
+    def _index_file(self, cache_key: str, size: int, mtime: float) -> None:
+        """Index a file found on disk (caller holds the lock or is __init__)."""
+        self._index[cache_key] = [size, mtime, 0, mtime + self.negative_ttl.total_seconds()]
+        self._unread.add(cache_key)
+        self._bytes += size
+
+    def _touch(self, cache_key: str) -> None:
+        with self.lock:
+            record = self._index.get(cache_key)
+            if record is not None:
+                record[1] = time.time()
+                record[2] += 1
+
+    def _set_expiry(self, cache_key: str, expires_at: float, confirmed: bool = True) -> None:
+        """
+        Record the expiry read from a file, so the sweep need not read it
+        again; unconfirmed ones are re-read by the sweep before deleting.
+        """
+        with self.lock:
+            record = self._index.get(cache_key)
+            if record is not None:
+                record[3] = expires_at
+                if confirmed:
+                    self._unread.discard(cache_key)
+                else:
+                    self._unread.add(cache_key)
+
+    def _forget(self, cache_key: str) -> None:
+        with self.lock:
+            record = self._index.pop(cache_key, None)
+            self._unread.discard(cache_key)
+            if record is not None:
+                self._bytes -= record[0]
+
+    def _evict(self, keep: str) -> int:
         """
-        Generate a cache key from agent name and content.
+        Once over a cap, delete the least recently (or frequently) used files
+        down toward the low-water mark, at most EVICTION_BATCH per call.
+        ``keep`` (the file just written) is never chosen.
+        """
+        with self.lock:
+            if len(self._index) <= self.max_entries and self._bytes <= self.max_bytes:
+                return 0
+            if self.eviction_policy == "lfu":
+                rank = lambda item: (item[1][2], item[1][1])
+            else:
+                rank = lambda item: item[1][1]
+            target_entries = int(self.max_entries * EVICTION_LOW_WATER)
+            target_bytes = int(self.max_bytes * EVICTION_LOW_WATER)
+            victims = []
+            candidates = heapq.nsmallest(EVICTION_BATCH + 1, self._index.items(), key=rank)
+            for cache_key, record in candidates:
+                if len(victims) >= EVICTION_BATCH or (
+                    len(self._index) <= target_entries and self._bytes <= target_bytes
+                ):
+                    break
+                if cache_key == keep:
+                    continue
+                del self._index[cache_key]
+                self._unread.discard(cache_key)
+                self._bytes -= record[0]
+                victims.append(cache_key)
+            self.evictions += len(victims)
+
+        for cache_key in victims:
+            try:
+                self._get_cache_file_path(cache_key).unlink()
+            except FileNotFoundError:
+                pass
+            self.memory.delete(cache_key)
+        return len(victims)
+
+    def _generate_cache_key(self, agent_name: str, content: str, version: str = "") -> str:
+        """
+        Generate a cache key from agent name, version and content.
 
         Args:
             agent_name: Name of the agent
             content: Input content to hash
+            version: Version tag from ``cache_keys.cache_version``
 
         Returns:
-            Cache key string
+            Cache key string (agent name prefix, for per-agent clears)
         """
-        # Create hash of content for deterministic key
-        content_hash = hashlib.sha256(content.encode()).hexdigest()[:16]
-        return f"{agent_name}_{content_hash}"
+        return f"{agent_name}_{build_cache_key(agent_name, content, version)}"
 
     def _get_cache_file_path(self, cache_key: str) -> Path:
         """Get the file path for a cache key."""
         return self.cache_dir / f"{cache_key}.json"
 
-    def get(self, agent_name: str, content: str) -> Optional[Any]:
+    def get(self, agent_name: str, content: str, version: str = "") -> Optional[Any]:
         """
         Retrieve cached response if available and not expired.
 
         Args:
             agent_name: Name of the agent
             content: Input content
+            version: Version tag of the agent (model, prompts, rules)
 
         Returns:
             Cached response or None if not found/expired
         """
-        cache_key = self._generate_cache_key(agent_name, content)
-        cache_file = self._get_cache_file_path(cache_key)
+        cache_key = self._generate_cache_key(agent_name, content, version)
+
+        # Served from memory without touching the disk
+        response = self.memory.get(cache_key)
+        if response is not MISS:
+            self._count("memory_hits")
+            self._touch(cache_key)
+            return response
+
+        with self.key_locks(cache_key):
+            response = self._read_file(cache_key, agent_name)
+        if response is MISS:
+            self._count("misses")
+            return None
+        self._count("disk_hits")
+        self._touch(cache_key)
+        return response
+
+    async def aget(self, agent_name: str, content: str, version: str = "") -> Optional[Any]:
+        """``get`` for async callers; runs on the cache I/O pool."""
+        return await run_io(self.get, agent_name, content, version)
 
+    def _count(self, counter: str) -> None:
+        with self.lock:
+            self.counters[counter] += 1
+
+    def _read_file(self, cache_key: str, agent_name: str) -> Any:
+        """The live response in a cache file (warming memory), or MISS."""
+        cache_file = self._get_cache_file_path(cache_key)
         if not cache_file.exists():
-            return None
+            return MISS
 
         try:
-            with open(cache_file, "r", encoding="utf-8") as f:
-                cache_data = json.load(f)
+            with open(cache_file, "rb") as f:
+                cache_data = cache_codec.decode(f.read())
 
-            # Check expiration
+            # Check expiration; failures only live for the negative TTL
             cached_time = datetime.fromisoformat(cache_data["timestamp"])
-            if datetime.now() - cached_time > self.default_ttl:
-                # Cache expired, delete it
-                cache_file.unlink()
-                return None
-
+            ttl = self.negative_ttl if cache_data.get("negative") else self.default_ttl
+            self._set_expiry(cache_key, (cached_time + ttl).timestamp())
+            if datetime.now() - cached_time > ttl:
+                # Expired: left for the background sweep
+                return MISS
+
+            self.memory.put(
+                cache_key, agent_name, cache_data["response"], (cached_time + ttl).timestamp()
+            )
             return cache_data["response"]
 
-        except (json.JSONDecodeError, KeyError, ValueError):
-            # Corrupted cache file, delete it
-            cache_file.unlink()
-            return None
-
-    def set(self, agent_name: str, content: str, response: Any) -> None:
+        except (KeyError, ValueError, TypeError, OSError):
+            # Corrupted or vanished cache file (or one caught mid-write):
+            # the next sweep checks it again and removes it
+            self._set_expiry(cache_key, 0.0, confirmed=False)
+            return MISS
+
+    def set(
+        self,
+        agent_name: str,
+        content: str,
+        response: Any,
+        failed: Optional[bool] = None,
+        version: str = "",
+    ) -> None:
         """
         Store a response in cache.
 
@@ -91,21 +302,60 @@ class CacheManager:
             agent_name: Name of the agent
             content: Input content
             response: Response to cache
+            failed: Whether the response is a failure (detected if not specified);
+                failures expire after the negative TTL
+            version: Version tag of the agent (model, prompts, rules)
         """
-        cache_key = self._generate_cache_key(agent_name, content)
+        cache_key = self._generate_cache_key(agent_name, content, version)
         cache_file = self._get_cache_file_path(cache_key)
 
+        if failed is None:
+            failed = is_failed_response(response)
+
         cache_data = {
             "agent_name": agent_name,
             "timestamp": datetime.now().isoformat(),
             "response": response,
+            "negative": failed,
         }
 
+        ttl = self.negative_ttl if failed else self.default_ttl
         try:
-            with open(cache_file, "w", encoding="utf-8") as f:
-                json.dump(cache_data, f, indent=2)
+            payload = cache_codec.encode(cache_data)
+            with self.key_locks(cache_key):
+                with open(cache_file, "wb") as f:
+                    f.write(payload)
+                # Write-through: same expiry as the file copy
+                self.memory.put(cache_key, agent_name, response, time.time() + ttl.total_seconds())
         except Exception as e:
             print(f"⚠️ Warning: Failed to write cache: {e}")
+            return
+
+        size = len(payload)
+        now = time.time()
+        with self.lock:
+            previous = self._index.get(cache_key)
+            if previous is not None:
+                self._bytes -= previous[0]
+            self._index[cache_key] = [
+                size, now, previous[2] if previous else 0, now + ttl.total_seconds()
+            ]
+            self._unread.discard(cache_key)
+            self._bytes += size
+        evicted = self._evict(cache_key)
+        if evicted:
+            print(f"🧹 Evicted {evicted} cache files ({self.eviction_policy})")
+
+    async def aset(
+        self,
+        agent_name: str,
+        content: str,
+        response: Any,
+        failed: Optional[bool] = None,
+        version: str = "",
+    ) -> None:
+        """``set`` for async callers; runs on the cache I/O pool."""
+        await run_io(self.set, agent_name, content, response, failed, version)
 
     def clear(self, agent_name: Optional[str] = None) -> int:
         """
@@ -119,21 +369,108 @@ class CacheManager:
             Number of files deleted
         """
         deleted = 0
+        self.memory.clear(agent_name)
 
         if agent_name:
             # Clear specific agent cache
             pattern = f"{agent_name}_*.json"
             for cache_file in self.cache_dir.glob(pattern):
                 cache_file.unlink()
+                self._forget(cache_file.stem)
                 deleted += 1
         else:
             # Clear all cache
             for cache_file in self.cache_dir.glob("*.json"):
                 cache_file.unlink()
                 deleted += 1
+            with self.lock:
+                self._index.clear()
+                self._unread.clear()
+                self._bytes = 0
 
         return deleted
 
+    async def aclear(self, agent_name: Optional[str] = None) -> int:
+        """``clear`` for async callers; runs on the cache I/O pool."""
+        return await run_io(self.clear, agent_name)
+
+    def _file_expiry(self, cache_file: Path) -> float:
+        """Expiry time recorded in a cache file (0 if it is unreadable)."""
+        try:
+            with open(cache_file, "rb") as f:
+                cache_data = cache_codec.decode(f.read())
+            cached_time = datetime.fromisoformat(cache_data["timestamp"])
+        except (KeyError, ValueError, TypeError):
+            return 0.0
+        ttl = self.negative_ttl if cache_data.get("negative") else self.default_ttl
+        return (cached_time + ttl).timestamp()
+
+    def sweep_expired(self, limit: int = 200) -> Tuple[int, int, bool]:
+        """
+        Delete up to ``limit`` files whose indexed expiry has passed
+        (background maintenance). Only files indexed at startup are read,
+        once, to confirm their real expiry; corrupt ones are deleted.
+
+        Returns:
+            (files removed, bytes reclaimed, whether more are due)
+        """
+        self.memory.clear_expired()
+        now = time.time()
+        with self.lock:
+            due = [key for key, record in self._index.items() if record[3] <= now]
+        batch, more = due[:limit], len(due) > limit
+
+        removed = reclaimed = 0
+        for cache_key in batch:
+            cache_file = self._get_cache_file_path(cache_key)
+            try:
+                # Not while the key is being rewritten
+                with self.key_locks(cache_key):
+                    with self.lock:
+                        record = self._index.get(cache_key)
+                        unread = cache_key in self._unread
+                    if record is None or record[3] > now:
+                        continue  # rewritten or removed since
+                    if unread:
+                        expires_at = self._file_expiry(cache_file)
+                        if expires_at > now:
+                            with self.lock:
+                                record[3] = expires_at
+                                self._unread.discard(cache_key)
+                            continue
+                    size = cache_file.stat().st_size
+                    cache_file.unlink()
+            except FileNotFoundError:
+                self._forget(cache_key)
+                continue
+            self._forget(cache_key)
+            self.memory.delete(cache_key)
+            removed += 1
+            reclaimed += size
+        return removed, reclaimed, more
+
+    def compact(self) -> int:
+        """One file per entry: nothing to compact."""
+        return 0
+
+    def verify(self) -> bool:
+        """Reconcile the in-memory index with the directory; True if they agreed."""
+        on_disk = {}
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".json") and entry.is_file():
+                    stat = entry.stat()
+                    on_disk[entry.name[:-5]] = (stat.st_size, stat.st_mtime)
+        with self.lock:
+            missing = [key for key in self._index if key not in on_disk]
+            unknown = [key for key in on_disk if key not in self._index]
+            for key in missing:
+                self._bytes -= self._index.pop(key)[0]
+                self._unread.discard(key)
+            for key in unknown:
+                self._index_file(key, *on_disk[key])
+        return not missing and not unknown
+
     def get_stats(self) -> Dict[str, Any]:
         """
         Get cache statistics.
@@ -141,38 +478,329 @@ class CacheManager:
         Returns:
             Dictionary with cache stats
         """
-        cache_files = list(self.cache_dir.glob("*.json"))
-        total_files = len(cache_files)
-        total_size = sum(f.stat().st_size for f in cache_files)
+        with self.lock:
+            total_files = len(self._index)
+            total_size = self._bytes
+            memory_hits, disk_hits, misses = (
+                self.counters["memory_hits"], self.counters["disk_hits"], self.counters["misses"]
+            )
+        lookups = memory_hits + disk_hits + misses
+        disk_lookups = lookups - memory_hits
 
         return {
+            "backend": "files",
             "total_entries": total_files,
-            "total_size_bytes": total_size,
+            "total_bytes": total_size,
+            "negative_ttl_seconds": self.negative_ttl.total_seconds(),
+            "cache_dir": str(self.cache_dir),
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries,
+            "eviction_policy": self.eviction_policy,
+            "evictions": self.evictions,
+            "lookups": lookups,
+            "hit_ratio": round((memory_hits + disk_hits) / lookups, 4) if lookups else 0.0,
+            "tiers": {
+                "memory": {
+                    **self.memory.get_stats(),
+                    "hits": memory_hits,
+                    "hit_ratio": round(memory_hits / lookups, 4) if lookups else 0.0,
+                },
+                "disk": {
+                    "hits": disk_hits,
+                    "hit_ratio": round(disk_hits / disk_lookups, 4) if disk_lookups else 0.0,
+                },
+            },
+        }
+
+
+class SharedCacheManager:
+    """
+    Cache manager on a shared storage backend (Redis or SQLite), with the
+    same interface as CacheManager and an in-process LRU tier in front.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        cache_dir: str = "agent_cache",
+        default_ttl_hours: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        eviction_policy: Optional[str] = None,
+    ):
+        """
+        Args:
+            backend: Shared storage backend
+            cache_dir: Local directory (shown in stats; used by SQLite by default)
+            default_ttl_hours: Default time-to-live in hours (defaults to CACHE_TTL_HOURS)
+            max_bytes: Cap on stored bytes in the backend
+            max_entries: Cap on entries in the backend
+            eviction_policy: "lru" or "lfu"
+        """
+        self.backend = backend
+        self.cache_dir = Path(cache_dir)
+        self.default_ttl = timedelta(hours=default_ttl_hours or CACHE_TTL_HOURS)
+        self.negative_ttl = timedelta(seconds=NEGATIVE_TTL_SECONDS)
+        self.memory = MemoryCache()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self.max_bytes = max_bytes or CACHE_MAX_BYTES
+        self.max_entries = max_entries or CACHE_MAX_ENTRIES
+        self.eviction_policy = (eviction_policy or CACHE_EVICTION_POLICY).lower()
+        if self.eviction_policy not in ("lru", "lfu"):
+            raise ValueError(f"Unknown eviction policy: {self.eviction_policy}")
+        # Guards counters and buffered reads only; storage has per-key locks
+        self.lock = threading.Lock()
+        self.key_locks = KeyLocks()
+        # One eviction or maintenance pass at a time
+        self.maintenance_lock = threading.Lock()
+        # Reads are recorded here (key -> [count, last read]) and written in batches
+        self._touches: Dict[str, list] = {}
+
+    def get(self, agent_name: str, content: str, version: str = "") -> Optional[Any]:
+        """
+        Retrieve cached response if available and not expired.
+
+        Args:
+            agent_name: Name of the agent
+            content: Input content
+            version: Version tag of the agent (model, prompts, rules)
+
+        Returns:
+            Cached response or None if not found/expired
+        """
+        cache_key = build_cache_key(agent_name, content, version)
+        now = time.time()
+
+        response = self.memory.get(cache_key, now)
+        if response is not MISS:
+            with self.lock:
+                self.counters["memory_hits"] += 1
+                self._record_touch(cache_key, now)
+            return response
+
+        # Held until memory is warmed, so an older entry cannot replace a concurrent set there
+        with self.key_locks(cache_key):
+            try:
+                entry = self.backend.get(cache_key)
+            except (OSError, RespError, ValueError) as e:
+                print(f"⚠️ Warning: Shared cache unavailable: {e}")
+                entry = None
+            if entry is not None and now > entry.get("expiry_time", 0):
+                entry = None
+            if entry is not None:
+                self.memory.put(cache_key, agent_name, entry.get("response"), entry["expiry_time"])
+
+        with self.lock:
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            self.counters["disk_hits"] += 1
+            self._record_touch(cache_key, now)
+        return entry.get("response")
+
+    async def aget(self, agent_name: str, content: str, version: str = "") -> Optional[Any]:
+        """``get`` for async callers; runs on the cache I/O pool."""
+        return await run_io(self.get, agent_name, content, version)
+
+    def set(
+        self,
+        agent_name: str,
+        content: str,
+        response: Any,
+        failed: Optional[bool] = None,
+        version: str = "",
+    ) -> None:
+        """
+        Store a response in cache.
+
+        Args:
+            agent_name: Name of the agent
+            content: Input content
+            response: Response to cache
+            failed: Whether the response is a failure (detected if not specified);
+                failures expire after the negative TTL
+            version: Version tag of the agent (model, prompts, rules)
+        """
+        if failed is None:
+            failed = is_failed_response(response)
+        cache_key = build_cache_key(agent_name, content, version)
+        ttl = self.negative_ttl if failed else self.default_ttl
+        now = time.time()
+        entry = {
+            "agent_name": agent_name,
+            "response": response,
+            "cached_at": now,
+            "expiry_time": now + ttl.total_seconds(),
+            "negative": failed,
+        }
+
+        try:
+            with self.key_locks(cache_key):
+                self.backend.put(cache_key, entry)
+                self.memory.put(cache_key, agent_name, response, entry["expiry_time"])
+            evicted = 0
+            # A write never waits for another write's eviction pass
+            if self.maintenance_lock.acquire(blocking=False):
+                try:
+                    self._flush_touches()
+                    evicted = self._evict(now, cache_key)
+                finally:
+                    self.maintenance_lock.release()
+        except Exception as e:
+            print(f"⚠️ Warning: Failed to write cache: {e}")
+            return
+        if evicted:
+            print(f"🧹 Evicted {evicted} cache entries ({self.eviction_policy})")
+
+    async def aset(
+        self,
+        agent_name: str,
+        content: str,
+        response: Any,
+        failed: Optional[bool] = None,
+        version: str = "",
+    ) -> None:
+        """``set`` for async callers; runs on the cache I/O pool."""
+        await run_io(self.set, agent_name, content, response, failed, version)
+
+    def _record_touch(self, cache_key: str, now: float) -> None:
+        touch = self._touches.setdefault(cache_key, [0, now])
+        touch[0] += 1
+        touch[1] = now
+
+    def _flush_touches(self) -> None:
+        with self.lock:
+            touches, self._touches = self._touches, {}
+        if touches:
+            self.backend.touch({key: tuple(touch) for key, touch in touches.items()})
+
+    def _evict(self, now: float, keep: str) -> int:
+        entries, stored_bytes = self.backend.usage()
+        if entries <= self.max_entries and stored_bytes <= self.max_bytes:
+            return 0
+        return self.backend.evict(
+            int(self.max_entries * EVICTION_LOW_WATER),
+            int(self.max_bytes * EVICTION_LOW_WATER),
+            self.eviction_policy,
+            EVICTION_BATCH,
+            now,
+            keep,
+        )
+
+    def clear(self, agent_name: Optional[str] = None) -> int:
+        """Clear all entries, or those of one agent; returns the count."""
+        cleared = self.backend.clear(agent_name)
+        self.memory.clear(agent_name)
+        return cleared
+
+    async def aclear(self, agent_name: Optional[str] = None) -> int:
+        """``clear`` for async callers; runs on the cache I/O pool."""
+        return await run_io(self.clear, agent_name)
+
+    def sweep_expired(self, limit: int = 200) -> Tuple[int, int, bool]:
+        """
+        Remove up to ``limit`` expired entries (background maintenance).
+
+        Returns:
+            (entries removed, bytes reclaimed, whether more may be left)
+        """
+        now = time.time()
+        self.memory.clear_expired(now)
+        with self.maintenance_lock:
+            removed, reclaimed = self.backend.sweep_expired(now, limit)
+        return removed, reclaimed, removed >= limit
+
+    def compact(self) -> int:
+        """Write buffered access records and compact storage; returns bytes reclaimed."""
+        with self.maintenance_lock:
+            self._flush_touches()
+            return self.backend.compact(COMPACT_MAX_PAGES)
+
+    def verify(self) -> bool:
+        """Check (and where possible repair) storage integrity."""
+        with self.maintenance_lock:
+            return self.backend.verify()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics (same keys as Agents/cache_manager.py).
+
+        Returns:
+            Dictionary with cache stats
+        """
+        stats = self.backend.stats(time.time())
+        with self.lock:
+            memory_hits, disk_hits, misses = (
+                self.counters["memory_hits"], self.counters["disk_hits"], self.counters["misses"]
+            )
+        lookups = memory_hits + disk_hits + misses
+        disk_lookups = lookups - memory_hits
+
+        return {
+            "backend": self.backend.name,
+            "total_entries": stats["total"],
+            "active_entries": stats["total"] - stats["expired"],
+            "expired_entries": stats["expired"],
+            "negative_entries": stats["negative"],
+            "negative_ttl_seconds": self.negative_ttl.total_seconds(),
+            "entries_by_agent": stats["by_agent"],
+            "total_bytes": stats["total_bytes"],
             "cache_dir": str(self.cache_dir),
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries,
+            "eviction_policy": self.eviction_policy,
+            "evictions": stats["evictions"],
+            "lookups": lookups,
+            "hit_ratio": round((memory_hits + disk_hits) / lookups, 4) if lookups else 0.0,
+            "tiers": {
+                "memory": {
+                    **self.memory.get_stats(),
+                    "hits": memory_hits,
+                    "hit_ratio": round(memory_hits / lookups, 4) if lookups else 0.0,
+                },
+                "disk": {
+                    "hits": disk_hits,
+                    "hit_ratio": round(disk_hits / disk_lookups, 4) if disk_lookups else 0.0,
+                },
+            },
         }
 
 
 # Global cache manager instance
-_cache_manager_instance: Optional[CacheManager] = None
+_cache_manager_instance = None
 
 
 def get_cache_manager(
-    cache_dir: str = "agent_cache", default_ttl_hours: int = 24
-) -> CacheManager:
+    cache_dir: str = "agent_cache", default_ttl_hours: Optional[int] = None
+):
     """
-    Get or create the global cache manager instance.
+    Get or create the global cache manager instance, on the storage
+    CACHE_BACKEND selects.
 
     Args:
         cache_dir: Directory to store cache files
-        default_ttl_hours: Default time-to-live in hours
+        default_ttl_hours: Default time-to-live in hours (defaults to CACHE_TTL_HOURS)
 
     Returns:
-        CacheManager instance
+        CacheManager (json) or SharedCacheManager (redis, sqlite) instance
     """
     global _cache_manager_instance
 
     if _cache_manager_instance is None:
-        _cache_manager_instance = CacheManager(cache_dir, default_ttl_hours)
+        if CACHE_BACKEND not in BACKEND_NAMES:
+            raise ValueError(
+                f"Unknown cache backend: {CACHE_BACKEND} (expected one of {', '.join(BACKEND_NAMES)})"
+            )
+        if CACHE_BACKEND == "json":
+            _cache_manager_instance = CacheManager(cache_dir, default_ttl_hours)
+        else:
+            Path(cache_dir).mkdir(exist_ok=True)
+            _cache_manager_instance = SharedCacheManager(
+                # The directory's files use this module's own format: nothing to import
+                create_backend(CACHE_BACKEND, Path(cache_dir), migrate=False),
+                cache_dir,
+                default_ttl_hours,
+            )
 
     return _cache_manager_instance
 
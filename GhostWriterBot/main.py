@@ -12,15 +12,28 @@ import json
 import time
 import jwt
 import os
+import sys
 import asyncio
+from pathlib import Path
+from contextlib import asynccontextmanager
 from typing import Optional
 
 from fastapi import FastAPI, Request, Header, HTTPException, BackgroundTasks
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
 
+# Shared cache, report and breaker modules live in Agents/ and agent-engine/;
+# appended so this bot's own cache_manager comes first
+sys.path.append(str(Path(__file__).parent.parent / "Agents"))
+sys.path.append(str(Path(__file__).parent.parent / "agent-engine"))
+
 # Import our service modules
 from github_client import GitHubClient
-from agent_service import create_orchestrator
+from agent_service import create_orchestrator, review_flight
+from circuit_breaker import get_breaker_stats, render_breaker_metrics
+from cache_io import run_io, shutdown_io_executor
+from cache_manager import get_cache_manager
+from cache_sweeper import get_cache_sweeper, get_sweeper_stats, render_sweeper_metrics
 
 # --------------------------------------------------
 # Load environment variables
@@ -39,10 +52,40 @@ except FileNotFoundError:
     print("Please ensure the GitHub App private key is in the same directory.")
     raise
 
+
+# --------------------------------------------------
+# Startup / Shutdown
+# --------------------------------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Print startup information, run cache maintenance, and finish queued cache writes on exit."""
+    sweeper = get_cache_sweeper(agent_cache(), "ghostwriter")
+    sweeper.start()
+    print("\n" + "=" * 70)
+    print("🤖 DevOps-GhostWriter - Multi-Agent PR Review System")
+    print("=" * 70)
+    print("✅ Service started successfully")
+    print(f"📋 GitHub App ID: {GITHUB_APP_ID}")
+    print("🔐 Webhook signature verification: ENABLED")
+    print("🤖 Agents loaded:")
+    print("   - Security Auditor Agent")
+    print("   - Runtime Validator Agent")
+    print("   - Ghostwriter Agent")
+    print("=" * 70)
+    print("🎯 Ready to review pull requests!")
+    print("=" * 70 + "\n")
+    try:
+        yield
+    finally:
+        await sweeper.stop()
+        await asyncio.to_thread(shutdown_io_executor)
+
+
 app = FastAPI(
     title="DevOps-GhostWriter",
     description="Multi-Agent PR Review System",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 
@@ -175,7 +218,10 @@ async def process_pr_review(
         orchestrator = await create_orchestrator()
 
         final_comment = await orchestrator.orchestrate_pr_review(
-            pr_diff=pr_diff, pr_metadata=pr_metadata, pr_number=pr_number
+            pr_diff=pr_diff,
+            pr_metadata=pr_metadata,
+            pr_number=pr_number,
+            repo_full_name=repo_full_name,
         )
 
         # Step 7: Post or update PR comment
@@ -287,6 +333,29 @@ async def health_check():
     return {"status": "healthy", "service": "DevOps-GhostWriter", "version": "1.0.0"}
 
 
+# --------------------------------------------------
+# Stats Endpoint
+# --------------------------------------------------
+@app.get("/stats")
+async def stats():
+    """Runtime counters (request coalescing, provider circuit breakers, cache)."""
+    return {
+        "single_flight": review_flight.get_stats(),
+        "circuit_breakers": get_breaker_stats(),
+        "cache": await run_io(agent_cache().get_stats),
+        "cache_maintenance": get_sweeper_stats(),
+    }
+
+
+# --------------------------------------------------
+# Metrics Endpoint
+# --------------------------------------------------
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Circuit breaker and cache maintenance metrics in Prometheus text format."""
+    return render_breaker_metrics() + render_sweeper_metrics()
+
+
 # --------------------------------------------------
 # Root Endpoint
 # --------------------------------------------------
@@ -298,26 +367,18 @@ async def root():
         "description": "Multi-Agent PR Review System",
         "version": "1.0.0",
         "agents": ["Security Auditor", "Runtime Validator", "Ghostwriter"],
-        "endpoints": {"webhook": "/webhook/github", "health": "/health"},
+        "endpoints": {
+            "webhook": "/webhook/github",
+            "health": "/health",
+            "stats": "/stats",
+            "metrics": "/metrics",
+        },
     }
 
 
 # --------------------------------------------------
-# Startup Event
+# Agent Cache
 # --------------------------------------------------
-@app.on_event("startup")
-async def startup_event():
-    """Print startup information."""
-    print("\n" + "=" * 70)
-    print("🤖 DevOps-GhostWriter - Multi-Agent PR Review System")
-    print("=" * 70)
-    print("✅ Service started successfully")
-    print(f"📋 GitHub App ID: {GITHUB_APP_ID}")
-    print("🔐 Webhook signature verification: ENABLED")
-    print("🤖 Agents loaded:")
-    print("   - Security Auditor Agent")
-    print("   - Runtime Validator Agent")
-    print("   - Ghostwriter Agent")
-    print("=" * 70)
-    print("🎯 Ready to review pull requests!")
-    print("=" * 70 + "\n")
+def agent_cache():
+    """The cache shared by the Security Auditor and Runtime Validator."""
+    return get_cache_manager(cache_dir=str(Path(__file__).parent / "agent_cache"))
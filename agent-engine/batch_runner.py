@@ -0,0 +1,107 @@
+"""
+Batch analysis scheduling
+Runs many PR analyses from one request: identical content is analyzed once,
+recent results are served from the cache first, and at most a fixed number
+of analyses run at a time across all batches in the process. Provider quotas are enforced below this layer by
+the shared rate limiter, so a large batch waits on quota, not on round trips.
+"""
+import asyncio
+import os
+import time
+import weakref
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# PR analyses in flight at once, shared by every batch in the process
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+# Largest accepted batch
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "1000"))
+
+Analyze = Callable[[Any], Awaitable[Dict[str, Any]]]
+Lookup = Callable[[str], Optional[Dict[str, Any]]]
+Record = Callable[[str, Any, Dict[str, Any]], None]
+
+# Event loop -> the semaphore all batches on it share (the engine runs one loop)
+_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _batch_limit() -> asyncio.Semaphore:
+    """Process-wide analysis slots, so concurrent batches don't add up."""
+    loop = asyncio.get_running_loop()
+    limit = _limits.get(loop)
+    if limit is None:
+        limit = _limits[loop] = asyncio.Semaphore(BATCH_CONCURRENCY)
+    return limit
+
+
+async def run_batch(
+    items: List[Tuple[str, Any]],
+    analyze: Analyze,
+    lookup: Optional[Lookup] = None,
+    record: Optional[Record] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Analyze a batch and yield one line per item as soon as it completes.
+
+    Args:
+        items: (content_key, request) pairs, in client order
+        analyze: Coroutine function running one analysis
+        lookup: Returns a cached result for a content key, if any
+        record: Stores a fresh result for later lookups
+
+    Yields:
+        {"index", "status": "done" | "error", "cached", "deduped", "result" | "error"}
+        per item, then a final {"summary": {...}} line
+    """
+    started = time.time()
+    limit = _batch_limit()
+    lines: asyncio.Queue = asyncio.Queue()
+
+    # content key -> indexes of the items sharing it
+    groups: Dict[str, List[int]] = {}
+    for index, (key, _) in enumerate(items):
+        groups.setdefault(key, []).append(index)
+
+    counts = {"total": len(items), "unique": len(groups), "cached": 0, "analyzed": 0, "failed": 0}
+
+    def publish(indexes: List[int], line: Dict[str, Any]) -> None:
+        for n, index in enumerate(indexes):
+            lines.put_nowait({"index": index, **line, "deduped": n > 0})
+
+    async def process(key: str, indexes: List[int]) -> None:
+        request = items[indexes[0]][1]
+        try:
+            cached = lookup(key) if lookup else None
+            if cached is not None:
+                counts["cached"] += 1
+                publish(indexes, {"status": "done", "cached": True, "result": cached})
+                return
+            async with limit:
+                result = await analyze(request)
+            counts["analyzed"] += 1
+            if record:
+                record(key, request, result)
+        except Exception as e:
+            # Every index must get a line, or the stream below never ends
+            print(f"❌ Batch item {indexes[0]} failed: {e}")
+            counts["failed"] += 1
+            publish(indexes, {"status": "error", "cached": False, "error": str(e)})
+            return
+        publish(indexes, {"status": "done", "cached": False, "result": result})
+
+    tasks = [asyncio.create_task(process(key, indexes)) for key, indexes in groups.items()]
+    try:
+        for _ in range(len(items)):
+            yield await lines.get()
+    finally:
+        # Client went away mid-batch: stop the remaining analyses
+        for task in tasks:
+            task.cancel()
+
+    counts["seconds"] = round(time.time() - started, 2)
+    print(
+        f"📦 Batch done: {counts['total']} PRs, {counts['unique']} unique, "
+        f"{counts['cached']} cached, {counts['failed']} failed in {counts['seconds']}s"
+    )
+    yield {"summary": counts}
@@ -0,0 +1,244 @@
+"""
+Circuit breakers around LLM providers
+One breaker per provider/model with closed, open and half-open states. While a
+breaker is open, calls fail immediately with CircuitOpenError so callers can
+switch to their deterministic fallbacks instead of waiting out timeouts; after
+a cool-off a limited number of probe calls decide whether to close it again.
+"""
+import asyncio
+import os
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Consecutive failures that open the breaker
+FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+# Seconds an open breaker waits before letting probe calls through
+RESET_TIMEOUT_SECONDS = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+# Concurrent probe calls allowed while half-open
+HALF_OPEN_MAX_CALLS = int(os.getenv("BREAKER_HALF_OPEN_MAX_CALLS", "1"))
+# Successful probes needed to close the breaker again
+HALF_OPEN_SUCCESSES = int(os.getenv("BREAKER_HALF_OPEN_SUCCESSES", "2"))
+
+# Transitions kept for the stats endpoint
+HISTORY_SIZE = 20
+
+# Exception class names that mean the provider could not be reached in time
+_TRANSPORT_ERROR_NAMES = re.compile(r"Timeout|Connect")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider whose breaker is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"Circuit '{name}' is open; retry in {retry_in:.0f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """
+    Whether an error says the provider is unhealthy (timeouts, connection
+    errors, 429 after retries, 5xx) rather than that our request was bad.
+    Anything else without a status, such as unparseable model output or a
+    bug on our side, does not count against the provider.
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    # SDK transport errors (httpx, groq, google) don't share a base class
+    if any(_TRANSPORT_ERROR_NAMES.search(cls.__name__) for cls in type(error).__mro__):
+        return True
+    status = None
+    for attr in ("status_code", "code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            status = value
+            break
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if not isinstance(status, int):
+        return False
+    return status == 429 or status >= 500
+
+
+class CircuitBreaker:
+    """Thread-safe breaker shared by async code and worker threads."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = None,
+        reset_timeout: float = None,
+        half_open_max_calls: int = None,
+        half_open_successes: int = None,
+    ):
+        """
+        Args:
+            name: Breaker label, usually "provider/model"
+            failure_threshold: Consecutive failures that open the breaker
+            reset_timeout: Seconds to stay open before probing
+            half_open_max_calls: Concurrent probes while half-open
+            half_open_successes: Successful probes that close the breaker
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold or FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout if reset_timeout is not None else RESET_TIMEOUT_SECONDS
+        self.half_open_max_calls = half_open_max_calls or HALF_OPEN_MAX_CALLS
+        self.half_open_successes = half_open_successes or HALF_OPEN_SUCCESSES
+
+        self.state = CLOSED
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self.counters = {"allowed": 0, "rejected": 0, "successes": 0, "failures": 0}
+        self.transitions: Dict[str, int] = {}
+        self.history: List[Dict[str, Any]] = []
+
+    def _transition(self, new_state: str) -> None:
+        label = f"{self.state}->{new_state}"
+        self.transitions[label] = self.transitions.get(label, 0) + 1
+        self.history.append({"transition": label, "at": time.time()})
+        del self.history[:-HISTORY_SIZE]
+        print(f"⚡ Circuit '{self.name}': {self.state} → {new_state}")
+        self.state = new_state
+        if new_state == OPEN:
+            self._opened_at = time.monotonic()
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+
+    def allow_request(self) -> bool:
+        """Reserve permission for one call (a probe slot when half-open)."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._transition(HALF_OPEN)
+            if self.state == CLOSED:
+                allowed = True
+            elif self.state == HALF_OPEN and self._probes_in_flight < self.half_open_max_calls:
+                self._probes_in_flight += 1
+                allowed = True
+            else:
+                allowed = False
+            self.counters["allowed" if allowed else "rejected"] += 1
+            return allowed
+
+    def check(self) -> None:
+        """Like ``allow_request`` but raises CircuitOpenError when rejected."""
+        if not self.allow_request():
+            raise CircuitOpenError(self.name, self.retry_in())
+
+    def retry_in(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(self.reset_timeout - (time.monotonic() - self._opened_at), 0.0)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.counters["successes"] += 1
+            self._consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_successes:
+                    self._transition(CLOSED)
+
+    def record_failure(self, error: Optional[BaseException] = None) -> None:
+        """Count a failed call; errors caused by the request itself are ignored."""
+        with self._lock:
+            if error is not None and not is_provider_failure(error):
+                if self.state == HALF_OPEN:
+                    # The provider answered, so the probe slot is free again
+                    self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+                return
+            self.counters["failures"] += 1
+            self._consecutive_failures += 1
+            if self.state == HALF_OPEN:
+                self._transition(OPEN)
+            elif self.state == CLOSED and self._consecutive_failures >= self.failure_threshold:
+                self._transition(OPEN)
+
+    def release(self) -> None:
+        """Give back a probe slot for a call that was cancelled before finishing."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+
+    async def call(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn`` through the breaker, failing fast with CircuitOpenError while open."""
+        self.check()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            self.release()
+            raise
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "retry_in_seconds": round(self.retry_in(), 1),
+            "consecutive_failures": self._consecutive_failures,
+            "transitions": dict(self.transitions),
+            "history": list(self.history),
+            **self.counters,
+        }
+
+
+# One breaker per provider/model
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(provider: str, model: str) -> CircuitBreaker:
+    """Get or create the process-wide breaker for a provider/model."""
+    name = f"{provider}/{model}"
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def get_breaker_stats() -> Dict[str, Any]:
+    return {name: breaker.snapshot() for name, breaker in _breakers.items()}
+
+
+def render_breaker_metrics() -> str:
+    """Breaker state and transition counters in Prometheus text format."""
+    states = (CLOSED, HALF_OPEN, OPEN)
+    lines = [
+        "# HELP llm_circuit_state Current breaker state (1 for the active state).",
+        "# TYPE llm_circuit_state gauge",
+    ]
+    for name, breaker in _breakers.items():
+        for state in states:
+            value = 1 if breaker.state == state else 0
+            lines.append(f'llm_circuit_state{{breaker="{name}",state="{state}"}} {value}')
+    lines += [
+        "# HELP llm_circuit_transitions_total Breaker state transitions.",
+        "# TYPE llm_circuit_transitions_total counter",
+    ]
+    for name, breaker in _breakers.items():
+        for label, count in breaker.transitions.items():
+            source, target = label.split("->")
+            lines.append(
+                f'llm_circuit_transitions_total{{breaker="{name}",from="{source}",to="{target}"}} {count}'
+            )
+    lines += [
+        "# HELP llm_circuit_rejected_total Calls failed fast while the breaker was open.",
+        "# TYPE llm_circuit_rejected_total counter",
+    ]
+    for name, breaker in _breakers.items():
+        lines.append(f'llm_circuit_rejected_total{{breaker="{name}"}} {breaker.counters["rejected"]}')
+    return "\n".join(lines) + "\n"
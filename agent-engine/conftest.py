@@ -0,0 +1,48 @@
+"""
+Shared fixtures for the agent-engine tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Add agent-engine to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import job_store
+
+_cache_dir = None
+
+
+def pytest_configure(config):
+    """Keep the agent cache that main/orchestral_integration open at import out of the repo."""
+    global _cache_dir
+    if "AGENT_CACHE_DIR" not in os.environ:
+        _cache_dir = tempfile.mkdtemp(prefix="agent_cache_")
+        os.environ["AGENT_CACHE_DIR"] = _cache_dir
+
+
+def pytest_unconfigure(config):
+    if _cache_dir is not None:
+        os.environ.pop("AGENT_CACHE_DIR", None)
+        shutil.rmtree(_cache_dir, ignore_errors=True)
+
+
+def use_engine(monkeypatch, tmp_dir):
+    """
+    Import the FastAPI app module with a test Groq key and a job database in
+    ``tmp_dir``; both are undone when ``monkeypatch`` is.
+    """
+    monkeypatch.setenv("GROQ_API_KEY", "gsk_test")
+    monkeypatch.setattr(job_store, "JOB_DB_PATH", str(Path(tmp_dir) / "jobs.db"))
+    import main
+    return main
+
+
+@pytest.fixture
+def engine(monkeypatch, tmp_path):
+    """The ``main`` module, isolated by ``use_engine``; patch its run_analysis via monkeypatch."""
+    return use_engine(monkeypatch, tmp_path)
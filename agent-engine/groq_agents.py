@@ -3,33 +3,76 @@ Groq-based agent implementation
 Fast and high-quota alternative to Google Gemini
 """
 import os
+import sys
 import asyncio
-from typing import Dict, Any, List
+from pathlib import Path
+from typing import Dict, Any, List, Optional
 from groq import AsyncGroq
 from dotenv import load_dotenv
 import json
 
-load_dotenv('../.env.local')
+# Add Agents directory to path for the shared report helpers
+agents_path = Path(__file__).parent.parent / "Agents"
+sys.path.insert(0, str(agents_path))
 
-# Initialize Groq client
-groq_client = AsyncGroq(
-    api_key=os.getenv("GROQ_API_KEY")
-)
+from report_encoder import encode_report, estimate_tokens
+from hunk_selector import select_hunks, format_coverage
+from key_pool import get_key_pool
+from circuit_breaker import get_breaker
+from provider_router import is_failed_result
+from degraded_reports import static_security_report, static_runtime_report, fallback_comment
+from progress import emit
+from prompt_batcher import PromptBatcher
+
+load_dotenv('../.env.local')
 
 # Default model - fast and capable
 DEFAULT_MODEL = "llama-3.3-70b-versatile"  # or "mixtral-8x7b-32768"
 
-async def security_auditor_groq(diff_text: str) -> Dict[str, Any]:
+# Every configured Groq key is load-balanced through the pool
+groq_pool = get_key_pool("groq")
+_groq_clients: Dict[str, AsyncGroq] = {}
+
+# Calls fail fast while Groq is down; callers fall back to the static reports
+groq_breaker = get_breaker("groq", DEFAULT_MODEL)
+
+
+def groq_client_for(api_key: str) -> AsyncGroq:
+    """Cached Groq client per API key (retries are handled by the rate limiter)."""
+    client = _groq_clients.get(api_key)
+    if client is None:
+        client = AsyncGroq(api_key=api_key, max_retries=0)
+        _groq_clients[api_key] = client
+    return client
+
+
+async def _chat_json(system: str, prompt: str, temperature: float, max_tokens: int) -> Dict[str, Any]:
     """
-    Security auditor using Groq LLM
+    Run a JSON-mode chat completion on the best available Groq key.
+    Waits for quota instead of failing and fails over to other keys on 401/403/429.
+    Raises CircuitOpenError immediately while the Groq breaker is open.
     """
-    prompt = f"""You are a security auditor. Analyze this code diff for security vulnerabilities.
+    messages = [
+        {"role": "system", "content": system},
+        {"role": "user", "content": prompt}
+    ]
+    raw = await groq_breaker.call(lambda: groq_pool.call(
+        lambda api_key: groq_client_for(api_key).chat.completions.with_raw_response.create(
+            model=DEFAULT_MODEL,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"}
+        ),
+        estimated_tokens=estimate_tokens(system + prompt) + max_tokens,
+    ))
+    response = await raw.parse()
+    return json.loads(response.choices[0].message.content)
 
-Respond in JSON format:
-{{
+SECURITY_REPORT_SCHEMA = """{
     "is_secure": boolean,
     "vulnerabilities": [
-        {{
+        {
             "type": "string (e.g., 'SQL Injection', 'Hardcoded Secret')",
             "severity": "Critical|High|Medium|Low",
             "description": "string",
@@ -37,95 +80,214 @@ Respond in JSON format:
             "line_number": number or null,
             "reasoning_path": "string explaining why this is a vulnerability",
             "confidence_score": float (0.0 to 1.0)
-        }}
+        }
     ],
     "summary_reasoning": "string"
-}}
+}"""
+
+RUNTIME_REPORT_SCHEMA = """{
+    "steps": [
+        {
+            "step_name": "string",
+            "description": "string",
+            "expected_output": "string",
+            "actual_output": "string",
+            "status": "PASS|FAIL"
+        }
+    ],
+    "final_verdict": "PASS|FAIL",
+    "error_recovery_attempted": boolean,
+    "recovery_trace": "string or null"
+}"""
+
+RUNTIME_CHECKS = """Check for:
+- Syntax errors
+- Undefined variables
+- Type mismatches
+- Infinite loops
+- Logic errors"""
+
+SECURITY_SYSTEM = "You are a security expert. Respond only with valid JSON."
+RUNTIME_SYSTEM = "You are a code quality expert. Respond only with valid JSON."
+
+# Output budget per report, and for a whole packed response
+REPORT_MAX_TOKENS = 2000
+PACKED_MAX_OUTPUT_TOKENS = int(os.getenv("PROMPT_BATCH_MAX_OUTPUT_TOKENS", "8000"))
+
+
+def _security_failure(e: Exception) -> Dict[str, Any]:
+    """Security report for a failed Groq call"""
+    print(f"Groq Security Auditor Error: {e}")
+    return {
+        "is_secure": False,
+        "vulnerabilities": [],
+        "summary_reasoning": f"Analysis failed: {str(e)}",
+        "error": str(e)
+    }
+
+
+def _runtime_failure(e: Exception) -> Dict[str, Any]:
+    """Runtime report for a failed Groq call"""
+    print(f"Groq Runtime Validator Error: {e}")
+    return {
+        "steps": [],
+        "final_verdict": "FAIL",
+        "error_recovery_attempted": True,
+        "recovery_trace": str(e),
+        "error": str(e)
+    }
+
+
+async def _security_audit_single(diff_text: str) -> Dict[str, Any]:
+    """
+    Security auditor using Groq LLM
+    """
+    prompt = f"""You are a security auditor. Analyze this code diff for security vulnerabilities.
+
+Respond in JSON format:
+{SECURITY_REPORT_SCHEMA}
 
 Diff:
 {diff_text}
 """
 
     try:
-        response = await groq_client.chat.completions.create(
-            model=DEFAULT_MODEL,
-            messages=[
-                {"role": "system", "content": "You are a security expert. Respond only with valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
+        return await _chat_json(
+            SECURITY_SYSTEM,
+            prompt,
             temperature=0.1,
-            max_tokens=2000,
-            response_format={"type": "json_object"}
+            max_tokens=REPORT_MAX_TOKENS
         )
         
-        result = json.loads(response.choices[0].message.content)
-        return result
-        
     except Exception as e:
-        print(f"Groq Security Auditor Error: {e}")
-        return {
-            "is_secure": False,
-            "vulnerabilities": [],
-            "summary_reasoning": f"Analysis failed: {str(e)}"
-        }
+        return _security_failure(e)
 
 
-async def runtime_validator_groq(diff_text: str) -> Dict[str, Any]:
+async def _runtime_validate_single(diff_text: str) -> Dict[str, Any]:
     """
     Runtime validator using Groq LLM
     """
     prompt = f"""You are a runtime validator. Analyze this code diff for potential runtime issues.
 
 Respond in JSON format:
-{{
-    "steps": [
-        {{
-            "step_name": "string",
-            "description": "string",
-            "expected_output": "string",
-            "actual_output": "string",
-            "status": "PASS|FAIL"
-        }}
-    ],
-    "final_verdict": "PASS|FAIL",
-    "error_recovery_attempted": boolean,
-    "recovery_trace": "string or null"
-}}
+{RUNTIME_REPORT_SCHEMA}
 
-Check for:
-- Syntax errors
-- Undefined variables
-- Type mismatches
-- Infinite loops
-- Logic errors
+{RUNTIME_CHECKS}
 
 Diff:
 {diff_text}
 """
 
     try:
-        response = await groq_client.chat.completions.create(
-            model=DEFAULT_MODEL,
-            messages=[
-                {"role": "system", "content": "You are a code quality expert. Respond only with valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
+        return await _chat_json(
+            RUNTIME_SYSTEM,
+            prompt,
             temperature=0.1,
-            max_tokens=2000,
-            response_format={"type": "json_object"}
+            max_tokens=REPORT_MAX_TOKENS
         )
         
-        result = json.loads(response.choices[0].message.content)
-        return result
-        
     except Exception as e:
-        print(f"Groq Runtime Validator Error: {e}")
-        return {
-            "steps": [],
-            "final_verdict": "FAIL",
-            "error_recovery_attempted": True,
-            "recovery_trace": str(e)
-        }
+        return _runtime_failure(e)
+
+
+def packed_prompt(task: str, schema: str, diffs: List[str], checks: str = "") -> str:
+    """One prompt for several independent diffs, each between numbered PR markers."""
+    sections = "\n\n".join(
+        f"<<<PR {n}>>>\n{diff}\n<<<END PR {n}>>>" for n, diff in enumerate(diffs, 1)
+    )
+    return f"""{task} The {len(diffs)} diffs below belong to separate, unrelated pull requests,
+each between <<<PR n>>> and <<<END PR n>>> markers. Analyze each one on its own.
+
+Respond in JSON format with exactly one entry per PR:
+{{
+    "results": [
+        {{
+            "pr": n,
+            "report": {schema}
+        }}
+    ]
+}}
+{checks}
+
+{sections}
+"""
+
+
+def split_packed_results(response: Dict[str, Any], count: int) -> List[Optional[Dict[str, Any]]]:
+    """Per-PR reports from a packed response, in PR order (None where missing)."""
+    reports: List[Optional[Dict[str, Any]]] = [None] * count
+    for entry in response.get("results") or []:
+        if not isinstance(entry, dict) or not isinstance(entry.get("report"), dict):
+            continue
+        try:
+            n = int(entry.get("pr"))
+        except (TypeError, ValueError):
+            continue
+        if 1 <= n <= count and reports[n - 1] is None:
+            reports[n - 1] = entry["report"]
+    return reports
+
+
+async def _packed_json(system: str, prompt: str, count: int) -> List[Optional[Dict[str, Any]]]:
+    response = await _chat_json(
+        system,
+        prompt,
+        temperature=0.1,
+        max_tokens=min(REPORT_MAX_TOKENS * count, PACKED_MAX_OUTPUT_TOKENS)
+    )
+    return split_packed_results(response, count)
+
+
+async def _security_audit_packed(diffs: List[str]) -> List[Optional[Dict[str, Any]]]:
+    prompt = packed_prompt(
+        "You are a security auditor. Analyze these code diffs for security vulnerabilities.",
+        SECURITY_REPORT_SCHEMA,
+        diffs
+    )
+    return await _packed_json(SECURITY_SYSTEM, prompt, len(diffs))
+
+
+async def _runtime_validate_packed(diffs: List[str]) -> List[Optional[Dict[str, Any]]]:
+    prompt = packed_prompt(
+        "You are a runtime validator. Analyze these code diffs for potential runtime issues.",
+        RUNTIME_REPORT_SCHEMA,
+        diffs,
+        RUNTIME_CHECKS
+    )
+    return await _packed_json(RUNTIME_SYSTEM, prompt, len(diffs))
+
+
+# Small diffs from concurrent PRs share one Groq call per agent
+security_batcher = PromptBatcher(
+    "groq-security", _security_audit_single, _security_audit_packed,
+    measure=estimate_tokens, on_failure=_security_failure
+)
+runtime_batcher = PromptBatcher(
+    "groq-runtime", _runtime_validate_single, _runtime_validate_packed,
+    measure=estimate_tokens, on_failure=_runtime_failure
+)
+
+
+async def security_auditor_groq(diff_text: str) -> Dict[str, Any]:
+    """
+    Security auditor using Groq LLM (small diffs may be packed with other PRs)
+    """
+    return await security_batcher.submit(diff_text)
+
+
+async def runtime_validator_groq(diff_text: str) -> Dict[str, Any]:
+    """
+    Runtime validator using Groq LLM (small diffs may be packed with other PRs)
+    """
+    return await runtime_batcher.submit(diff_text)
+
+
+def get_prompt_batching_stats() -> Dict[str, Any]:
+    """Packing counters for the Groq security and runtime agents."""
+    return {
+        "security": security_batcher.get_stats(),
+        "runtime": runtime_batcher.get_stats(),
+    }
 
 
 async def ghostwriter_groq(
@@ -137,21 +299,24 @@ async def ghostwriter_groq(
     Ghostwriter using Groq LLM - synthesizes reports into GitHub comment
     """
     prompt = f"""You are a technical writer creating a GitHub PR review comment.
+Reports are compact: a key=value header, then one row per finding group
+(sev|rule|file|n|lines|details|snippets), then distinct fixes.
 
 Security Report:
-{json.dumps(security_report, indent=2)}
+{encode_report(security_report)}
 
 Runtime Report:
-{json.dumps(runtime_report, indent=2)}
+{encode_report(runtime_report)}
 
 PR Info:
-{json.dumps(pr_info, indent=2)}
+{json.dumps(pr_info, separators=(",", ":"))}
 
 Create a professional Markdown comment with:
 1. Executive summary with emoji indicators
 2. Security findings (if any)
 3. Runtime/logic issues (if any)
 4. Overall recommendation
+5. A one-line review coverage note if PR Info includes review_coverage
 
 Respond in JSON:
 {{
@@ -162,26 +327,20 @@ Respond in JSON:
 """
 
     try:
-        response = await groq_client.chat.completions.create(
-            model=DEFAULT_MODEL,
-            messages=[
-                {"role": "system", "content": "You are a professional technical writer. Respond only with valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
+        return await _chat_json(
+            "You are a professional technical writer. Respond only with valid JSON.",
+            prompt,
             temperature=0.3,
-            max_tokens=3000,
-            response_format={"type": "json_object"}
+            max_tokens=3000
         )
         
-        result = json.loads(response.choices[0].message.content)
-        return result
-        
     except Exception as e:
         print(f"Groq Ghostwriter Error: {e}")
         return {
             "status": "error",
             "comment": f"Failed to generate review: {str(e)}",
-            "confidence_score": 0.0
+            "confidence_score": 0.0,
+            "error": str(e)
         }
 
 
@@ -200,12 +359,30 @@ async def analyze_pr_groq(
     print("=" * 80)
     
     try:
+        # Keep only the highest-risk hunks within the LLM token budget
+        selection = select_hunks(diff_text)
+        coverage = selection["coverage"]
+        print(f"🎯 Hunks sent to LLM: {coverage['hunks_sent']}/{coverage['hunks_total']} "
+              f"(~{coverage['tokens_sent']}/{coverage['tokens_total']} tokens)")
+
         # Run agents in parallel
         print("\n⚡ Running Security & Runtime analysis in parallel...")
-        security_task = security_auditor_groq(diff_text)
-        runtime_task = runtime_validator_groq(diff_text)
+        async def security_task():
+            report = await security_auditor_groq(selection["diff"])
+            # Degraded mode: static scanners stand in for agents that failed
+            if is_failed_result(report):
+                report = static_security_report(diff_text, report["error"])
+            emit("security", {"backend": f"groq/{DEFAULT_MODEL}", "report": report})
+            return report
+
+        async def runtime_task():
+            report = await runtime_validator_groq(selection["diff"])
+            if is_failed_result(report):
+                report = static_runtime_report(diff_text, report["error"])
+            emit("runtime", {"backend": f"groq/{DEFAULT_MODEL}", "report": report})
+            return report
         
-        security_report, runtime_report = await asyncio.gather(security_task, runtime_task)
+        security_report, runtime_report = await asyncio.gather(security_task(), runtime_task())
         
         print(f"✅ Security: {len(security_report.get('vulnerabilities', []))} issues")
         print(f"✅ Runtime: {runtime_report.get('final_verdict', 'unknown')}")
@@ -217,8 +394,22 @@ async def analyze_pr_groq(
             "pr_id": pr_id,
             "title": title
         }
+        coverage_note = format_coverage(coverage)
+        if coverage_note:
+            pr_info["review_coverage"] = coverage_note
         
         final_verdict = await ghostwriter_groq(security_report, runtime_report, pr_info)
+        if is_failed_result(final_verdict):
+            final_verdict = fallback_comment(
+                security_report, runtime_report, pr_info, final_verdict["error"]
+            )
+        degraded = [
+            name for name, report in (
+                ("security", security_report),
+                ("runtime", runtime_report),
+                ("ghostwriter", final_verdict),
+            ) if report.get("degraded")
+        ]
         
         print(f"✅ Analysis Complete - Confidence: {final_verdict['confidence_score']:.2%}")
         
@@ -230,7 +421,9 @@ async def analyze_pr_groq(
             "runtime_snapshot": runtime_report,
             "metadata": {
                 "model": DEFAULT_MODEL,
-                "provider": "groq"
+                "provider": "groq",
+                "hunk_coverage": coverage,
+                "degraded": degraded
             }
         }
         
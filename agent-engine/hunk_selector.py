@@ -0,0 +1,337 @@
+"""
+Risk-ranked hunk selection
+Scores every diff hunk cheaply and keeps only the highest-risk hunks that fit
+in the LLM token budget, plus a one-line manifest of what was left out.
+"""
+import json
+import math
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Add Agents directory to path for the shared static scanners
+agents_path = Path(__file__).parent.parent / "Agents"
+sys.path.insert(0, str(agents_path))
+
+from workers_agents.security_scanners import (
+    scan_hardcoded_secrets,
+    scan_sql_injection,
+    scan_vulnerable_dependencies,
+    scan_security_antipatterns,
+)
+from report_encoder import estimate_tokens
+
+# Token budget for the diff sent to each LLM agent
+DEFAULT_TOKEN_BUDGET = int(os.getenv("HUNK_TOKEN_BUDGET", "6000"))
+
+# Maximum omitted hunks listed individually in the manifest line
+MANIFEST_MAX_ENTRIES = 40
+
+# Appended to a hunk cut short because it alone exceeds the token budget
+TRUNCATION_NOTE = "# truncated: {} more line(s) of this hunk exceed the token budget"
+
+SEVERITY_WEIGHTS = {"CRITICAL": 10.0, "HIGH": 6.0, "MEDIUM": 3.0, "LOW": 1.0}
+
+# Sensitive API families: (pattern, weight)
+SENSITIVE_APIS = {
+    "process": (r"\b(subprocess|os\.system|os\.popen|Popen|child_process|execSync|spawn)\b", 5.0),
+    "sql": (r"(?i)\b(cursor|execute|executemany|raw\s*\(|SELECT\s|INSERT\s+INTO|UPDATE\s+\w+\s+SET|DELETE\s+FROM)", 4.0),
+    "auth": (r"(?i)(auth|login|logout|password|passwd|token|jwt|session|permission|oauth|credential|api[_-]?key)", 4.0),
+    "crypto": (r"(?i)\b(hashlib|hmac|crypto|cipher|encrypt|decrypt|bcrypt|ssl|tls|secrets\.|random\.)", 3.0),
+    "code_exec": (r"\b(eval|exec|pickle\.loads?|yaml\.load|marshal\.loads|__import__)\s*\(", 5.0),
+    "network": (r"(?i)\b(requests\.(get|post|put|delete)|urllib|fetch\(|axios|http\.client|socket\.)", 2.0),
+    "filesystem": (r"\b(open\(|os\.remove|shutil\.rmtree|unlink\(|chmod)", 1.5),
+}
+
+LOW_SIGNAL_FILES = (
+    ".md", ".rst", ".txt", ".lock", ".svg", ".png", ".jpg", ".jpeg", ".gif",
+    ".ico", ".css", ".map", ".snap", ".csv",
+)
+LOW_SIGNAL_NAMES = ("package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock", "Cargo.lock")
+DEPENDENCY_FILES = ("requirements.txt", "package.json", "pyproject.toml", "setup.py", "Pipfile", "go.mod", "Gemfile")
+CONFIG_FILES = (".yml", ".yaml", ".toml", ".ini", ".env", ".cfg", "Dockerfile", ".tf")
+
+
+def _file_weight(path: str) -> float:
+    """Weight a hunk by how likely its file type is to carry real risk."""
+    name = path.rsplit("/", 1)[-1]
+    if name in LOW_SIGNAL_NAMES or name.endswith(LOW_SIGNAL_FILES):
+        # requirements.txt is a dependency manifest, not documentation
+        if name not in DEPENDENCY_FILES:
+            return 0.1
+    if name in DEPENDENCY_FILES:
+        return 1.3
+    if name.endswith(CONFIG_FILES) or name == "Dockerfile":
+        return 1.2
+    if "test" in path.lower() or "/fixtures/" in path:
+        return 0.6
+    return 1.0
+
+
+def parse_hunks(diff_text: str) -> List[Dict[str, Any]]:
+    """
+    Split a unified diff into hunks.
+
+    Text without ``@@`` hunk markers (plain code) is treated as a single hunk
+    whose every non-blank line counts as added.
+
+    Returns:
+        List of hunks with file path, file header, hunk text and churn counts
+    """
+    hunks = []
+    file_path = ""
+    file_header: List[str] = []
+    current = None
+
+    def close():
+        if current is not None:
+            hunks.append(current)
+
+    for line in diff_text.split("\n"):
+        if line.startswith("diff --git"):
+            close()
+            current = None
+            parts = line.split(" b/", 1)
+            file_path = parts[1] if len(parts) == 2 else line[len("diff --git "):]
+            file_header = [line]
+        elif current is None and (
+            line.startswith(("index ", "--- ", "+++ ", "new file", "deleted file",
+                             "similarity", "rename ", "old mode", "new mode", "Binary"))
+        ):
+            file_header.append(line)
+            if line.startswith("+++ ") and not file_path:
+                file_path = line[4:].removeprefix("b/")
+        elif line.startswith("@@"):
+            close()
+            current = {
+                "index": len(hunks),
+                "file": file_path or "(unknown)",
+                "file_header": list(file_header),
+                "lines": [line],
+                "added": 0,
+                "removed": 0,
+                "plain": False,
+            }
+        elif current is not None:
+            current["lines"].append(line)
+            if current["plain"]:
+                current["added"] += 1 if line.strip() else 0
+            elif line.startswith("+"):
+                current["added"] += 1
+            elif line.startswith("-"):
+                current["removed"] += 1
+        elif line.strip():
+            # Content outside any hunk: plain code rather than a diff
+            current = {
+                "index": len(hunks),
+                "file": file_path or "(snippet)",
+                "file_header": list(file_header),
+                "lines": [line],
+                "added": 1,
+                "removed": 0,
+                "plain": True,
+            }
+    close()
+
+    for hunk in hunks:
+        hunk["text"] = "\n".join(hunk["lines"])
+    return hunks
+
+
+def score_hunk(hunk: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Score a hunk from static scanner hits, sensitive API usage, file type and churn.
+
+    Returns:
+        Dictionary with the total score and its components
+    """
+    if hunk["lines"][0].startswith("@@"):
+        body = hunk["lines"][1:]
+        added = "\n".join(line[1:] for line in body if line.startswith("+"))
+        changed = "\n".join(line[1:] for line in body if line[:1] in "+-")
+    else:
+        added = changed = hunk["text"]
+
+    scanner_score = 0.0
+    scanner_hits = 0
+    for scan in (scan_hardcoded_secrets, scan_sql_injection,
+                 scan_vulnerable_dependencies, scan_security_antipatterns):
+        result = json.loads(scan(added))
+        for issue in result.get("issues", []):
+            scanner_hits += 1
+            scanner_score += SEVERITY_WEIGHTS.get(issue.get("severity", "LOW"), 1.0)
+
+    sensitive = [
+        name for name, (pattern, _) in SENSITIVE_APIS.items()
+        if re.search(pattern, changed)
+    ]
+    sensitive_score = sum(SENSITIVE_APIS[name][1] for name in sensitive)
+
+    churn = hunk["added"] + hunk["removed"]
+    churn_score = math.log2(1 + churn)
+    weight = _file_weight(hunk["file"])
+
+    return {
+        "score": round((scanner_score + sensitive_score + churn_score) * weight, 2),
+        "scanner_hits": scanner_hits,
+        "sensitive_apis": sensitive,
+        "churn": churn,
+        "file_weight": weight,
+    }
+
+
+def _manifest(omitted: List[Dict[str, Any]]) -> str:
+    """One-line summary of every hunk that was left out."""
+    entries = []
+    for hunk in omitted[:MANIFEST_MAX_ENTRIES]:
+        header = hunk["lines"][0]
+        match = re.match(r"@@ -\d+(?:,\d+)? \+(\d+)", header)
+        where = f"@L{match.group(1)}" if match else ""
+        entries.append(f"{hunk['file']}{where}(+{hunk['added']}/-{hunk['removed']})")
+    if len(omitted) > MANIFEST_MAX_ENTRIES:
+        entries.append(f"+{len(omitted) - MANIFEST_MAX_ENTRIES} more")
+    return f"# omitted {len(omitted)} low-risk hunk(s): " + ", ".join(entries)
+
+
+def _truncate_hunk(hunk: Dict[str, Any], token_budget: int) -> Dict[str, Any]:
+    """Copy of ``hunk`` cut to its leading lines that fit in ``token_budget``, with a note of the rest."""
+    kept = []
+    used = 0
+    for line in hunk["lines"]:
+        cost = estimate_tokens(line + "\n")
+        if kept and used + cost > token_budget:
+            break
+        kept.append(line)
+        used += cost
+    # Make room for the truncation note
+    while len(kept) > 1 and used + estimate_tokens(TRUNCATION_NOTE.format(len(hunk["lines"]))) > token_budget:
+        used -= estimate_tokens(kept.pop() + "\n")
+
+    note = TRUNCATION_NOTE.format(len(hunk["lines"]) - len(kept))
+    if kept[0].startswith("@@"):
+        body = kept[1:]
+        added = sum(1 for line in body if line.startswith("+"))
+        removed = sum(1 for line in body if line.startswith("-"))
+    else:
+        added, removed = sum(1 for line in kept if line.strip()), 0
+    return {
+        **hunk,
+        "lines": kept + [note],
+        "text": "\n".join(kept + [note]),
+        "added": added,
+        "removed": removed,
+        "truncated": True,
+    }
+
+
+def select_hunks(diff_text: str, token_budget: int = None) -> Dict[str, Any]:
+    """
+    Keep the top-ranked hunks that fit in the token budget. When even the
+    top-ranked hunk does not fit, it is sent cut to the budget instead.
+
+    Args:
+        diff_text: Full PR diff
+        token_budget: Approximate token budget (defaults to HUNK_TOKEN_BUDGET)
+
+    Returns:
+        Dict with the reduced ``diff`` (including the omission manifest),
+        the ``manifest`` line and ``coverage`` statistics
+    """
+    budget = token_budget if token_budget is not None else DEFAULT_TOKEN_BUDGET
+    hunks = parse_hunks(diff_text)
+    total_tokens = estimate_tokens(diff_text)
+    total_lines = sum(h["added"] + h["removed"] for h in hunks)
+
+    if total_tokens <= budget or not hunks:
+        return {
+            "diff": diff_text,
+            "manifest": "",
+            "coverage": {
+                "hunks_total": len(hunks),
+                "hunks_sent": len(hunks),
+                "changed_lines_total": total_lines,
+                "changed_lines_sent": total_lines,
+                "tokens_total": total_tokens,
+                "tokens_sent": total_tokens,
+                "coverage_pct": 100.0,
+                "files_omitted": [],
+                "hunks_truncated": 0,
+            },
+        }
+
+    for hunk in hunks:
+        hunk.update(score_hunk(hunk))
+
+    ranked = sorted(hunks, key=lambda h: (-h["score"], h["index"]))
+    selected = []
+    used = 0
+    headers_sent = set()
+    for hunk in ranked:
+        header_cost = 0
+        if hunk["file"] not in headers_sent:
+            header_cost = estimate_tokens("\n".join(hunk["file_header"]))
+        cost = estimate_tokens(hunk["text"]) + header_cost
+        if used + cost > budget:
+            if selected:
+                continue
+            hunk = _truncate_hunk(hunk, budget - header_cost)
+            cost = estimate_tokens(hunk["text"]) + header_cost
+        selected.append(hunk)
+        headers_sent.add(hunk["file"])
+        used += cost
+
+    chosen = {h["index"] for h in selected}
+    omitted = [h for h in ranked if h["index"] not in chosen]
+
+    # Reassemble in original diff order so file headers stay with their hunks
+    parts = []
+    last_file = None
+    for hunk in sorted(selected, key=lambda h: h["index"]):
+        if hunk["file"] != last_file:
+            parts.extend(hunk["file_header"])
+            last_file = hunk["file"]
+        parts.append(hunk["text"])
+
+    manifest = _manifest(omitted) if omitted else ""
+    if manifest:
+        parts.append(manifest)
+    reduced = "\n".join(parts)
+
+    sent_lines = sum(h["added"] + h["removed"] for h in selected)
+    sent_files = {h["file"] for h in selected}
+    return {
+        "diff": reduced,
+        "manifest": manifest,
+        "coverage": {
+            "hunks_total": len(hunks),
+            "hunks_sent": len(selected),
+            "changed_lines_total": total_lines,
+            "changed_lines_sent": sent_lines,
+            "tokens_total": total_tokens,
+            "tokens_sent": estimate_tokens(reduced),
+            "coverage_pct": round(100.0 * sent_lines / total_lines, 1) if total_lines else 100.0,
+            "files_omitted": sorted({h["file"] for h in omitted} - sent_files),
+            "hunks_truncated": sum(1 for h in selected if h.get("truncated")),
+        },
+    }
+
+
+def format_coverage(coverage: Dict[str, Any]) -> str:
+    """Human-readable coverage line for PR comments; empty when the whole diff was reviewed."""
+    if not coverage or (
+        coverage.get("hunks_sent") == coverage.get("hunks_total")
+        and not coverage.get("hunks_truncated")
+    ):
+        return ""
+    note = "lower-risk hunks were summarized, not analyzed"
+    if coverage.get("hunks_truncated"):
+        note = "a hunk over the token budget was cut short"
+        if coverage["hunks_sent"] != coverage["hunks_total"]:
+            note += " and lower-risk hunks were summarized, not analyzed"
+    return (
+        f"Reviewed {coverage['changed_lines_sent']}/{coverage['changed_lines_total']} "
+        f"changed lines ({coverage['hunks_sent']}/{coverage['hunks_total']} hunks, "
+        f"{coverage['coverage_pct']}%); {note}."
+    )
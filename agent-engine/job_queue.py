@@ -0,0 +1,149 @@
+"""
+Bounded priority worker pool for persisted analysis jobs
+A fixed number of workers drain an in-process priority queue; the JobStore
+is the source of truth, so queued work survives a restart and is picked up
+again when the pool starts.
+"""
+import asyncio
+import itertools
+import os
+import traceback
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from job_store import QUEUED, JobStore
+
+# Analyses run at most this many at a time, however many jobs are queued
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# Seconds between deletions of finished jobs past the retention period
+JOB_PRUNE_INTERVAL = float(os.getenv("JOB_PRUNE_INTERVAL", "3600"))
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class JobQueue:
+    """
+    Runs jobs from a JobStore with a fixed pool of asyncio workers.
+
+    Higher priority runs first; equal priorities run in submission order.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        handler: JobHandler,
+        workers: Optional[int] = None,
+        prune_interval: Optional[float] = None,
+    ):
+        """
+        Args:
+            store: Persistent job store
+            handler: Coroutine function taking the job's request dict and
+                returning the result dict
+            workers: Concurrent jobs (defaults to JOB_WORKERS)
+            prune_interval: Seconds between prunes of expired jobs
+                (defaults to JOB_PRUNE_INTERVAL)
+        """
+        self.store = store
+        self.handler = handler
+        self.workers = workers or JOB_WORKERS
+        self.prune_interval = prune_interval or JOB_PRUNE_INTERVAL
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        # job id -> priority of its most urgent entry still in the queue
+        self._queued: Dict[str, int] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._seq = itertools.count()
+        self._active = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self) -> None:
+        """Start the workers and requeue jobs left over from a previous run."""
+        if self.running:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._queued = {}
+        self._prune()
+        pending = self.store.pending()
+        for job in pending:
+            self._put(job)
+        self._tasks = [
+            asyncio.create_task(self._worker(n), name=f"job-worker-{n}")
+            for n in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._pruner(), name="job-pruner"))
+        print(f"🧵 Job queue started: {self.workers} workers, {len(pending)} pending jobs")
+
+    async def stop(self) -> None:
+        """Cancel the workers; jobs they were running are requeued on next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _put(self, job: Dict[str, Any]) -> None:
+        queued = self._queued.get(job["id"])
+        if queued is not None and queued >= job["priority"]:
+            return
+        self._queued[job["id"]] = job["priority"]
+        self._queue.put_nowait((-job["priority"], next(self._seq), job["id"]))
+
+    def submit(self, job: Dict[str, Any]) -> None:
+        """
+        Queue a new job, or move a waiting one up after its priority was
+        raised; the entry left at the old priority is skipped when reached.
+        """
+        if self._queue is not None and job["status"] == QUEUED:
+            self._put(job)
+
+    def _prune(self) -> None:
+        pruned = self.store.prune()
+        if pruned:
+            print(f"🧹 Pruned {pruned} expired jobs")
+
+    async def _pruner(self) -> None:
+        while True:
+            await asyncio.sleep(self.prune_interval)
+            try:
+                await asyncio.to_thread(self._prune)
+            except Exception as e:
+                print(f"⚠️  Job prune failed: {e}")
+
+    async def _worker(self, n: int) -> None:
+        while True:
+            _, _, job_id = await self._queue.get()
+            self._queued.pop(job_id, None)
+            try:
+                job = self.store.get(job_id)
+                if job is None or job["status"] != QUEUED:
+                    continue  # duplicate queue entry or pruned
+                self._active += 1
+                try:
+                    await self._run(job)
+                finally:
+                    self._active -= 1
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        self.store.mark_running(job["id"])
+        try:
+            result = await self.handler(job["request"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ Job {job['id'][:12]} failed: {e}")
+            traceback.print_exc()
+            self.store.mark_failed(job["id"], str(e))
+            return
+        self.store.mark_done(job["id"], result)
+        print(f"✅ Job {job['id'][:12]} done")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "active": self._active,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            **self.store.get_stats()
+        }
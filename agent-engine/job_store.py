@@ -0,0 +1,201 @@
+"""
+Persistent job store for asynchronous analyses
+Jobs live in a local SQLite database so a client can submit a PR, get a job
+id back immediately and poll for the result, even across engine restarts.
+Jobs are idempotent by content key: resubmitting the same repo/PR/diff
+returns the existing job instead of starting duplicate work.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", str(Path(__file__).parent / "jobs.db"))
+# Finished jobs are kept this long for polling and idempotent resubmits
+JOB_RETENTION_HOURS = float(os.getenv("JOB_RETENTION_HOURS", "24"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    content_key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    request TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_content_key ON jobs (content_key, created_at);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, priority, created_at);
+"""
+
+
+def is_reusable_result(result: Optional[Dict[str, Any]]) -> bool:
+    """Full reviews are reused by later submits; errors and degraded reviews are not."""
+    if not isinstance(result, dict) or result.get("error"):
+        return False
+    return not (result.get("metadata") or {}).get("degraded")
+
+
+class JobStore:
+    """Thread-safe SQLite job table (WAL mode, one shared connection)."""
+
+    def __init__(self, path: str = None, retention_hours: float = None):
+        self.path = path or JOB_DB_PATH
+        self.retention_seconds = (
+            retention_hours if retention_hours is not None else JOB_RETENTION_HOURS
+        ) * 3600
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["request"] = json.loads(job["request"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def create_or_get(
+        self, content_key: str, request: Dict[str, Any], priority: int = 0
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Return the live job for ``content_key``, or create a queued one.
+        Finished jobs past the retention period are never reused.
+
+        Returns:
+            (job, created): created is False when an existing job was reused
+        """
+        now = time.time()
+        cutoff = now - self.retention_seconds
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE content_key = ? AND status != ? "
+                "AND NOT (status = ? AND finished_at < ?) ORDER BY created_at DESC",
+                (content_key, FAILED, DONE, cutoff),
+            ).fetchall()
+            for row in rows:
+                job = self._to_dict(row)
+                if job["status"] != DONE or is_reusable_result(job["result"]):
+                    if priority > job["priority"] and job["status"] == QUEUED:
+                        # A more urgent resubmit bumps the waiting job
+                        self._conn.execute(
+                            "UPDATE jobs SET priority = ? WHERE id = ?", (priority, job["id"])
+                        )
+                        job["priority"] = priority
+                    return job, False
+
+            job_id = uuid.uuid4().hex
+            self._conn.execute(
+                "INSERT INTO jobs (id, content_key, status, priority, request, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, content_key, QUEUED, priority, json.dumps(request), now),
+            )
+        return self.get(job_id), True
+
+    def latest_result(self, content_key: str) -> Optional[Dict[str, Any]]:
+        """Most recent reusable result for ``content_key`` within the retention period."""
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT result FROM jobs WHERE content_key = ? AND status = ? AND finished_at >= ? "
+                "ORDER BY finished_at DESC",
+                (content_key, DONE, cutoff),
+            ).fetchall()
+        for row in rows:
+            result = json.loads(row["result"]) if row["result"] else None
+            if is_reusable_result(result):
+                return result
+        return None
+
+    def record_result(self, content_key: str, request: Dict[str, Any], result: Dict[str, Any]) -> str:
+        """Store a result computed outside the queue (e.g. a batch) as a finished job."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, content_key, status, priority, request, result, attempts, "
+                "created_at, started_at, finished_at) VALUES (?, ?, ?, 0, ?, ?, 1, ?, ?, ?)",
+                (job_id, content_key, DONE, json.dumps(request), json.dumps(result, default=str),
+                 now, now, now),
+            )
+        return job_id
+
+    def mark_running(self, job_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                (RUNNING, time.time(), job_id),
+            )
+
+    def mark_done(self, job_id: str, result: Dict[str, Any]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, finished_at = ? WHERE id = ?",
+                (DONE, json.dumps(result, default=str), time.time(), job_id),
+            )
+
+    def mark_failed(self, job_id: str, error: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                (FAILED, error, time.time(), job_id),
+            )
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """
+        Jobs that still need a worker, most urgent first. Jobs left running
+        by a previous process (crash, deploy) are queued again.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?", (QUEUED, RUNNING)
+            )
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY priority DESC, created_at",
+                (QUEUED,),
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def prune(self) -> int:
+        """Delete finished jobs older than the retention period."""
+        cutoff = time.time() - self.retention_seconds
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (DONE, FAILED, cutoff),
+            )
+        return cursor.rowcount
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"
+            ).fetchall()
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        counts.update({row["status"]: row["n"] for row in rows})
+        return {"path": self.path, "jobs": counts}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,262 @@
+"""
+API key pool with quota-aware load balancing
+Spreads calls for a provider across every configured key, preferring keys with
+the most remaining quota and the lowest recent latency, and benching keys that
+return auth or quota errors for a cooldown. Keys are handed to each call
+explicitly; nothing here touches the process environment.
+"""
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from rate_limiter import (
+    backoff_delay,
+    get_rate_limiter,
+    headers_of,
+    key_fingerprint,
+    parse_duration,
+    status_of,
+)
+
+# Environment variables that may hold keys for each provider, in priority order.
+# Keys are reassigned by prefix when they clearly belong to the other provider
+# (Groq keys start with "gsk_", Google AI Studio keys with "AIza").
+PROVIDER_KEY_ENV = {
+    "groq": (
+        "GROQ_API_KEYS",
+        "GROQ_API_KEY",
+        "SECURITY_AUDITOR_API_KEY",
+        "RUNTIME_VALIDATOR_API_KEY",
+        "GHOSTWRITER_API_KEY",
+    ),
+    "gemini": ("GEMINI_API_KEYS", "GEMINI_API_KEY", "GOOGLE_API_KEY"),
+}
+KEY_PREFIXES = {"gsk_": "groq", "AIza": "gemini"}
+
+AUTH_STATUSES = (401, 403)
+QUOTA_STATUSES = (429,)
+RETRY_STATUSES = (429, 503)
+
+AUTH_COOLDOWN_SECONDS = float(os.getenv("KEY_POOL_AUTH_COOLDOWN", "900"))
+# Bench after a 429 without retry-after; with retry-after the provider's wait
+# is used, but never less than the floor
+QUOTA_COOLDOWN_SECONDS = float(os.getenv("KEY_POOL_QUOTA_COOLDOWN", "60"))
+QUOTA_MIN_COOLDOWN_SECONDS = float(os.getenv("KEY_POOL_QUOTA_MIN_COOLDOWN", "1"))
+MAX_ATTEMPTS = int(os.getenv("KEY_POOL_MAX_ATTEMPTS", "6"))
+MAX_WAIT_SECONDS = float(os.getenv("KEY_POOL_MAX_WAIT", "30"))
+LATENCY_EWMA_ALPHA = 0.3
+
+
+class NoAvailableKeyError(RuntimeError):
+    """Raised when a provider has no configured API keys."""
+
+
+def discover_keys(provider: str) -> List[str]:
+    """
+    Collect every distinct key configured for a provider.
+
+    Args:
+        provider: "groq" or "gemini"
+
+    Returns:
+        Keys in priority order, without duplicates
+    """
+    keys = []
+    # The provider's own variables first, then keys filed under the other provider
+    groups = sorted(PROVIDER_KEY_ENV.items(), key=lambda item: item[0] != provider)
+    for listed_under, env_names in groups:
+        for env_name in env_names:
+            for key in (os.getenv(env_name) or "").split(","):
+                key = key.strip()
+                if not key or key in keys:
+                    continue
+                # A recognisable prefix wins over the variable the key was found in
+                owner = next(
+                    (p for prefix, p in KEY_PREFIXES.items() if key.startswith(prefix)),
+                    listed_under,
+                )
+                if owner == provider:
+                    keys.append(key)
+    return keys
+
+
+class KeyPool:
+    """Quota- and latency-aware selection over a provider's API keys."""
+
+    def __init__(self, provider: str, keys: Optional[List[str]] = None):
+        """
+        Args:
+            provider: Provider name shared with the rate limiter
+            keys: Explicit keys (discovered from the environment if omitted)
+        """
+        self.provider = provider
+        self.rate_limiter = get_rate_limiter()
+        self.keys = list(keys) if keys is not None else discover_keys(provider)
+        self._state: Dict[str, Dict[str, Any]] = {
+            key: {
+                "key_id": key_fingerprint(key),
+                "latency_ewma": None,
+                "cooldown_until": 0.0,
+                "cooldown_reason": None,
+                "last_used": 0.0,
+                "calls": 0,
+                "errors": 0,
+                "evictions": 0,
+            }
+            for key in self.keys
+        }
+
+    def _score(self, key: str) -> float:
+        state = self._state[key]
+        limiter = self.rate_limiter.limiter(self.provider, state["key_id"])
+        tokens = limiter.tokens.snapshot()
+        requests = limiter.requests.snapshot()
+        quota = min(
+            max(tokens["available"], 0.0) / max(tokens["capacity_per_minute"], 1.0),
+            max(requests["available"], 0.0) / max(requests["capacity_per_minute"], 1.0),
+        )
+        load = limiter.in_flight / max(limiter.concurrency_limit, 1.0)
+        latency = state["latency_ewma"] if state["latency_ewma"] is not None else 1.0
+        return (0.05 + quota) * (1.0 - 0.5 * min(load, 1.0)) / (1.0 + latency)
+
+    def choose(self) -> Optional[str]:
+        """Best healthy key right now, or None if every key is cooling down."""
+        now = time.monotonic()
+        healthy = [k for k in self.keys if self._state[k]["cooldown_until"] <= now]
+        if not healthy:
+            return None
+        # Highest score wins; least recently used breaks ties (round robin)
+        return max(healthy, key=lambda k: (round(self._score(k), 3), -self._state[k]["last_used"]))
+
+    def _next_recovery(self) -> float:
+        now = time.monotonic()
+        return max(min(s["cooldown_until"] for s in self._state.values()) - now, 0.0)
+
+    def record_success(self, key: str, latency: float) -> None:
+        state = self._state[key]
+        previous = state["latency_ewma"]
+        state["latency_ewma"] = latency if previous is None else (
+            LATENCY_EWMA_ALPHA * latency + (1 - LATENCY_EWMA_ALPHA) * previous
+        )
+
+    def _quota_cooldown(self, retry_after: Optional[float]) -> float:
+        """
+        Bench time after a 429. Capped at MAX_WAIT_SECONDS per key, so a
+        small pool with nothing to fail over to never stalls callers for longer
+        than they would wait for it anyway.
+        """
+        if retry_after:
+            cooldown = max(retry_after, QUOTA_MIN_COOLDOWN_SECONDS)
+        else:
+            cooldown = QUOTA_COOLDOWN_SECONDS
+        return min(cooldown, MAX_WAIT_SECONDS * len(self.keys))
+
+    def record_failure(self, key: str, status: Optional[int], retry_after: Optional[float] = None) -> None:
+        state = self._state[key]
+        state["errors"] += 1
+        if status in AUTH_STATUSES:
+            cooldown, reason = AUTH_COOLDOWN_SECONDS, "auth"
+        elif status in QUOTA_STATUSES:
+            cooldown, reason = self._quota_cooldown(retry_after), "quota"
+        else:
+            return
+        state["cooldown_until"] = time.monotonic() + cooldown
+        state["cooldown_reason"] = reason
+        state["evictions"] += 1
+        print(f"🔑 {self.provider} key {state['key_id']} benched for {cooldown:.0f}s ({reason})")
+
+    async def call(
+        self,
+        fn: Callable[[str], Awaitable[Any]],
+        estimated_tokens: int = 1000,
+        max_attempts: int = MAX_ATTEMPTS,
+    ) -> Any:
+        """
+        Run ``fn(api_key)`` on the best key, failing over to other keys on
+        auth/quota errors and waiting (instead of failing) when all are benched.
+
+        Args:
+            fn: Coroutine factory taking the API key to use for this call
+            estimated_tokens: Token estimate forwarded to the rate limiter
+            max_attempts: Total attempts across keys before giving up
+
+        Returns:
+            Whatever ``fn`` returns
+        """
+        if not self.keys:
+            raise NoAvailableKeyError(f"No {self.provider} API keys configured")
+
+        attempt = 0
+        while True:
+            key = self.choose()
+            if key is None:
+                # Wait for the earliest key to recover (capped), then use it
+                wait = min(self._next_recovery(), MAX_WAIT_SECONDS)
+                print(f"⏳ All {self.provider} keys benched; waiting {wait:.1f}s")
+                await asyncio.sleep(wait)
+                key = self.choose() or min(self.keys, key=lambda k: self._state[k]["cooldown_until"])
+
+            state = self._state[key]
+            state["last_used"] = time.monotonic()
+            state["calls"] += 1
+            start = time.monotonic()
+            try:
+                result = await self.rate_limiter.call(
+                    self.provider,
+                    state["key_id"],
+                    lambda: fn(key),
+                    estimated_tokens=estimated_tokens,
+                    max_retries=0,
+                )
+            except Exception as e:
+                status = status_of(e)
+                if status not in AUTH_STATUSES and status not in RETRY_STATUSES:
+                    state["errors"] += 1
+                    raise
+                retry_after = parse_duration(headers_of(e).get("retry-after"))
+                self.record_failure(key, status, retry_after)
+                attempt += 1
+                if attempt >= max_attempts:
+                    raise
+                if status == 503:
+                    # Provider overload is not the key's fault: back off, don't bench
+                    await asyncio.sleep(backoff_delay(attempt, retry_after))
+                continue
+
+            self.record_success(key, time.monotonic() - start)
+            return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "provider": self.provider,
+            "keys": [
+                {
+                    "key_id": s["key_id"],
+                    "score": round(self._score(k), 4),
+                    "latency_ewma": round(s["latency_ewma"], 3) if s["latency_ewma"] is not None else None,
+                    "benched_for_seconds": round(max(s["cooldown_until"] - now, 0.0), 1),
+                    "bench_reason": s["cooldown_reason"] if s["cooldown_until"] > now else None,
+                    "calls": s["calls"],
+                    "errors": s["errors"],
+                    "evictions": s["evictions"],
+                }
+                for k, s in self._state.items()
+            ],
+        }
+
+
+# One pool per provider
+_key_pools: Dict[str, KeyPool] = {}
+
+
+def get_key_pool(provider: str) -> KeyPool:
+    """Get or create the process-wide key pool for a provider."""
+    if provider not in _key_pools:
+        _key_pools[provider] = KeyPool(provider)
+    return _key_pools[provider]
+
+
+def get_key_pool_stats() -> Dict[str, Any]:
+    return {provider: pool.get_stats() for provider, pool in _key_pools.items()}
@@ -3,19 +3,48 @@ import asyncio
 import weave
 import json
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 from typing import List, Optional
-import google.generativeai as genai
+from google import genai
 from dotenv import load_dotenv
 import traceback
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+# Add Agents directory to path for degraded_reports and the shared cache modules
+agents_path = Path(__file__).parent.parent / "Agents"
+sys.path.insert(0, str(agents_path))
+
+from single_flight import SingleFlight, content_key
+from rate_limiter import get_rate_limiter
+from key_pool import get_key_pool, get_key_pool_stats
+from provider_router import get_provider_router, is_failed_result
+from circuit_breaker import get_breaker, get_breaker_stats, render_breaker_metrics
+from hunk_selector import select_hunks, format_coverage
+from degraded_reports import (
+    static_security_report,
+    static_runtime_report,
+    fallback_comment,
+    static_findings,
+)
+from progress import JsonFieldStream, emit, format_sse, progress_sink, streaming
+from job_store import JobStore
+from job_queue import JobQueue
+from batch_runner import BATCH_MAX_ITEMS, run_batch
 
 # Import orchestral agent integration
 try:
     from orchestral_integration import (
         analyze_pr_with_orchestral_agents,
         get_cache_stats,
+        get_session_stats,
         clear_cache,
+        start_cache_maintenance,
+        stop_cache_maintenance,
     )
+    from cache_sweeper import render_sweeper_metrics
 
     ORCHESTRAL_AVAILABLE = True
     print("INFO: Orchestral agent system loaded successfully")
@@ -26,7 +55,14 @@ except ImportError as e:
 
 # Import Groq agents (high-quota alternative)
 try:
-    from groq_agents import analyze_pr_groq
+    from groq_agents import (
+        analyze_pr_groq,
+        security_auditor_groq,
+        runtime_validator_groq,
+        ghostwriter_groq,
+        get_prompt_batching_stats,
+        DEFAULT_MODEL as GROQ_MODEL,
+    )
 
     GROQ_AVAILABLE = True
     print("INFO: Groq agent system loaded successfully")
@@ -54,14 +90,49 @@ except Exception as e:
     )
     os.environ["WANDB_MODE"] = "disabled"
 
-# Configure Gemini
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
+# Configure Gemini (every configured key is load-balanced through the pool)
+gemini_pool = get_key_pool("gemini")
+if not gemini_pool.keys:
     print("WARNING: GEMINI_API_KEY not found. Agents will fail.")
-else:
-    genai.configure(api_key=api_key)
+GEMINI_MODEL = "gemini-2.5-flash"
+_gemini_clients = {}
+gemini_breaker = get_breaker("gemini", GEMINI_MODEL)
+
+rate_limiter = get_rate_limiter()
+
+# Route each agent call to the fastest healthy backend when both providers are configured
+ROUTING_ENABLED = os.getenv("PROVIDER_ROUTING", "true").lower() != "false"
+provider_router = get_provider_router()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Starts cache maintenance and the /jobs workers, and stops them in reverse."""
+    global job_queue
+    if ORCHESTRAL_AVAILABLE:
+        start_cache_maintenance()
+    job_queue = JobQueue(JobStore(), run_job)
+    await job_queue.start()
+    try:
+        yield
+    finally:
+        await job_queue.stop()
+        job_queue.store.close()
+        if ORCHESTRAL_AVAILABLE:
+            # Stops the sweeper, then the cache I/O pool once queued writes finish
+            await stop_cache_maintenance()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# Identical concurrent /analyze requests share one computation
+analysis_flight = SingleFlight("analyze")
+
+# Persisted /jobs queue; created by the lifespan
+job_queue: Optional[JobQueue] = None
+
+# Seconds between SSE keep-alive comments while agents are working
+STREAM_KEEPALIVE_SECONDS = float(os.getenv("STREAM_KEEPALIVE_SECONDS", "15"))
 
 # -----------------------------------------------------------------------------
 # W&B / Agent Data Models (Schema)
@@ -75,6 +146,11 @@ class AnalysisRequest(BaseModel):
     title: Optional[str] = None
 
 
+class JobRequest(AnalysisRequest):
+    # Higher runs first when the worker pool is saturated
+    priority: int = 0
+
+
 class Vulnerability(BaseModel):
     type: str = Field(description="Category (e.g., 'Secret Leak', 'SQL Injection')")
     severity: str = Field(description="Critical, High, Medium, or Low")
@@ -91,6 +167,7 @@ class SecurityReport(BaseModel):
     is_secure: bool
     vulnerabilities: List[Vulnerability]
     summary_reasoning: str
+    error: Optional[str] = None
 
 
 class ValidationStep(BaseModel):
@@ -106,12 +183,14 @@ class ValidationReport(BaseModel):
     error_recovery_attempted: bool = False
     recovery_trace: Optional[str] = None
     final_verdict: str = Field(description="PASS or FAIL")
+    error: Optional[str] = None
 
 
 class FinalVerdict(BaseModel):
     status: str
     comment: str
     confidence_score: float
+    error: Optional[str] = None
 
 
 # -----------------------------------------------------------------------------
@@ -119,6 +198,65 @@ class FinalVerdict(BaseModel):
 # -----------------------------------------------------------------------------
 
 
+async def gemini_generate_json(prompt: str, max_output_tokens: int = 2048):
+    """
+    Run a JSON-mode Gemini call on the best available key (waits for quota,
+    fails over on 401/403/429). Fails fast while the Gemini breaker is open.
+    """
+
+    def generate(key: str):
+        client = _gemini_clients.get(key)
+        if client is None:
+            client = _gemini_clients[key] = genai.Client(api_key=key)
+        return client.aio.models.generate_content(
+            model=GEMINI_MODEL,
+            contents=prompt,
+            config={"response_mime_type": "application/json"},
+        )
+
+    return await gemini_breaker.call(lambda: gemini_pool.call(
+        generate,
+        estimated_tokens=len(prompt) // 4 + max_output_tokens,
+    ))
+
+
+async def gemini_stream_json_field(prompt: str, field: str, max_output_tokens: int = 2048) -> str:
+    """
+    Like ``gemini_generate_json`` but streams the response, emitting the
+    decoded text of one JSON string ``field`` as ``comment_delta`` events.
+    Returns the complete JSON text.
+    """
+    attempts = []
+
+    async def generate(key: str):
+        client = _gemini_clients.get(key)
+        if client is None:
+            client = _gemini_clients[key] = genai.Client(api_key=key)
+        if attempts:
+            # A failed attempt may have streamed part of the field already
+            emit("comment_reset")
+        attempts.append(key)
+        field_stream = JsonFieldStream(field)
+        chunks = []
+        stream = await client.aio.models.generate_content_stream(
+            model=GEMINI_MODEL,
+            contents=prompt,
+            config={"response_mime_type": "application/json"},
+        )
+        async for chunk in stream:
+            if chunk.text:
+                chunks.append(chunk.text)
+                delta = field_stream.feed(chunk.text)
+                if delta:
+                    emit("comment_delta", {"text": delta})
+        return "".join(chunks)
+
+    return await gemini_breaker.call(lambda: gemini_pool.call(
+        generate,
+        estimated_tokens=len(prompt) // 4 + max_output_tokens,
+    ))
+
+
 @weave.op()
 async def security_auditor_agent(diff_text: str) -> SecurityReport:
     """
@@ -153,11 +291,7 @@ async def security_auditor_agent(diff_text: str) -> SecurityReport:
     """
 
     try:
-        model = genai.GenerativeModel(
-            "gemini-2.5-flash",
-            generation_config={"response_mime_type": "application/json"},
-        )
-        response = model.generate_content(prompt)
+        response = await gemini_generate_json(prompt)
         # Parse JSON to validate against Pydantic model
         data = json.loads(response.text)
         report = SecurityReport(**data)
@@ -169,6 +303,7 @@ async def security_auditor_agent(diff_text: str) -> SecurityReport:
             is_secure=False,
             vulnerabilities=[],
             summary_reasoning=f"Agent failed to run: {str(e)}",
+            error=str(e),
         )
 
 
@@ -205,11 +340,7 @@ async def runtime_validator_agent(diff_text: str) -> ValidationReport:
     """
 
     try:
-        model = genai.GenerativeModel(
-            "gemini-2.5-flash",
-            generation_config={"response_mime_type": "application/json"},
-        )
-        response = model.generate_content(prompt)
+        response = await gemini_generate_json(prompt)
         data = json.loads(response.text)
         return ValidationReport(**data)
     except Exception as e:
@@ -219,16 +350,21 @@ async def runtime_validator_agent(diff_text: str) -> ValidationReport:
             final_verdict="FAIL",
             error_recovery_attempted=True,
             recovery_trace=str(e),
+            error=str(e),
         )
 
 
 @weave.op()
 async def ghostwriter_agent(
-    security_report: SecurityReport, validation_report: ValidationReport, pr_info: dict
+    security_report: SecurityReport,
+    validation_report: ValidationReport,
+    pr_info: dict,
+    stream: bool = False,
 ) -> FinalVerdict:
     """
     Ghostwriter: Synthesizes reports into a final GitHub comment and score.
-    Uses confidence weighting.
+    Uses confidence weighting. With ``stream`` the comment is emitted as
+    ``comment_delta`` progress events while it is generated.
     """
 
     # Calculate aggregate confidence
@@ -263,16 +399,18 @@ async def ghostwriter_agent(
     """
 
     try:
-        model = genai.GenerativeModel(
-            "gemini-2.5-flash",
-            generation_config={"response_mime_type": "application/json"},
-        )
-        response = model.generate_content(prompt)
-        data = json.loads(response.text)
+        if stream:
+            data = json.loads(await gemini_stream_json_field(prompt, "comment"))
+        else:
+            response = await gemini_generate_json(prompt)
+            data = json.loads(response.text)
         return FinalVerdict(**data)
     except Exception as e:
         return FinalVerdict(
-            status="error", comment=f"Failed to synthesize: {e}", confidence_score=0.0
+            status="error",
+            comment=f"Failed to synthesize: {e}",
+            confidence_score=0.0,
+            error=str(e),
         )
 
 
@@ -288,15 +426,34 @@ async def orchestration_agent(request: AnalysisRequest):
     # For now, we hardcode the fan-out.
 
     # 2. Parallel Execution
-    security_task = security_auditor_agent(request.diff_text)
-    runtime_task = runtime_validator_agent(request.diff_text)
+    async def security_task():
+        report = await security_auditor_agent(request.diff_text)
+        # Degraded mode: static scanners stand in for agents that failed
+        if report.error:
+            report = SecurityReport.model_validate(
+                static_security_report(request.diff_text, report.error)
+            )
+        emit("security", {"backend": f"gemini/{GEMINI_MODEL}", "report": report.model_dump()})
+        return report
+
+    async def runtime_task():
+        report = await runtime_validator_agent(request.diff_text)
+        if report.error:
+            report = ValidationReport.model_validate(
+                static_runtime_report(request.diff_text, report.error)
+            )
+        emit("runtime", {"backend": f"gemini/{GEMINI_MODEL}", "report": report.model_dump()})
+        return report
 
-    sec_report, run_report = await asyncio.gather(security_task, runtime_task)
+    sec_report, run_report = await asyncio.gather(security_task(), runtime_task())
 
     # 3. Synthesis
-    final_verdict = await ghostwriter_agent(
-        sec_report, run_report, {"repo_id": request.repo_id, "pr_id": request.pr_id}
-    )
+    pr_info = {"repo_id": request.repo_id, "pr_id": request.pr_id}
+    final_verdict = await ghostwriter_agent(sec_report, run_report, pr_info, stream=streaming())
+    if final_verdict.error:
+        final_verdict = FinalVerdict.model_validate(fallback_comment(
+            sec_report.model_dump(), run_report.model_dump(), pr_info, final_verdict.error
+        ))
 
     print(f"✅ Analysis Complete. Score: {final_verdict.confidence_score}")
 
@@ -309,47 +466,162 @@ async def orchestration_agent(request: AnalysisRequest):
     }
 
 
+async def gemini_ghostwriter(
+    security_report: dict, runtime_report: dict, pr_info: dict
+) -> dict:
+    """Gemini ghostwriter over plain report dicts (as produced by either backend)."""
+    try:
+        sec_report = SecurityReport.model_validate(security_report)
+        run_report = ValidationReport.model_validate(runtime_report)
+    except ValidationError as e:
+        return {"error": f"Reports do not match the Gemini schema: {e}"}
+    verdict = await ghostwriter_agent(sec_report, run_report, pr_info)
+    return verdict.model_dump()
+
+
+async def analyze_pr_routed(request: AnalysisRequest):
+    """
+    Runs each agent call on the fastest healthy backend (Groq or Gemini),
+    hedging on the other provider when a call runs past its p95 latency.
+    """
+    groq_backend = f"groq/{GROQ_MODEL}"
+    gemini_backend = f"gemini/{GEMINI_MODEL}"
+    print(f"🧭 ROUTED AGENT ANALYSIS - PR #{request.pr_id} ({groq_backend} | {gemini_backend})")
+
+    selection = select_hunks(request.diff_text)
+    coverage = selection["coverage"]
+    diff = selection["diff"]
+
+    async def gemini_dict(agent, *args):
+        return (await agent(*args)).model_dump()
+
+    async def security_task():
+        backend, report = await provider_router.run("security", {
+            groq_backend: lambda: security_auditor_groq(diff),
+            gemini_backend: lambda: gemini_dict(security_auditor_agent, diff),
+        })
+        # Degraded mode: static scanners stand in when both providers failed
+        if is_failed_result(report):
+            backend, report = "static", static_security_report(request.diff_text, report["error"])
+        emit("security", {"backend": backend, "report": report})
+        return backend, report
+
+    async def runtime_task():
+        backend, report = await provider_router.run("runtime", {
+            groq_backend: lambda: runtime_validator_groq(diff),
+            gemini_backend: lambda: gemini_dict(runtime_validator_agent, diff),
+        })
+        if is_failed_result(report):
+            backend, report = "static", static_runtime_report(request.diff_text, report["error"])
+        emit("runtime", {"backend": backend, "report": report})
+        return backend, report
+
+    (security_backend, security_report), (runtime_backend, runtime_report) = await asyncio.gather(
+        security_task(), runtime_task()
+    )
+
+    pr_info = {"repo_id": request.repo_id, "pr_id": request.pr_id, "title": request.title}
+    coverage_note = format_coverage(coverage)
+    if coverage_note:
+        pr_info["review_coverage"] = coverage_note
+
+    writer_backend, final_verdict = await provider_router.run("ghostwriter", {
+        groq_backend: lambda: ghostwriter_groq(security_report, runtime_report, pr_info),
+        gemini_backend: lambda: gemini_ghostwriter(security_report, runtime_report, pr_info),
+    })
+    if is_failed_result(final_verdict):
+        writer_backend = "static"
+        final_verdict = fallback_comment(
+            security_report, runtime_report, pr_info, final_verdict["error"]
+        )
+
+    print(f"✅ Routed analysis complete: security={security_backend}, "
+          f"runtime={runtime_backend}, ghostwriter={writer_backend}")
+
+    return {
+        "status": final_verdict["status"],
+        "comment": final_verdict["comment"],
+        "confidence_score": final_verdict["confidence_score"],
+        "security_snapshot": security_report,
+        "runtime_snapshot": runtime_report,
+        "metadata": {
+            "provider": "routed",
+            "routing": {
+                "security": security_backend,
+                "runtime": runtime_backend,
+                "ghostwriter": writer_backend,
+            },
+            "hunk_coverage": coverage,
+        },
+    }
+
+
 # -----------------------------------------------------------------------------
 # API Routes
 # -----------------------------------------------------------------------------
 
 
+async def run_analysis(request: AnalysisRequest):
+    """
+    Analyzes a Pull Request using available agent systems in priority order:
+    1. Routed Groq + Gemini agents (when both providers have keys)
+    2. Groq (fastest, highest quota)
+    3. Orchestral agents (Google ADK with caching)
+    4. Simple Gemini agents (fallback)
+    """
+    # Route per agent call between providers (hedges slow calls)
+    if ROUTING_ENABLED and GROQ_AVAILABLE and get_key_pool("groq").keys and gemini_pool.keys:
+        print(f"Using Routed Agent System for PR #{request.pr_id}")
+        return await analyze_pr_routed(request)
+
+    # Try Groq first (best quota)
+    if GROQ_AVAILABLE and os.getenv("GROQ_API_KEY"):
+        print(f"Using Groq Agent System for PR #{request.pr_id}")
+        return await analyze_pr_groq(
+            repo_id=request.repo_id,
+            pr_id=request.pr_id,
+            diff_text=request.diff_text,
+            title=request.title,
+        )
+
+    # Try orchestral agents (Google ADK with caching)
+    elif ORCHESTRAL_AVAILABLE:
+        print(f"Using Orchestral Agent System for PR #{request.pr_id}")
+        return await analyze_pr_with_orchestral_agents(
+            repo_id=request.repo_id,
+            pr_id=request.pr_id,
+            diff_text=request.diff_text,
+            title=request.title,
+        )
+
+    # Fall back to simple agent implementation
+    else:
+        print(f"Using Simple Agent System for PR #{request.pr_id}")
+        return await orchestration_agent(request)
+
+
+def _with_cache_status(result):
+    """Make sure ``metadata.cache_status`` is set on an analysis result."""
+    # Only the orchestral system caches; every other result was just computed
+    if isinstance(result, dict):
+        if not isinstance(result.get("metadata"), dict):
+            result["metadata"] = {}
+        result["metadata"].setdefault("cache_status", "recomputed")
+    return result
+
+
 @app.post("/analyze")
 async def analyze_pr(request: AnalysisRequest):
     """
-    Analyzes a Pull Request using available agent systems in priority order:
-    1. Groq (fastest, highest quota)
-    2. Orchestral agents (Google ADK with caching)
-    3. Simple Gemini agents (fallback)
+    Analyzes a Pull Request. Concurrent requests for the same repo, PR and
+    diff (webhook, Node backend, manual triggers) attach to one in-flight
+    analysis instead of each paying for full LLM runs. ``metadata.cache_status``
+    says whether the result was "fresh", "stale" or "recomputed".
     """
     try:
-        # Try Groq first (best quota)
-        if GROQ_AVAILABLE and os.getenv("GROQ_API_KEY"):
-            print(f"Using Groq Agent System for PR #{request.pr_id}")
-            result = await analyze_pr_groq(
-                repo_id=request.repo_id,
-                pr_id=request.pr_id,
-                diff_text=request.diff_text,
-                title=request.title,
-            )
-            return result
-
-        # Try orchestral agents (Google ADK with caching)
-        elif ORCHESTRAL_AVAILABLE:
-            print(f"Using Orchestral Agent System for PR #{request.pr_id}")
-            result = await analyze_pr_with_orchestral_agents(
-                repo_id=request.repo_id,
-                pr_id=request.pr_id,
-                diff_text=request.diff_text,
-                title=request.title,
-            )
-            return result
-
-        # Fall back to simple agent implementation
-        else:
-            print(f"Using Simple Agent System for PR #{request.pr_id}")
-            result = await orchestration_agent(request)
-            return result
+        key = content_key(request.repo_id, request.pr_id, request.diff_text)
+        result = await analysis_flight.run(key, lambda: run_analysis(request))
+        return _with_cache_status(result)
 
     except Exception as e:
         print(f"Error processing analysis: {e}")
@@ -357,6 +629,165 @@ async def analyze_pr(request: AnalysisRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def run_job(request: dict):
+    """Job handler: shares in-flight work with /analyze for the same content."""
+    analysis = AnalysisRequest(**request)
+    key = content_key(analysis.repo_id, analysis.pr_id, analysis.diff_text)
+    return await analysis_flight.run(key, lambda: run_analysis(analysis))
+
+
+def _job_view(job: dict) -> dict:
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "priority": job["priority"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "result": job["result"],
+        "error": job["error"],
+    }
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: JobRequest):
+    """
+    Queues an analysis and returns its job id immediately; poll GET /jobs/{id}.
+    Resubmitting the same repo, PR and diff returns the existing job.
+    """
+    if job_queue is None:
+        raise HTTPException(status_code=503, detail="Job queue not running")
+    key = content_key(request.repo_id, request.pr_id, request.diff_text)
+    job, created = job_queue.store.create_or_get(
+        key, request.model_dump(exclude={"priority"}), request.priority
+    )
+    # New jobs, and waiting ones whose priority this resubmit raised
+    job_queue.submit(job)
+    return {"job_id": job["id"], "status": job["status"], "created": created}
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Status of a queued analysis, with its result once done."""
+    if job_queue is None:
+        raise HTTPException(status_code=503, detail="Job queue not running")
+    job = job_queue.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_view(job)
+
+
+@app.post("/analyze/batch")
+async def analyze_batch(requests: List[AnalysisRequest]):
+    """
+    Analyzes many Pull Requests in one call and streams one NDJSON line per
+    PR as it completes (tagged with its index in the request), then a summary
+    line. Identical repo/PR/diff entries run once and recent results are
+    served from the job store.
+    """
+    if len(requests) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch larger than {BATCH_MAX_ITEMS} items")
+
+    items = [
+        (content_key(r.repo_id, r.pr_id, r.diff_text), r.model_dump()) for r in requests
+    ]
+    store = job_queue.store if job_queue is not None else None
+
+    async def lines():
+        batch = run_batch(
+            items,
+            run_job,
+            lookup=store.latest_result if store else None,
+            record=store.record_result if store else None,
+        )
+        async for line in batch:
+            yield json.dumps(line, default=str) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+async def analysis_events(request: AnalysisRequest):
+    """
+    Server-Sent Events for one analysis: static findings first, then each
+    agent report as it lands, Ghostwriter comment tokens where the backend
+    streams them, and the final verdict (the same body /analyze returns).
+    Shares in-flight work with /analyze and jobs for the same content; a
+    stream that joins an analysis someone else started only gets its verdict.
+    """
+    events: asyncio.Queue = asyncio.Queue()
+    event_id = 0
+
+    def sse(event, data):
+        nonlocal event_id
+        event_id += 1
+        return format_sse(event, data, event_id)
+
+    # Deterministic scanners answer in well under a second
+    yield sse("static", static_findings(request.diff_text))
+
+    key = content_key(request.repo_id, request.pr_id, request.diff_text)
+
+    async def analyze():
+        with progress_sink(lambda event, data: events.put_nowait((event, data))):
+            result = await analysis_flight.run(
+                key, lambda: run_analysis(request), cancel_when_abandoned=True
+            )
+        return _with_cache_status(result)
+
+    task = asyncio.create_task(analyze())
+    try:
+        while True:
+            getter = asyncio.ensure_future(events.get())
+            done, _ = await asyncio.wait(
+                {getter, task},
+                timeout=STREAM_KEEPALIVE_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if getter in done:
+                yield sse(*getter.result())
+                continue
+            getter.cancel()
+            if task in done:
+                break
+            yield ": keep-alive\n\n"
+
+        while not events.empty():
+            yield sse(*events.get_nowait())
+        try:
+            yield sse("verdict", task.result())
+        except Exception as e:
+            print(f"Error streaming analysis: {e}")
+            traceback.print_exc()
+            yield sse("error", {"detail": str(e)})
+    finally:
+        # Client went away: stop the agents unless another caller still needs them
+        task.cancel()
+
+
+def _event_stream(request: AnalysisRequest) -> StreamingResponse:
+    return StreamingResponse(
+        analysis_events(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/analyze/stream")
+async def analyze_pr_stream(request: AnalysisRequest):
+    """
+    Analyzes a Pull Request and streams progress as Server-Sent Events
+    (static, security, runtime, comment_delta, comment_reset, verdict, error).
+    """
+    return _event_stream(request)
+
+
+@app.get("/analyze/stream")
+async def analyze_pr_stream_get(repo_id: str, pr_id: int, diff_text: str, title: Optional[str] = None):
+    """EventSource-friendly variant of POST /analyze/stream (query parameters)."""
+    return _event_stream(AnalysisRequest(repo_id=repo_id, pr_id=pr_id, diff_text=diff_text, title=title))
+
+
 @app.get("/health")
 def health_check():
     return {
@@ -367,6 +798,30 @@ def health_check():
     }
 
 
+@app.get("/stats")
+def engine_stats():
+    """Runtime counters for the engine (coalescing, rate limits, key pools, routing, breakers, sessions, jobs, packing)."""
+    return {
+        "single_flight": analysis_flight.get_stats(),
+        "rate_limits": rate_limiter.get_stats(),
+        "key_pools": get_key_pool_stats(),
+        "routing": provider_router.get_stats(),
+        "circuit_breakers": get_breaker_stats(),
+        "adk_sessions": get_session_stats() if ORCHESTRAL_AVAILABLE else None,
+        "jobs": job_queue.get_stats() if job_queue is not None else None,
+        "prompt_batching": get_prompt_batching_stats() if GROQ_AVAILABLE else None,
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def engine_metrics():
+    """Circuit breaker and cache maintenance metrics in Prometheus text format."""
+    metrics = render_breaker_metrics()
+    if ORCHESTRAL_AVAILABLE:
+        metrics += render_sweeper_metrics()
+    return metrics
+
+
 @app.get("/cache/stats")
 def cache_stats():
     """Get cache statistics (only available with orchestral agents)."""
@@ -0,0 +1,113 @@
+"""
+Progress events for streamed analyses
+An analysis started under ``progress_sink(callback)`` reports typed events
+(security report ready, comment tokens, ...) through ``emit``. The sink lives
+in a context variable, so the same code paths serve /analyze (no sink, emit
+is a no-op) and /analyze/stream, and concurrent requests never mix events.
+"""
+import json
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+ProgressCallback = Callable[[str, Dict[str, Any]], None]
+
+_sink: ContextVar[Optional[ProgressCallback]] = ContextVar("progress_sink", default=None)
+
+
+@contextmanager
+def progress_sink(callback: ProgressCallback):
+    """Send events emitted in this context (and tasks it starts) to ``callback``."""
+    token = _sink.set(callback)
+    try:
+        yield
+    finally:
+        _sink.reset(token)
+
+
+def streaming() -> bool:
+    """Whether anyone is listening; lets callers skip work only a stream needs."""
+    return _sink.get() is not None
+
+
+def emit(event: str, data: Optional[Dict[str, Any]] = None) -> None:
+    """Report a progress event to the current sink, if any."""
+    callback = _sink.get()
+    if callback is not None:
+        callback(event, data or {})
+
+
+def format_sse(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    """One Server-Sent Events message (JSON data on a single line)."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'), default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class JsonFieldStream:
+    """
+    Incrementally decodes one string field (e.g. "comment") out of a JSON
+    object whose text arrives in chunks, so the field can be streamed to a
+    client before the whole object is complete.
+    """
+
+    def __init__(self, field: str):
+        self._key = re.compile(r'"%s"\s*:\s*"' % re.escape(field))
+        self._buffer = ""
+        self._pos: Optional[int] = None
+        self.done = False
+
+    def feed(self, chunk: str) -> str:
+        """Add raw JSON text; returns the newly decoded part of the field."""
+        if self.done:
+            return ""
+        self._buffer += chunk
+        if self._pos is None:
+            match = self._key.search(self._buffer)
+            if not match:
+                return ""
+            self._pos = match.end()
+
+        out = []
+        buffer, pos = self._buffer, self._pos
+        while pos < len(buffer):
+            char = buffer[pos]
+            if char == '"':
+                self.done = True
+                pos += 1
+                break
+            if char != "\\":
+                out.append(char)
+                pos += 1
+                continue
+            # Escape sequence: wait for the rest if it was split across chunks
+            if pos + 1 >= len(buffer):
+                break
+            code = buffer[pos + 1]
+            if code == "u":
+                if pos + 6 > len(buffer):
+                    break
+                codepoint = int(buffer[pos + 2:pos + 6], 16)
+                if 0xD800 <= codepoint < 0xDC00:
+                    # High surrogate: combine with the low half that follows
+                    if pos + 12 > len(buffer):
+                        break
+                    if buffer[pos + 6:pos + 8] == "\\u":
+                        low = int(buffer[pos + 8:pos + 12], 16)
+                        if 0xDC00 <= low < 0xE000:
+                            codepoint = 0x10000 + ((codepoint - 0xD800) << 10) + (low - 0xDC00)
+                            pos += 6
+                out.append(chr(codepoint))
+                pos += 6
+            else:
+                out.append(_ESCAPES.get(code, code))
+                pos += 2
+        self._pos = pos
+        return "".join(out)
@@ -0,0 +1,176 @@
+"""
+Opportunistic prompt packing for small LLM requests
+Small requests are held for a short window and sent as one packed prompt,
+so several tiny PRs share one round trip and one copy of the fixed system
+prompt. The packed response is split back out per request; anything the
+packed call misses is retried on its own. When the provider itself fails
+(429, 5xx, timeout, open breaker) every request in the batch gets its own
+failure report instead, so one throttled call doesn't become a burst of
+single calls on the same quota and callers can still degrade gracefully.
+"""
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from circuit_breaker import CircuitOpenError, is_provider_failure
+
+# Disable with PROMPT_BATCHING=false
+PROMPT_BATCHING = os.getenv("PROMPT_BATCHING", "true").lower() != "false"
+# How long the first small request waits for company
+PROMPT_BATCH_WINDOW_MS = float(os.getenv("PROMPT_BATCH_WINDOW_MS", "250"))
+# Input tokens packed into one prompt at most
+PROMPT_BATCH_MAX_TOKENS = int(os.getenv("PROMPT_BATCH_MAX_TOKENS", "6000"))
+# Requests packed into one prompt at most
+PROMPT_BATCH_MAX_ITEMS = int(os.getenv("PROMPT_BATCH_MAX_ITEMS", "8"))
+# Only requests up to this size are held for packing (~30 changed lines)
+PROMPT_BATCH_SMALL_TOKENS = int(os.getenv("PROMPT_BATCH_SMALL_TOKENS", "600"))
+
+Single = Callable[[str], Awaitable[Dict[str, Any]]]
+# Takes the packed texts, returns one result per text (None where missing)
+Pack = Callable[[List[str]], Awaitable[List[Optional[Dict[str, Any]]]]]
+# Builds the per-request result for a provider failure (the single call's error shape)
+Failure = Callable[[Exception], Dict[str, Any]]
+
+
+def _estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+class PromptBatcher:
+    """
+    Collects small requests for one agent and runs them as packed prompts.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        single: Single,
+        pack: Pack,
+        window_ms: Optional[float] = None,
+        max_batch_tokens: Optional[int] = None,
+        max_items: Optional[int] = None,
+        small_tokens: Optional[int] = None,
+        measure: Callable[[str], int] = _estimate_tokens,
+        enabled: Optional[bool] = None,
+        on_failure: Optional[Failure] = None
+    ):
+        """
+        Args:
+            name: Label used in logs and stats
+            single: Runs one request on its own
+            pack: Runs several requests as one packed prompt
+            window_ms: Hold time for the first request of a batch
+            max_batch_tokens: Token budget of one packed prompt
+            max_items: Requests per packed prompt
+            small_tokens: Largest request that is held for packing
+            measure: Token estimate for a request text
+            enabled: Pack at all (defaults to PROMPT_BATCHING)
+            on_failure: Result for each request when the provider fails a packed
+                call; without it the provider error is raised to every caller
+        """
+        self.name = name
+        self.single = single
+        self.pack = pack
+        self.window = (window_ms if window_ms is not None else PROMPT_BATCH_WINDOW_MS) / 1000
+        self.max_batch_tokens = max_batch_tokens or PROMPT_BATCH_MAX_TOKENS
+        self.max_items = max_items or PROMPT_BATCH_MAX_ITEMS
+        self.small_tokens = small_tokens or PROMPT_BATCH_SMALL_TOKENS
+        self.measure = measure
+        self.enabled = PROMPT_BATCHING if enabled is None else enabled
+        self.on_failure = on_failure
+
+        self._pending: List[tuple] = []  # (text, tokens, future)
+        self._pending_tokens = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Running batches, referenced until done so they are not garbage-collected
+        self._tasks: Set[asyncio.Task] = set()
+        self.counters = {
+            "single": 0, "packed_calls": 0, "packed_requests": 0, "retried": 0, "failed": 0
+        }
+
+    async def submit(self, text: str) -> Dict[str, Any]:
+        """Run one request, packed with others when it is small enough."""
+        tokens = self.measure(text)
+        if not self.enabled or tokens > self.small_tokens:
+            self.counters["single"] += 1
+            return await self.single(text)
+
+        loop = asyncio.get_running_loop()
+        if self._pending and self._pending_tokens + tokens > self.max_batch_tokens:
+            self._flush()
+        future = loop.create_future()
+        self._pending.append((text, tokens, future))
+        self._pending_tokens += tokens
+        if len(self._pending) >= self.max_items:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending, self._pending_tokens = self._pending, [], 0
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[tuple]) -> None:
+        texts = [text for text, _, _ in batch]
+        futures = [future for _, _, future in batch]
+        results: List[Optional[Dict[str, Any]]] = [None] * len(batch)
+
+        if len(batch) > 1:
+            self.counters["packed_calls"] += 1
+            self.counters["packed_requests"] += len(batch)
+            try:
+                packed = await self.pack(texts)
+                results = list(packed[:len(batch)]) + [None] * (len(batch) - len(packed))
+            except Exception as e:
+                print(f"⚠️ [{self.name}] Packed call for {len(batch)} requests failed: {e}")
+                if isinstance(e, CircuitOpenError) or is_provider_failure(e):
+                    # Retrying singly would hit the same exhausted provider N times
+                    self.counters["failed"] += len(batch)
+                    for future in futures:
+                        if future.done():
+                            continue
+                        if self.on_failure is None:
+                            future.set_exception(e)
+                        else:
+                            future.set_result(self.on_failure(e))
+                    return
+            print(f"📦 [{self.name}] Packed {len(batch)} requests into one prompt")
+
+        async def resolve(index: int) -> None:
+            future = futures[index]
+            if future.done():
+                return
+            result = results[index]
+            try:
+                if result is None:
+                    if len(batch) > 1:
+                        self.counters["retried"] += 1
+                    else:
+                        self.counters["single"] += 1
+                    result = await self.single(texts[index])
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                return
+            if not future.done():
+                future.set_result(result)
+
+        await asyncio.gather(*(resolve(i) for i in range(len(batch))))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "window_ms": self.window * 1000,
+            "max_batch_tokens": self.max_batch_tokens,
+            "max_items": self.max_items,
+            "small_tokens": self.small_tokens,
+            "pending": len(self._pending),
+            **self.counters
+        }
@@ -0,0 +1,227 @@
+"""
+Latency-based routing and hedged requests across LLM backends
+Keeps a rolling latency/error histogram per task and backend (provider/model),
+sends each agent call to the fastest healthy backend and, once that call runs
+past its p95 latency, fires a hedged duplicate on the next backend. The first
+good answer wins and the other call is cancelled.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Rolling window per task/backend
+WINDOW_SIZE = int(os.getenv("ROUTER_WINDOW_SIZE", "200"))
+WINDOW_SECONDS = float(os.getenv("ROUTER_WINDOW_SECONDS", "900"))
+# Samples needed before percentiles are trusted
+MIN_SAMPLES = int(os.getenv("ROUTER_MIN_SAMPLES", "5"))
+# Expected latency for a backend with too few samples (keeps new backends in play)
+LATENCY_PRIOR_SECONDS = float(os.getenv("ROUTER_LATENCY_PRIOR", "6.0"))
+# Error rate above which a backend is only used as a last resort
+MAX_ERROR_RATE = float(os.getenv("ROUTER_MAX_ERROR_RATE", "0.5"))
+
+# Hedge when the primary runs past its p95 (or this delay until p95 is known)
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", "10.0"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "0.5"))
+# Hedges allowed as a fraction of calls, so spend stays close to one call each
+HEDGE_MAX_RATIO = float(os.getenv("HEDGE_MAX_RATIO", "0.15"))
+
+
+def is_failed_result(result: Any) -> bool:
+    """Agents report failures as a result carrying an ``error`` value."""
+    return isinstance(result, dict) and bool(result.get("error"))
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of ``values`` (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = min(max(math.ceil(pct / 100.0 * len(ordered)) - 1, 0), len(ordered) - 1)
+    return ordered[rank]
+
+
+class LatencyHistogram:
+    """Rolling window of (timestamp, latency, ok) samples for one task/backend."""
+
+    def __init__(self):
+        self.samples: deque = deque(maxlen=WINDOW_SIZE)
+
+    def record(self, latency: float, ok: bool) -> None:
+        self.samples.append((time.monotonic(), latency, ok))
+
+    def _window(self) -> List[Tuple[float, float, bool]]:
+        cutoff = time.monotonic() - WINDOW_SECONDS
+        while self.samples and self.samples[0][0] < cutoff:
+            self.samples.popleft()
+        return list(self.samples)
+
+    def latencies(self) -> List[float]:
+        return [latency for _, latency, ok in self._window() if ok]
+
+    def error_rate(self) -> float:
+        window = self._window()
+        if not window:
+            return 0.0
+        return sum(1 for _, _, ok in window if not ok) / len(window)
+
+    def healthy(self) -> bool:
+        return len(self._window()) < MIN_SAMPLES or self.error_rate() < MAX_ERROR_RATE
+
+    def expected_latency(self) -> float:
+        """Median latency inflated by the error rate (a failure costs a retry)."""
+        latencies = self.latencies()
+        if len(latencies) < MIN_SAMPLES:
+            return LATENCY_PRIOR_SECONDS
+        return percentile(latencies, 50) / max(1.0 - self.error_rate(), 0.05)
+
+    def hedge_delay(self) -> float:
+        latencies = self.latencies()
+        if len(latencies) < MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return max(percentile(latencies, 95), HEDGE_MIN_DELAY)
+
+    def snapshot(self) -> Dict[str, Any]:
+        latencies = self.latencies()
+        return {
+            "samples": len(self._window()),
+            "p50": round(percentile(latencies, 50), 3) if latencies else None,
+            "p95": round(percentile(latencies, 95), 3) if latencies else None,
+            "error_rate": round(self.error_rate(), 3),
+            "healthy": self.healthy(),
+        }
+
+
+class ProviderRouter:
+    """Routes agent calls between backends with latency ranking and hedging."""
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.counters = {
+            "calls": 0,
+            "hedges": 0,
+            "hedge_wins": 0,
+            "failovers": 0,
+            "cancelled": 0,
+            "failed": 0,
+        }
+
+    def histogram(self, task: str, backend: str) -> LatencyHistogram:
+        key = (task, backend)
+        if key not in self._histograms:
+            self._histograms[key] = LatencyHistogram()
+        return self._histograms[key]
+
+    def rank(self, task: str, backends: List[str]) -> List[str]:
+        """Healthy backends by expected latency, then unhealthy ones as a last resort."""
+        return sorted(
+            backends,
+            key=lambda b: (
+                not self.histogram(task, b).healthy(),
+                self.histogram(task, b).expected_latency(),
+            ),
+        )
+
+    def _hedge_allowed(self) -> bool:
+        return self.counters["hedges"] < HEDGE_MAX_RATIO * self.counters["calls"] + 1
+
+    async def run(
+        self,
+        task: str,
+        candidates: Dict[str, Callable[[], Awaitable[Any]]],
+    ) -> Tuple[str, Any]:
+        """
+        Run one agent call on the best backend, hedging past its p95 latency.
+
+        Args:
+            task: Agent call name ("security", "runtime", "ghostwriter")
+            candidates: Backend name ("provider/model") -> coroutine factory
+
+        Returns:
+            Tuple of (winning backend, result). When every backend fails, the
+            last failed result is returned (or its exception raised).
+        """
+        order = self.rank(task, list(candidates))
+        remaining = list(order)
+        pending: Dict[asyncio.Future, Tuple[str, float]] = {}
+        self.counters["calls"] += 1
+
+        def launch(backend: str) -> None:
+            remaining.remove(backend)
+            future = asyncio.ensure_future(candidates[backend]())
+            pending[future] = (backend, time.monotonic())
+
+        launch(order[0])
+        hedge_at = time.monotonic() + self.histogram(task, order[0]).hedge_delay()
+        hedged = False
+        last_failure: Any = None
+        last_backend = order[0]
+
+        try:
+            while pending:
+                timeout = None
+                if remaining and not hedged and self._hedge_allowed():
+                    timeout = max(hedge_at - time.monotonic(), 0.0)
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    hedged = True
+                    self.counters["hedges"] += 1
+                    print(f"🏁 [{task}] {order[0]} past p95; hedging on {remaining[0]}")
+                    launch(remaining[0])
+                    continue
+
+                for future in done:
+                    backend, started = pending.pop(future)
+                    latency = time.monotonic() - started
+                    error = future.exception()
+                    result = None if error else future.result()
+                    ok = error is None and not is_failed_result(result)
+                    self.histogram(task, backend).record(latency, ok)
+                    if ok:
+                        if backend != order[0]:
+                            self.counters["hedge_wins" if hedged else "failovers"] += 1
+                        return backend, result
+                    last_failure, last_backend = error or result, backend
+                    print(f"⚠️ [{task}] {backend} failed after {latency:.1f}s")
+
+                # Everything in flight failed: fail over to the next backend now
+                if not pending and remaining:
+                    launch(remaining[0])
+
+            self.counters["failed"] += 1
+            if isinstance(last_failure, BaseException):
+                raise last_failure
+            return last_backend, last_failure
+        finally:
+            for future in pending:
+                future.cancel()
+                self.counters["cancelled"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters and per task/backend latency histograms."""
+        return {
+            **self.counters,
+            "backends": {
+                f"{task}:{backend}": histogram.snapshot()
+                for (task, backend), histogram in self._histograms.items()
+            },
+        }
+
+
+# Singleton instance
+_router_instance: Optional[ProviderRouter] = None
+
+
+def get_provider_router() -> ProviderRouter:
+    """Get or create the process-wide provider router."""
+    global _router_instance
+
+    if _router_instance is None:
+        _router_instance = ProviderRouter()
+
+    return _router_instance
@@ -0,0 +1,336 @@
+"""
+Provider-aware client-side rate limiter
+Token buckets per provider and API key (requests and tokens per minute),
+corrected from rate-limit response headers, with AIMD adaptive concurrency,
+a fair FIFO wait queue and jittered exponential retry on 429/503.
+"""
+import asyncio
+import hashlib
+import os
+import random
+import re
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# Per-provider defaults; override with RATE_LIMIT_<PROVIDER>_RPM / _TPM / _CONCURRENCY
+PROVIDER_DEFAULTS = {
+    "groq": {"rpm": 30, "tpm": 12000, "concurrency": 8},
+    "gemini": {"rpm": 10, "tpm": 250000, "concurrency": 4},
+}
+FALLBACK_DEFAULTS = {"rpm": 30, "tpm": 30000, "concurrency": 4}
+
+RETRY_STATUSES = (429, 503)
+MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "5"))
+BACKOFF_BASE_SECONDS = float(os.getenv("RATE_LIMIT_BACKOFF_BASE", "1.0"))
+BACKOFF_MAX_SECONDS = float(os.getenv("RATE_LIMIT_BACKOFF_MAX", "60.0"))
+
+
+def key_fingerprint(api_key: Optional[str]) -> str:
+    """Short, non-reversible identifier for an API key (safe for logs and stats)."""
+    if not api_key:
+        return "default"
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:8]
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse header durations such as ``"7.66s"``, ``"2m59.56s"``, ``"120ms"`` or ``"30"``."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total = 0.0
+    matched = False
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        matched = True
+        amount = float(amount)
+        total += {"h": 3600, "m": 60, "s": 1, "ms": 0.001}[unit] * amount
+    return total if matched else None
+
+
+def status_of(error: BaseException) -> Optional[int]:
+    """HTTP status of a provider SDK error (Groq, google-genai, google-api-core)."""
+    for attr in ("status_code", "code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def headers_of(obj: Any) -> Dict[str, str]:
+    """Lower-cased response headers from a raw response or an SDK error."""
+    headers = getattr(obj, "headers", None)
+    if headers is None:
+        headers = getattr(getattr(obj, "response", None), "headers", None)
+    if not headers:
+        return {}
+    return {str(k).lower(): v for k, v in dict(headers).items()}
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff that never undercuts Retry-After."""
+    backoff = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+    return max(backoff, retry_after or 0.0)
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously over a one-minute window."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        rate = self.capacity / 60.0
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Reserve ``amount`` tokens and return how long the caller must wait.
+        Reservations may go negative so queued callers keep their order.
+        """
+        now = time.monotonic()
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        self.tokens -= amount
+        wait = max(self.blocked_until - now, 0.0)
+        if self.tokens < 0:
+            wait = max(wait, -self.tokens / (self.capacity / 60.0))
+        return wait
+
+    def observe(self, limit: Optional[float], remaining: Optional[float], reset: Optional[float]) -> None:
+        """Correct the local estimate with what the provider reported."""
+        now = time.monotonic()
+        self._refill(now)
+        if limit:
+            self.capacity = float(limit)
+        if remaining is not None:
+            self.tokens = min(self.tokens, float(remaining))
+            if remaining <= 0 and reset:
+                self.blocked_until = max(self.blocked_until, now + reset)
+
+    def snapshot(self) -> Dict[str, Any]:
+        self._refill(time.monotonic())
+        return {
+            "capacity_per_minute": self.capacity,
+            "available": round(self.tokens, 1),
+            "blocked_for_seconds": round(max(self.blocked_until - time.monotonic(), 0.0), 2),
+        }
+
+
+class KeyLimiter:
+    """Limiter state for one (provider, API key) pair."""
+
+    def __init__(self, provider: str, key_id: str, rpm: float, tpm: float, concurrency: int):
+        self.provider = provider
+        self.key_id = key_id
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = concurrency
+        self.concurrency_limit = float(concurrency)
+        self.in_flight = 0
+        self._waiters: deque = deque()
+        self.counters = {"success": 0, "throttled": 0, "retries": 0, "failed": 0}
+
+    # -- fair concurrency slots ------------------------------------------------
+
+    async def _acquire_slot(self) -> None:
+        if self.in_flight < int(self.concurrency_limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Slot was handed over just as we were cancelled: pass it on
+                self.in_flight -= 1
+                self._wake()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.concurrency_limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _release_slot(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    async def acquire(self, estimated_tokens: int) -> None:
+        """Wait for a concurrency slot (FIFO), then for request and token budget."""
+        await self._acquire_slot()
+        try:
+            wait = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+            if wait > 0:
+                await asyncio.sleep(wait)
+        except BaseException:
+            self._release_slot()
+            raise
+
+    # -- AIMD feedback ---------------------------------------------------------
+
+    def on_success(self, headers: Dict[str, str]) -> None:
+        self.counters["success"] += 1
+        # Additive increase: about +1 slot per window of successful calls
+        self.concurrency_limit = min(
+            float(self.max_concurrency),
+            self.concurrency_limit + 1.0 / max(self.concurrency_limit, 1.0),
+        )
+        self.observe_headers(headers)
+        self._release_slot()
+
+    def on_throttle(self, headers: Dict[str, str]) -> None:
+        self.counters["throttled"] += 1
+        # Multiplicative decrease
+        self.concurrency_limit = max(1.0, self.concurrency_limit / 2.0)
+        self.observe_headers(headers)
+        retry_after = parse_duration(headers.get("retry-after"))
+        if retry_after:
+            self.requests.blocked_until = max(
+                self.requests.blocked_until, time.monotonic() + retry_after
+            )
+        self._release_slot()
+
+    def on_failure(self) -> None:
+        self.counters["failed"] += 1
+        self._release_slot()
+
+    def observe_headers(self, headers: Dict[str, str]) -> None:
+        if not headers:
+            return
+
+        def number(name: str) -> Optional[float]:
+            try:
+                return float(headers[name])
+            except (KeyError, TypeError, ValueError):
+                return None
+
+        # Groq reports requests per day, so only the remaining count is used
+        self.requests.observe(
+            None,
+            number("x-ratelimit-remaining-requests"),
+            parse_duration(headers.get("x-ratelimit-reset-requests")),
+        )
+        self.tokens.observe(
+            number("x-ratelimit-limit-tokens"),
+            number("x-ratelimit-remaining-tokens"),
+            parse_duration(headers.get("x-ratelimit-reset-tokens")),
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "provider": self.provider,
+            "key_id": self.key_id,
+            "concurrency_limit": round(self.concurrency_limit, 2),
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "requests": self.requests.snapshot(),
+            "tokens": self.tokens.snapshot(),
+            **self.counters,
+        }
+
+
+class RateLimiter:
+    """Registry of per-(provider, key) limiters plus the retrying call wrapper."""
+
+    def __init__(self):
+        self._limiters: Dict[Tuple[str, str], KeyLimiter] = {}
+
+    def limiter(self, provider: str, key_id: str = "default") -> KeyLimiter:
+        limiter = self._limiters.get((provider, key_id))
+        if limiter is None:
+            defaults = PROVIDER_DEFAULTS.get(provider, FALLBACK_DEFAULTS)
+            prefix = f"RATE_LIMIT_{provider.upper()}_"
+            limiter = KeyLimiter(
+                provider,
+                key_id,
+                rpm=float(os.getenv(prefix + "RPM", defaults["rpm"])),
+                tpm=float(os.getenv(prefix + "TPM", defaults["tpm"])),
+                concurrency=int(os.getenv(prefix + "CONCURRENCY", defaults["concurrency"])),
+            )
+            self._limiters[(provider, key_id)] = limiter
+        return limiter
+
+    async def call(
+        self,
+        provider: str,
+        key_id: str,
+        fn: Callable[[], Awaitable[Any]],
+        estimated_tokens: int = 1000,
+        max_retries: int = MAX_RETRIES,
+    ) -> Any:
+        """
+        Run ``fn`` once budget is available, retrying 429/503 with jittered backoff.
+
+        Args:
+            provider: Provider name ("groq", "gemini")
+            key_id: Key fingerprint from ``key_fingerprint``
+            fn: Zero-argument coroutine factory making the API call
+            estimated_tokens: Prompt + completion token estimate for the call
+            max_retries: Retries allowed for throttled/unavailable responses
+
+        Returns:
+            Whatever ``fn`` returns (raw responses expose ``headers`` for feedback)
+        """
+        limiter = self.limiter(provider, key_id)
+        attempt = 0
+        while True:
+            await limiter.acquire(estimated_tokens)
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                limiter.on_failure()
+                raise
+            except Exception as e:
+                status = status_of(e)
+                if status not in RETRY_STATUSES:
+                    limiter.on_failure()
+                    raise
+                headers = headers_of(e)
+                limiter.on_throttle(headers)
+                if attempt >= max_retries:
+                    raise
+                delay = backoff_delay(attempt, parse_duration(headers.get("retry-after")))
+                attempt += 1
+                limiter.counters["retries"] += 1
+                print(f"⏳ {provider}/{key_id} returned {status}; retry {attempt}/{max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            limiter.on_success(headers_of(result))
+            return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Limiter state for every provider/key seen so far."""
+        return {
+            f"{provider}:{key_id}": limiter.snapshot()
+            for (provider, key_id), limiter in self._limiters.items()
+        }
+
+
+# Singleton instance
+_rate_limiter_instance: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get or create the process-wide rate limiter."""
+    global _rate_limiter_instance
+
+    if _rate_limiter_instance is None:
+        _rate_limiter_instance = RateLimiter()
+
+    return _rate_limiter_instance
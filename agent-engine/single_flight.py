@@ -0,0 +1,96 @@
+"""
+Single-flight coalescing of identical in-flight requests
+Concurrent callers with the same content key share one computation and all
+receive its result (or its exception).
+"""
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable, Dict
+
+
+def content_key(*parts: Any) -> str:
+    """Build a stable key from request content (SHA256 of all parts)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class SingleFlight:
+    """
+    Tracks in-flight computations by key.
+
+    The computation runs as its own task, so a caller that disconnects or is
+    cancelled does not cancel the work the other callers are waiting on
+    (unless it asks to, and nobody else is waiting).
+    """
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name: Label used in stats output
+        """
+        self.name = name
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        # Callers currently awaiting each computation
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self._calls = 0
+        self._executions = 0
+        self._coalesced = 0
+
+    async def run(
+        self, key: str, fn: Callable[[], Awaitable[Any]], cancel_when_abandoned: bool = False
+    ) -> Any:
+        """
+        Run ``fn`` for ``key`` unless an identical computation is already running.
+
+        Args:
+            key: Content key identifying the computation
+            fn: Zero-argument coroutine factory doing the real work
+            cancel_when_abandoned: If this caller is cancelled while it is the
+                only one waiting, cancel the computation too
+
+        Returns:
+            Result of the (possibly shared) computation
+        """
+        self._calls += 1
+        task = self._in_flight.get(key)
+
+        if task is not None:
+            self._coalesced += 1
+            print(f"🔗 [{self.name}] Joining in-flight computation {key[:12]}")
+        else:
+            self._executions += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t, k=key: self._finish(k, t))
+
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if cancel_when_abandoned and self._waiters[task] == 1:
+                task.cancel()
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved; waiters re-raise it themselves
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for the stats endpoint."""
+        return {
+            "name": self.name,
+            "calls": self._calls,
+            "executions": self._executions,
+            "coalesced": self._coalesced,
+            "in_flight": len(self._in_flight),
+        }
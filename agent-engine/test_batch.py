@@ -0,0 +1,150 @@
+"""
+Test script for batch analysis (/analyze/batch)
+"""
+import asyncio
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Add agent-engine to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import batch_runner
+from batch_runner import run_batch
+from conftest import use_engine
+
+
+async def _collect(batch):
+    return [line async for line in batch]
+
+
+def test_batch_dedupes_uses_cache_and_bounds_concurrency(monkeypatch):
+    monkeypatch.setattr(batch_runner, "BATCH_CONCURRENCY", 2)
+    calls, active, peak = [], [0], [0]
+
+    async def analyze(request):
+        calls.append(request["pr_id"])
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        # Later PRs finish first
+        await asyncio.sleep(0.05 - request["pr_id"] * 0.01)
+        active[0] -= 1
+        if request["pr_id"] == 4:
+            raise RuntimeError("provider down")
+        return {"status": "success", "pr": request["pr_id"]}
+
+    recorded = {}
+    items = [
+        ("k1", {"pr_id": 1}),
+        ("k2", {"pr_id": 2}),
+        ("k1", {"pr_id": 1}),   # duplicate of item 0
+        ("k3", {"pr_id": 3}),   # cached
+        ("k4", {"pr_id": 4}),
+    ]
+
+    async def scenario():
+        batch = run_batch(
+            items,
+            analyze,
+            lookup=lambda key: {"status": "success", "cached": key} if key == "k3" else None,
+            record=lambda key, request, result: recorded.update({key: result}),
+        )
+        return [line async for line in batch]
+
+    lines = asyncio.run(scenario())
+    by_index = {line["index"]: line for line in lines[:-1]}
+
+    assert sorted(calls) == [1, 2, 4]
+    assert peak[0] == 2
+    assert lines[0]["index"] == 3 and lines[0]["cached"]
+    assert by_index[2]["deduped"] and by_index[2]["result"] == by_index[0]["result"]
+    assert by_index[4]["status"] == "error" and "provider down" in by_index[4]["error"]
+    assert set(recorded) == {"k1", "k2"}
+    assert lines[-1]["summary"]["unique"] == 4
+    assert lines[-1]["summary"]["failed"] == 1
+
+
+def test_concurrent_batches_share_one_limit(monkeypatch):
+    monkeypatch.setattr(batch_runner, "BATCH_CONCURRENCY", 2)
+    active, peak = [0], [0]
+
+    async def analyze(request):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.02)
+        active[0] -= 1
+        return {"status": "success"}
+
+    async def drain(prefix):
+        items = [(f"{prefix}{n}", {"pr_id": n}) for n in range(4)]
+        return await _collect(run_batch(items, analyze))
+
+    async def scenario():
+        return await asyncio.gather(drain("a"), drain("b"))
+
+    first, second = asyncio.run(scenario())
+    assert peak[0] == 2
+    assert first[-1]["summary"]["analyzed"] == second[-1]["summary"]["analyzed"] == 4
+
+
+def test_store_errors_become_error_lines():
+    async def analyze(request):
+        return {"status": "success"}
+
+    def lookup(key):
+        if key == "k1":
+            raise RuntimeError("database is locked")
+        return None
+
+    def record(key, request, result):
+        raise RuntimeError("disk full")
+
+    async def scenario():
+        batch = run_batch([("k1", {}), ("k2", {})], analyze, lookup=lookup, record=record)
+        return await asyncio.wait_for(_collect(batch), timeout=1)
+
+    lines = asyncio.run(scenario())
+    errors = sorted(line["error"] for line in lines[:-1])
+    assert errors == ["database is locked", "disk full"]
+    assert lines[-1]["summary"]["failed"] == 2
+
+
+def test_batch_endpoint_streams_ndjson_and_reuses_results(engine, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    runs = []
+
+    async def fake_analysis(request):
+        runs.append(request.pr_id)
+        return {"status": "success", "comment": f"PR {request.pr_id}", "confidence_score": 0.9}
+
+    body = [
+        {"repo_id": "o/r", "pr_id": pr_id, "diff_text": f"+x = {pr_id}\n"} for pr_id in (1, 2, 1)
+    ]
+    monkeypatch.setattr(engine, "run_analysis", fake_analysis)
+    with TestClient(engine.app) as client:
+        first = client.post("/analyze/batch", json=body)
+        assert first.headers["content-type"].startswith("application/x-ndjson")
+        first_lines = [json.loads(line) for line in first.text.splitlines()]
+        second_lines = [
+            json.loads(line) for line in client.post("/analyze/batch", json=body).text.splitlines()
+        ]
+
+    assert sorted(runs) == [1, 2]
+    assert first_lines[-1]["summary"]["analyzed"] == 2
+    assert second_lines[-1]["summary"]["cached"] == 2
+    assert all(line["status"] == "done" for line in first_lines[:-1])
+
+
+if __name__ == "__main__":
+    with pytest.MonkeyPatch.context() as mp:
+        test_batch_dedupes_uses_cache_and_bounds_concurrency(mp)
+    with pytest.MonkeyPatch.context() as mp:
+        test_concurrent_batches_share_one_limit(mp)
+    test_store_errors_become_error_lines()
+    with pytest.MonkeyPatch.context() as mp, tempfile.TemporaryDirectory() as tmp:
+        test_batch_endpoint_streams_ndjson_and_reuses_results(use_engine(mp, tmp), mp)
+    print("✅ Batch analysis tests passed!")
@@ -0,0 +1,149 @@
+"""
+Test script for provider circuit breakers
+"""
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add agent-engine to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    get_breaker,
+    is_provider_failure,
+    render_breaker_metrics,
+)
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def test_opens_after_failures_and_fails_fast():
+    breaker = CircuitBreaker("test/open", failure_threshold=3, reset_timeout=60)
+    for _ in range(3):
+        breaker.check()
+        breaker.record_failure(FakeAPIError(503))
+
+    assert breaker.state == OPEN
+    try:
+        breaker.check()
+        assert False, "open breaker should reject calls"
+    except CircuitOpenError as e:
+        assert e.retry_in > 0
+    assert breaker.counters["rejected"] == 1
+
+
+def test_request_errors_do_not_trip_breaker():
+    breaker = CircuitBreaker("test/client-errors", failure_threshold=2)
+    for _ in range(5):
+        breaker.record_failure(FakeAPIError(400))
+
+    assert breaker.state == CLOSED
+    assert breaker.counters["failures"] == 0
+
+
+def test_only_outages_count_as_provider_failures():
+    class APIConnectionError(Exception):
+        pass
+
+    assert is_provider_failure(TimeoutError("timed out"))
+    assert is_provider_failure(APIConnectionError("connection reset"))
+    assert is_provider_failure(FakeAPIError(429))
+    assert is_provider_failure(FakeAPIError(503))
+    assert not is_provider_failure(FakeAPIError(400))
+    # Bad model output or our own bugs must not open the breaker
+    assert not is_provider_failure(json.JSONDecodeError("Expecting value", "", 0))
+    assert not is_provider_failure(KeyError("summary"))
+
+
+def test_half_open_probes_restore_service():
+    breaker = CircuitBreaker(
+        "test/probe", failure_threshold=1, reset_timeout=0.01,
+        half_open_max_calls=1, half_open_successes=2,
+    )
+    breaker.record_failure(TimeoutError("timed out"))
+    assert breaker.state == OPEN
+    time.sleep(0.02)
+
+    assert breaker.allow_request() and breaker.state == HALF_OPEN
+    # Only one probe at a time
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.allow_request()
+    breaker.record_success()
+
+    assert breaker.state == CLOSED
+    assert breaker.transitions == {"closed->open": 1, "open->half_open": 1, "half_open->closed": 1}
+
+
+def test_failed_probe_reopens_and_metrics_export():
+    breaker = get_breaker("test", "reopen")
+    breaker.failure_threshold = 1
+    breaker.reset_timeout = 0.01
+
+    async def failing():
+        raise FakeAPIError(500)
+
+    async def scenario():
+        for _ in range(2):
+            try:
+                await breaker.call(failing)
+            except FakeAPIError:
+                pass
+            await asyncio.sleep(0.02)
+
+    asyncio.run(scenario())
+
+    assert breaker.transitions["half_open->open"] == 1
+    metrics = render_breaker_metrics()
+    assert 'llm_circuit_transitions_total{breaker="test/reopen",from="half_open",to="open"} 1' in metrics
+    assert 'llm_circuit_state{breaker="test/reopen",state="open"} 1' in metrics
+
+
+def test_failed_ghostwriter_step_marks_review_degraded(monkeypatch):
+    import orchestral_integration
+
+    async def gemini_down(call, text):
+        raise ConnectionError("gemini unreachable")
+
+    async def empty_stream(**kwargs):
+        return
+        yield
+
+    monkeypatch.setattr(orchestral_integration, "_on_gemini_key", gemini_down)
+    monkeypatch.setattr(orchestral_integration, "GHOSTWRITER_AVAILABLE", True)
+    monkeypatch.setattr(orchestral_integration, "stream_pr_review", empty_stream)
+    diff = "+++ b/app.py\n@@ -0,0 +1 @@\n+x = 1"
+
+    # An empty GhostWriter stream is a failure, not a review
+    result = asyncio.run(orchestral_integration._run_analysis("org/repo", 1, diff, None))
+    assert result["metadata"]["degraded"] == ["runtime", "security", "ghostwriter"]
+    assert "No response generated." not in result["comment"]
+
+    # So is skipping GhostWriter because its breaker is open
+    monkeypatch.setattr(orchestral_integration.gemini_breaker, "allow_request", lambda: False)
+    result = asyncio.run(orchestral_integration._run_analysis("org/repo", 1, diff, None))
+    assert "ghostwriter" in result["metadata"]["degraded"]
+
+
+if __name__ == "__main__":
+    test_opens_after_failures_and_fails_fast()
+    test_request_errors_do_not_trip_breaker()
+    test_only_outages_count_as_provider_failures()
+    test_half_open_probes_restore_service()
+    test_failed_probe_reopens_and_metrics_export()
+    with pytest.MonkeyPatch.context() as mp:
+        test_failed_ghostwriter_step_marks_review_degraded(mp)
+    print("✅ Circuit breaker tests passed!")
@@ -0,0 +1,105 @@
+"""
+Test script for risk-ranked hunk selection
+"""
+import sys
+from pathlib import Path
+
+# Add agent-engine to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from hunk_selector import parse_hunks, select_hunks, format_coverage
+
+
+def _file_diff(path, start, added_lines):
+    body = "\n".join(f"+{line}" for line in added_lines)
+    return (
+        f"diff --git a/{path} b/{path}\n"
+        f"index 1111111..2222222 100644\n"
+        f"--- a/{path}\n"
+        f"+++ b/{path}\n"
+        f"@@ -{start},0 +{start},{len(added_lines)} @@\n"
+        f"{body}"
+    )
+
+
+def _large_diff():
+    docs = _file_diff("docs/GUIDE.md", 1, [f"Some documentation line {i}" for i in range(300)])
+    risky = _file_diff("app/db.py", 10, [
+        "def find_user(cursor, user_id):",
+        '    api_key = "sk_live_1234567890abcdefghijkl"',
+        '    cursor.execute(f"SELECT * FROM users WHERE id = {user_id}")',
+        "    subprocess.run(cmd, shell=True)",
+    ])
+    helper = _file_diff("app/utils.py", 5, [f"value_{i} = {i}" for i in range(20)])
+    return "\n".join([docs, risky, helper])
+
+
+def test_parse_hunks_tracks_files_and_churn():
+    hunks = parse_hunks(_large_diff())
+
+    assert [h["file"] for h in hunks] == ["docs/GUIDE.md", "app/db.py", "app/utils.py"]
+    assert hunks[1]["added"] == 4 and hunks[1]["removed"] == 0
+
+
+def test_plain_code_counts_every_line_as_added():
+    code = "import subprocess\n\ndef run(cmd):\n    subprocess.run(cmd, shell=True)\n"
+
+    hunks = parse_hunks(code)
+
+    assert len(hunks) == 1
+    assert hunks[0]["added"] == 3 and hunks[0]["removed"] == 0
+
+    selection = select_hunks(code * 200, token_budget=100)
+    assert selection["coverage"]["changed_lines_total"] == 600
+    assert 0 < selection["coverage"]["changed_lines_sent"] < 600
+
+
+def test_small_diff_is_passed_through():
+    diff = _file_diff("app/db.py", 1, ["x = 1"])
+
+    selection = select_hunks(diff, token_budget=1000)
+
+    assert selection["diff"] == diff
+    assert selection["manifest"] == ""
+    assert selection["coverage"]["coverage_pct"] == 100.0
+    assert format_coverage(selection["coverage"]) == ""
+
+
+def test_risky_hunk_kept_and_docs_omitted():
+    selection = select_hunks(_large_diff(), token_budget=300)
+    coverage = selection["coverage"]
+
+    assert "cursor.execute" in selection["diff"]
+    assert "Some documentation line" not in selection["diff"]
+    assert selection["manifest"].startswith("# omitted 1 low-risk hunk(s): docs/GUIDE.md@L1")
+    assert selection["diff"].endswith(selection["manifest"])
+    assert coverage["hunks_sent"] == 2 and coverage["hunks_total"] == 3
+    assert coverage["files_omitted"] == ["docs/GUIDE.md"]
+    assert coverage["tokens_sent"] < coverage["tokens_total"]
+    assert "Reviewed 24/324 changed lines" in format_coverage(coverage)
+
+
+def test_oversized_top_hunk_is_cut_to_the_budget():
+    risky = _file_diff("app/db.py", 1, [
+        f'cursor.execute(f"SELECT * FROM t{i} WHERE id = {{user_id}}")' for i in range(200)
+    ])
+    for diff in (risky, "\n".join([risky, _file_diff("README.md", 1, ["Docs"])])):
+        selection = select_hunks(diff, token_budget=300)
+        coverage = selection["coverage"]
+
+        assert coverage["hunks_sent"] == 1
+        assert coverage["hunks_truncated"] == 1
+        assert coverage["tokens_sent"] <= 300 + 40  # plus the manifest line
+        assert "cursor.execute" in selection["diff"]
+        assert "more line(s) of this hunk exceed the token budget" in selection["diff"]
+        assert 0 < coverage["changed_lines_sent"] < 200
+        assert "cut short" in format_coverage(coverage)
+
+
+if __name__ == "__main__":
+    test_parse_hunks_tracks_files_and_churn()
+    test_plain_code_counts_every_line_as_added()
+    test_small_diff_is_passed_through()
+    test_risky_hunk_kept_and_docs_omitted()
+    test_oversized_top_hunk_is_cut_to_the_budget()
+    print("✅ Hunk selector tests passed!")
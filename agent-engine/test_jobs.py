@@ -0,0 +1,174 @@
+"""
+Test script for the persisted /jobs queue
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+# Add agent-engine to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from conftest import use_engine
+from job_queue import JobQueue
+from job_store import JobStore
+
+REQUEST = {"repo_id": "o/r", "pr_id": 7, "diff_text": "+x = 1\n", "title": None}
+
+
+def _store(tmp):
+    return JobStore(os.path.join(tmp, "jobs.db"))
+
+
+def test_store_is_idempotent_and_survives_restart():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = _store(tmp)
+        first, created = store.create_or_get("k1", REQUEST)
+        again, created_again = store.create_or_get("k1", REQUEST, priority=5)
+        assert created and not created_again
+        assert again["id"] == first["id"] and again["priority"] == 5
+
+        # A degraded result is not reused; a new job is queued instead
+        store.mark_running(first["id"])
+        store.mark_done(first["id"], {"status": "warning", "metadata": {"degraded": True}})
+        retry, created = store.create_or_get("k1", REQUEST)
+        assert created and retry["id"] != first["id"]
+
+        # A job left running by a crashed process is queued again
+        store.mark_running(retry["id"])
+        store.close()
+        reopened = _store(tmp)
+        assert [job["id"] for job in reopened.pending()] == [retry["id"]]
+        assert reopened.get(retry["id"])["attempts"] == 1
+        reopened.close()
+
+
+def test_queue_runs_by_priority_with_bounded_workers():
+    order, peak, active = [], [0], [0]
+
+    async def handler(request):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.01)
+        active[0] -= 1
+        order.append(request["pr_id"])
+        if request["pr_id"] == 3:
+            raise RuntimeError("boom")
+        return {"status": "success", "pr": request["pr_id"]}
+
+    async def scenario(store):
+        # Queued before the pool starts, as after a restart
+        for pr_id, priority in [(1, 0), (2, 0), (3, 0), (4, 9)]:
+            store.create_or_get(f"k{pr_id}", dict(REQUEST, pr_id=pr_id), priority)
+        queue = JobQueue(store, handler, workers=1)
+        await queue.start()
+        await queue._queue.join()
+        await queue.stop()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = _store(tmp)
+        asyncio.run(scenario(store))
+        stats = store.get_stats()["jobs"]
+        store.close()
+
+    assert order == [4, 1, 2, 3]
+    assert peak[0] == 1
+    assert stats == {"queued": 0, "running": 0, "done": 3, "failed": 1}
+
+
+def test_expired_results_are_not_reused_and_pruned_periodically():
+    async def handler(request):
+        return {"status": "success"}
+
+    async def scenario(store):
+        queue = JobQueue(store, handler, workers=1, prune_interval=0.01)
+        await queue.start()
+        await asyncio.sleep(0.05)
+        await queue.stop()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JobStore(os.path.join(tmp, "jobs.db"), retention_hours=0.1 / 3600)
+        old, _ = store.create_or_get("k1", REQUEST)
+        store.mark_running(old["id"])
+        store.mark_done(old["id"], {"status": "success"})
+        time.sleep(0.15)
+
+        fresh, created = store.create_or_get("k1", REQUEST)
+        assert created and fresh["id"] != old["id"]
+
+        store.retention_seconds = 0.02
+        asyncio.run(scenario(store))
+        # The pruner deleted the expired job while the queue was running
+        assert store.get(old["id"]) is None
+        store.close()
+
+
+def test_raised_priority_moves_a_waiting_job_up():
+    order = []
+
+    async def handler(request):
+        await asyncio.sleep(0.01)
+        order.append(request["pr_id"])
+        return {"status": "success"}
+
+    async def scenario(store):
+        queue = JobQueue(store, handler, workers=1)
+        await queue.start()
+        for pr_id in (1, 2, 3):
+            job, _ = store.create_or_get(f"k{pr_id}", dict(REQUEST, pr_id=pr_id))
+            queue.submit(job)
+        bumped, created = store.create_or_get("k3", dict(REQUEST, pr_id=3), priority=5)
+        assert not created
+        queue.submit(bumped)
+        await queue._queue.join()
+        await queue.stop()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = _store(tmp)
+        asyncio.run(scenario(store))
+        stats = store.get_stats()["jobs"]
+        store.close()
+
+    # Job 3 jumps the queue and runs once; its old entry is skipped
+    assert order == [3, 1, 2]
+    assert stats["done"] == 3
+
+
+def test_jobs_endpoint_returns_immediately_and_polls_result(engine, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    async def fake_analysis(request):
+        await asyncio.sleep(0.05)
+        return {"status": "success", "comment": f"PR {request.pr_id}", "confidence_score": 0.9}
+
+    monkeypatch.setattr(engine, "run_analysis", fake_analysis)
+    with TestClient(engine.app) as client:
+        body = dict(REQUEST, priority=1)
+        submitted = client.post("/jobs", json=body)
+        assert submitted.status_code == 202
+        job_id = submitted.json()["job_id"]
+        resubmitted = client.post("/jobs", json=body).json()
+        assert resubmitted["job_id"] == job_id and not resubmitted["created"]
+
+        for _ in range(100):
+            job = client.get(f"/jobs/{job_id}").json()
+            if job["status"] == "done":
+                break
+            time.sleep(0.02)
+        assert job["result"]["comment"] == "PR 7"
+        assert client.get("/jobs/missing").status_code == 404
+        assert client.get("/stats").json()["jobs"]["jobs"]["done"] == 1
+
+
+if __name__ == "__main__":
+    test_store_is_idempotent_and_survives_restart()
+    test_queue_runs_by_priority_with_bounded_workers()
+    test_expired_results_are_not_reused_and_pruned_periodically()
+    test_raised_priority_moves_a_waiting_job_up()
+    with pytest.MonkeyPatch.context() as mp, tempfile.TemporaryDirectory() as tmp:
+        test_jobs_endpoint_returns_immediately_and_polls_result(use_engine(mp, tmp), mp)
+    print("✅ Job queue tests passed!")
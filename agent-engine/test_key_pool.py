@@ -0,0 +1,144 @@
+"""
+Test script for the quota-aware API key pool
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add agent-engine to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import key_pool
+from key_pool import KeyPool, discover_keys
+from rate_limiter import RateLimiter
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def _pool(keys):
+    pool = KeyPool("groq", keys)
+    pool.rate_limiter = RateLimiter()
+    return pool
+
+
+def test_discover_keys_dedupes_and_classifies_by_prefix():
+    names = [name for env_names in key_pool.PROVIDER_KEY_ENV.values() for name in env_names]
+    saved = {name: os.environ.pop(name, None) for name in names}
+    try:
+        os.environ["GROQ_API_KEYS"] = "gsk_a, gsk_b"
+        os.environ["GROQ_API_KEY"] = "gsk_a"
+        os.environ["SECURITY_AUDITOR_API_KEY"] = "AIzaSecurity"
+        os.environ["GEMINI_API_KEY"] = "AIzaGemini"
+
+        assert discover_keys("groq") == ["gsk_a", "gsk_b"]
+        assert discover_keys("gemini") == ["AIzaGemini", "AIzaSecurity"]
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def test_quota_error_benches_key_and_fails_over():
+    pool = _pool(["key-a", "key-b"])
+    used = []
+
+    async def call(api_key):
+        used.append(api_key)
+        if api_key == "key-a":
+            raise FakeAPIError(429, {"retry-after": "5"})
+        return "ok"
+
+    # Make key-a the first choice
+    pool._state["key-b"]["last_used"] = 1.0
+    result = asyncio.run(pool.call(call, estimated_tokens=10))
+
+    assert result == "ok"
+    assert used == ["key-a", "key-b"]
+    stats = {k["key_id"]: k for k in pool.get_stats()["keys"]}
+    benched = stats[pool._state["key-a"]["key_id"]]
+    assert benched["bench_reason"] == "quota" and benched["benched_for_seconds"] >= 5
+    assert pool.choose() == "key-b"
+
+
+def test_auth_error_evicts_key_until_cooldown():
+    key_pool.AUTH_COOLDOWN_SECONDS = 0.05
+    pool = _pool(["bad", "good"])
+    pool._state["good"]["last_used"] = 1.0
+
+    async def call(api_key):
+        if api_key == "bad":
+            raise FakeAPIError(401)
+        return api_key
+
+    async def scenario():
+        first = await pool.call(call)
+        benched = pool.choose()
+        await asyncio.sleep(0.06)
+        return first, benched, pool._state["bad"]["cooldown_until"] <= key_pool.time.monotonic()
+
+    first, benched, recovered = asyncio.run(scenario())
+    assert first == "good" and benched == "good" and recovered
+
+
+def test_waits_when_all_keys_benched_and_raises_other_errors():
+    key_pool.QUOTA_COOLDOWN_SECONDS = 0.02
+    pool = _pool(["only"])
+    attempts = []
+
+    async def call(api_key):
+        attempts.append(api_key)
+        if len(attempts) == 1:
+            raise FakeAPIError(429)
+        return "recovered"
+
+    assert asyncio.run(pool.call(call)) == "recovered"
+    assert len(attempts) == 2
+
+    async def broken(api_key):
+        raise ValueError("bad request")
+
+    try:
+        asyncio.run(pool.call(broken))
+        assert False, "non-quota errors should propagate"
+    except ValueError:
+        pass
+    assert pool.choose() == "only"
+
+
+def test_quota_bench_follows_retry_after_and_pool_size(monkeypatch):
+    monkeypatch.setattr(key_pool, "QUOTA_COOLDOWN_SECONDS", 60.0)
+    monkeypatch.setattr(key_pool, "QUOTA_MIN_COOLDOWN_SECONDS", 1.0)
+    monkeypatch.setattr(key_pool, "MAX_WAIT_SECONDS", 30.0)
+
+    def benched_for(keys, retry_after):
+        pool = _pool(keys)
+        pool.record_failure(keys[0], 429, retry_after)
+        return pool._state[keys[0]]["cooldown_until"] - key_pool.time.monotonic()
+
+    # The provider's short wait is honoured, with a floor
+    assert 1.5 < benched_for(["only"], 2.0) <= 2.0
+    assert 0.5 < benched_for(["only"], 0.1) <= 1.0
+    # Without retry-after a lone key is benched no longer than callers would wait
+    assert 29 < benched_for(["only"], None) <= 30
+    # Larger pools can afford the full cooldown
+    assert 59 < benched_for(["a", "b", "c"], None) <= 60
+
+
+if __name__ == "__main__":
+    test_discover_keys_dedupes_and_classifies_by_prefix()
+    test_quota_error_benches_key_and_fails_over()
+    test_auth_error_evicts_key_until_cooldown()
+    test_waits_when_all_keys_benched_and_raises_other_errors()
+    with pytest.MonkeyPatch.context() as mp:
+        test_quota_bench_follows_retry_after_and_pool_size(mp)
+    print("✅ Key pool tests passed!")
@@ -0,0 +1,120 @@
+"""
+Test script for streamed analysis progress (SSE)
+"""
+import asyncio
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Add agent-engine to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from conftest import use_engine
+from progress import JsonFieldStream, emit, format_sse, progress_sink
+
+DIFF = """diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -1,2 +1,3 @@
+ import os
++password = "hunter2hunter2"
+"""
+
+
+def test_json_field_streams_across_chunk_boundaries():
+    raw = json.dumps({"status": "success", "comment": 'Line "one"\n✅ done \U0001F680', "confidence_score": 0.9})
+    raw = raw.replace("✅", "\\u2705")
+    stream = JsonFieldStream("comment")
+
+    decoded = "".join(stream.feed(raw[i:i + 3]) for i in range(0, len(raw), 3))
+
+    assert decoded == 'Line "one"\n✅ done \U0001F680'
+    assert stream.done
+
+
+def test_events_stay_in_their_own_context():
+    received = {"a": [], "b": []}
+
+    async def agent(name):
+        await asyncio.sleep(0)
+        emit(f"security-{name}")
+
+    async def analysis(name):
+        with progress_sink(lambda event, data: received[name].append(event)):
+            # Tasks started inside the sink report to it
+            await asyncio.gather(agent(name))
+            emit(f"verdict-{name}")
+
+    async def scenario():
+        await asyncio.gather(analysis("a"), analysis("b"))
+
+    asyncio.run(scenario())
+    emit("ignored")  # no sink: no-op
+
+    assert received == {"a": ["security-a", "verdict-a"], "b": ["security-b", "verdict-b"]}
+    assert format_sse("static", {"n": 1}, 3) == 'id: 3\nevent: static\ndata: {"n":1}\n\n'
+
+
+def test_stream_endpoint_emits_typed_events_in_order(engine, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    async def fake_analysis(request):
+        emit("security", {"backend": "test", "report": {"is_secure": False}})
+        await asyncio.sleep(0.01)
+        emit("runtime", {"backend": "test", "report": {"final_verdict": "PASS"}})
+        emit("comment_delta", {"text": "## Review"})
+        return {"status": "warning", "comment": "## Review", "confidence_score": 0.5}
+
+    monkeypatch.setattr(engine, "run_analysis", fake_analysis)
+    client = TestClient(engine.app)
+    body = {"repo_id": "o/r", "pr_id": 1, "diff_text": DIFF}
+    with client.stream("POST", "/analyze/stream", json=body) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        text = "".join(response.iter_text())
+
+    events = [line.split(": ", 1)[1] for line in text.splitlines() if line.startswith("event: ")]
+    assert events == ["static", "security", "runtime", "comment_delta", "verdict"]
+    static = json.loads(text.split("data: ", 1)[1].split("\n", 1)[0])
+    assert any(f["rule"] == "Password" for f in static["security"])
+
+
+def test_stream_shares_analysis_with_analyze_and_reports_cache_status(engine, monkeypatch):
+    import httpx
+
+    runs = []
+
+    async def fake_analysis(request):
+        runs.append(request.pr_id)
+        await asyncio.sleep(0.05)
+        return {"status": "success", "comment": "ok", "confidence_score": 1.0}
+
+    monkeypatch.setattr(engine, "run_analysis", fake_analysis)
+    body = {"repo_id": "o/r", "pr_id": 7, "diff_text": DIFF}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=engine.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            stream, plain = await asyncio.gather(
+                client.post("/analyze/stream", json=body), client.post("/analyze", json=body)
+            )
+        return stream.text, plain.json()
+
+    text, plain = asyncio.run(scenario())
+
+    assert runs == [7]
+    verdict = json.loads(text.split("event: verdict\ndata: ", 1)[1].split("\n", 1)[0])
+    assert verdict["metadata"]["cache_status"] == "recomputed"
+    assert plain["metadata"]["cache_status"] == "recomputed"
+
+
+if __name__ == "__main__":
+    test_json_field_streams_across_chunk_boundaries()
+    test_events_stay_in_their_own_context()
+    with pytest.MonkeyPatch.context() as mp, tempfile.TemporaryDirectory() as tmp:
+        test_stream_endpoint_emits_typed_events_in_order(use_engine(mp, tmp), mp)
+    with pytest.MonkeyPatch.context() as mp, tempfile.TemporaryDirectory() as tmp:
+        test_stream_shares_analysis_with_analyze_and_reports_cache_status(use_engine(mp, tmp), mp)
+    print("✅ Progress streaming tests passed!")
@@ -0,0 +1,161 @@
+"""
+Test script for multi-PR prompt packing
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add agent-engine to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from prompt_batcher import PromptBatcher
+
+
+def _fakes(drop=()):
+    calls = {"single": [], "pack": []}
+
+    async def single(text):
+        calls["single"].append(text)
+        return {"text": text, "via": "single"}
+
+    async def pack(texts):
+        calls["pack"].append(list(texts))
+        return [None if text in drop else {"text": text, "via": "pack"} for text in texts]
+
+    return calls, single, pack
+
+
+def test_small_requests_share_one_packed_call():
+    calls, single, pack = _fakes(drop={"b"})
+    batcher = PromptBatcher("test", single, pack, window_ms=20, small_tokens=100, enabled=True)
+
+    async def scenario():
+        return await asyncio.gather(
+            batcher.submit("a"), batcher.submit("b"), batcher.submit("c"), batcher.submit("x" * 1000)
+        )
+
+    results = asyncio.run(scenario())
+
+    assert calls["pack"] == [["a", "b", "c"]]
+    # "b" was missing from the packed response and the large one is never held
+    assert sorted(calls["single"]) == ["b", "x" * 1000]
+    assert [r["via"] for r in results] == ["pack", "single", "pack", "single"]
+    assert [r["text"] for r in results[:3]] == ["a", "b", "c"]
+    assert batcher.get_stats()["retried"] == 1
+
+
+def test_batches_flush_on_item_and_token_limits():
+    calls, single, pack = _fakes()
+    batcher = PromptBatcher(
+        "test", single, pack, window_ms=1000, max_items=2, max_batch_tokens=10, small_tokens=10,
+        measure=len, enabled=True
+    )
+
+    async def scenario():
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(text) for text in ["aaaa", "bbbb", "cccccccc", "dd"])),
+            timeout=0.5,
+        )
+
+    asyncio.run(scenario())
+
+    # Item limit flushes [a, b]; the token budget splits c from d without waiting for the window
+    assert calls["pack"] == [["aaaa", "bbbb"], ["cccccccc", "dd"]]
+
+
+def test_failed_packed_call_falls_back_to_single_calls():
+    calls, single, _ = _fakes()
+
+    async def broken_pack(texts):
+        raise ValueError("invalid JSON")
+
+    batcher = PromptBatcher("test", single, broken_pack, window_ms=10, small_tokens=100, enabled=True)
+
+    async def scenario():
+        return await asyncio.gather(batcher.submit("a"), batcher.submit("b"))
+
+    results = asyncio.run(scenario())
+    assert [r["via"] for r in results] == ["single", "single"]
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+def test_provider_failure_fails_the_batch_without_single_retries():
+    calls, single, _ = _fakes()
+
+    async def throttled_pack(texts):
+        raise RateLimited("rate limit exceeded")
+
+    batcher = PromptBatcher(
+        "test", single, throttled_pack, window_ms=10, small_tokens=100, enabled=True,
+        on_failure=lambda e: {"error": str(e)}
+    )
+
+    async def scenario():
+        return await asyncio.gather(batcher.submit("a"), batcher.submit("b"))
+
+    results = asyncio.run(scenario())
+    assert results == [{"error": "rate limit exceeded"}] * 2
+    assert calls["single"] == []
+    assert batcher.get_stats()["failed"] == 2
+
+
+def test_throttled_packed_prs_get_static_degraded_reports(monkeypatch):
+    import groq_agents
+
+    async def throttled(system, prompt, temperature, max_tokens):
+        raise RateLimited("rate limited")
+
+    monkeypatch.setattr(groq_agents, "_chat_json", throttled)
+    for batcher in (groq_agents.security_batcher, groq_agents.runtime_batcher):
+        monkeypatch.setattr(batcher, "window", 0.02)
+        monkeypatch.setattr(batcher, "enabled", True)
+
+    diffs = [
+        "+++ b/app.py\n@@ -0,0 +1 @@\n+password = \"hunter2hunter2\"",
+        "+++ b/db.py\n@@ -0,0 +1 @@\n+cursor.execute(f\"SELECT * FROM t WHERE id = {uid}\")",
+    ]
+
+    async def scenario():
+        return await asyncio.gather(*(
+            groq_agents.analyze_pr_groq("org/repo", n, diff) for n, diff in enumerate(diffs, 1)
+        ))
+
+    results = asyncio.run(scenario())
+
+    assert groq_agents.security_batcher.get_stats()["failed"] >= 2
+    for result in results:
+        assert result["status"] != "error"
+        assert result["security_snapshot"]["degraded"] is True
+        assert result["runtime_snapshot"]["degraded"] is True
+        assert set(result["metadata"]["degraded"]) == {"security", "runtime", "ghostwriter"}
+
+
+def test_packed_response_is_split_by_pr_number():
+    from groq_agents import packed_prompt, split_packed_results
+
+    prompt = packed_prompt("Audit.", '{"is_secure": boolean}', ["+a = 1", "+b = 2"])
+    assert "<<<PR 2>>>\n+b = 2\n<<<END PR 2>>>" in prompt
+
+    response = {"results": [
+        {"pr": 2, "report": {"is_secure": True}},
+        {"pr": "1", "report": {"is_secure": False}},
+        {"pr": 9, "report": {"is_secure": True}},
+        {"pr": 2, "report": {"is_secure": False}},
+    ]}
+    assert split_packed_results(response, 3) == [{"is_secure": False}, {"is_secure": True}, None]
+
+
+if __name__ == "__main__":
+    test_small_requests_share_one_packed_call()
+    test_batches_flush_on_item_and_token_limits()
+    test_failed_packed_call_falls_back_to_single_calls()
+    test_provider_failure_fails_the_batch_without_single_retries()
+    with pytest.MonkeyPatch.context() as mp:
+        test_throttled_packed_prs_get_static_degraded_reports(mp)
+    test_packed_response_is_split_by_pr_number()
+    print("✅ Prompt batcher tests passed!")
@@ -0,0 +1,91 @@
+"""
+Test script for latency-based routing and hedged requests
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add agent-engine to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import provider_router
+from provider_router import ProviderRouter, percentile
+
+
+def _backend(delay, result, calls):
+    async def call():
+        calls.append(result)
+        await asyncio.sleep(delay)
+        return result
+    return call
+
+
+def test_routes_to_fastest_backend():
+    router = ProviderRouter()
+    for _ in range(provider_router.MIN_SAMPLES):
+        router.histogram("security", "slow").record(2.0, True)
+        router.histogram("security", "fast").record(0.2, True)
+
+    assert router.rank("security", ["slow", "fast"]) == ["fast", "slow"]
+    assert percentile([1, 2, 3, 4, 100], 95) == 100
+
+
+def test_unhealthy_backend_is_last_resort():
+    router = ProviderRouter()
+    for _ in range(provider_router.MIN_SAMPLES):
+        router.histogram("runtime", "flaky").record(0.1, False)
+        router.histogram("runtime", "steady").record(3.0, True)
+
+    assert router.rank("runtime", ["flaky", "steady"]) == ["steady", "flaky"]
+
+
+def test_hedges_past_p95_and_cancels_loser(monkeypatch):
+    router = ProviderRouter()
+    for _ in range(provider_router.MIN_SAMPLES):
+        router.histogram("ghostwriter", "primary").record(0.01, True)
+    monkeypatch.setattr(provider_router, "HEDGE_MIN_DELAY", 0.01)
+    cancelled = []
+    calls = []
+
+    async def stuck():
+        calls.append("primary")
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append("primary")
+            raise
+
+    backend, result = asyncio.run(router.run("ghostwriter", {
+        "primary": stuck,
+        "secondary": _backend(0.01, {"comment": "ok"}, calls),
+    }))
+
+    assert backend == "secondary" and result == {"comment": "ok"}
+    assert calls == ["primary", {"comment": "ok"}]
+    assert cancelled == ["primary"]
+    assert router.counters["hedges"] == 1 and router.counters["hedge_wins"] == 1
+
+
+def test_error_result_fails_over_immediately():
+    router = ProviderRouter()
+    calls = []
+
+    backend, result = asyncio.run(router.run("security", {
+        "a": _backend(0, {"error": "boom"}, calls),
+        "b": _backend(0, {"is_secure": True}, calls),
+    }))
+
+    assert backend == "b" and result == {"is_secure": True}
+    assert router.counters["failovers"] == 1 and router.counters["hedges"] == 0
+    assert router.histogram("security", "a").error_rate() == 1.0
+
+
+if __name__ == "__main__":
+    test_routes_to_fastest_backend()
+    test_unhealthy_backend_is_last_resort()
+    with pytest.MonkeyPatch.context() as mp:
+        test_hedges_past_p95_and_cancels_loser(mp)
+    test_error_result_fails_over_immediately()
+    print("✅ Provider router tests passed!")
@@ -0,0 +1,111 @@
+"""
+Test script for the provider-aware rate limiter
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add agent-engine to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import rate_limiter
+from rate_limiter import RateLimiter, parse_duration
+
+
+class FakeThrottle(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+def test_parse_duration_formats():
+    assert parse_duration("7.66s") == 7.66
+    assert abs(parse_duration("2m59.56s") - 179.56) < 1e-9
+    assert parse_duration("120ms") == 0.12
+    assert parse_duration("30") == 30.0
+    assert parse_duration(None) is None
+
+
+def test_throttled_call_retries_and_halves_concurrency():
+    rate_limiter.BACKOFF_BASE_SECONDS = 0.001
+    limiter = RateLimiter()
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise FakeThrottle(429)
+        return FakeResponse({"x-ratelimit-remaining-tokens": "500"})
+
+    result = asyncio.run(limiter.call("groq", "k1", call, estimated_tokens=10))
+
+    state = limiter.limiter("groq", "k1")
+    assert isinstance(result, FakeResponse)
+    assert len(attempts) == 3
+    assert state.counters["throttled"] == 2 and state.counters["retries"] == 2
+    assert state.concurrency_limit < state.max_concurrency
+    assert state.tokens.tokens <= 500
+    assert state.in_flight == 0
+
+
+def test_non_retryable_errors_are_raised_immediately():
+    limiter = RateLimiter()
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        raise FakeThrottle(401)
+
+    try:
+        asyncio.run(limiter.call("groq", "k1", call))
+        raised = False
+    except FakeThrottle:
+        raised = True
+
+    assert raised and len(attempts) == 1
+    assert limiter.limiter("groq", "k1").in_flight == 0
+
+
+def test_concurrency_is_capped_and_queue_is_fifo():
+    limiter = RateLimiter()
+    state = limiter.limiter("gemini", "k2")
+    state.concurrency_limit = 2.0
+    state.max_concurrency = 2
+    running = []
+    peak = []
+    order = []
+
+    def make_call(i):
+        async def call():
+            order.append(i)
+            running.append(i)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(i)
+            return FakeResponse({})
+        return call
+
+    async def main():
+        await asyncio.gather(*(
+            limiter.call("gemini", "k2", make_call(i), estimated_tokens=1) for i in range(6)
+        ))
+
+    asyncio.run(main())
+
+    assert max(peak) == 2
+    assert order == list(range(6))
+    assert limiter.get_stats()["gemini:k2"]["success"] == 6
+
+
+if __name__ == "__main__":
+    test_parse_duration_formats()
+    test_throttled_call_retries_and_halves_concurrency()
+    test_non_retryable_errors_are_raised_immediately()
+    test_concurrency_is_capped_and_queue_is_fifo()
+    print("✅ Rate limiter tests passed!")
@@ -0,0 +1,141 @@
+"""
+Test script for single-flight request coalescing
+"""
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Add agent-engine to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from conftest import use_engine
+from single_flight import SingleFlight, content_key
+
+
+def test_concurrent_identical_requests_share_one_computation():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def analyze():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"status": "success"}
+
+    async def main():
+        key = content_key("owner/repo", 1, "diff")
+        return await asyncio.gather(*(flight.run(key, analyze) for _ in range(5)))
+
+    results = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert all(r == {"status": "success"} for r in results)
+    stats = flight.get_stats()
+    assert stats["executions"] == 1 and stats["coalesced"] == 4
+    assert stats["in_flight"] == 0
+
+
+def test_errors_reach_every_waiter_and_next_call_recomputes():
+    flight = SingleFlight("test")
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("provider down")
+
+    async def main():
+        first = await asyncio.gather(
+            flight.run("k", failing), flight.run("k", failing), return_exceptions=True
+        )
+        second = await asyncio.gather(flight.run("k", failing), return_exceptions=True)
+        return first + second
+
+    results = asyncio.run(main())
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert len(attempts) == 2
+
+
+def test_cancelled_caller_does_not_cancel_shared_work():
+    flight = SingleFlight("test")
+
+    async def analyze():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        leader = asyncio.ensure_future(flight.run("k", analyze))
+        follower = asyncio.ensure_future(flight.run("k", analyze))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == "done"
+
+
+def test_abandoned_work_is_cancelled_only_when_nobody_else_waits():
+    flight = SingleFlight("test")
+    outcomes = []
+
+    async def analyze():
+        try:
+            await asyncio.sleep(0.05)
+            outcomes.append("finished")
+            return "done"
+        except asyncio.CancelledError:
+            outcomes.append("cancelled")
+            raise
+
+    async def main():
+        # A stream joined by another caller: its departure leaves the work running
+        stream = asyncio.ensure_future(flight.run("a", analyze, cancel_when_abandoned=True))
+        other = asyncio.ensure_future(flight.run("a", analyze))
+        await asyncio.sleep(0.01)
+        stream.cancel()
+        shared = await other
+
+        # A lone stream: its departure stops the work
+        lone = asyncio.ensure_future(flight.run("b", analyze, cancel_when_abandoned=True))
+        await asyncio.sleep(0.01)
+        lone.cancel()
+        await asyncio.sleep(0.01)
+        return shared
+
+    assert asyncio.run(main()) == "done"
+    assert outcomes == ["finished", "cancelled"]
+    assert flight.get_stats()["in_flight"] == 0
+
+
+def test_analyze_endpoint_always_reports_cache_status(engine, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    results = {
+        1: {"status": "success", "comment": "ok"},  # simple Gemini path: no metadata
+        2: {"error": "Gemini unavailable", "metadata": None},
+        3: {"status": "success", "metadata": {"cache_status": "stale"}},
+    }
+
+    async def fake_analysis(request):
+        return dict(results[request.pr_id])
+
+    monkeypatch.setattr(engine, "run_analysis", fake_analysis)
+    client = TestClient(engine.app)
+    statuses = [
+        client.post("/analyze", json={"repo_id": "o/r", "pr_id": pr_id, "diff_text": "+x\n"})
+        .json()["metadata"]["cache_status"]
+        for pr_id in results
+    ]
+    assert statuses == ["recomputed", "recomputed", "stale"]
+
+
+if __name__ == "__main__":
+    test_concurrent_identical_requests_share_one_computation()
+    test_errors_reach_every_waiter_and_next_call_recomputes()
+    test_cancelled_caller_does_not_cancel_shared_work()
+    test_abandoned_work_is_cancelled_only_when_nobody_else_waits()
+    with pytest.MonkeyPatch.context() as mp, tempfile.TemporaryDirectory() as tmp:
+        test_analyze_endpoint_always_reports_cache_status(use_engine(mp, tmp), mp)
+    print("✅ Single-flight tests passed!")
@@ -8,6 +8,10 @@ const nodemailer = require('nodemailer');
 const app = express();
 const PORT = process.env.NODE_PORT || 3001;
 const PYTHON_AGENT_URL = process.env.PYTHON_AGENT_URL || 'http://localhost:8000/analyze';
+// Job API on the same engine: submit returns at once, then poll for the result
+const PYTHON_JOBS_URL = process.env.PYTHON_JOBS_URL || PYTHON_AGENT_URL.replace(/\/analyze\/?$/, '/jobs');
+const JOB_POLL_INTERVAL_MS = parseInt(process.env.JOB_POLL_INTERVAL_MS || '2000', 10);
+const JOB_TIMEOUT_MS = parseInt(process.env.JOB_TIMEOUT_MS || '900000', 10);
 
 // In-memory store for audits (Mock Database)
 const AUDITS = {};
@@ -159,6 +163,31 @@ app.post('/api/analyze-pr', async (req, res) => {
 });
 
 // Shared Analysis Logic
+// Submit an analysis job and poll until it finishes. Each request is short, so
+// proxy timeouts never cut a long analysis off, and resubmits reuse the same job.
+async function analyzeViaJobs(payload) {
+  let submitted;
+  try {
+    submitted = await axios.post(PYTHON_JOBS_URL, payload);
+  } catch (error) {
+    if (error.response && error.response.status === 404) {
+      // Older engine without /jobs
+      return (await axios.post(PYTHON_AGENT_URL, payload)).data;
+    }
+    throw error;
+  }
+
+  const jobId = submitted.data.job_id;
+  const deadline = Date.now() + JOB_TIMEOUT_MS;
+  while (Date.now() < deadline) {
+    const { data: job } = await axios.get(`${PYTHON_JOBS_URL}/${jobId}`);
+    if (job.status === 'done') return job.result;
+    if (job.status === 'failed') throw new Error(`Analysis job ${jobId} failed: ${job.error}`);
+    await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+  }
+  throw new Error(`Analysis job ${jobId} timed out`);
+}
+
 async function runAnalysis(owner, repo, pull_number, providedDiff, email, requestOctokit, pull_request) {
   // Step 2: Fetch or Mock Diff
   let diffText = "";
@@ -194,11 +223,9 @@ async function runAnalysis(owner, repo, pull_number, providedDiff, email, reques
   let emailLog = "Skipped (Conditions not met)";
 
   try {
-    const agentResponse = await axios.post(PYTHON_AGENT_URL, analysisPayload);
+    const result = await analyzeViaJobs(analysisPayload);
     console.log('Successfully forwarded to Python Agent Engine');
 
-    const result = agentResponse.data;
-
     // Store result in memory
     const auditKey = `${owner}/${repo}/${pull_number}`;
     AUDITS[auditKey] = {